@@ -0,0 +1,18 @@
+"""
+Ponto de entrada ASGI: rotas de streaming em corrotinas, demais rotas no Flask
+
+Uso:
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+Com ``--workers`` maior que 1, defina METRICS_DIR e PROFILING_DIR para que
+``/metrics`` e ``/admin/profiles`` enxerguem todos os processos.
+"""
+
+from config import Config
+from src.api.asgi import criar_app_asgi
+from src.utils.servidor import ativar_wal
+
+if Config.DATABASE_WAL:
+    ativar_wal()
+
+app = criar_app_asgi()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark da verificação de permissões
+Compara as máscaras de bits compiladas com o caminho anterior
+(AuthorizationContext novo a cada chamada + busca linear em lista)
+"""
+
+import os
+import sys
+import timeit
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.authorization_strategy import (
+    VisualizacaoStrategy,
+    GerencialStrategy,
+    AdministrativoStrategy,
+    bit_permissao
+)
+from src.utils.permissions import verificar_permissao, verificar_bits, obter_permissoes_usuario
+
+REPETICOES = 500000
+CASOS = [
+    ('visualizacao', 'tarefas:list'),
+    ('gerencial', 'usuarios:create'),
+    ('administrativo', 'system:admin'),
+]
+
+
+def verificar_permissao_legado(nivel_usuario, permissao_necessaria):
+    """Reprodução do caminho anterior: instancia as três estratégias e faz busca em lista"""
+    strategies = {
+        'visualizacao': VisualizacaoStrategy(),
+        'gerencial': GerencialStrategy(),
+        'administrativo': AdministrativoStrategy()
+    }
+    strategy = strategies.get(nivel_usuario)
+    if not strategy:
+        return False
+    return permissao_necessaria in strategy.ALLOWED_ACTIONS
+
+
+def medir(nome, funcao):
+    """Mede o tempo médio por chamada (melhor de 5 rodadas)"""
+    melhor = min(timeit.repeat(funcao, number=REPETICOES, repeat=5))
+    print(f"  {nome:<36} {melhor / REPETICOES * 1e9:8.1f} ns/op")
+
+
+def main():
+    for nivel, permissao in CASOS:
+        bits = bit_permissao(permissao)
+        print(f"{nivel} / {permissao}")
+        medir("legado (contexto + lista)", lambda: verificar_permissao_legado(nivel, permissao))
+        medir("verificar_permissao (máscara)", lambda: verificar_permissao(nivel, permissao))
+        medir("verificar_bits (bit pré-calculado)", lambda: verificar_bits(nivel, bits))
+
+    print("obter_permissoes_usuario")
+    medir("legado (cópia da lista)", lambda: AdministrativoStrategy().get_allowed_actions())
+    medir("lista a partir da tupla pré-calculada", lambda: obter_permissoes_usuario('administrativo'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de partida da aplicação
+Cada medição roda num processo Python novo (como um worker do gunicorn ou
+uma sessão de testes) e separa o tempo de importação de ``src.api.app``
+do tempo de ``create_app()`` com banco novo (esquema criado) e com banco
+existente (esquema já na versão atual).
+
+Também lista as dependências pesadas carregadas na partida, que devem
+ser importadas apenas quando usadas.
+
+Uso:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeticoes 20 --json partida.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependências que só algumas rotas usam (2FA, QR Code, tokens)
+MODULOS_PESADOS = ('pyotp', 'jwt', 'cryptography', 'qrcode', 'PIL')
+
+# Executado em cada processo filho: imprime as medidas em JSON
+SCRIPT_MEDICAO = '''
+import json, sys, time
+inicio = time.perf_counter()
+from src.api.app import create_app
+importado = time.perf_counter()
+create_app()
+criado = time.perf_counter()
+print(json.dumps({
+    'importacao_ms': (importado - inicio) * 1000,
+    'create_app_ms': (criado - importado) * 1000,
+    'pesados': sorted(m for m in %r if m in sys.modules)
+}))
+'''
+
+
+def medir_partida(db_path):
+    """Mede uma partida num interpretador novo"""
+    ambiente = dict(os.environ, DATABASE_PATH=db_path, PYTHONDONTWRITEBYTECODE='1')
+    saida = subprocess.run(
+        [sys.executable, '-c', SCRIPT_MEDICAO % (MODULOS_PESADOS,)],
+        cwd=RAIZ, env=ambiente, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def resumir(medidas, chave):
+    valores = [medida[chave] for medida in medidas]
+    return {'mediana_ms': round(statistics.median(valores), 2), 'minimo_ms': round(min(valores), 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de partida da aplicação')
+    parser.add_argument('--repeticoes', type=int, default=10, help='Partidas medidas em cada cenário')
+    parser.add_argument('--json', help='Gravar os resultados em JSON neste arquivo')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='partida-') as diretorio:
+        # Aquecimento: bytecode compilado e arquivos no cache do sistema
+        medir_partida(os.path.join(diretorio, 'aquecimento.db'))
+
+        novos = [medir_partida(os.path.join(diretorio, f'novo-{numero}.db')) for numero in range(args.repeticoes)]
+        existente = os.path.join(diretorio, 'existente.db')
+        medir_partida(existente)
+        existentes = [medir_partida(existente) for _ in range(args.repeticoes)]
+
+    resultados = {
+        'importacao': resumir(novos + existentes, 'importacao_ms'),
+        'create_app_banco_novo': resumir(novos, 'create_app_ms'),
+        'create_app_banco_existente': resumir(existentes, 'create_app_ms'),
+        'modulos_pesados_carregados': existentes[-1]['pesados']
+    }
+
+    print(f"📊 Partida da aplicação ({args.repeticoes} processos por cenário)")
+    print("=" * 60)
+    for nome in ('importacao', 'create_app_banco_novo', 'create_app_banco_existente'):
+        medida = resultados[nome]
+        print(f"{nome:<28} {medida['mediana_ms']:>8.1f} ms  (mín {medida['minimo_ms']:.1f})")
+    pesados = resultados['modulos_pesados_carregados']
+    print(f"\n{'⚠️ ' if pesados else '✅'} Dependências pesadas carregadas na partida: {', '.join(pesados) or 'nenhuma'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark de construção e serialização do registro Usuario
+Compara a tupla nomeada atual com uma classe comum equivalente (com __dict__)
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.usuario import Usuario
+
+LINHA = (42, 'Fulano de Tal', 'fulano@dpm.com', 'JBSWY3DPEHPK3PXP', 'gerencial', 1, '2024-01-01T10:00:00')
+REPETICOES = 200000
+
+
+class UsuarioComDict:
+    """Classe comum equivalente ao modelo anterior (referência)"""
+
+    def __init__(self, id=None, nome=None, email=None, senha_hash=None, secret_2fa=None, nivel_acesso='visualizacao', ativo=True, data_criacao=None):
+        self.id = id
+        self.nome = nome
+        self.email = email
+        self.senha_hash = senha_hash
+        self.secret_2fa = secret_2fa
+        self.nivel_acesso = nivel_acesso
+        self.ativo = ativo
+        self.data_criacao = data_criacao
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'nome': self.nome,
+            'email': self.email,
+            'nivel_acesso': self.nivel_acesso,
+            '2fa_ativo': bool(self.secret_2fa),
+            'data_criacao': self.data_criacao
+        }
+
+
+def construir_com_dict(linha):
+    return UsuarioComDict(
+        id=linha[0], nome=linha[1], email=linha[2], secret_2fa=linha[3],
+        nivel_acesso=linha[4], ativo=linha[5], data_criacao=linha[6]
+    )
+
+
+def medir(nome, funcao):
+    """Mede o tempo médio por chamada (melhor de 5 rodadas)"""
+    melhor = min(timeit.repeat(funcao, number=REPETICOES, repeat=5))
+    print(f"{nome:<40} {melhor / REPETICOES * 1e9:8.1f} ns/op")
+
+
+def medir_memoria(nome, construtor, quantidade=100000):
+    """Mede a memória alocada por instância"""
+    tracemalloc.start()
+    instancias = [construtor(LINHA) for _ in range(quantidade)]
+    tamanho, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instancias
+    print(f"{nome:<40} {tamanho / quantidade:8.1f} bytes/instância")
+
+
+def main():
+    usuario = Usuario(*LINHA)
+    usuario_dict = construir_com_dict(LINHA)
+
+    print("Construção a partir da linha do banco")
+    medir("Usuario(*linha)", lambda: Usuario(*LINHA))
+    medir("classe com __dict__ (referência)", lambda: construir_com_dict(LINHA))
+
+    print("\nSerialização to_dict()")
+    medir("Usuario.to_dict()", usuario.to_dict)
+    medir("classe com __dict__ (referência)", usuario_dict.to_dict)
+
+    print("\nMemória")
+    medir_memoria("Usuario(*linha)", lambda linha: Usuario(*linha))
+    medir_memoria("classe com __dict__ (referência)", construir_com_dict)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Teste de carga da API com cenários ponderados
+
+Sobe a aplicação de ``create_app()`` num servidor HTTP local com banco
+temporário, cria usuários e tarefas e dispara requisições de vários
+clientes simultâneos. O resultado (RPS e latências p50/p95/p99 por
+endpoint) sai em JSON para comparar commits.
+
+Uso:
+    python benchmarks/carga.py
+    python benchmarks/carga.py --clientes 32 --duracao 30 --tarefas 5000 --saida carga.json
+    python benchmarks/carga.py --cenarios listar_tarefas=80,criar_tarefa=20
+    python benchmarks/carga.py --saida depois.json --comparar antes.json
+    python benchmarks/carga.py --banco escala.db     # banco criado por generate_data.py
+
+O limite de tentativas de login é desligado durante o teste (todos os
+clientes saem do mesmo IP); use ``--com-limite`` para mantê-lo.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SENHA_PADRAO = 'senha123'
+
+# Peso de cada cenário no sorteio das requisições
+PESOS_PADRAO = {
+    'login': 2,
+    'me': 5,
+    'listar_tarefas': 30,
+    'obter_tarefa': 20,
+    'criar_tarefa': 10,
+    'atualizar_tarefa': 10,
+    'remover_tarefa': 5,
+    'listar_usuarios': 8,
+    'sugerir_usuarios': 8,
+    'atualizar_usuario': 2,
+}
+
+PERCENTIS = (50, 95, 99)
+
+
+def percentil(ordenados, p):
+    """Percentil pelo método do posto mais próximo (lista já ordenada)"""
+    if not ordenados:
+        return None
+    posicao = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[posicao]
+
+
+def popular_banco(usuarios, tarefas, semente):
+    """
+    Cria usuários (um administrador, gerentes e leitores) e tarefas
+
+    Uma única senha é transformada em hash e reaproveitada, para o
+    preparo não dominar o tempo do teste.
+
+    Returns:
+        dict: Emails por papel e IDs das tarefas criadas
+    """
+    from werkzeug.security import generate_password_hash
+    from src.models.usuario import get_db_connection
+    from src.models.tarefa_alteracoes import registrar_tarefas_existentes
+    from src.models.usuario_lote import versionar_usuarios
+
+    aleatorio = random.Random(semente)
+    senha_hash = generate_password_hash(SENHA_PADRAO)
+    agora = datetime.now()
+
+    papeis = {'administrativo': [], 'gerencial': [], 'visualizacao': []}
+    linhas = []
+    for numero in range(max(usuarios, 3)):
+        nivel = 'administrativo' if numero == 0 else ('gerencial' if numero % 5 == 1 else 'visualizacao')
+        email = f'carga{numero}@teste.com'
+        papeis[nivel].append(email)
+        criado = (agora - timedelta(minutes=numero)).isoformat()
+        linhas.append((f'Usuário Carga {numero}', email, senha_hash, nivel, criado))
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany(
+            'INSERT INTO usuarios (nome, email, senha_hash, nivel_acesso, data_criacao) VALUES (?, ?, ?, ?, ?)',
+            linhas
+        )
+        versionar_usuarios(cursor)
+        cursor.executemany(
+            'INSERT INTO tarefas (titulo, descricao, status, data_criacao, data_atualizacao) VALUES (?, ?, ?, ?, ?)',
+            (
+                (f'Tarefa {numero}', 'x' * aleatorio.randint(0, 200),
+                 aleatorio.choice(('pendente', 'concluida')),
+                 (agora - timedelta(seconds=numero)).isoformat(), agora.isoformat())
+                for numero in range(tarefas)
+            )
+        )
+        registrar_tarefas_existentes(cursor)
+        conn.commit()
+        cursor.execute('SELECT id FROM tarefas')
+        ids_tarefas = [tarefa_id for (tarefa_id,) in cursor.fetchall()]
+        cursor.execute("SELECT id FROM usuarios WHERE nivel_acesso = 'visualizacao'")
+        ids_leitores = [usuario_id for (usuario_id,) in cursor.fetchall()]
+    finally:
+        conn.close()
+
+    return {'papeis': papeis, 'tarefas': ids_tarefas, 'leitores': ids_leitores}
+
+
+def carregar_dados(limite=10000):
+    """
+    Lê de um banco já populado (ex.: ``generate_data.py``) os usuários ativos
+    por papel e uma amostra das tarefas usadas pelos cenários
+    """
+    from src.models.usuario import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        papeis = {}
+        for papel in ('administrativo', 'gerencial', 'visualizacao'):
+            papeis[papel] = [email for (email,) in conn.execute(
+                'SELECT email FROM usuarios WHERE nivel_acesso = ? AND ativo = 1 LIMIT 200', (papel,)
+            )]
+        ids_tarefas = [tarefa_id for (tarefa_id,) in conn.execute(
+            'SELECT id FROM tarefas ORDER BY random() LIMIT ?', (limite,)
+        )]
+        ids_leitores = [usuario_id for (usuario_id,) in conn.execute(
+            "SELECT id FROM usuarios WHERE nivel_acesso = 'visualizacao' LIMIT ?", (limite,)
+        )]
+    finally:
+        conn.close()
+
+    vazios = [papel for papel, emails in papeis.items() if not emails]
+    if vazios:
+        raise SystemExit(f"❌ Banco sem usuários ativos com nível: {', '.join(vazios)}")
+    return {'papeis': papeis, 'tarefas': ids_tarefas, 'leitores': ids_leitores}
+
+
+def iniciar_servidor(app):
+    """Sobe a aplicação num servidor WSGI com threads numa porta livre"""
+    from werkzeug.serving import make_server
+
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, name='servidor-carga', daemon=True).start()
+    return servidor
+
+
+class Cliente:
+    """Cliente HTTP com tokens próprios, que sorteia e executa cenários"""
+
+    def __init__(self, porta, dados, pesos, semente, resultados):
+        self.conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=30)
+        self.dados = dados
+        self.aleatorio = random.Random(semente)
+        self.cenarios = list(pesos)
+        self.pesos = [pesos[nome] for nome in self.cenarios]
+        self.resultados = resultados
+        self.tokens = {}
+        self.criadas = []
+
+    def requisitar(self, cenario, metodo, caminho, corpo=None, token=None, medir=True):
+        """Executa uma requisição e registra (cenário, status, segundos)"""
+        headers = {'Accept': 'application/json'}
+        if corpo is not None:
+            headers['Content-Type'] = 'application/json'
+            corpo = json.dumps(corpo)
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+
+        inicio = time.perf_counter()
+        try:
+            self.conexao.request(metodo, caminho, body=corpo, headers=headers)
+            resposta = self.conexao.getresponse()
+            conteudo = resposta.read()
+            status = resposta.status
+        except (OSError, http.client.HTTPException):
+            self.conexao.close()
+            conteudo, status = b'', 0
+        duracao = time.perf_counter() - inicio
+
+        if medir:
+            self.resultados.append((cenario, status, duracao))
+        return status, conteudo
+
+    def entrar(self, papel, medir=False):
+        """Faz login com um usuário do papel e guarda o token"""
+        email = self.aleatorio.choice(self.dados['papeis'][papel])
+        status, conteudo = self.requisitar('login', 'POST', '/auth/login',
+                                           {'email': email, 'senha': SENHA_PADRAO}, medir=medir)
+        if status == 200:
+            self.tokens[papel] = json.loads(conteudo)['token']
+
+    def preparar(self):
+        for papel in ('visualizacao', 'gerencial', 'administrativo'):
+            self.entrar(papel)
+
+    def tarefa_aleatoria(self):
+        return self.aleatorio.choice(self.dados['tarefas']) if self.dados['tarefas'] else 1
+
+    def executar(self, cenario):
+        leitor = self.tokens.get('visualizacao')
+        gerente = self.tokens.get('gerencial')
+        admin = self.tokens.get('administrativo')
+
+        if cenario == 'login':
+            self.entrar(self.aleatorio.choice(('visualizacao', 'gerencial')), medir=True)
+        elif cenario == 'me':
+            self.requisitar(cenario, 'GET', '/auth/me', token=leitor)
+        elif cenario == 'listar_tarefas':
+            self.requisitar(cenario, 'GET', '/tarefas/', token=leitor)
+        elif cenario == 'obter_tarefa':
+            self.requisitar(cenario, 'GET', f'/tarefas/{self.tarefa_aleatoria()}', token=leitor)
+        elif cenario == 'criar_tarefa':
+            status, conteudo = self.requisitar(cenario, 'POST', '/tarefas/', {
+                'titulo': f'Carga {self.aleatorio.randint(0, 10 ** 6)}',
+                'descricao': 'x' * self.aleatorio.randint(0, 200)
+            }, token=gerente)
+            if status == 201:
+                self.criadas.append(json.loads(conteudo)['id'])
+        elif cenario == 'atualizar_tarefa':
+            self.requisitar(cenario, 'PUT', f'/tarefas/{self.tarefa_aleatoria()}',
+                            {'status': self.aleatorio.choice(('pendente', 'concluida'))}, token=gerente)
+        elif cenario == 'remover_tarefa':
+            # Remove apenas tarefas criadas por este cliente, preservando a massa inicial
+            if self.criadas:
+                self.requisitar(cenario, 'DELETE', f'/tarefas/{self.criadas.pop()}', token=gerente)
+        elif cenario == 'listar_usuarios':
+            self.requisitar(cenario, 'GET', '/usuarios/?limite=50', token=admin)
+        elif cenario == 'sugerir_usuarios':
+            termo = self.aleatorio.choice(('usu', 'carga', 'carga1', 'u'))
+            self.requisitar(cenario, 'GET', f'/usuarios/suggest?q={termo}', token=admin)
+        elif cenario == 'atualizar_usuario':
+            # Só o nome muda: os tokens dos outros clientes continuam válidos
+            usuario_id = self.aleatorio.choice(self.dados['leitores'])
+            self.requisitar(cenario, 'PUT', f'/usuarios/{usuario_id}',
+                            {'nome': f'Usuário Carga {self.aleatorio.randint(0, 10 ** 6)}'}, token=admin)
+
+    def rodar(self, prazo):
+        while time.monotonic() < prazo:
+            self.executar(self.aleatorio.choices(self.cenarios, self.pesos)[0])
+        self.conexao.close()
+
+
+def resumir(resultados, duracao):
+    """Agrupa os resultados por cenário: contagens, RPS e latências em ms"""
+    por_cenario = {}
+    for cenario, status, segundos in resultados:
+        por_cenario.setdefault(cenario, []).append((status, segundos))
+
+    endpoints = {}
+    for cenario, medidas in sorted(por_cenario.items()):
+        latencias = sorted(segundos * 1000 for _, segundos in medidas)
+        contagem_status = {}
+        for status, _ in medidas:
+            contagem_status[str(status)] = contagem_status.get(str(status), 0) + 1
+        endpoints[cenario] = {
+            'requisicoes': len(medidas),
+            'rps': round(len(medidas) / duracao, 2),
+            'erros': sum(1 for status, _ in medidas if status == 0 or status >= 500),
+            'status': contagem_status,
+            'media_ms': round(sum(latencias) / len(latencias), 3),
+            'max_ms': round(latencias[-1], 3),
+            **{f'p{p}_ms': round(percentil(latencias, p), 3) for p in PERCENTIS}
+        }
+
+    latencias = sorted(segundos * 1000 for _, _, segundos in resultados)
+    return {
+        'requisicoes': len(resultados),
+        'rps': round(len(resultados) / duracao, 2) if duracao else 0,
+        'erros': sum(e['erros'] for e in endpoints.values()),
+        **{f'p{p}_ms': round(percentil(latencias, p), 3) if latencias else None for p in PERCENTIS},
+        'endpoints': endpoints
+    }
+
+
+def comparar(base, atual):
+    """Tabela de RPS e p95 por endpoint contra um relatório anterior"""
+    linhas = [f"{'endpoint':<20} {'rps base':>10} {'rps':>10} {'p95 base':>10} {'p95':>10} {'Δp95':>8}"]
+    for nome, dados in atual['endpoints'].items():
+        anterior = base.get('endpoints', {}).get(nome)
+        if not anterior:
+            continue
+        variacao = (dados['p95_ms'] / anterior['p95_ms'] - 1) * 100 if anterior['p95_ms'] else 0.0
+        linhas.append(f"{nome:<20} {anterior['rps']:>10} {dados['rps']:>10} "
+                      f"{anterior['p95_ms']:>10} {dados['p95_ms']:>10} {variacao:>+7.1f}%")
+    return '\n'.join(linhas)
+
+
+def commit_atual():
+    """Hash do commit em teste (None fora de um repositório git)"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ler_pesos(texto):
+    """Converte ``nome=peso,nome=peso`` em dicionário (cenários omitidos ficam com peso 0)"""
+    pesos = {}
+    for item in texto.split(','):
+        nome, _, peso = item.partition('=')
+        nome = nome.strip()
+        if nome not in PESOS_PADRAO:
+            raise argparse.ArgumentTypeError(f"Cenário desconhecido: {nome}")
+        pesos[nome] = float(peso)
+    return pesos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga da API com cenários ponderados')
+    parser.add_argument('--clientes', type=int, default=16, help='Clientes simultâneos')
+    parser.add_argument('--duracao', type=float, default=10, help='Duração da medição em segundos')
+    parser.add_argument('--aquecimento', type=float, default=2, help='Segundos descartados no início')
+    parser.add_argument('--usuarios', type=int, default=200, help='Usuários criados antes do teste')
+    parser.add_argument('--tarefas', type=int, default=1000, help='Tarefas criadas antes do teste')
+    parser.add_argument('--banco', help=f'Usar um banco já populado (ex.: generate_data.py, senha {SENHA_PADRAO}); '
+                                        'os cenários de escrita o alteram')
+    parser.add_argument('--cenarios', type=ler_pesos, default=None,
+                        help=f"Pesos 'nome=peso,...' (cenários: {', '.join(PESOS_PADRAO)})")
+    parser.add_argument('--semente', type=int, default=42, help='Semente dos sorteios')
+    parser.add_argument('--com-limite', action='store_true', help='Manter o limite de tentativas de login')
+    parser.add_argument('--saida', help='Arquivo JSON do resultado (padrão: saída padrão)')
+    parser.add_argument('--comparar', help='Relatório JSON anterior para comparar (tabela na saída de erro)')
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp(prefix='carga-')
+    os.environ['DATABASE_PATH'] = os.path.abspath(args.banco) if args.banco else os.path.join(diretorio, 'carga.db')
+    if not args.com_limite:
+        os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    import logging
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    from src.api.app import create_app
+    from src.utils.user_index import indice_usuarios
+
+    app, api = create_app()
+    if args.banco:
+        dados = carregar_dados()
+    else:
+        dados = popular_banco(args.usuarios, args.tarefas, args.semente)
+        indice_usuarios.construir()
+    servidor = iniciar_servidor(app)
+
+    pesos = {nome: peso for nome, peso in (args.cenarios or PESOS_PADRAO).items() if peso > 0}
+    clientes = []
+    for numero in range(args.clientes):
+        cliente = Cliente(servidor.server_port, dados, pesos, args.semente + numero, [])
+        cliente.preparar()
+        clientes.append(cliente)
+
+    # Aquecimento: mesmas requisições, resultados descartados ao final
+    inicio_medicao = time.monotonic() + args.aquecimento
+    prazo = inicio_medicao + args.duracao
+    threads = [threading.Thread(target=cliente.rodar, args=(prazo,)) for cliente in clientes]
+    for thread in threads:
+        thread.start()
+    time.sleep(max(0.0, inicio_medicao - time.monotonic()))
+    marcas = [len(cliente.resultados) for cliente in clientes]
+    for thread in threads:
+        thread.join()
+    duracao = time.monotonic() - inicio_medicao
+    servidor.shutdown()
+    shutil.rmtree(diretorio, ignore_errors=True)
+
+    resultados = [item for cliente, marca in zip(clientes, marcas) for item in cliente.resultados[marca:]]
+    relatorio = {
+        'commit': commit_atual(),
+        'data': datetime.now().isoformat(),
+        'configuracao': {
+            'clientes': args.clientes,
+            'duracao': args.duracao,
+            'aquecimento': args.aquecimento,
+            'usuarios': args.usuarios,
+            'tarefas': args.tarefas,
+            'banco': args.banco,
+            'semente': args.semente,
+            'cenarios': pesos
+        },
+        **resumir(resultados, duracao)
+    }
+
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto + '\n')
+        print(f"✅ {relatorio['requisicoes']} requisições, {relatorio['rps']} req/s -> {args.saida}")
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        print(f"\nComparação com {base.get('commit') or args.comparar}:", file=sys.stderr)
+        print(comparar(base, relatorio), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Suíte de microbenchmarks dos caminhos mais executados
+
+Cada caso é aquecido, calibrado para rodadas de ~0,2 s e repetido várias
+vezes, em ns/op (mediana, mínimo e dispersão). O mínimo das rodadas, o
+valor menos sujeito a ruído da máquina, é comparado com uma baseline
+gravada e a execução falha quando um caso fica mais lento que o limite
+configurado.
+
+Uso:
+    python benchmarks/microbench.py --salvar            # grava a baseline
+    python benchmarks/microbench.py                     # compara (falha acima de 15%)
+    python benchmarks/microbench.py --limite 0.25 --casos jwt
+    python benchmarks/microbench.py --json resultado.json
+
+A baseline depende da máquina: grave-a no mesmo ambiente em que a
+comparação será feita (por padrão ``benchmarks/baselines/<máquina>.json``).
+"""
+
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+import statistics
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DIRETORIO_BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# Casos registrados: nome -> função que prepara o ambiente e retorna o callable medido
+CASOS = {}
+
+
+def caso(nome):
+    """Registra a preparação de um caso da suíte"""
+    def decorator(preparar):
+        CASOS[nome] = preparar
+        return preparar
+    return decorator
+
+
+def linhas_tarefas(quantidade):
+    """Linhas no formato de ``SELECT * FROM tarefas``"""
+    return [
+        (numero, f'Tarefa {numero}', 'Descrição ' * 8, 'pendente' if numero % 3 else 'concluida',
+         '2024-01-01T10:00:00.000000', '2024-01-02T10:00:00.000000', None)
+        for numero in range(quantidade)
+    ]
+
+
+@caso('verificar_permissao:permitida')
+def preparar_permissao_permitida(contexto):
+    from src.utils.permissions import verificar_permissao
+    return lambda: verificar_permissao('administrativo', 'system:admin')
+
+
+@caso('verificar_permissao:negada')
+def preparar_permissao_negada(contexto):
+    from src.utils.permissions import verificar_permissao
+    return lambda: verificar_permissao('visualizacao', 'tarefas:create')
+
+
+@caso('jwt:gerar_token')
+def preparar_gerar_token(contexto):
+    return contexto['usuario'].gerar_jwt_token
+
+
+@caso('jwt:verificar_token')
+def preparar_verificar_token(contexto):
+    from src.models.usuario import Usuario
+    token = contexto['token']
+    return lambda: Usuario.verificar_jwt_token(token)
+
+
+@caso('tarefas:linha_para_dict')
+def preparar_linha_tarefa(contexto):
+    from src.models.tarefa import tarefa_para_dict
+    linha = linhas_tarefas(1)[0]
+    return lambda: tarefa_para_dict(linha)
+
+
+@caso('tarefas:listagem_1000')
+def preparar_listagem_tarefas(contexto):
+    from src.models.tarefa import tarefa_para_dict
+    linhas = linhas_tarefas(1000)
+    return lambda: [tarefa_para_dict(linha) for linha in linhas]
+
+
+@caso('usuario:to_dict')
+def preparar_to_dict(contexto):
+    return contexto['usuario'].to_dict
+
+
+@caso('json:tarefas_10000')
+def preparar_json_tarefas(contexto):
+    from src.models.tarefa import tarefa_para_dict
+    corpo = {'tarefas': [tarefa_para_dict(linha) for linha in linhas_tarefas(10000)], 'total': 10000}
+    return lambda: json.dumps(corpo)
+
+
+def preparar_contexto(diretorio):
+    """Banco temporário com um usuário e um token válidos para os casos de JWT"""
+    os.environ['DATABASE_PATH'] = os.path.join(diretorio, 'microbench.db')
+    from src.models.esquema import garantir_esquema
+    from src.models.usuario import Usuario
+
+    garantir_esquema()
+    usuario = Usuario.criar(nome='Benchmark', email='benchmark@teste.com', senha='senha123')
+    return {'usuario': usuario, 'token': usuario.gerar_jwt_token()}
+
+
+def medir(funcao, repeticoes, tempo_rodada=0.2):
+    """
+    Mede um callable com aquecimento e calibração
+
+    Returns:
+        dict: Mediana, mínimo e desvio padrão em ns/op, e chamadas por rodada
+    """
+    temporizador = timeit.Timer(funcao)
+
+    # Aquecimento: caches, especialização do interpretador e páginas do SQLite
+    numero, tempo = temporizador.autorange()
+    numero = max(1, int(numero * tempo_rodada / tempo)) if tempo else numero
+
+    tempos = [t / numero * 1e9 for t in temporizador.repeat(repeat=repeticoes, number=numero)]
+    return {
+        'mediana_ns': round(statistics.median(tempos), 1),
+        'minimo_ns': round(min(tempos), 1),
+        'desvio_ns': round(statistics.stdev(tempos), 1) if len(tempos) > 1 else 0.0,
+        'chamadas_por_rodada': numero,
+        'repeticoes': repeticoes
+    }
+
+
+def comparar(resultados, baseline, limite):
+    """
+    Compara o mínimo de cada caso com o da baseline
+
+    Returns:
+        list: ``(caso, mínimo base, mínimo atual, variação, regrediu)``
+    """
+    comparacao = []
+    for nome, medida in resultados.items():
+        base = baseline.get('casos', {}).get(nome)
+        if not base:
+            continue
+        variacao = medida['minimo_ns'] / base['minimo_ns'] - 1
+        comparacao.append((nome, base['minimo_ns'], medida['minimo_ns'], variacao, variacao > limite))
+    return comparacao
+
+
+def caminho_baseline_padrao():
+    maquina = platform.node() or 'local'
+    versao = '.'.join(platform.python_version_tuple()[:2])
+    return os.path.join(DIRETORIO_BASELINES, f'{maquina}-py{versao}.json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks dos caminhos mais executados')
+    parser.add_argument('--casos', help='Executar só os casos cujo nome contém este texto')
+    parser.add_argument('--repeticoes', type=int, default=7, help='Rodadas medidas por caso')
+    parser.add_argument('--tempo-rodada', type=float, default=0.2, help='Duração aproximada de cada rodada (s)')
+    parser.add_argument('--baseline', default=None, help='Arquivo da baseline (padrão: por máquina e versão do Python)')
+    parser.add_argument('--salvar', action='store_true', help='Gravar os resultados como nova baseline')
+    parser.add_argument('--limite', type=float, default=float(os.environ.get('MICROBENCH_LIMITE', 0.15)),
+                        help='Regressão máxima aceita, em fração da baseline (padrão 0.15 = 15%%)')
+    parser.add_argument('--json', help='Gravar os resultados em JSON neste arquivo')
+    args = parser.parse_args()
+
+    caminho_baseline = args.baseline or caminho_baseline_padrao()
+    nomes = [nome for nome in CASOS if not args.casos or args.casos in nome]
+
+    with tempfile.TemporaryDirectory(prefix='microbench-') as diretorio:
+        contexto = preparar_contexto(diretorio)
+        resultados = {}
+        for nome in nomes:
+            funcao = CASOS[nome](contexto)
+            resultados[nome] = medir(funcao, args.repeticoes, args.tempo_rodada)
+            medida = resultados[nome]
+            print(f"{nome:<32} {medida['mediana_ns']:>12.1f} ns/op  "
+                  f"(mín {medida['minimo_ns']:.1f}, ±{medida['desvio_ns']:.1f})")
+
+    relatorio = {
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'maquina': platform.node(),
+        'casos': resultados
+    }
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+
+    if args.salvar:
+        os.makedirs(os.path.dirname(os.path.abspath(caminho_baseline)), exist_ok=True)
+        baseline = {'casos': {}}
+        if os.path.exists(caminho_baseline):
+            with open(caminho_baseline, encoding='utf-8') as arquivo:
+                baseline = json.load(arquivo)
+        # Uma execução parcial (--casos) atualiza apenas os casos medidos
+        baseline.update({chave: valor for chave, valor in relatorio.items() if chave != 'casos'})
+        baseline.setdefault('casos', {}).update(resultados)
+        with open(caminho_baseline, 'w', encoding='utf-8') as arquivo:
+            json.dump(baseline, arquivo, ensure_ascii=False, indent=2)
+        print(f"\n✅ Baseline gravada em {caminho_baseline}")
+        return
+
+    if not os.path.exists(caminho_baseline):
+        print(f"\n⚠️  Sem baseline em {caminho_baseline}; rode com --salvar para criá-la")
+        return
+
+    with open(caminho_baseline, encoding='utf-8') as arquivo:
+        baseline = json.load(arquivo)
+
+    print(f"\nComparação com a baseline (limite +{args.limite:.0%}):")
+    regressoes = 0
+    for nome, base, atual, variacao, regrediu in comparar(resultados, baseline, args.limite):
+        marca = '❌' if regrediu else '✅'
+        print(f"{marca} {nome:<32} {base:>12.1f} -> {atual:>12.1f} ns/op  {variacao:>+7.1%}")
+        regressoes += regrediu
+
+    if regressoes:
+        print(f"\n❌ {regressoes} caso(s) acima do limite")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
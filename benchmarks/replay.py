@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Reprodução de tráfego capturado (CAPTURE_ENABLED=true)
+
+Reenvia as requisições capturadas respeitando os intervalos originais
+(``--velocidade 1``), acelerados (``--velocidade 10``) ou o mais rápido
+possível (``--velocidade 0``), e resume as latências por endpoint no
+mesmo formato do teste de carga, para comparar builds.
+
+Uso:
+    python benchmarks/replay.py capturas/ --banco escala.db --saida antes.json
+    python benchmarks/replay.py capturas/ --banco escala.db --velocidade 5 --comparar antes.json
+    python benchmarks/replay.py capturas/ --url http://127.0.0.1:5000 \\
+        --credencial visualizacao=leitor@x.com:senha --credencial administrativo=admin@x.com:senha
+
+Com ``--banco`` a aplicação sobe localmente sobre uma cópia do banco
+(as escritas reproduzidas não alteram o original, e cada build parte do
+mesmo estado); os usuários vêm do banco, com a senha de generate_data.py.
+
+Como corpos e tokens não são capturados, cada requisição usa o token de
+um usuário com o mesmo nível de acesso e as escritas recebem corpos
+sintéticos. Escritas sem corpo conhecido (cadastros, 2FA, logout, níveis)
+são puladas e contadas em ``ignoradas``.
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import http.client
+from datetime import datetime
+from urllib.parse import urlsplit
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.carga import (
+    PERCENTIS, SENHA_PADRAO, carregar_dados, commit_atual, iniciar_servidor, percentil, resumir
+)
+from src.utils.capture import caminho_registro, ler_registros
+
+PAPEIS = ('visualizacao', 'gerencial', 'administrativo')
+
+METODOS_LEITURA = ('GET', 'HEAD', 'OPTIONS')
+
+
+def corpo_sintetico(registro, aleatorio, credenciais):
+    """
+    Corpo JSON para uma escrita capturada, ou None se ela não puder ser reproduzida
+
+    Returns:
+        tuple: ``(reproduzir, corpo)``
+    """
+    chave = (registro['m'], registro['r'])
+    if registro['m'] in METODOS_LEITURA:
+        return True, None
+    if chave == ('POST', '/auth/login'):
+        papel = registro.get('p') if registro.get('p') in credenciais else aleatorio.choice(sorted(credenciais))
+        email, senha = aleatorio.choice(credenciais[papel])
+        return True, {'email': email, 'senha': senha}
+    if chave == ('POST', '/tarefas/'):
+        # Descrição dimensionada para aproximar o tamanho original do corpo
+        return True, {'titulo': f'Replay {aleatorio.randint(0, 10 ** 6)}',
+                      'descricao': 'x' * max(0, (registro.get('e') or 0) - 40)}
+    if chave == ('PUT', '/tarefas/<int:id>'):
+        return True, {'status': aleatorio.choice(('pendente', 'concluida'))}
+    if chave == ('DELETE', '/tarefas/<int:id>'):
+        return True, None
+    if chave == ('PUT', '/usuarios/<int:id>'):
+        # Só o nome: nível e status alterariam os tokens usados na reprodução
+        return True, {'nome': f'Usuário Replay {aleatorio.randint(0, 10 ** 6)}'}
+    return False, None
+
+
+class Reprodutor:
+    """Agenda os registros no tempo e os distribui entre conexões HTTP"""
+
+    def __init__(self, host, porta, tokens, credenciais, conexoes, semente):
+        self.host = host
+        self.porta = porta
+        self.tokens = tokens
+        self.credenciais = credenciais
+        self.conexoes = conexoes
+        self.aleatorio = random.Random(semente)
+        self.fila = queue.Queue(maxsize=conexoes * 4)
+        self.resultados = []
+        self.atrasos = []
+        self.ignoradas = {}
+        self._lock = threading.Lock()
+
+    def token_para(self, papel):
+        if papel is None:
+            return None
+        if papel in self.tokens:
+            return self.tokens[papel]
+        # Token não resolvido na captura ou nível sem credencial: o menor privilégio disponível
+        for candidato in PAPEIS:
+            if candidato in self.tokens:
+                return self.tokens[candidato]
+        return None
+
+    def _trabalhar(self):
+        conexao = http.client.HTTPConnection(self.host, self.porta, timeout=30)
+        while True:
+            item = self.fila.get()
+            if item is None:
+                break
+            previsto, registro, corpo = item
+            headers = {'Accept': 'application/json'}
+            if corpo is not None:
+                headers['Content-Type'] = 'application/json'
+                corpo = json.dumps(corpo)
+            token = self.token_para(registro.get('p'))
+            if token:
+                headers['Authorization'] = f'Bearer {token}'
+
+            inicio = time.perf_counter()
+            try:
+                conexao.request(registro['m'], caminho_registro(registro), body=corpo, headers=headers)
+                resposta = conexao.getresponse()
+                resposta.read()
+                status = resposta.status
+            except (OSError, http.client.HTTPException):
+                conexao.close()
+                status = 0
+            duracao = time.perf_counter() - inicio
+
+            with self._lock:
+                self.resultados.append((f"{registro['m']} {registro['r']}", status, duracao))
+                self.atrasos.append(max(0.0, inicio - previsto))
+        conexao.close()
+
+    def reproduzir(self, registros, velocidade):
+        """Envia os registros e retorna a duração da reprodução em segundos"""
+        trabalhadores = [threading.Thread(target=self._trabalhar, daemon=True) for _ in range(self.conexoes)]
+        for trabalhador in trabalhadores:
+            trabalhador.start()
+
+        origem = registros[0]['t'] if registros else 0.0
+        inicio = time.perf_counter()
+        for registro in registros:
+            reproduzir, corpo = corpo_sintetico(registro, self.aleatorio, self.credenciais)
+            if not reproduzir:
+                chave = f"{registro['m']} {registro['r']}"
+                self.ignoradas[chave] = self.ignoradas.get(chave, 0) + 1
+                continue
+            previsto = inicio + (registro['t'] - origem) / velocidade if velocidade else time.perf_counter()
+            espera = previsto - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            # Com todas as conexões ocupadas o put bloqueia e o atraso aparece no relatório
+            self.fila.put((previsto, registro, corpo))
+
+        for _ in trabalhadores:
+            self.fila.put(None)
+        for trabalhador in trabalhadores:
+            trabalhador.join()
+        return time.perf_counter() - inicio
+
+
+def entrar(host, porta, email, senha):
+    """Token de login de um usuário (None se o login falhar)"""
+    conexao = http.client.HTTPConnection(host, porta, timeout=30)
+    try:
+        conexao.request('POST', '/auth/login', body=json.dumps({'email': email, 'senha': senha}),
+                        headers={'Content-Type': 'application/json'})
+        resposta = conexao.getresponse()
+        conteudo = resposta.read()
+        return json.loads(conteudo)['token'] if resposta.status == 200 else None
+    finally:
+        conexao.close()
+
+
+def resumo_capturado(registros):
+    """Latências registradas na captura, por endpoint, para referência"""
+    por_endpoint = {}
+    for registro in registros:
+        por_endpoint.setdefault(f"{registro['m']} {registro['r']}", []).append(registro['d'])
+    resumo = {}
+    for endpoint, duracoes in sorted(por_endpoint.items()):
+        duracoes.sort()
+        resumo[endpoint] = {'requisicoes': len(duracoes),
+                            **{f'p{p}_ms': round(percentil(duracoes, p), 3) for p in PERCENTIS}}
+    return resumo
+
+
+def comparar_distribuicoes(base, atual):
+    """Tabela de p50/p95/p99 por endpoint contra um relatório anterior"""
+    cabecalho = f"{'endpoint':<36}" + ''.join(f"{f'p{p} base':>11} {f'p{p}':>9} {'Δ':>8}" for p in PERCENTIS)
+    linhas = [cabecalho]
+    for nome, dados in atual['endpoints'].items():
+        anterior = base.get('endpoints', {}).get(nome)
+        if not anterior:
+            continue
+        colunas = []
+        for p in PERCENTIS:
+            antes, depois = anterior[f'p{p}_ms'], dados[f'p{p}_ms']
+            variacao = (depois / antes - 1) * 100 if antes else 0.0
+            colunas.append(f"{antes:>11} {depois:>9} {variacao:>+7.1f}%")
+        linhas.append(f"{nome:<36}" + ''.join(colunas))
+    return '\n'.join(linhas)
+
+
+def ler_credencial(texto):
+    """Converte ``papel=email:senha`` em ``(papel, email, senha)``"""
+    papel, _, resto = texto.partition('=')
+    email, _, senha = resto.partition(':')
+    if papel not in PAPEIS or not email or not senha:
+        raise argparse.ArgumentTypeError(f"Credencial inválida (use papel=email:senha): {texto}")
+    return papel, email, senha
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reproduz tráfego capturado e resume as latências')
+    parser.add_argument('capturas', nargs='+', help='Arquivos ou diretórios de captura')
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument('--banco', help='Subir a aplicação local sobre uma cópia deste banco')
+    destino.add_argument('--url', help='Instância já em execução (ex.: http://127.0.0.1:5000)')
+    parser.add_argument('--credencial', type=ler_credencial, action='append', default=[],
+                        help='papel=email:senha para uso com --url (repetível)')
+    parser.add_argument('--velocidade', type=float, default=1.0,
+                        help='Aceleração em relação ao tempo capturado (0 = sem pausas)')
+    parser.add_argument('--conexoes', type=int, default=32, help='Conexões HTTP simultâneas')
+    parser.add_argument('--limite', type=int, default=None, help='Reproduzir só os N primeiros registros')
+    parser.add_argument('--semente', type=int, default=42, help='Semente dos sorteios')
+    parser.add_argument('--com-limite', action='store_true', help='Manter o limite de tentativas de login')
+    parser.add_argument('--saida', help='Arquivo JSON do resultado (padrão: saída padrão)')
+    parser.add_argument('--comparar', help='Relatório JSON anterior para comparar (tabela na saída de erro)')
+    args = parser.parse_args()
+
+    registros = ler_registros(args.capturas)[:args.limite]
+    if not registros:
+        raise SystemExit('❌ Nenhum registro de captura encontrado')
+
+    diretorio = servidor = None
+    credenciais = {}
+    if args.banco:
+        diretorio = tempfile.mkdtemp(prefix='replay-')
+        os.environ['DATABASE_PATH'] = os.path.join(diretorio, 'replay.db')
+        shutil.copyfile(args.banco, os.environ['DATABASE_PATH'])
+        if not args.com_limite:
+            os.environ['RATE_LIMIT_ENABLED'] = 'false'
+        # A instância local não deve capturar o próprio replay
+        os.environ['CAPTURE_ENABLED'] = 'false'
+        import logging
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+        from src.api.app import create_app
+        app, api = create_app()
+        servidor = iniciar_servidor(app)
+        host, porta = '127.0.0.1', servidor.server_port
+        for papel, emails in carregar_dados(limite=1)['papeis'].items():
+            credenciais[papel] = [(email, SENHA_PADRAO) for email in emails[:20]]
+    else:
+        url = urlsplit(args.url)
+        host, porta = url.hostname, url.port or 80
+        for papel, email, senha in args.credencial:
+            credenciais.setdefault(papel, []).append((email, senha))
+        if not credenciais:
+            raise SystemExit('❌ Informe ao menos uma --credencial para reproduzir contra --url')
+
+    tokens = {}
+    for papel, contas in credenciais.items():
+        token = entrar(host, porta, *contas[0])
+        if token:
+            tokens[papel] = token
+        else:
+            print(f"⚠️  Login falhou para o papel {papel}", file=sys.stderr)
+
+    reprodutor = Reprodutor(host, porta, tokens, credenciais, args.conexoes, args.semente)
+    duracao = reprodutor.reproduzir(registros, args.velocidade)
+
+    if servidor is not None:
+        servidor.shutdown()
+    if diretorio:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+    atrasos = sorted(segundos * 1000 for segundos in reprodutor.atrasos)
+    relatorio = {
+        'commit': commit_atual(),
+        'data': datetime.now().isoformat(),
+        'configuracao': {
+            'capturas': args.capturas,
+            'registros': len(registros),
+            'janela_capturada_s': round(registros[-1]['t'] - registros[0]['t'], 3),
+            'velocidade': args.velocidade,
+            'conexoes': args.conexoes,
+            'banco': args.banco,
+            'url': args.url
+        },
+        'ignoradas': reprodutor.ignoradas,
+        # Atraso entre o instante previsto e o envio: alto indica conexões insuficientes
+        'atraso_envio': {f'p{p}_ms': round(percentil(atrasos, p), 3) if atrasos else None for p in PERCENTIS},
+        **resumir(reprodutor.resultados, duracao),
+        'capturado': resumo_capturado(registros)
+    }
+
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto + '\n')
+        print(f"✅ {relatorio['requisicoes']} requisições reproduzidas em {duracao:.1f}s -> {args.saida}")
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        print(f"\nComparação com {base.get('commit') or args.comparar}:", file=sys.stderr)
+        print(comparar_distribuicoes(base, relatorio), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
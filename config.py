@@ -24,3 +24,109 @@ class Config:
     # Configurações do banco de dados
     DATABASE_PATH = os.environ.get('DATABASE_PATH', 'tarefas.db')
 
+    
+    # Limite de tentativas de login e 2FA (token bucket por IP e por identidade)
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', 10000))
+    LOGIN_RATE_IP_BURST = int(os.environ.get('LOGIN_RATE_IP_BURST', 20))
+    LOGIN_RATE_IP_PER_MINUTE = float(os.environ.get('LOGIN_RATE_IP_PER_MINUTE', 30))
+    LOGIN_RATE_ID_BURST = int(os.environ.get('LOGIN_RATE_ID_BURST', 5))
+    LOGIN_RATE_ID_PER_MINUTE = float(os.environ.get('LOGIN_RATE_ID_PER_MINUTE', 5))
+    TWOFA_RATE_IP_BURST = int(os.environ.get('TWOFA_RATE_IP_BURST', 20))
+    TWOFA_RATE_IP_PER_MINUTE = float(os.environ.get('TWOFA_RATE_IP_PER_MINUTE', 30))
+    TWOFA_RATE_ID_BURST = int(os.environ.get('TWOFA_RATE_ID_BURST', 5))
+    TWOFA_RATE_ID_PER_MINUTE = float(os.environ.get('TWOFA_RATE_ID_PER_MINUTE', 3))
+    
+    # Intervalo (segundos) entre verificações da versão dos níveis de acesso
+    PERMISSIONS_VERSION_CHECK_INTERVAL = float(os.environ.get('PERMISSIONS_VERSION_CHECK_INTERVAL', 5))
+    
+    # Intervalo (segundos) entre verificações da versão do índice de sugestão de usuários
+    USER_INDEX_VERSION_CHECK_INTERVAL = float(os.environ.get('USER_INDEX_VERSION_CHECK_INTERVAL', 5))
+    
+    # Métricas Prometheus em /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    # Diretório compartilhado pelos workers para agregar as métricas (vazio = processo único)
+    METRICS_DIR = os.environ.get('METRICS_DIR', '')
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+    
+    # Perfilamento sob demanda (cabeçalho X-Profile para system:admin)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'true').lower() == 'true'
+    # Fração do tráfego perfilada automaticamente por amostragem (0 = nenhuma)
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+    PROFILING_SAMPLE_INTERVAL_MS = float(os.environ.get('PROFILING_SAMPLE_INTERVAL_MS', 1))
+    PROFILING_MAX_PROFILES = int(os.environ.get('PROFILING_MAX_PROFILES', 50))
+    # Diretório compartilhado pelos workers para consultar perfis de qualquer um deles
+    # (também limitado a PROFILING_MAX_PROFILES arquivos)
+    PROFILING_DIR = os.environ.get('PROFILING_DIR', '')
+    
+    # Inspeção de memória com tracemalloc (/admin/memory)
+    TRACEMALLOC_MAX_SNAPSHOTS = int(os.environ.get('TRACEMALLOC_MAX_SNAPSHOTS', 4))
+    TRACEMALLOC_MAX_FRAMES = int(os.environ.get('TRACEMALLOC_MAX_FRAMES', 25))
+    # Segundos até o rastreamento ser desligado automaticamente (0 = sem limite)
+    TRACEMALLOC_MAX_SECONDS = float(os.environ.get('TRACEMALLOC_MAX_SECONDS', 600))
+    
+    # Captura do tráfego real para benchmarks/replay.py (desativada por padrão)
+    CAPTURE_ENABLED = os.environ.get('CAPTURE_ENABLED', 'false').lower() == 'true'
+    CAPTURE_DIR = os.environ.get('CAPTURE_DIR', 'capturas')
+    CAPTURE_SAMPLE_RATE = float(os.environ.get('CAPTURE_SAMPLE_RATE', 1.0))
+    # Tamanho de cada arquivo antes da compactação e arquivos compactados mantidos
+    CAPTURE_MAX_BYTES = int(os.environ.get('CAPTURE_MAX_BYTES', 10 * 1024 * 1024))
+    CAPTURE_MAX_FILES = int(os.environ.get('CAPTURE_MAX_FILES', 10))
+    
+    # Servidor de produção (gunicorn.conf.py): workers pré-fork com preload
+    # Workers (0 = 2 x CPUs + 1) e threads por worker (> 1 usa workers gthread;
+    # 0 = automático: o suficiente para o controle de admissão, ou 1 sem ele)
+    WORKERS = int(os.environ.get('WORKERS', 0))
+    WORKER_THREADS = int(os.environ.get('WORKER_THREADS', 0))
+    PRELOAD_APP = os.environ.get('PRELOAD_APP', 'true').lower() == 'true'
+    # Segundos sem resposta até o worker ser reiniciado / para concluir requisições ao reiniciar
+    WORKER_TIMEOUT = int(os.environ.get('WORKER_TIMEOUT', 30))
+    GRACEFUL_TIMEOUT = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+    KEEPALIVE = int(os.environ.get('KEEPALIVE', 5))
+    # Reciclagem: cada worker é substituído após N requisições (+ até JITTER, para não reciclarem juntos)
+    MAX_REQUESTS = int(os.environ.get('MAX_REQUESTS', 10000))
+    MAX_REQUESTS_JITTER = int(os.environ.get('MAX_REQUESTS_JITTER', 1000))
+    # Log de acesso ('-' = saída padrão, vazio = desligado)
+    ACCESS_LOG = os.environ.get('ACCESS_LOG', '')
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'info')
+    # Journal WAL: leitores não bloqueiam o escritor entre workers
+    DATABASE_WAL = os.environ.get('DATABASE_WAL', 'true').lower() == 'true'
+    
+    # Servidor ASGI (asgi.py): rotas assíncronas + Flask num pool de threads
+    # Threads e fila do pool que executa a aplicação Flask
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 32))
+    ASGI_WSGI_QUEUE = int(os.environ.get('ASGI_WSGI_QUEUE', 256))
+    # Threads e fila do pool de acesso ao SQLite das rotas assíncronas
+    ASGI_DB_THREADS = int(os.environ.get('ASGI_DB_THREADS', 8))
+    ASGI_DB_QUEUE = int(os.environ.get('ASGI_DB_QUEUE', 256))
+    # Corpo máximo aceito por requisição (lido inteiro antes de chegar ao Flask)
+    ASGI_MAX_BODY_BYTES = int(os.environ.get('ASGI_MAX_BODY_BYTES', 10 * 1024 * 1024))
+    
+    # Eventos de tarefas em tempo real (GET /tarefas/stream)
+    # Segundos entre leituras do log de alterações (escritas deste processo são imediatas)
+    SSE_POLL_INTERVAL = float(os.environ.get('SSE_POLL_INTERVAL', 1.0))
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+    # Eventos no buffer de cada cliente antes de ele ser desconectado por lentidão
+    SSE_BUFFER_EVENTS = int(os.environ.get('SSE_BUFFER_EVENTS', 256))
+    # Duração máxima de uma conexão (o cliente reconecta e a autenticação é refeita)
+    SSE_MAX_SECONDS = float(os.environ.get('SSE_MAX_SECONDS', 300))
+    SSE_MAX_CLIENTS = int(os.environ.get('SSE_MAX_CLIENTS', 1000))
+    # Conexões por worker no gunicorn gthread (cada uma ocupa uma thread; as demais usam /tarefas/changes)
+    SSE_WSGI_MAX_CLIENTS = int(os.environ.get('SSE_WSGI_MAX_CLIENTS', 2))
+    
+    # Controle de admissão: vagas simultâneas e fila curta por classe de rota (por processo)
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'true').lower() == 'true'
+    # Segundos máximos na fila antes do 503 e valor do cabeçalho Retry-After
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 0.5))
+    ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 1))
+    # Threads além das vagas das classes (WORKER_THREADS=0): /health, /auth/me e rejeições com 503
+    ADMISSION_RESERVED_THREADS = int(os.environ.get('ADMISSION_RESERVED_THREADS', 4))
+    # Listagens completas (GET /tarefas/, GET /usuarios/)
+    ADMISSION_LIST_CONCURRENCY = int(os.environ.get('ADMISSION_LIST_CONCURRENCY', 8))
+    ADMISSION_LIST_QUEUE = int(os.environ.get('ADMISSION_LIST_QUEUE', 16))
+    # Exportação (GET /tarefas/export)
+    ADMISSION_EXPORT_CONCURRENCY = int(os.environ.get('ADMISSION_EXPORT_CONCURRENCY', 2))
+    ADMISSION_EXPORT_QUEUE = int(os.environ.get('ADMISSION_EXPORT_QUEUE', 2))
+    # Hash de senha (POST /auth/login, POST /auth/register)
+    ADMISSION_LOGIN_CONCURRENCY = int(os.environ.get('ADMISSION_LOGIN_CONCURRENCY', 4))
+    ADMISSION_LOGIN_QUEUE = int(os.environ.get('ADMISSION_LOGIN_QUEUE', 8))
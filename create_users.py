@@ -7,8 +7,8 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.models.usuario import Usuario, init_auth_database
-import sqlite3
+from src.models.usuario import init_auth_database
+from src.utils.provisionamento import provisionar_usuarios
 
 def create_example_users():
     """Cria usuários de exemplo com diferentes níveis de acesso"""
@@ -38,40 +38,21 @@ def create_example_users():
         }
     ]
     
-    conn = sqlite3.connect('tarefas.db')
-    cursor = conn.cursor()
-    
     print("🚀 Criando usuários de exemplo...")
     
-    for usuario_data in usuarios_exemplo:
-        try:
-            # Verificar se usuário já existe
-            cursor.execute('SELECT id FROM usuarios WHERE email = ?', (usuario_data['email'],))
-            if cursor.fetchone():
-                print(f"⚠️  Usuário {usuario_data['email']} já existe, pulando...")
-                continue
-            
-            # Criar usuário
-            usuario = Usuario.criar(
-                usuario_data['nome'],
-                usuario_data['email'],
-                usuario_data['senha']
-            )
-            
-            # Atualizar nível de acesso
-            cursor.execute('UPDATE usuarios SET nivel_acesso = ? WHERE id = ?', 
-                         (usuario_data['nivel_acesso'], usuario.id))
-            
+    # Criação em lote: emails verificados numa consulta e inserção com executemany
+    resultados = provisionar_usuarios(usuarios_exemplo)
+    
+    for usuario_data, resultado in zip(usuarios_exemplo, resultados):
+        if resultado['status'] == 'criado':
             print(f"✅ Usuário criado: {usuario_data['nome']} ({usuario_data['nivel_acesso']})")
             print(f"   Email: {usuario_data['email']}")
             print(f"   Senha: {usuario_data['senha']}")
             print()
-            
-        except Exception as e:
-            print(f"❌ Erro ao criar usuário {usuario_data['email']}: {str(e)}")
-    
-    conn.commit()
-    conn.close()
+        elif resultado['erro'] == "Email já cadastrado":
+            print(f"⚠️  Usuário {usuario_data['email']} já existe, pulando...")
+        else:
+            print(f"❌ Erro ao criar usuário {usuario_data['email']}: {resultado['erro']}")
     
     print("🎉 Usuários de exemplo criados com sucesso!")
     print("\n📋 Resumo dos usuários:")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Script para gerar dados sintéticos em escala (usuários, tarefas e sessões)
+
+Uso:
+    python generate_data.py --usuarios 10000 --tarefas 5000000 --sessoes 1000000
+    python generate_data.py --banco /tmp/escala.db --semente 7 --referencia 2025-01-01
+    DATABASE_PATH=/tmp/escala.db python generate_data.py --limpar
+
+Mesma semente e mesma referência geram exatamente os mesmos dados. Todos
+os usuários gerados têm a senha informada em --senha (padrão: senha123) e
+emails ``usuario<N>@dados.teste``; ``usuario0`` é administrativo.
+"""
+
+import sys
+import os
+import json
+import argparse
+import time
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos para testes de escala')
+    parser.add_argument('--banco', help='Arquivo SQLite de destino (padrão: DATABASE_PATH)')
+    parser.add_argument('--usuarios', type=int, default=1000, help='Número de usuários')
+    parser.add_argument('--tarefas', type=int, default=50000, help='Número de tarefas')
+    parser.add_argument('--sessoes', type=int, default=10000, help='Número de sessões')
+    parser.add_argument('--dias', type=int, default=365, help='Período coberto pelas datas, em dias')
+    parser.add_argument('--semente', type=int, default=42, help='Semente dos sorteios')
+    parser.add_argument('--referencia', type=datetime.fromisoformat, default=None,
+                        help='Data mais recente dos dados, ISO 8601 (padrão: hoje)')
+    parser.add_argument('--senha', default='senha123', help='Senha de todos os usuários gerados')
+    parser.add_argument('--lote', type=int, default=50000, help='Linhas inseridas por commit')
+    parser.add_argument('--processos', type=int, default=None, help='Processos de geração (padrão: CPUs)')
+    parser.add_argument('--limpar', action='store_true', help='Apagar os dados sintéticos de uma geração anterior antes (os dados reais são mantidos)')
+    parser.add_argument('--json', action='store_true', help='Imprimir o resumo em JSON')
+    args = parser.parse_args()
+
+    if args.banco:
+        os.environ['DATABASE_PATH'] = args.banco
+
+    from src.utils.synthetic_data import Escala, gerar_banco
+
+    escala = Escala(usuarios=args.usuarios, tarefas=args.tarefas, sessoes=args.sessoes, dias=args.dias)
+    inicio = time.perf_counter()
+
+    def progresso(tabela, linhas):
+        if not args.json:
+            print(f"\r  {tabela}: {linhas} linhas ({time.perf_counter() - inicio:.1f}s)", end='', flush=True)
+
+    try:
+        inseridos = gerar_banco(escala, semente=args.semente, referencia=args.referencia, senha=args.senha,
+                                limpar=args.limpar, tamanho_lote=args.lote, processos=args.processos,
+                                progresso=progresso)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    duracao = time.perf_counter() - inicio
+    if args.json:
+        print(json.dumps({'banco': os.environ.get('DATABASE_PATH', 'tarefas.db'), 'segundos': round(duracao, 2),
+                          **inseridos}, ensure_ascii=False))
+    else:
+        total = sum(inseridos.values())
+        print(f"\n✅ {inseridos['usuarios']} usuários, {inseridos['tarefas']} tarefas e "
+              f"{inseridos['sessoes']} sessões em {duracao:.1f}s ({total / duracao:,.0f} linhas/s)")
+
+if __name__ == '__main__':
+    main()
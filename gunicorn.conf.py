@@ -0,0 +1,18 @@
+"""
+Configuração do gunicorn a partir de ``Config`` (variáveis de ambiente)
+
+Uso:
+    gunicorn -c gunicorn.conf.py wsgi:app
+    WORKERS=4 WORKER_THREADS=4 PORT=8000 gunicorn -c gunicorn.conf.py wsgi:app
+
+Detalhes do ciclo de vida dos workers e dos sinais aceitos em
+``src/utils/servidor.py``.
+"""
+
+from config import Config
+from src.utils.servidor import on_exit, opcoes_gunicorn, preparar_ambiente, worker_exit
+
+globals().update(opcoes_gunicorn(Config))
+
+# Antes do preload: diretórios compartilhados e journal do banco
+preparar_ambiente(workers, Config)
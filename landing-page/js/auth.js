@@ -95,9 +95,10 @@ async function handleLogin(e) {
       localStorage.setItem("auth_token", authToken);
       localStorage.setItem("current_user", JSON.stringify(currentUser));
 
-      // Verificar se precisa configurar 2FA
-      if (result.qr_code_url) {
-        show2FASetup(result.qr_code_url);
+      // Verificar se precisa configurar 2FA (QR Code obtido sob demanda)
+      const qrCodeUrl = currentUser["2fa_ativo"] ? await fetch2FAQRCode() : null;
+      if (qrCodeUrl) {
+        show2FASetup(qrCodeUrl);
       } else {
         // Redirecionar para o app
         window.location.href = "index.html";
@@ -216,13 +217,32 @@ async function verifyToken(token) {
   }
 }
 
+// Buscar QR Code do 2FA (data URI gerado e mantido em cache pela API)
+async function fetch2FAQRCode() {
+  try {
+    const response = await fetch(`${API_BASE}/auth/setup-2fa`, {
+      headers: {
+        Authorization: `Bearer ${authToken}`,
+      },
+    });
+
+    if (!response.ok) return null;
+
+    const result = await response.json();
+    return result.qr_code_url;
+  } catch (error) {
+    console.error("Erro ao obter QR Code do 2FA:", error);
+    return null;
+  }
+}
+
 // Mostrar configuração 2FA
 function show2FASetup(qrCodeUrl) {
   switchTab("2fa");
 
   const qrContainer = document.getElementById("qr-code-container");
   qrContainer.innerHTML = `
-        <img src="${API_BASE}${qrCodeUrl}" alt="QR Code para 2FA">
+        <img src="${qrCodeUrl}" alt="QR Code para 2FA">
         <p>Escaneie com o Google Authenticator</p>
     `;
 }
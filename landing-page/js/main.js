@@ -8,6 +8,7 @@ const API_ENDPOINTS = {
 // Estado de autenticação
 let authToken = null;
 let currentUser = null;
+let capabilities = null;
 
 // Função auxiliar para construir URLs corretamente
 function buildApiUrl(endpoint, id = null) {
@@ -42,9 +43,17 @@ function getAuthHeaders(customHeaders = {}) {
 
 // Estado global da aplicação
 let tasks = [];
+// Último seq do log de alterações já aplicado em tasks
+let tasksSeq = 0;
+let syncInProgress = null;
 let currentFilter = "todas";
 let users = [];
 
+// Espera antes de reabrir o stream de alterações após uma falha
+const STREAM_RETRY_MS = 3000;
+// Intervalo de consulta a /tarefas/changes quando o servidor não oferece o stream
+const TASK_POLL_MS = 10000;
+
 // Elementos DOM
 const elements = {
   loading: document.getElementById("loading"),
@@ -95,11 +104,17 @@ async function initializeApp() {
       return;
     }
 
+    // Carregar permissões do usuário numa única chamada
+    await loadCapabilities();
+
     // Verificar se é admin e mostrar/esconder menu
     checkAdminAccess();
 
     await loadTasks();
     updateStatistics();
+
+    // Alterações feitas por outros usuários chegam em tempo real
+    subscribeTaskStream();
   } catch (error) {
     // Se erro 401, redirecionar para login
     if (error.message.includes("401")) {
@@ -182,6 +197,7 @@ async function loadTasks() {
 
     const data = await response.json();
     tasks = data.tarefas || [];
+    tasksSeq = data.seq || 0;
 
     renderTasks();
     showLoading(false);
@@ -191,6 +207,141 @@ async function loadTasks() {
   }
 }
 
+// Aplicar as alterações posteriores a tasksSeq (em vez de recarregar a lista)
+function syncTasks() {
+  // Sincronizações simultâneas (intervalo + ação do usuário) compartilham a mesma chamada
+  if (!syncInProgress) {
+    syncInProgress = fetchTaskChanges().finally(() => {
+      syncInProgress = null;
+    });
+  }
+  return syncInProgress;
+}
+
+async function fetchTaskChanges() {
+  let hasMore = true;
+  while (hasMore) {
+    const response = await fetch(
+      `${API_ENDPOINTS.tarefas}changes?since=${tasksSeq}`,
+      {
+        method: "GET",
+        headers: getAuthHeaders(),
+        mode: "cors",
+        credentials: "same-origin",
+      }
+    );
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    const data = await response.json();
+    if (data.reset) {
+      // Log compactado além do ponto local: recarregar a lista completa
+      await loadTasks();
+      updateStatistics();
+      return;
+    }
+
+    data.alteracoes.forEach(applyTaskChange);
+    tasksSeq = data.seq;
+    hasMore = data.mais;
+  }
+
+  renderTasks();
+  updateStatistics();
+}
+
+// Receber alterações em tempo real de /tarefas/stream (Server-Sent Events)
+// Lido com fetch porque o EventSource não envia o header Authorization
+async function subscribeTaskStream() {
+  for (;;) {
+    try {
+      const response = await fetch(
+        `${API_ENDPOINTS.tarefas}stream?since=${tasksSeq}`,
+        {
+          method: "GET",
+          headers: getAuthHeaders({ Accept: "text/event-stream" }),
+          mode: "cors",
+          credentials: "same-origin",
+        }
+      );
+      if (response.status === 401 || response.status === 403) {
+        return;
+      }
+      if (response.status === 503) {
+        const data = await response.json().catch(() => ({}));
+        if (data.polling) {
+          // Servidor sem suporte a conexões longas: consultar o feed de alterações
+          setInterval(() => syncTasks().catch(() => {}), TASK_POLL_MS);
+          return;
+        }
+      }
+      if (!response.ok || !response.body) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let end;
+        while ((end = buffer.indexOf("\n\n")) !== -1) {
+          await handleStreamFrame(buffer.slice(0, end));
+          buffer = buffer.slice(end + 2);
+        }
+      }
+      // Fim normal (duração máxima da conexão): reconectar a partir de tasksSeq
+    } catch (error) {
+      console.warn("Stream de tarefas interrompido:", error);
+      await new Promise((resolve) => setTimeout(resolve, STREAM_RETRY_MS));
+      await syncTasks().catch(() => {});
+    }
+  }
+}
+
+// Aplicar um quadro SSE (linhas "event:" e "data:"; comentários são heartbeats)
+async function handleStreamFrame(frame) {
+  let event = "message";
+  let data = "";
+  frame.split("\n").forEach((line) => {
+    if (line.startsWith("event: ")) event = line.slice(7);
+    else if (line.startsWith("data: ")) data += line.slice(6);
+  });
+
+  if (event === "reset") {
+    await loadTasks();
+    updateStatistics();
+    return;
+  }
+  if (!["insert", "update", "delete"].includes(event)) return;
+
+  const alteracao = JSON.parse(data);
+  // Sem permissão de leitura o evento não traz a tarefa: só avança a posição
+  if (alteracao.tarefa || event === "delete") {
+    applyTaskChange(alteracao);
+    renderTasks();
+    updateStatistics();
+  }
+  tasksSeq = Math.max(tasksSeq, alteracao.seq);
+}
+
+// insert/update trazem o estado atual da tarefa; delete a remove
+function applyTaskChange(alteracao) {
+  const index = tasks.findIndex((t) => t.id === alteracao.tarefa_id);
+  if (alteracao.operacao === "delete" || !alteracao.tarefa) {
+    if (index !== -1) {
+      tasks.splice(index, 1);
+    }
+  } else if (index !== -1) {
+    tasks[index] = alteracao.tarefa;
+  } else {
+    tasks.unshift(alteracao.tarefa);
+  }
+}
+
 // Renderizar lista de tarefas
 function renderTasks() {
   if (tasks.length === 0) {
@@ -204,6 +355,9 @@ function renderTasks() {
 
   const filteredTasks = filterTasks(tasks, currentFilter);
 
+  const canUpdate = can("PUT", "/tarefas/<int:id>");
+  const canDelete = can("DELETE", "/tarefas/<int:id>");
+
   elements.tasksList.innerHTML = filteredTasks
     .map((task) => {
       // Validar e normalizar o status da tarefa
@@ -226,7 +380,11 @@ function renderTasks() {
       }
       
       <div class="task-actions">
-        <button class="task-btn btn-edit" onclick="openEditModal(${task.id})">
+        ${
+          canUpdate
+            ? `<button class="task-btn btn-edit" onclick="openEditModal(${
+                task.id
+              })">
           <i class="fas fa-edit"></i>
           Editar
         </button>
@@ -235,11 +393,17 @@ function renderTasks() {
         })">
           <i class="fas fa-${status === "pendente" ? "check" : "undo"}"></i>
           ${status === "pendente" ? "Concluir" : "Reabrir"}
-        </button>
-        <button class="task-btn btn-delete" onclick="deleteTask(${task.id})">
+        </button>`
+            : ""
+        }
+        ${
+          canDelete
+            ? `<button class="task-btn btn-delete" onclick="deleteTask(${task.id})">
           <i class="fas fa-trash"></i>
           Excluir
-        </button>
+        </button>`
+            : ""
+        }
       </div>
     </div>
   `;
@@ -312,11 +476,7 @@ async function handleCreateTask(event) {
       throw new Error(`HTTP ${response.status}: ${response.statusText}`);
     }
 
-    const newTask = await response.json();
-    tasks.push(newTask);
-
-    renderTasks();
-    updateStatistics();
+    await syncTasks();
     event.target.reset();
 
     showToast("Tarefa criada com sucesso!", "success");
@@ -382,16 +542,7 @@ async function handleEditTask(event) {
       throw new Error(`HTTP ${response.status}: ${response.statusText}`);
     }
 
-    const updatedTask = await response.json();
-
-    // Atualizar tarefa na lista
-    const index = tasks.findIndex((t) => t.id === taskId);
-    if (index !== -1) {
-      tasks[index] = updatedTask;
-    }
-
-    renderTasks();
-    updateStatistics();
+    await syncTasks();
     closeEditModal();
 
     showToast("Tarefa atualizada com sucesso!", "success");
@@ -426,16 +577,7 @@ async function toggleTaskStatus(taskId) {
       throw new Error(`HTTP ${response.status}: ${response.statusText}`);
     }
 
-    const updatedTask = await response.json();
-
-    // Atualizar tarefa na lista
-    const index = tasks.findIndex((t) => t.id === taskId);
-    if (index !== -1) {
-      tasks[index] = updatedTask;
-    }
-
-    renderTasks();
-    updateStatistics();
+    await syncTasks();
 
     showToast(`Tarefa marcada como ${newStatus}!`, "success");
   } catch (error) {
@@ -462,11 +604,7 @@ async function deleteTask(taskId) {
       throw new Error(`HTTP ${response.status}: ${response.statusText}`);
     }
 
-    // Remover tarefa da lista
-    tasks = tasks.filter((t) => t.id !== taskId);
-
-    renderTasks();
-    updateStatistics();
+    await syncTasks();
 
     showToast("Tarefa excluída com sucesso!", "success");
   } catch (error) {
@@ -682,11 +820,40 @@ function logout() {
   window.location.href = "login.html";
 }
 
+// Carregar as capacidades do usuário (rotas permitidas) em uma requisição
+async function loadCapabilities() {
+  const response = await fetch(`${API_BASE_URL}/auth/me/capabilities`, {
+    method: "GET",
+    headers: getAuthHeaders(),
+    mode: "cors",
+    credentials: "same-origin",
+  });
+
+  if (!response.ok) {
+    if (response.status === 401) {
+      throw new Error(`401: Token inválido ou expirado`);
+    }
+    capabilities = null;
+    return;
+  }
+
+  capabilities = await response.json();
+}
+
+// Verificar se o usuário pode chamar uma rota (ex: can("DELETE", "/tarefas/<int:id>"))
+function can(method, route) {
+  if (!capabilities) {
+    // Sem capacidades carregadas: deixar a API decidir
+    return true;
+  }
+  return capabilities.rotas[`${method} ${route}`] === true;
+}
+
 // Verificar acesso de admin
 function checkAdminAccess() {
   const navUsuarios = document.getElementById("nav-usuarios");
 
-  if (currentUser && currentUser.nivel_acesso === "administrativo") {
+  if (capabilities ? can("PUT", "/usuarios/<int:id>/nivel") : currentUser && currentUser.nivel_acesso === "administrativo") {
     if (navUsuarios) navUsuarios.style.display = "flex";
   } else {
     if (navUsuarios) navUsuarios.style.display = "none";
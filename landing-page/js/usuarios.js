@@ -7,6 +7,7 @@ const API_ENDPOINTS = {
 // Estado de autenticação
 let authToken = null;
 let currentUser = null;
+let capabilities = null;
 
 // Estado global
 let users = [];
@@ -49,17 +50,41 @@ document.addEventListener("DOMContentLoaded", function () {
   setupEventListeners();
 });
 
+// Carregar as capacidades do usuário (rotas permitidas) em uma requisição
+async function loadCapabilities() {
+  try {
+    const response = await fetch(`${API_BASE_URL}/auth/me/capabilities`, {
+      method: "GET",
+      headers: getAuthHeaders(),
+      mode: "cors",
+      credentials: "same-origin",
+    });
+    capabilities = response.ok ? await response.json() : null;
+  } catch (error) {
+    capabilities = null;
+  }
+}
+
+// Verificar se o usuário pode chamar uma rota (ex: can("PUT", "/usuarios/<int:id>/nivel"))
+function can(method, route) {
+  if (!capabilities) {
+    return currentUser && currentUser.nivel_acesso === "administrativo";
+  }
+  return capabilities.rotas[`${method} ${route}`] === true;
+}
+
 // Verificar se usuário está autenticado
-function checkAuthentication() {
+async function checkAuthentication() {
   const savedToken = localStorage.getItem("auth_token");
   const savedUser = localStorage.getItem("current_user");
 
   if (savedToken && savedUser) {
     authToken = savedToken;
     currentUser = JSON.parse(savedUser);
+    await loadCapabilities();
 
-    // Verificar se é admin
-    if (currentUser.nivel_acesso !== "administrativo") {
+    // Verificar se pode gerenciar usuários
+    if (!can("PUT", "/usuarios/<int:id>/nivel")) {
       showToast("Apenas administradores podem acessar esta página", "error");
       setTimeout(() => {
         window.location.href = "index.html";
@@ -160,27 +185,38 @@ async function loadUsers() {
     if (usersListElement) usersListElement.style.display = "none";
     if (noUsersElement) noUsersElement.style.display = "none";
 
-    const response = await fetch(API_ENDPOINTS.usuarios, {
-      method: "GET",
-      headers: getAuthHeaders(),
-      mode: "cors",
-      credentials: "same-origin",
-    });
+    // A listagem é paginada por cursor: seguir proximo_cursor até o fim
+    const loaded = [];
+    let cursor = null;
+    do {
+      const params = new URLSearchParams({ limite: "200" });
+      if (cursor) params.set("cursor", cursor);
+
+      const response = await fetch(`${API_ENDPOINTS.usuarios}?${params}`, {
+        method: "GET",
+        headers: getAuthHeaders(),
+        mode: "cors",
+        credentials: "same-origin",
+      });
 
-    if (!response.ok) {
-      if (response.status === 401) {
-        throw new Error(`401: Token inválido ou expirado`);
+      if (!response.ok) {
+        if (response.status === 401) {
+          throw new Error(`401: Token inválido ou expirado`);
+        }
+        if (response.status === 403) {
+          throw new Error(
+            `403: Acesso negado. Apenas administradores podem gerenciar usuários.`
+          );
+        }
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
       }
-      if (response.status === 403) {
-        throw new Error(
-          `403: Acesso negado. Apenas administradores podem gerenciar usuários.`
-        );
-      }
-      throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-    }
 
-    const data = await response.json();
-    users = data.usuarios || [];
+      const data = await response.json();
+      loaded.push(...(data.usuarios || []));
+      cursor = data.proximo_cursor;
+    } while (cursor);
+
+    users = loaded;
 
     renderUsers();
     updateStatistics();
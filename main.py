@@ -1,3 +1,4 @@
+from config import Config
 from src.api.app import create_app
 
 if __name__ == '__main__':
@@ -5,10 +6,11 @@ if __name__ == '__main__':
     app, api = create_app()
     
     print("🚀 API de Tarefas iniciando...")
-    print("📍 Acesse: http://localhost:5000")
-    print("📚 Swagger: http://localhost:5000/docs")
+    print(f"📍 Acesse: http://localhost:{Config.PORT}")
+    print(f"📚 Swagger: http://localhost:{Config.PORT}/docs")
     print("✅ CRUD completo implementado!")
     print("🗄️  Banco SQLite configurado automaticamente")
+    print("🏭 Produção: gunicorn -c gunicorn.conf.py wsgi:app")
     
-    # Executar aplicação
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Servidor de desenvolvimento (um processo, com reloader quando DEBUG=true)
+    app.run(host=Config.HOST, port=Config.PORT, debug=Config.DEBUG)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Script para provisionar usuários em lote a partir de CSV ou NDJSON
+
+Uso:
+    python provision_users.py usuarios.csv
+    python provision_users.py usuarios.ndjson --threads 4 --lote 1000
+    cat usuarios.csv | python provision_users.py - --formato csv
+
+CSV: cabeçalho com nome,email,senha e, opcionalmente, nivel_acesso
+NDJSON: um objeto JSON por linha com as mesmas chaves
+"""
+
+import sys
+import os
+import json
+import argparse
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.models.usuario import init_auth_database
+from src.utils.provisionamento import detectar_formato, ler_registros, provisionar_usuarios, resumir
+
+def main():
+    parser = argparse.ArgumentParser(description='Provisiona usuários em lote')
+    parser.add_argument('arquivo', help="Arquivo CSV/NDJSON ou '-' para ler da entrada padrão")
+    parser.add_argument('--formato', choices=['csv', 'ndjson'], help='Formato (padrão: pela extensão)')
+    parser.add_argument('--threads', type=int, default=None, help='Threads para o hash das senhas (padrão: pool compartilhado)')
+    parser.add_argument('--lote', type=int, default=500, help='Linhas por executemany/commit')
+    parser.add_argument('--json', action='store_true', help='Imprimir o resultado completo em JSON')
+    args = parser.parse_args()
+    
+    if args.arquivo == '-':
+        conteudo = sys.stdin.read()
+    else:
+        with open(args.arquivo, encoding='utf-8') as arquivo:
+            conteudo = arquivo.read()
+    
+    formato = args.formato or detectar_formato(nome_arquivo=args.arquivo)
+    registros = ler_registros(conteudo, formato)
+    
+    init_auth_database()
+    
+    inicio = time.perf_counter()
+    resumo = resumir(provisionar_usuarios(registros, threads=args.threads, tamanho_lote=args.lote))
+    duracao = time.perf_counter() - inicio
+    
+    if args.json:
+        print(json.dumps(resumo, ensure_ascii=False, indent=2))
+    else:
+        for resultado in resumo['resultados']:
+            if resultado['status'] == 'erro':
+                print(f"❌ Linha {resultado['linha']} ({resultado['email']}): {resultado['erro']}")
+        print(f"✅ {resumo['criados']} usuários criados, {resumo['erros']} erros em {duracao:.2f}s")
+    
+    sys.exit(1 if resumo['erros'] else 0)
+
+if __name__ == '__main__':
+    main()
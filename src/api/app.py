@@ -24,10 +24,52 @@ def create_app():
         doc="/docs"
     )
     
+    # Métricas registradas primeiro para que a latência inclua a autenticação
+    from config import Config
+    if Config.METRICS_ENABLED:
+        from src.utils.metrics import registrar_metricas
+        registrar_metricas(app, Config.METRICS_DIR or None, Config.METRICS_FLUSH_INTERVAL)
+    
+    # Captura do tráfego para reprodução (benchmarks/replay.py)
+    if Config.CAPTURE_ENABLED:
+        import atexit
+        from src.utils.capture import GravadorCaptura, registrar_captura
+        app.extensions['captura'] = GravadorCaptura(Config.CAPTURE_DIR, Config.CAPTURE_MAX_BYTES,
+                                                    Config.CAPTURE_MAX_FILES)
+        registrar_captura(app, app.extensions['captura'], Config.CAPTURE_SAMPLE_RATE)
+        atexit.register(app.extensions['captura'].descarregar)
+    
+    # Controle de admissão antes da autenticação: rejeitar não custa nenhuma consulta
+    if Config.ADMISSION_ENABLED:
+        from src.utils.admissao import ControleAdmissao, registrar_admissao
+        app.extensions['admissao'] = ControleAdmissao.from_config(Config)
+        registrar_admissao(app, app.extensions['admissao'])
+    
+    # Verificação de saúde: sem autenticação, banco nem fila de admissão
+    @app.route('/health')
+    def saude():
+        return {'status': 'ok'}
+    
+    # Autenticação resolvida uma única vez por requisição (em flask.g)
+    from src.utils.auth_middleware import resolve_current_user
+    app.before_request(resolve_current_user)
+    
+    # Perfilamento sob demanda: sem nenhum hook quando desativado
+    if Config.PROFILING_ENABLED:
+        from src.utils.profiling import ArmazemPerfis, registrar_profiling
+        app.extensions['perfis'] = ArmazemPerfis(Config.PROFILING_MAX_PROFILES, Config.PROFILING_DIR or None)
+        registrar_profiling(app, app.extensions['perfis'], Config.PROFILING_SAMPLE_RATE,
+                            Config.PROFILING_SAMPLE_INTERVAL_MS / 1000)
+    
+    # Esquema do banco criado uma única vez (versão em PRAGMA user_version)
+    from src.models.esquema import garantir_esquema
+    garantir_esquema()
+    
     # Criar e registrar rotas
     from src.routes.api import create_routes
     from src.routes.auth import create_auth_routes
     from src.routes.usuarios import create_user_routes
+    from src.routes.admin import create_admin_routes
     
     # Rotas de autenticação
     auth_ns = create_auth_routes(api)
@@ -41,4 +83,48 @@ def create_app():
     user_ns = create_user_routes(api)
     api.add_namespace(user_ns)
     
+    # Rotas administrativas de diagnóstico
+    admin_ns = create_admin_routes(api)
+    api.add_namespace(admin_ns)
+    
+    # Matriz rota/método -> permissão, montada uma vez a partir dos decorators
+    from src.utils.route_matrix import MatrizPermissoes
+    app.extensions['matriz_permissoes'] = MatrizPermissoes.construir(app)
+    
+    # Taxas de acerto dos caches em memória
+    from src.utils.metrics import metricas, coletor_cache
+    from src.utils.qr_cache import qr_code_cache
+    metricas.registrar_coletor('qr_code', coletor_cache('qr_code', qr_code_cache.stats))
+    metricas.registrar_coletor('capacidades', coletor_cache('capacidades', app.extensions['matriz_permissoes'].stats))
+    
+    # Conexões de /tarefas/stream
+    from src.utils.sse import hub_tarefas
+    metricas.registrar_coletor('sse', hub_tarefas.coletor())
+    
+    # Leituras idênticas simultâneas coalescidas
+    from src.utils.single_flight import consultas_tarefas, consultas_usuarios
+    metricas.registrar_coletor('single_flight_tarefas', consultas_tarefas.coletor())
+    metricas.registrar_coletor('single_flight_usuarios', consultas_usuarios.coletor())
+    if 'admissao' in app.extensions:
+        metricas.registrar_coletor('admissao', app.extensions['admissao'].coletor())
+    
+    # Caches e estruturas em memória listados em /admin/memory
+    from src.utils.memory import inspetor_memoria
+    from src.utils.permissions import registro_permissoes
+    from src.utils.user_index import indice_usuarios
+    inspetor_memoria.registrar_componente('qr_code', qr_code_cache.stats)
+    inspetor_memoria.registrar_componente('capacidades', app.extensions['matriz_permissoes'].stats)
+    inspetor_memoria.registrar_componente('indice_usuarios', indice_usuarios.stats)
+    inspetor_memoria.registrar_componente('permissoes', registro_permissoes.stats)
+    inspetor_memoria.registrar_componente('sse', hub_tarefas.stats)
+    if 'perfis' in app.extensions:
+        inspetor_memoria.registrar_componente('perfis', app.extensions['perfis'].stats)
+    if 'captura' in app.extensions:
+        inspetor_memoria.registrar_componente('captura', app.extensions['captura'].stats)
+    if 'admissao' in app.extensions:
+        inspetor_memoria.registrar_componente('admissao', app.extensions['admissao'].stats)
+    
+    # Recompilar permissões quando outro worker alterar os níveis de acesso
+    app.before_request(registro_permissoes.verificar_versao)
+    
     return app, api
@@ -0,0 +1,367 @@
+"""
+Aplicação ASGI: rotas assíncronas na frente da aplicação Flask
+
+Rotas de streaming e de espera longa (exportação, feeds de alterações)
+são corrotinas registradas num ``RoteadorAssincrono``: enquanto esperam
+dados não ocupam nenhuma thread, e um processo mantém milhares de
+conexões ociosas. O acesso ao SQLite dessas rotas roda num pool de
+threads limitado (``ExecutorLimitado``).
+
+Todas as demais requisições seguem para a aplicação Flask pelo
+``AdaptadorWSGI``, que a executa noutro pool limitado; hooks, métricas,
+autenticação e validação continuam os mesmos do caminho WSGI.
+
+Uso:
+    uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import asyncio
+import io
+import json
+import sys
+import time
+from urllib.parse import parse_qsl
+
+from config import Config
+from src.utils.admissao import CHAVE_ADMITIDA
+from src.utils.metrics import metricas
+
+
+class ErroHTTP(Exception):
+    """Interrompe uma rota assíncrona com status e mensagem (como ``abort``)"""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+class Resposta:
+    """Resposta completa, enviada de uma vez"""
+
+    def __init__(self, corpo=b'', status=200, tipo='application/json', headers=None):
+        self.corpo = corpo
+        self.status = status
+        self.headers = {'content-type': tipo, **(headers or {})}
+
+
+class RespostaJSON(Resposta):
+    def __init__(self, dados, status=200, headers=None):
+        super().__init__(json.dumps(dados, ensure_ascii=False).encode('utf-8'), status, headers=headers)
+
+
+class RespostaStream:
+    """Resposta enviada em partes produzidas por um gerador assíncrono de bytes"""
+
+    def __init__(self, corpo, tipo='application/octet-stream', status=200, headers=None):
+        self.corpo = corpo
+        self.status = status
+        self.headers = {'content-type': tipo, **(headers or {})}
+
+
+class Requisicao:
+    """Dados da requisição de uma rota assíncrona"""
+
+    def __init__(self, scope, executor):
+        self.scope = scope
+        self.metodo = scope['method']
+        self.caminho = scope['path']
+        self.query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        self.headers = {nome.decode('latin-1').lower(): valor.decode('latin-1') for nome, valor in scope['headers']}
+        self._executor = executor
+        self._usuario = None
+
+    @property
+    def token(self):
+        header = self.headers.get('authorization', '')
+        return header[len('Bearer '):] if header.startswith('Bearer ') else None
+
+    async def executar(self, funcao, *args, **kwargs):
+        """Executa uma função bloqueante (ex.: consulta SQLite) no pool limitado"""
+        return await self._executor.executar(funcao, *args, **kwargs)
+
+    async def exigir_permissao(self, permissao):
+        """
+        Autentica pelo token Bearer e verifica a permissão
+
+        Mesmas respostas de ``require_auth`` + ``require_permission``.
+
+        Returns:
+            Usuario: Usuário autenticado
+        """
+        from src.models.usuario import Usuario
+        from src.utils.permissions import verificar_permissao
+
+        if not self.token:
+            raise ErroHTTP(401, 'Token de autorização necessário')
+        if self._usuario is None:
+            self._usuario = await self.executar(Usuario.verificar_jwt_token, self.token)
+        if self._usuario is None:
+            raise ErroHTTP(401, 'Token inválido ou expirado')
+        if not verificar_permissao(self._usuario.nivel_acesso, permissao):
+            raise ErroHTTP(403, f'Permissão insuficiente. Necessário: {permissao}')
+        return self._usuario
+
+
+class RoteadorAssincrono:
+    """Rotas atendidas por corrotinas, por método e caminho exato"""
+
+    def __init__(self):
+        self.rotas = {}
+
+    def rota(self, caminho, metodos=('GET',)):
+        def decorator(corrotina):
+            for metodo in metodos:
+                self.rotas[(metodo, caminho)] = corrotina
+            return corrotina
+        return decorator
+
+    def encontrar(self, metodo, caminho):
+        return self.rotas.get((metodo, caminho))
+
+
+def montar_environ(scope, corpo):
+    """Environ WSGI (PEP 3333) a partir do scope HTTP do ASGI"""
+    servidor = scope.get('server') or ('localhost', 80)
+    cliente = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': servidor[0],
+        'SERVER_PORT': str(servidor[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': cliente[0],
+        'REMOTE_PORT': str(cliente[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        # O corpo já foi lido inteiro: o tamanho vale também para envios chunked
+        'CONTENT_LENGTH': str(len(corpo)),
+        'wsgi.input': io.BytesIO(corpo),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for nome, valor in scope['headers']:
+        nome = nome.decode('latin-1')
+        valor = valor.decode('latin-1')
+        if nome == 'content-type':
+            environ['CONTENT_TYPE'] = valor
+        elif nome != 'content-length':
+            chave = 'HTTP_' + nome.upper().replace('-', '_')
+            environ[chave] = f'{environ[chave]},{valor}' if chave in environ else valor
+    return environ
+
+
+class AdaptadorWSGI:
+    """Executa uma aplicação WSGI num pool limitado, enviando o corpo parte a parte"""
+
+    def __init__(self, app, executor):
+        self.app = app
+        self.executor = executor
+
+    async def __call__(self, scope, corpo, send, extras=None):
+        environ = montar_environ(scope, corpo)
+        environ.update(extras or {})
+        inicio = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and inicio.get('enviado'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            inicio['status'] = int(status.split(' ', 1)[0])
+            inicio['headers'] = [(nome.lower().encode('latin-1'), valor.encode('latin-1')) for nome, valor in headers]
+            return lambda dados: None
+
+        def iniciar():
+            resultado = self.app(environ, start_response)
+            iterador = iter(resultado)
+            return resultado, iterador, next(iterador, None)
+
+        resultado, iterador, pedaco = await self.executor.executar(iniciar)
+        try:
+            await send({'type': 'http.response.start', 'status': inicio['status'], 'headers': inicio['headers']})
+            inicio['enviado'] = True
+            if pedaco is None:
+                await send({'type': 'http.response.body', 'body': b''})
+            # Respostas comuns terminam no segundo next(); streams seguem até o fim
+            while pedaco is not None:
+                proximo = await self.executor.executar(next, iterador, None)
+                await send({'type': 'http.response.body', 'body': pedaco, 'more_body': proximo is not None})
+                pedaco = proximo
+        finally:
+            if hasattr(resultado, 'close'):
+                await self.executor.executar(resultado.close)
+
+
+class AplicacaoASGI:
+    """Aplicação ASGI: rotas assíncronas primeiro, o restante para o Flask"""
+
+    def __init__(self, app_flask, roteador, executor_wsgi, executor_banco, max_corpo=10 * 1024 * 1024,
+                 admissao=None):
+        self.app_flask = app_flask
+        self.roteador = roteador
+        self.executor_wsgi = executor_wsgi
+        self.executor_banco = executor_banco
+        self.max_corpo = max_corpo
+        self.admissao = admissao
+        self.wsgi = AdaptadorWSGI(app_flask, executor_wsgi)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._ciclo_de_vida(receive, send)
+        elif scope['type'] == 'http':
+            # Admissão no event loop: a fila não ocupa threads do pool do Flask
+            classe = self.admissao.classificar(scope['method'], scope['path']) if self.admissao else None
+            if classe is None:
+                await self._despachar(scope, receive, send)
+            elif await classe.entrar_assincrono():
+                try:
+                    await self._despachar(scope, receive, send, {CHAVE_ADMITIDA: True})
+                finally:
+                    classe.liberar()
+            else:
+                await self._rejeitar(scope, send)
+
+    async def _despachar(self, scope, receive, send, extras=None):
+        corrotina = self.roteador.encontrar(scope['method'], scope['path'])
+        if corrotina is not None:
+            await self._rota_assincrona(corrotina, scope, receive, send)
+        else:
+            corpo = await self._ler_corpo(receive)
+            if corpo is None:
+                await self._enviar(send, RespostaJSON({'message': 'Corpo da requisição muito grande'}, 413))
+            else:
+                await self.wsgi(scope, corpo, send, extras)
+
+    async def _rejeitar(self, scope, send):
+        """503 imediato, sem ler o corpo nem chegar ao Flask"""
+        corpo, headers = self.admissao.sobrecarga()
+        await self._enviar(send, RespostaJSON(corpo, 503, {nome.lower(): valor for nome, valor in headers.items()}))
+        metricas.observar('http_request_duration_seconds',
+                          (('metodo', scope['method']), ('rota', scope['path']), ('status', '503')), 0.0)
+
+    async def _ciclo_de_vida(self, receive, send):
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensagem['type'] == 'lifespan.shutdown':
+                self.executor_wsgi.encerrar()
+                self.executor_banco.encerrar()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _ler_corpo(self, receive):
+        """Corpo completo da requisição (None se exceder o limite)"""
+        partes = []
+        tamanho = 0
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'http.disconnect':
+                break
+            partes.append(mensagem.get('body', b''))
+            tamanho += len(partes[-1])
+            if tamanho > self.max_corpo:
+                return None
+            if not mensagem.get('more_body'):
+                break
+        return b''.join(partes)
+
+    async def _rota_assincrona(self, corrotina, scope, receive, send):
+        rotulo_rota = (('rota', scope['path']),)
+        inicio = time.perf_counter()
+        requisicao = Requisicao(scope, self.executor_banco)
+        try:
+            resposta = await corrotina(requisicao)
+        except ErroHTTP as erro:
+            resposta = RespostaJSON({'message': erro.mensagem}, erro.status)
+        except Exception as erro:
+            resposta = RespostaJSON({'message': f'Erro interno: {erro}'}, 500)
+
+        if isinstance(resposta, RespostaStream):
+            metricas.ajustar_gauge('http_requests_in_flight', rotulo_rota, 1)
+            try:
+                await self._transmitir(resposta, receive, send)
+            finally:
+                metricas.ajustar_gauge('http_requests_in_flight', rotulo_rota, -1)
+        else:
+            await self._enviar(send, resposta)
+            metricas.observar('http_request_duration_seconds',
+                              (('metodo', scope['method']), ('rota', scope['path']), ('status', str(resposta.status))),
+                              time.perf_counter() - inicio)
+
+    @staticmethod
+    def _cabecalhos(resposta):
+        return [(nome.encode('latin-1'), str(valor).encode('latin-1')) for nome, valor in resposta.headers.items()]
+
+    async def _enviar(self, send, resposta):
+        await send({'type': 'http.response.start', 'status': resposta.status, 'headers': self._cabecalhos(resposta)})
+        await send({'type': 'http.response.body', 'body': resposta.corpo})
+
+    async def _transmitir(self, resposta, receive, send):
+        """
+        Envia um stream até o fim ou até o cliente desconectar
+
+        A espera pela próxima parte corre junto com a escuta de
+        ``http.disconnect``: um cliente que sai libera a corrotina na hora,
+        mesmo que o gerador esteja parado esperando dados.
+        """
+        await send({'type': 'http.response.start', 'status': resposta.status, 'headers': self._cabecalhos(resposta)})
+
+        async def aguardar_desconexao():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        desconexao = asyncio.ensure_future(aguardar_desconexao())
+        iterador = resposta.corpo.__aiter__()
+        try:
+            while True:
+                proxima = asyncio.ensure_future(iterador.__anext__())
+                await asyncio.wait((proxima, desconexao), return_when=asyncio.FIRST_COMPLETED)
+                if not proxima.done():
+                    # Cliente saiu: o cancelamento executa o finally do gerador
+                    proxima.cancel()
+                    await asyncio.gather(proxima, return_exceptions=True)
+                    return
+                try:
+                    pedaco = proxima.result()
+                except StopAsyncIteration:
+                    break
+                await send({'type': 'http.response.body', 'body': pedaco, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            desconexao.cancel()
+            if hasattr(iterador, 'aclose'):
+                try:
+                    await iterador.aclose()
+                except RuntimeError:
+                    # Gerador ainda em execução (cancelado no meio de um await)
+                    pass
+
+
+def criar_app_asgi(app=None, config=Config):
+    """
+    Cria a aplicação ASGI
+
+    Args:
+        app (Flask): Aplicação já criada (padrão: ``create_app()``)
+    """
+    from src.utils.assincrono import ExecutorLimitado
+    from src.routes.assincronas import create_async_routes
+
+    if app is None:
+        from src.api.app import create_app
+        app, api = create_app()
+
+    executor_wsgi = ExecutorLimitado('wsgi', config.ASGI_WSGI_THREADS, config.ASGI_WSGI_QUEUE)
+    executor_banco = ExecutorLimitado('banco', config.ASGI_DB_THREADS, config.ASGI_DB_QUEUE)
+    metricas.registrar_coletor('executor_wsgi', executor_wsgi.coletor())
+    metricas.registrar_coletor('executor_banco', executor_banco.coletor())
+
+    roteador = RoteadorAssincrono()
+    create_async_routes(roteador)
+
+    return AplicacaoASGI(app, roteador, executor_wsgi, executor_banco, config.ASGI_MAX_BODY_BYTES,
+                         app.extensions.get('admissao'))
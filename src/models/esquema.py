@@ -0,0 +1,59 @@
+"""
+Criação do esquema do banco uma única vez por versão
+O DDL de todas as tabelas roda numa só conexão e transação, e a versão
+aplicada fica em ``PRAGMA user_version``. Nas partidas seguintes (novos
+workers, reinícios, testes) basta ler o pragma para pular o DDL.
+
+Ao alterar qualquer DDL (tabela, coluna ou índice novo), incremente
+``VERSAO_ESQUEMA``: os bancos existentes rodam o DDL idempotente de novo
+na próxima partida.
+"""
+
+import os
+import sqlite3
+
+from src.models.tarefa import criar_tabela_tarefas
+from src.models.tarefa_alteracoes import criar_tabela_alteracoes
+from src.models.usuario import criar_tabelas_auth
+
+# 1: tarefas e autenticação
+# 2: log de alterações das tarefas (tarefas_alteracoes)
+VERSAO_ESQUEMA = 2
+
+def versao_esquema(conn):
+    """Versão do esquema gravada no banco (0 em bancos novos ou anteriores ao controle)"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def garantir_esquema(db_path=None):
+    """
+    Cria ou atualiza o esquema se a versão gravada for anterior à atual
+    
+    ``BEGIN IMMEDIATE`` serializa workers que partem ao mesmo tempo: quem
+    obtém o lock aplica o DDL e os demais encontram a versão já gravada.
+    
+    Returns:
+        bool: True se o DDL foi executado nesta chamada
+    """
+    db_path = db_path or os.environ.get('DATABASE_PATH', 'tarefas.db')
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if versao_esquema(conn) >= VERSAO_ESQUEMA:
+            return False
+        
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if versao_esquema(conn) >= VERSAO_ESQUEMA:
+                conn.execute('ROLLBACK')
+                return False
+            cursor = conn.cursor()
+            criar_tabela_tarefas(cursor)
+            criar_tabelas_auth(cursor)
+            criar_tabela_alteracoes(cursor)
+            cursor.execute(f'PRAGMA user_version = {VERSAO_ESQUEMA}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return True
+    finally:
+        conn.close()
@@ -0,0 +1,166 @@
+"""
+Persistência dos níveis de acesso e suas permissões
+"""
+
+import sqlite3
+
+from src.models.usuario import get_db_connection
+
+# Chave da tabela versoes_cache usada pelo registro de permissões
+CHAVE_VERSAO_NIVEIS = 'niveis_acesso'
+
+def criar_tabelas_niveis(cursor):
+    """Cria as tabelas de níveis, permissões e versões (se não existirem)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS niveis_acesso (
+            nome TEXT PRIMARY KEY,
+            titulo TEXT NOT NULL,
+            descricao TEXT,
+            nivel INTEGER NOT NULL
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS niveis_permissoes (
+            nivel_nome TEXT NOT NULL,
+            permissao TEXT NOT NULL,
+            PRIMARY KEY (nivel_nome, permissao),
+            FOREIGN KEY (nivel_nome) REFERENCES niveis_acesso (nome)
+        )
+    ''')
+
+    # Versões incrementadas a cada alteração, lidas pelos caches em memória
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versoes_cache (
+            chave TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL
+        )
+    ''')
+
+    # Popular com os níveis padrão na primeira execução
+    cursor.execute('SELECT COUNT(*) FROM niveis_acesso')
+    if cursor.fetchone()[0] == 0:
+        from src.utils.permissions import NIVEIS_ACESSO
+
+        cursor.executemany(
+            'INSERT INTO niveis_acesso (nome, titulo, descricao, nivel) VALUES (?, ?, ?, ?)',
+            [(nome, dados['nome'], dados['descricao'], dados['nivel']) for nome, dados in NIVEIS_ACESSO.items()]
+        )
+        cursor.executemany(
+            'INSERT INTO niveis_permissoes (nivel_nome, permissao) VALUES (?, ?)',
+            [(nome, permissao) for nome, dados in NIVEIS_ACESSO.items() for permissao in dados['permissoes']]
+        )
+        incrementar_versao(cursor, CHAVE_VERSAO_NIVEIS)
+
+def incrementar_versao(cursor, chave):
+    """Incrementa a versão de uma chave dentro da transação atual e retorna a nova versão"""
+    cursor.execute('''
+        INSERT INTO versoes_cache (chave, versao) VALUES (?, 1)
+        ON CONFLICT (chave) DO UPDATE SET versao = versao + 1
+        RETURNING versao
+    ''', (chave,))
+    return cursor.fetchone()[0]
+
+def obter_versao(chave):
+    """Retorna a versão atual de uma chave (0 se nunca alterada)"""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT versao FROM versoes_cache WHERE chave = ?', (chave,))
+        linha = cursor.fetchone()
+        return linha[0] if linha else 0
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        conn.close()
+
+def obter_versao_niveis():
+    """Retorna a versão atual dos níveis de acesso"""
+    return obter_versao(CHAVE_VERSAO_NIVEIS)
+
+def carregar_niveis():
+    """
+    Lê todos os níveis e permissões numa única transação de leitura
+
+    Returns:
+        tuple: (versão, ``{nome: {'nome', 'descricao', 'nivel', 'permissoes'}}``)
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        cursor.execute('SELECT versao FROM versoes_cache WHERE chave = ?', (CHAVE_VERSAO_NIVEIS,))
+        linha = cursor.fetchone()
+        versao = linha[0] if linha else 0
+
+        cursor.execute('SELECT nome, titulo, descricao, nivel FROM niveis_acesso ORDER BY nivel, nome')
+        niveis = {
+            nome: {'nome': titulo, 'descricao': descricao, 'nivel': nivel, 'permissoes': []}
+            for nome, titulo, descricao, nivel in cursor.fetchall()
+        }
+
+        cursor.execute('SELECT nivel_nome, permissao FROM niveis_permissoes ORDER BY rowid')
+        for nivel_nome, permissao in cursor.fetchall():
+            if nivel_nome in niveis:
+                niveis[nivel_nome]['permissoes'].append(permissao)
+
+        conn.rollback()
+        return versao, niveis
+    finally:
+        conn.close()
+
+def salvar_nivel(nome, titulo, descricao, nivel, permissoes):
+    """
+    Cria ou substitui um nível de acesso e suas permissões
+
+    Returns:
+        bool: True se o nível foi criado, False se foi atualizado
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1 FROM niveis_acesso WHERE nome = ?', (nome,))
+        criado = cursor.fetchone() is None
+
+        cursor.execute('''
+            INSERT INTO niveis_acesso (nome, titulo, descricao, nivel) VALUES (?, ?, ?, ?)
+            ON CONFLICT (nome) DO UPDATE SET titulo = excluded.titulo, descricao = excluded.descricao, nivel = excluded.nivel
+        ''', (nome, titulo, descricao, nivel))
+        cursor.execute('DELETE FROM niveis_permissoes WHERE nivel_nome = ?', (nome,))
+        cursor.executemany(
+            'INSERT INTO niveis_permissoes (nivel_nome, permissao) VALUES (?, ?)',
+            [(nome, permissao) for permissao in dict.fromkeys(permissoes)]
+        )
+        incrementar_versao(cursor, CHAVE_VERSAO_NIVEIS)
+        conn.commit()
+        return criado
+    finally:
+        conn.close()
+
+def remover_nivel(nome):
+    """
+    Remove um nível de acesso que não esteja atribuído a nenhum usuário
+
+    Raises:
+        ValueError: Se algum usuário ainda usa o nível
+
+    Returns:
+        bool: True se o nível existia
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM usuarios WHERE nivel_acesso = ?', (nome,))
+        em_uso = cursor.fetchone()[0]
+        if em_uso:
+            raise ValueError(f"Nível em uso por {em_uso} usuário(s)")
+
+        cursor.execute('DELETE FROM niveis_permissoes WHERE nivel_nome = ?', (nome,))
+        cursor.execute('DELETE FROM niveis_acesso WHERE nome = ?', (nome,))
+        existia = cursor.rowcount > 0
+        if existia:
+            incrementar_versao(cursor, CHAVE_VERSAO_NIVEIS)
+        conn.commit()
+        return existia
+    finally:
+        conn.close()
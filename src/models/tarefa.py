@@ -2,6 +2,7 @@ from flask_restx import fields
 import sqlite3
 import os
 from datetime import datetime
+from src.utils.metrics import ConexaoMedida
 
 def create_models(api):
     """Cria os modelos para Swagger"""
@@ -26,7 +27,8 @@ def create_models(api):
     # Modelo para lista de tarefas
     tarefa_lista_model = api.model('TarefaLista', {
         'tarefas': fields.List(fields.Nested(tarefa_resposta_model), description='Lista de tarefas'),
-        'total': fields.Integer(description='Total de tarefas')
+        'total': fields.Integer(description='Total de tarefas'),
+        'seq': fields.Integer(description='Posição do log de alterações (since para /tarefas/changes)')
     })
     
     # Modelo para mensagem de resposta
@@ -39,12 +41,19 @@ def create_models(api):
 
 def init_database():
     """Inicializa o banco de dados SQLite"""
-    db_path = 'tarefas.db'
+    db_path = os.environ.get('DATABASE_PATH', 'tarefas.db')
     
     # Criar tabela se não existir
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
+    criar_tabela_tarefas(cursor)
+    
+    conn.commit()
+    conn.close()
+
+def criar_tabela_tarefas(cursor):
+    """Cria a tabela de tarefas (se não existir)"""
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS tarefas (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -56,10 +65,34 @@ def init_database():
             usuario_id INTEGER
         )
     ''')
-    
-    conn.commit()
-    conn.close()
+
+def tarefa_para_dict(linha):
+    """Converte uma linha de ``SELECT * FROM tarefas`` no dicionário de resposta"""
+    # A linha pode trazer colunas extras (usuario_id); o fatiamento para
+    # desempacotar custa mais que indexar as seis colunas
+    return {
+        'id': linha[0],
+        'titulo': linha[1],
+        'descricao': linha[2],
+        'status': linha[3],
+        'data_criacao': linha[4],
+        'data_atualizacao': linha[5]
+    }
 
 def get_db_connection():
-    """Retorna uma conexão com o banco de dados"""
-    return sqlite3.connect('tarefas.db')
+    """Retorna uma conexão com o banco de dados (com o tempo de banco medido por requisição)"""
+    db_path = os.environ.get('DATABASE_PATH', 'tarefas.db')
+    return sqlite3.connect(db_path, factory=ConexaoMedida)
+
+def ler_lote_tarefas(apos_id=0, limite=500):
+    """
+    Lê até ``limite`` tarefas com id maior que ``apos_id``, em ordem de id
+
+    Paginação por chave (sem OFFSET): cada lote custa o mesmo, em qualquer
+    ponto da tabela. O lote seguinte começa no id da última linha.
+    """
+    conn = get_db_connection()
+    try:
+        return conn.execute('SELECT * FROM tarefas WHERE id > ? ORDER BY id LIMIT ?', (apos_id, limite)).fetchall()
+    finally:
+        conn.close()
@@ -0,0 +1,177 @@
+"""
+Registro de alterações das tarefas (feed incremental)
+Cada escrita em ``tarefas`` grava, na mesma transação, uma linha em
+``tarefas_alteracoes`` com um número de sequência crescente (``seq``).
+Clientes guardam o último ``seq`` recebido e pedem apenas o que mudou
+depois dele, em vez de recarregar a lista inteira.
+
+Compactação automática:
+
+- Cada tarefa mantém só a sua alteração mais recente: ao gravar uma nova,
+  as anteriores da mesma tarefa são removidas (o cliente aplica o estado
+  atual, não o histórico). O log tem no máximo uma linha por tarefa.
+- Exclusões mais antigas que ``retencao`` sequências são descartadas e o
+  maior ``seq`` descartado vira o piso do log. Clientes com ``since``
+  abaixo do piso podem ter perdido exclusões e recebem ``reset``.
+"""
+
+from flask_restx import fields
+
+from src.models.tarefa import tarefa_para_dict
+
+OPERACOES = ('insert', 'update', 'delete')
+
+# Chave da tabela versoes_cache com o maior seq descartado pela compactação
+CHAVE_PISO = 'tarefas_alteracoes_piso'
+
+# Sequências durante as quais uma exclusão continua no log
+RETENCAO_EXCLUSOES = 10000
+
+def create_alteracoes_models(api, tarefa_resposta_model):
+    """Cria os modelos do feed de alterações para Swagger"""
+    alteracao_model = api.model('TarefaAlteracao', {
+        'seq': fields.Integer(description='Número de sequência da alteração'),
+        'operacao': fields.String(enum=list(OPERACOES), description='Operação (insert/update aplicam o estado atual)'),
+        'tarefa_id': fields.Integer(description='ID da tarefa'),
+        'tarefa': fields.Nested(tarefa_resposta_model, allow_null=True, description='Estado atual (nulo se excluída)')
+    })
+
+    alteracoes_model = api.model('TarefaAlteracoes', {
+        'alteracoes': fields.List(fields.Nested(alteracao_model), description='Alterações em ordem de seq'),
+        'seq': fields.Integer(description='Valor de since para a próxima consulta'),
+        'mais': fields.Boolean(description='Há mais alterações além desta página'),
+        'reset': fields.Boolean(description='Descartar o estado local e recomeçar com since=0')
+    })
+
+    return alteracao_model, alteracoes_model
+
+def criar_tabela_alteracoes(cursor):
+    """Cria a tabela do log (se não existir) e registra tarefas que ainda não constam nele"""
+    # AUTOINCREMENT: um seq nunca é reaproveitado, mesmo após a compactação
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tarefas_alteracoes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tarefa_id INTEGER NOT NULL,
+            operacao TEXT NOT NULL,
+            instante TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tarefas_alteracoes_tarefa ON tarefas_alteracoes (tarefa_id)')
+    # Só as exclusões são compactadas por idade
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tarefas_alteracoes_exclusoes
+        ON tarefas_alteracoes (seq) WHERE operacao = 'delete'
+    ''')
+    registrar_tarefas_existentes(cursor)
+
+def registrar_tarefas_existentes(cursor):
+    """
+    Registra como 'insert' as tarefas sem alteração no log
+
+    Usado na criação do log em bancos existentes e após cargas em massa
+    que inserem direto na tabela ``tarefas``.
+    """
+    cursor.execute('''
+        INSERT INTO tarefas_alteracoes (tarefa_id, operacao, instante)
+        SELECT id, 'insert', data_atualizacao FROM tarefas
+        WHERE id NOT IN (SELECT tarefa_id FROM tarefas_alteracoes)
+        ORDER BY id
+    ''')
+    return cursor.rowcount
+
+def registrar_alteracao(cursor, tarefa_id, operacao, instante, retencao=RETENCAO_EXCLUSOES):
+    """
+    Grava uma alteração na transação do cursor (antes do commit da escrita)
+
+    Args:
+        cursor: Cursor da conexão que alterou a tarefa
+        tarefa_id (int): Tarefa alterada
+        operacao (str): 'insert', 'update' ou 'delete'
+        instante (str): Data da alteração (ISO)
+        retencao (int): Sequências durante as quais uma exclusão é mantida
+
+    Returns:
+        int: ``seq`` da alteração
+    """
+    cursor.execute('DELETE FROM tarefas_alteracoes WHERE tarefa_id = ?', (tarefa_id,))
+    cursor.execute(
+        'INSERT INTO tarefas_alteracoes (tarefa_id, operacao, instante) VALUES (?, ?, ?)',
+        (tarefa_id, operacao, instante)
+    )
+    seq = cursor.lastrowid
+    compactar(cursor, seq - retencao)
+    return seq
+
+def compactar(cursor, ate_seq):
+    """Descarta exclusões com ``seq <= ate_seq`` e eleva o piso do log (retorna as descartadas)"""
+    cursor.execute(
+        "SELECT MAX(seq) FROM tarefas_alteracoes WHERE operacao = 'delete' AND seq <= ?", (ate_seq,)
+    )
+    maior = cursor.fetchone()[0]
+    if maior is None:
+        return 0
+    cursor.execute("DELETE FROM tarefas_alteracoes WHERE operacao = 'delete' AND seq <= ?", (maior,))
+    removidas = cursor.rowcount
+    _elevar_piso(cursor, maior)
+    return removidas
+
+def reiniciar_alteracoes(cursor):
+    """Esvazia o log (ex.: após apagar todas as tarefas); todo cliente com ``since`` recebe reset"""
+    cursor.execute('DELETE FROM tarefas_alteracoes')
+    _elevar_piso(cursor, seq_atual(cursor))
+
+def _elevar_piso(cursor, seq):
+    cursor.execute('''
+        INSERT INTO versoes_cache (chave, versao) VALUES (?, ?)
+        ON CONFLICT (chave) DO UPDATE SET versao = MAX(versao, excluded.versao)
+    ''', (CHAVE_PISO, seq))
+
+def seq_atual(cursor):
+    """Último ``seq`` atribuído (0 se o log nunca recebeu alterações)"""
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'tarefas_alteracoes'")
+    linha = cursor.fetchone()
+    return linha[0] if linha else 0
+
+def listar_alteracoes(conn, desde=0, limite=100):
+    """
+    Lê uma página de alterações posteriores a ``desde``
+
+    ``desde=0`` é sempre aceito: como o log guarda a alteração mais recente
+    de cada tarefa, lê-lo desde o início reconstrói a lista completa.
+
+    Returns:
+        dict: ``alteracoes`` (seq, operacao, tarefa_id e a tarefa atual, ou
+        None se excluída), ``seq`` (onde continuar), ``mais`` (há outra
+        página) e ``reset`` (o cliente deve descartar o estado local e
+        recomeçar de ``desde=0``)
+    """
+    cursor = conn.cursor()
+    # Piso e página lidos no mesmo snapshot
+    cursor.execute('BEGIN')
+    cursor.execute('SELECT versao FROM versoes_cache WHERE chave = ?', (CHAVE_PISO,))
+    linha = cursor.fetchone()
+    if desde and linha and desde < linha[0]:
+        return {'alteracoes': [], 'seq': 0, 'mais': False, 'reset': True}
+
+    cursor.execute('''
+        SELECT a.seq, a.operacao, a.tarefa_id, t.*
+        FROM tarefas_alteracoes a LEFT JOIN tarefas t ON t.id = a.tarefa_id
+        WHERE a.seq > ? ORDER BY a.seq LIMIT ?
+    ''', (desde, limite + 1))
+    linhas = cursor.fetchall()
+    mais = len(linhas) > limite
+    alteracoes = [
+        {
+            'seq': seq,
+            'operacao': operacao,
+            'tarefa_id': tarefa_id,
+            'tarefa': tarefa_para_dict(tarefa) if tarefa[0] is not None else None
+        }
+        for seq, operacao, tarefa_id, *tarefa in linhas[:limite]
+    ]
+    if alteracoes:
+        proximo = alteracoes[-1]['seq']
+    else:
+        # Nada novo: o cliente pode pular direto para o último seq atribuído
+        proximo = max(desde, seq_atual(cursor))
+    return {'alteracoes': alteracoes, 'seq': proximo, 'mais': mais, 'reset': False}
@@ -1,14 +1,28 @@
 from flask_restx import fields
 import sqlite3
 import os
-import pyotp
-import qrcode
+import secrets
 from datetime import datetime, timedelta, timezone
-import jwt
+from typing import NamedTuple, Optional
 from werkzeug.security import generate_password_hash, check_password_hash
+from src.utils.qr_cache import qr_code_cache
+from src.utils.metrics import ConexaoMedida
+
+# pyotp e jwt (que carrega cryptography) são importados dentro dos métodos
+# que os usam: a partida da aplicação e dos workers não paga por eles
+
+# Modelos de autenticação, na ordem retornada por create_auth_models
+MODELOS_AUTH = ('UsuarioRegistro', 'UsuarioLogin', 'Verificar2FA', 'UsuarioResposta', 'LoginResposta')
 
 def create_auth_models(api):
-    """Cria os modelos para autenticação no Swagger"""
+    """
+    Cria os modelos para autenticação no Swagger
+    
+    Os namespaces de autenticação e de usuários compartilham os modelos:
+    a segunda chamada com a mesma Api reaproveita os já registrados.
+    """
+    if all(nome in api.models for nome in MODELOS_AUTH):
+        return tuple(api.models[nome] for nome in MODELOS_AUTH)
     
     # Modelo para registro de usuário
     usuario_registro_model = api.model('UsuarioRegistro', {
@@ -54,6 +68,13 @@ def init_auth_database():
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
+    criar_tabelas_auth(cursor)
+    
+    conn.commit()
+    conn.close()
+
+def criar_tabelas_auth(cursor):
+    """Cria as tabelas de usuários, sessões e níveis de acesso (se não existirem)"""
     # Tabela de usuários
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS usuarios (
@@ -81,30 +102,49 @@ def init_auth_database():
         )
     ''')
     
+    # Índices da listagem paginada (ordem por data) e da busca por prefixo
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_usuarios_data_criacao ON usuarios (data_criacao, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_usuarios_nivel_data ON usuarios (nivel_acesso, data_criacao, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_usuarios_nome_nocase ON usuarios (nome COLLATE NOCASE)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_usuarios_email_nocase ON usuarios (email COLLATE NOCASE)')
+    
+    # Tabelas de níveis de acesso dinâmicos
+    from src.models.nivel_acesso import criar_tabelas_niveis
+    criar_tabelas_niveis(cursor)
+    
     # Adicionar coluna usuario_id na tabela tarefas se não existir
     try:
         cursor.execute('ALTER TABLE tarefas ADD COLUMN usuario_id INTEGER')
     except sqlite3.OperationalError:
         pass  # Coluna já existe
-    
-    conn.commit()
-    conn.close()
 
 def get_db_connection():
-    """Retorna uma conexão com o banco de dados"""
+    """Retorna uma conexão com o banco de dados (com o tempo de banco medido por requisição)"""
     db_path = os.environ.get('DATABASE_PATH', 'tarefas.db')
-    return sqlite3.connect(db_path)
+    return sqlite3.connect(db_path, factory=ConexaoMedida)
 
-class Usuario:
-    def __init__(self, id=None, nome=None, email=None, senha_hash=None, secret_2fa=None, nivel_acesso='visualizacao', ativo=True, data_criacao=None):
-        self.id = id
-        self.nome = nome
-        self.email = email
-        self.senha_hash = senha_hash
-        self.secret_2fa = secret_2fa
-        self.nivel_acesso = nivel_acesso
-        self.ativo = ativo
-        self.data_criacao = data_criacao
+# Colunas lidas em cada uso, na ordem dos campos de Usuario
+COLUNAS_USUARIO = 'id, nome, email, secret_2fa, nivel_acesso, ativo, data_criacao'
+COLUNAS_USUARIO_LOGIN = COLUNAS_USUARIO + ', senha_hash'
+COLUNAS_USUARIO_SESSAO = 'u.id, u.nome, u.email, u.secret_2fa, u.nivel_acesso, u.ativo, u.data_criacao'
+
+class Usuario(NamedTuple):
+    """
+    Registro imutável de usuário
+    
+    Tupla nomeada (sem ``__dict__`` por instância). As consultas selecionam
+    as colunas na ordem dos campos e constroem o registro com
+    ``Usuario(*linha)``; ``senha_hash`` é o último campo e só é lido no
+    caminho de login. Para alterar um campo use ``usuario._replace(...)``.
+    """
+    id: Optional[int] = None
+    nome: Optional[str] = None
+    email: Optional[str] = None
+    secret_2fa: Optional[str] = None
+    nivel_acesso: str = 'visualizacao'
+    ativo: bool = True
+    data_criacao: Optional[str] = None
+    senha_hash: Optional[str] = None
     
     @staticmethod
     def criar(nome, email, senha):
@@ -122,6 +162,7 @@ class Usuario:
         senha_hash = generate_password_hash(senha)
         
         # Gerar secret para 2FA
+        import pyotp
         secret_2fa = pyotp.random_base32()
         
         data_atual = datetime.now().isoformat()
@@ -132,9 +173,15 @@ class Usuario:
         ''', (nome, email, senha_hash, secret_2fa, 'visualizacao', data_atual))
         
         usuario_id = cursor.lastrowid
+        
+        # Versão lida pelos caches de usuários (índice de sugestão)
+        from src.models.usuario_lote import versionar_usuarios, notificar_alteracao_usuarios
+        versao = versionar_usuarios(cursor)
         conn.commit()
         conn.close()
         
+        notificar_alteracao_usuarios('criacao', [usuario_id], versao)
+        
         return Usuario(id=usuario_id, nome=nome, email=email, secret_2fa=secret_2fa, nivel_acesso='visualizacao', data_criacao=data_atual)
     
     @staticmethod
@@ -143,59 +190,53 @@ class Usuario:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM usuarios WHERE email = ? AND ativo = 1', (email,))
+        cursor.execute(f'SELECT {COLUNAS_USUARIO_LOGIN} FROM usuarios WHERE email = ? AND ativo = 1', (email,))
         usuario_data = cursor.fetchone()
         conn.close()
         
         if not usuario_data:
             return None
         
-        return Usuario(
-            id=usuario_data[0],
-            nome=usuario_data[1],
-            email=usuario_data[2],
-            senha_hash=usuario_data[3],
-            secret_2fa=usuario_data[4],
-            nivel_acesso=usuario_data[5],
-            ativo=usuario_data[6],
-            data_criacao=usuario_data[7]
-        )
+        return Usuario(*usuario_data)
     
     def verificar_senha(self, senha):
         """Verifica se a senha está correta"""
         return check_password_hash(self.senha_hash, senha)
     
-    def gerar_qr_code_2fa(self):
-        """Gera QR Code para configuração do Google Authenticator"""
-        if not self.secret_2fa:
-            return None
-        
+    def provisioning_uri_2fa(self):
+        """Retorna a URI otpauth:// usada pelo Google Authenticator"""
+        import pyotp
         totp = pyotp.TOTP(self.secret_2fa)
-        provisioning_uri = totp.provisioning_uri(
+        return totp.provisioning_uri(
             name=self.email,
             issuer_name="DPM Task Manager"
         )
+    
+    def gerar_qr_code_png(self):
+        """
+        Retorna o PNG do QR Code do 2FA a partir do cache em memória
         
-        # Gerar QR Code
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(provisioning_uri)
-        qr.make(fit=True)
-        
-        # Salvar QR Code
-        qr_dir = "static/qr_codes"
-        os.makedirs(qr_dir, exist_ok=True)
-        qr_path = f"{qr_dir}/qr_{self.id}.png"
+        Returns:
+            tuple: (bytes do PNG, ETag) ou None se o 2FA não estiver configurado
+        """
+        if not self.secret_2fa:
+            return None
         
-        img = qr.make_image(fill_color="black", back_color="white")
-        img.save(qr_path)
+        return qr_code_cache.obter_png(self.id, self.secret_2fa, self.provisioning_uri_2fa())
+    
+    def gerar_qr_code_2fa(self):
+        """Gera QR Code para configuração do Google Authenticator (data URI)"""
+        if not self.secret_2fa:
+            return None
         
-        return f"/static/qr_codes/qr_{self.id}.png"
+        return qr_code_cache.obter_data_uri(self.id, self.secret_2fa, self.provisioning_uri_2fa())
     
     def verificar_codigo_2fa(self, codigo):
         """Verifica código do Google Authenticator"""
         if not self.secret_2fa:
             return False
         
+        import pyotp
         totp = pyotp.TOTP(self.secret_2fa)
         return totp.verify(codigo)
     
@@ -204,10 +245,13 @@ class Usuario:
         payload = {
             'user_id': self.id,
             'email': self.email,
-            'exp': datetime.now(timezone.utc) + timedelta(days=7)
+            'exp': datetime.now(timezone.utc) + timedelta(days=7),
+            # Dois logins no mesmo segundo gerariam o mesmo token (sessoes.token é UNIQUE)
+            'jti': secrets.token_hex(8)
         }
         
         # Usar secret do config ou padrão
+        import jwt
         secret = os.environ.get('JWT_SECRET', 'dev-secret-key')
         token = jwt.encode(payload, secret, algorithm='HS256')
         
@@ -236,6 +280,7 @@ class Usuario:
     @staticmethod
     def verificar_jwt_token(token):
         """Verifica e retorna usuário do JWT token"""
+        import jwt
         try:
             secret = os.environ.get('JWT_SECRET', 'dev-secret-key')
             payload = jwt.decode(token, secret, algorithms=['HS256'])
@@ -246,8 +291,8 @@ class Usuario:
             
             # Buscar sessão - comparação de string ISO funciona bem no SQLite
             now_iso = datetime.now(timezone.utc).isoformat()
-            cursor.execute('''
-                SELECT s.*, u.* FROM sessoes s
+            cursor.execute(f'''
+                SELECT {COLUNAS_USUARIO_SESSAO} FROM sessoes s
                 JOIN usuarios u ON s.usuario_id = u.id
                 WHERE s.token = ? AND s.ativo = 1 AND s.expires_at > ?
             ''', (token, now_iso))
@@ -258,15 +303,7 @@ class Usuario:
             if not sessao_data:
                 return None
             
-            return Usuario(
-                id=sessao_data[6],
-                nome=sessao_data[7],
-                email=sessao_data[8],
-                secret_2fa=sessao_data[10],
-                nivel_acesso=sessao_data[11],
-                ativo=sessao_data[12],
-                data_criacao=sessao_data[13]
-            )
+            return Usuario(*sessao_data)
             
         except jwt.ExpiredSignatureError:
             return None
@@ -280,11 +317,13 @@ class Usuario:
     
     def to_dict(self):
         """Converte usuário para dicionário"""
+        # Desempacotar a tupla uma vez é mais rápido que acessar cada campo
+        id, nome, email, secret_2fa, nivel_acesso, _, data_criacao, _ = self
         return {
-            'id': self.id,
-            'nome': self.nome,
-            'email': self.email,
-            'nivel_acesso': self.nivel_acesso,
-            '2fa_ativo': bool(self.secret_2fa),
-            'data_criacao': self.data_criacao
+            'id': id,
+            'nome': nome,
+            'email': email,
+            'nivel_acesso': nivel_acesso,
+            '2fa_ativo': bool(secret_2fa),
+            'data_criacao': data_criacao
         }
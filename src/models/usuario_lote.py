@@ -0,0 +1,190 @@
+"""
+Operações por conjunto sobre usuários
+Os usuários afetados são selecionados por lista de IDs e/ou filtro, e cada
+alteração é um único UPDATE numa única transação. Sessões e caches dos
+usuários afetados são invalidados de uma vez.
+"""
+
+import json
+import logging
+
+from src.models.usuario import get_db_connection
+from src.models.nivel_acesso import incrementar_versao
+
+logger = logging.getLogger(__name__)
+
+# Chave da tabela versoes_cache incrementada a cada alteração de usuários
+CHAVE_VERSAO_USUARIOS = 'usuarios'
+
+# Critérios aceitos no filtro das operações em lote e da listagem
+CAMPOS_FILTRO = ('nivel_acesso', 'ativo', 'q')
+
+# Funções chamadas como ouvinte(evento, ids, versao) após cada alteração confirmada
+_ouvintes = []
+
+def registrar_ouvinte(ouvinte):
+    """
+    Registra uma função chamada após alterações de usuários
+
+    O ouvinte recebe o evento ('criacao', 'atualizacao', 'nivel' ou
+    'desativacao'), a lista de IDs afetados e a versão ``usuarios``
+    gravada pela alteração (None se desconhecida).
+    """
+    if ouvinte not in _ouvintes:
+        _ouvintes.append(ouvinte)
+    return ouvinte
+
+def remover_ouvinte(ouvinte):
+    """Remove um ouvinte registrado"""
+    if ouvinte in _ouvintes:
+        _ouvintes.remove(ouvinte)
+
+def versionar_usuarios(cursor):
+    """Incrementa a versão 'usuarios' na transação atual e retorna a nova versão"""
+    return incrementar_versao(cursor, CHAVE_VERSAO_USUARIOS)
+
+def notificar_alteracao_usuarios(evento, ids, versao=None):
+    """Avisa os ouvintes (caches em memória) sobre usuários alterados"""
+    if not ids:
+        return
+    for ouvinte in list(_ouvintes):
+        try:
+            ouvinte(evento, ids, versao)
+        except Exception:
+            # A alteração já foi confirmada no banco; um cache com falha
+            # não deve transformá-la em erro
+            logger.exception("Falha ao notificar alteração de usuários (%s)", evento)
+
+def escapar_like(texto):
+    """Escapa os curingas do LIKE para buscar o texto literalmente"""
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def filtro_usuarios(nivel_acesso=None, ativo=None, prefixo=None):
+    """
+    Monta as condições SQL de um filtro de usuários
+
+    A busca por prefixo usa LIKE com os curingas escapados, que o SQLite
+    resolve por faixa nos índices NOCASE de nome e email.
+
+    Returns:
+        tuple: (lista de condições, lista de parâmetros)
+    """
+    condicoes = []
+    parametros = []
+
+    if nivel_acesso:
+        condicoes.append('nivel_acesso = ?')
+        parametros.append(nivel_acesso)
+    if ativo is not None:
+        condicoes.append('ativo = ?')
+        parametros.append(1 if ativo else 0)
+    if prefixo:
+        padrao = escapar_like(prefixo) + '%'
+        condicoes.append("(nome LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\')")
+        parametros.extend([padrao, padrao])
+
+    return condicoes, parametros
+
+def _selecao(ids=None, filtro=None, excluir_id=None):
+    """
+    Monta o WHERE que seleciona os usuários de uma operação em lote
+
+    Raises:
+        ValueError: Se nenhum critério for informado ou o filtro for inválido
+    """
+    filtro = filtro or {}
+    desconhecidos = set(filtro) - set(CAMPOS_FILTRO)
+    if desconhecidos:
+        raise ValueError(f"Filtro inválido: {', '.join(sorted(desconhecidos))}")
+
+    condicoes, parametros = filtro_usuarios(
+        nivel_acesso=filtro.get('nivel_acesso'),
+        ativo=filtro.get('ativo'),
+        prefixo=(filtro.get('q') or '').strip() or None
+    )
+
+    if ids is not None:
+        if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise ValueError("'ids' deve ser uma lista de inteiros")
+        # Lista enviada como um único parâmetro JSON (sem limite de variáveis)
+        condicoes.append('id IN (SELECT value FROM json_each(?))')
+        parametros.append(json.dumps(list(ids)))
+
+    if not condicoes:
+        raise ValueError("Informe 'ids' ou um filtro com ao menos um critério")
+
+    if excluir_id is not None:
+        condicoes.append('id != ?')
+        parametros.append(excluir_id)
+
+    return ' AND '.join(condicoes), parametros
+
+def alterar_nivel_em_lote(nivel_acesso, ids=None, filtro=None, excluir_id=None):
+    """
+    Altera o nível de acesso de vários usuários com um único UPDATE
+
+    Args:
+        nivel_acesso (str): Novo nível (já validado)
+        ids (list): IDs dos usuários
+        filtro (dict): Critérios ``nivel_acesso``, ``ativo`` e ``q``
+        excluir_id (int): Usuário que nunca deve ser alterado (o próprio administrador)
+
+    Returns:
+        list: IDs efetivamente alterados
+    """
+    where, parametros = _selecao(ids, filtro, excluir_id)
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(
+            f'UPDATE usuarios SET nivel_acesso = ? WHERE {where} AND nivel_acesso != ? RETURNING id',
+            [nivel_acesso, *parametros, nivel_acesso]
+        )
+        alterados = sorted(usuario_id for (usuario_id,) in cursor.fetchall())
+        versao = versionar_usuarios(cursor) if alterados else None
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    notificar_alteracao_usuarios('nivel', alterados, versao)
+    return alterados
+
+def desativar_em_lote(ids=None, filtro=None, excluir_id=None):
+    """
+    Desativa vários usuários e revoga suas sessões na mesma transação
+
+    Returns:
+        tuple: (IDs desativados, número de sessões revogadas)
+    """
+    where, parametros = _selecao(ids, filtro, excluir_id)
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(f'UPDATE usuarios SET ativo = 0 WHERE {where} AND ativo = 1 RETURNING id', parametros)
+        desativados = sorted(usuario_id for (usuario_id,) in cursor.fetchall())
+
+        sessoes_revogadas = 0
+        versao = None
+        if desativados:
+            cursor.execute(
+                'UPDATE sessoes SET ativo = 0 WHERE ativo = 1 AND usuario_id IN (SELECT value FROM json_each(?))',
+                (json.dumps(desativados),)
+            )
+            sessoes_revogadas = cursor.rowcount
+            versao = versionar_usuarios(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    notificar_alteracao_usuarios('desativacao', desativados, versao)
+    return desativados, sessoes_revogadas
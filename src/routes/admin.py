@@ -0,0 +1,212 @@
+"""
+Rotas administrativas de diagnóstico (perfis de requisições e memória)
+"""
+
+from flask import Response, current_app, request
+from flask_restx import Resource, Namespace
+from werkzeug.exceptions import HTTPException
+from src.utils.auth_middleware import require_auth
+from src.utils.role_middleware import require_permission
+from src.utils.memory import AGRUPAMENTOS, OperacaoEmAndamento, inspetor_memoria
+from src.utils.profiling import ORDENACOES, tabela_top, pilhas_colapsadas
+
+# Linhas da tabela top-N de um perfil
+TOP_PADRAO = 30
+TOP_MAXIMO = 500
+
+# Linhas das estatísticas e comparações de snapshots de memória
+TOP_MEMORIA_PADRAO = 20
+TOP_MEMORIA_MAXIMO = 200
+
+def create_admin_routes(api):
+    """Cria as rotas administrativas"""
+
+    # Namespace administrativo
+    admin_ns = Namespace('admin', description='Diagnóstico da aplicação (somente administradores)')
+
+    def armazem_perfis():
+        """Armazém de perfis da aplicação (404 se o perfilamento estiver desativado)"""
+        armazem = current_app.extensions.get('perfis')
+        if armazem is None:
+            admin_ns.abort(404, "Perfilamento desativado")
+        return armazem
+
+    @admin_ns.route('/profiles')
+    class ListaPerfis(Resource):
+        @admin_ns.doc('listar_perfis')
+        @admin_ns.response(200, 'Perfis recentes deste worker')
+        @admin_ns.response(403, 'Acesso negado')
+        @require_auth
+        @require_permission('system:admin')
+        def get(self):
+            """Listar os perfis de requisições mais recentes"""
+            return {'perfis': armazem_perfis().listar()}
+
+    @admin_ns.route('/profiles/<string:perfil_id>')
+    class DetalhePerfil(Resource):
+        @admin_ns.doc('obter_perfil', params={
+            'formato': "'tabela' (padrão) ou 'collapsed' (pilhas para flamegraph, só perfis por amostragem)",
+            'top': f'Número de funções na tabela (padrão {TOP_PADRAO}, máximo {TOP_MAXIMO})',
+            'ordenar': f"Critério da tabela: {', '.join(ORDENACOES)}"
+        })
+        @admin_ns.response(200, 'Perfil da requisição')
+        @admin_ns.response(400, 'Formato inválido')
+        @admin_ns.response(404, 'Perfil não encontrado')
+        @require_auth
+        @require_permission('system:admin')
+        def get(self, perfil_id):
+            """Obter um perfil como tabela top-N ou pilhas colapsadas"""
+            try:
+                perfil = armazem_perfis().obter(perfil_id)
+                if perfil is None:
+                    admin_ns.abort(404, "Perfil não encontrado")
+
+                formato = request.args.get('formato', 'tabela')
+                if formato == 'collapsed':
+                    if perfil.get('pilhas') is None:
+                        admin_ns.abort(400, "Pilhas colapsadas disponíveis apenas para perfis por amostragem")
+                    return Response(pilhas_colapsadas(perfil), mimetype='text/plain')
+                if formato != 'tabela':
+                    admin_ns.abort(400, "Formato inválido: use 'tabela' ou 'collapsed'")
+
+                top = min(max(request.args.get('top', TOP_PADRAO, type=int), 1), TOP_MAXIMO)
+                ordenar = request.args.get('ordenar', 'cumtime')
+                resumo = {chave: valor for chave, valor in perfil.items() if chave not in ('funcoes', 'pilhas')}
+                resumo['funcoes'] = tabela_top(perfil, top, ordenar)
+                return resumo
+
+            except HTTPException:
+                raise
+            except Exception as e:
+                admin_ns.abort(500, f"Erro ao obter perfil: {str(e)}")
+
+    def parametros_memoria():
+        """Lê ``top`` e ``agrupar`` das estatísticas de memória"""
+        top = min(max(request.args.get('top', TOP_MEMORIA_PADRAO, type=int), 1), TOP_MEMORIA_MAXIMO)
+        agrupar = request.args.get('agrupar', 'lineno')
+        if agrupar not in AGRUPAMENTOS:
+            admin_ns.abort(400, f"Agrupamento inválido: use {', '.join(AGRUPAMENTOS)}")
+        return top, agrupar
+
+    def operacao_em_andamento():
+        """Resposta 409 quando outra captura ou comparação está em execução"""
+        admin_ns.abort(409, "Outra operação de memória está em andamento neste worker")
+
+    @admin_ns.route('/memory')
+    class EstadoMemoria(Resource):
+        @admin_ns.doc('estado_memoria')
+        @admin_ns.response(200, 'Rastreamento, snapshots, memória do processo e tamanho dos caches')
+        @admin_ns.response(403, 'Acesso negado')
+        @require_auth
+        @require_permission('system:admin')
+        def get(self):
+            """Estado do tracemalloc e tamanho dos caches deste worker"""
+            return inspetor_memoria.estado()
+
+    @admin_ns.route('/memory/start')
+    class IniciarRastreamento(Resource):
+        @admin_ns.doc('iniciar_tracemalloc', params={
+            'quadros': 'Quadros de pilha por alocação (padrão 1, limitado pela configuração)',
+            'duracao': 'Segundos até desligar automaticamente (limitado pela configuração)'
+        })
+        @admin_ns.response(200, 'Rastreamento iniciado')
+        @admin_ns.response(409, 'Rastreamento já estava ligado')
+        @require_auth
+        @require_permission('system:admin')
+        def post(self):
+            """Ligar o tracemalloc"""
+            quadros = request.args.get('quadros', 1, type=int)
+            duracao = request.args.get('duracao', None, type=float)
+            if not inspetor_memoria.iniciar(quadros, duracao):
+                admin_ns.abort(409, "tracemalloc já está ligado")
+            return inspetor_memoria.estado()
+
+    @admin_ns.route('/memory/stop')
+    class PararRastreamento(Resource):
+        @admin_ns.doc('parar_tracemalloc')
+        @admin_ns.response(200, 'Rastreamento desligado')
+        @require_auth
+        @require_permission('system:admin')
+        def post(self):
+            """Desligar o tracemalloc (os snapshots continuam disponíveis)"""
+            parado = inspetor_memoria.parar()
+            return {'parado': parado, 'snapshots': inspetor_memoria.estado()['snapshots']}
+
+    @admin_ns.route('/memory/snapshots')
+    class SnapshotsMemoria(Resource):
+        @admin_ns.doc('capturar_snapshot')
+        @admin_ns.response(201, 'Snapshot capturado')
+        @admin_ns.response(409, 'tracemalloc desligado ou operação em andamento')
+        @require_auth
+        @require_permission('system:admin')
+        def post(self):
+            """Capturar um snapshot das alocações rastreadas"""
+            try:
+                return inspetor_memoria.capturar(), 201
+            except OperacaoEmAndamento:
+                operacao_em_andamento()
+            except RuntimeError as e:
+                admin_ns.abort(409, str(e))
+
+    @admin_ns.route('/memory/snapshots/<int:snapshot_id>')
+    class DetalheSnapshot(Resource):
+        @admin_ns.doc('estatisticas_snapshot', params={
+            'top': f'Número de linhas (padrão {TOP_MEMORIA_PADRAO}, máximo {TOP_MEMORIA_MAXIMO})',
+            'agrupar': f"Agrupamento: {', '.join(AGRUPAMENTOS)}"
+        })
+        @admin_ns.response(200, 'Maiores alocações do snapshot')
+        @admin_ns.response(404, 'Snapshot não encontrado')
+        @require_auth
+        @require_permission('system:admin')
+        def get(self, snapshot_id):
+            """Maiores alocações de um snapshot"""
+            top, agrupar = parametros_memoria()
+            try:
+                return {'id': snapshot_id, 'estatisticas': inspetor_memoria.estatisticas(snapshot_id, top, agrupar)}
+            except KeyError:
+                admin_ns.abort(404, "Snapshot não encontrado")
+            except OperacaoEmAndamento:
+                operacao_em_andamento()
+
+        @admin_ns.doc('descartar_snapshot')
+        @admin_ns.response(204, 'Snapshot descartado')
+        @admin_ns.response(404, 'Snapshot não encontrado')
+        @require_auth
+        @require_permission('system:admin')
+        def delete(self, snapshot_id):
+            """Descartar um snapshot"""
+            if not inspetor_memoria.descartar(snapshot_id):
+                admin_ns.abort(404, "Snapshot não encontrado")
+            return '', 204
+
+    @admin_ns.route('/memory/diff')
+    class DiferencaSnapshots(Resource):
+        @admin_ns.doc('comparar_snapshots', params={
+            'de': 'ID do snapshot anterior',
+            'para': 'ID do snapshot posterior',
+            'top': f'Número de linhas (padrão {TOP_MEMORIA_PADRAO}, máximo {TOP_MEMORIA_MAXIMO})',
+            'agrupar': f"Agrupamento: {', '.join(AGRUPAMENTOS)}"
+        })
+        @admin_ns.response(200, 'Linhas com maior variação de alocação')
+        @admin_ns.response(404, 'Snapshot não encontrado')
+        @require_auth
+        @require_permission('system:admin')
+        def get(self):
+            """Comparar dois snapshots pelas linhas que mais alocaram"""
+            de_id = request.args.get('de', type=int)
+            para_id = request.args.get('para', type=int)
+            if de_id is None or para_id is None:
+                admin_ns.abort(400, "Informe os snapshots 'de' e 'para'")
+            top, agrupar = parametros_memoria()
+            try:
+                return {
+                    'de': de_id,
+                    'para': para_id,
+                    'diferencas': inspetor_memoria.comparar(de_id, para_id, top, agrupar)
+                }
+            except KeyError:
+                admin_ns.abort(404, "Snapshot não encontrado")
+            except OperacaoEmAndamento:
+                operacao_em_andamento()
+
+    return admin_ns
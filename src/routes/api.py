@@ -1,8 +1,17 @@
-from flask import request
+from flask import Response, request
 from flask_restx import Resource, Namespace
 from datetime import datetime
+from werkzeug.exceptions import HTTPException
 from src.utils.role_middleware import require_permission, require_manager_or_admin
-from src.utils.auth_middleware import require_auth
+from src.utils.auth_middleware import require_auth, get_current_user
+from src.utils.permissions import verificar_permissao
+from src.utils.sse import hub_tarefas
+from src.utils.single_flight import consultas_tarefas
+from config import Config
+
+# Paginação de /tarefas/changes
+LIMITE_ALTERACOES_PADRAO = 100
+LIMITE_ALTERACOES_MAXIMO = 500
 
 def create_routes(api):
     """Cria as rotas da API de tarefas"""
@@ -11,11 +20,10 @@ def create_routes(api):
     api_ns = Namespace('tarefas', description='Operações CRUD para tarefas')
     
     # Criar modelos
-    from src.models.tarefa import create_models, init_database, get_db_connection
+    from src.models.tarefa import create_models, get_db_connection, tarefa_para_dict
+    from src.models.tarefa_alteracoes import create_alteracoes_models, listar_alteracoes, registrar_alteracao
     tarefa_model, tarefa_resposta_model, tarefa_lista_model, mensagem_model = create_models(api)
-    
-    # Inicializar banco de dados
-    init_database()
+    alteracao_model, alteracoes_model = create_alteracoes_models(api, tarefa_resposta_model)
     
     @api_ns.route('/')
     class TarefasList(Resource):
@@ -28,29 +36,24 @@ def create_routes(api):
         def get(self):
             """Listar todas as tarefas (requer permissão de visualização)"""
             try:
-                conn = get_db_connection()
-                cursor = conn.cursor()
-                
-                cursor.execute('SELECT * FROM tarefas ORDER BY data_criacao DESC')
-                tarefas = cursor.fetchall()
+                # Posição do log lida na mesma consulta (mesmo snapshot): o cliente
+                # sincroniza a partir de seq. Sem tarefas, seq=0 também é válido.
+                # Listagens idênticas simultâneas compartilham uma única execução.
+                tarefas = consultas_tarefas.consultar(get_db_connection, '''
+                    SELECT tarefas.*, (SELECT seq FROM sqlite_sequence WHERE name = 'tarefas_alteracoes')
+                    FROM tarefas ORDER BY data_criacao DESC
+                ''', escopo=get_current_user().nivel_acesso)
+                seq = (tarefas[0][-1] or 0) if tarefas else 0
                 
-                tarefas_list = []
-                for tarefa in tarefas:
-                    tarefas_list.append({
-                        'id': tarefa[0],
-                        'titulo': tarefa[1],
-                        'descricao': tarefa[2],
-                        'status': tarefa[3],
-                        'data_criacao': tarefa[4],
-                        'data_atualizacao': tarefa[5]
-                    })
-                
-                conn.close()
+                tarefas_list = [tarefa_para_dict(tarefa) for tarefa in tarefas]
                 
                 return {
                     'tarefas': tarefas_list,
-                    'total': len(tarefas_list)
+                    'total': len(tarefas_list),
+                    'seq': seq
                 }
+            except HTTPException:
+                raise
             except Exception as e:
                 api_ns.abort(500, f"Erro ao listar tarefas: {str(e)}")
         
@@ -87,8 +90,11 @@ def create_routes(api):
                 ''', (titulo, descricao, status, data_atual, data_atual))
                 
                 tarefa_id = cursor.lastrowid
+                registrar_alteracao(cursor, tarefa_id, 'insert', data_atual)
                 conn.commit()
                 conn.close()
+                consultas_tarefas.invalidar()
+                hub_tarefas.notificar()
                 
                 return {
                     'id': tarefa_id,
@@ -98,9 +104,95 @@ def create_routes(api):
                     'data_criacao': data_atual,
                     'data_atualizacao': data_atual
                 }, 201
+            except HTTPException:
+                raise
             except Exception as e:
                 api_ns.abort(500, f"Erro ao criar tarefa: {str(e)}")
     
+    @api_ns.route('/changes')
+    class TarefasAlteracoes(Resource):
+        @api_ns.doc('listar_alteracoes', params={
+            'since': 'Último seq recebido (0 = desde o início; o seq de GET /tarefas/ também serve)',
+            'limite': f'Alterações por página (padrão {LIMITE_ALTERACOES_PADRAO}, máximo {LIMITE_ALTERACOES_MAXIMO})'
+        })
+        @api_ns.response(200, 'Sucesso', alteracoes_model)
+        @api_ns.response(400, 'Parâmetros inválidos')
+        @api_ns.response(401, 'Token inválido')
+        @api_ns.response(403, 'Permissão insuficiente')
+        @require_auth
+        @require_permission('tarefas:list')
+        def get(self):
+            """Alterações de tarefas posteriores a since, em ordem (requer permissão de visualização)"""
+            desde = request.args.get('since', 0, type=int)
+            if desde < 0:
+                api_ns.abort(400, "since deve ser maior ou igual a 0")
+            limite = request.args.get('limite', LIMITE_ALTERACOES_PADRAO, type=int)
+            limite = max(1, min(limite, LIMITE_ALTERACOES_MAXIMO))
+            
+            try:
+                conn = get_db_connection()
+                try:
+                    return listar_alteracoes(conn, desde, limite)
+                finally:
+                    conn.close()
+            except Exception as e:
+                api_ns.abort(500, f"Erro ao listar alterações: {str(e)}")
+    
+    @api_ns.route('/stream')
+    class TarefasStream(Resource):
+        @api_ns.doc('stream_tarefas', params={
+            'since': 'Seq a partir do qual retomar (o header Last-Event-ID tem precedência)'
+        })
+        @api_ns.response(200, 'Eventos insert/update/delete/reset (text/event-stream)')
+        @api_ns.response(401, 'Token inválido')
+        @api_ns.response(403, 'Permissão insuficiente')
+        @api_ns.response(503, 'Sem vaga para conexões longas neste worker (usar /tarefas/changes)')
+        @require_auth
+        @require_permission('tarefas:list')
+        def get(self):
+            """Alterações de tarefas em tempo real via Server-Sent Events (requer permissão de visualização)"""
+            import threading
+            from src.utils.sse import Assinante, duracao_wsgi, ler_posicao, transmitir
+            
+            acordado = threading.Event()
+            assinante = Assinante(
+                verificar_permissao(get_current_user().nivel_acesso, 'tarefas:read'),
+                ler_posicao(request.headers.get('Last-Event-ID'), request.args.get('since')),
+                Config.SSE_BUFFER_EVENTS,
+                acordado.set
+            )
+            # Cada conexão prende uma thread: num worker síncrono (gunicorn sync) prenderia o
+            # processo inteiro, e no gthread o limite preserva as threads das demais rotas.
+            # Recusado, o cliente passa a consultar /tarefas/changes.
+            if not request.environ.get('wsgi.multithread') or not hub_tarefas.assinar(assinante, Config.SSE_WSGI_MAX_CLIENTS):
+                return {
+                    'message': 'Stream de eventos indisponível neste servidor; use /tarefas/changes',
+                    'polling': True
+                }, 503, {'Retry-After': str(Config.SSE_MAX_SECONDS)}
+            
+            corpo = transmitir(hub_tarefas, assinante, acordado, Config.SSE_HEARTBEAT_SECONDS, duracao_wsgi(Config))
+            return Response(corpo, mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
+    @api_ns.route('/export')
+    class TarefasExportacao(Resource):
+        @api_ns.doc('exportar_tarefas', params={'formato': 'ndjson (padrão) ou csv'})
+        @api_ns.response(200, 'Exportação em streaming')
+        @api_ns.response(400, 'Formato inválido')
+        @api_ns.response(401, 'Token inválido')
+        @api_ns.response(403, 'Permissão insuficiente')
+        @require_auth
+        @require_permission('tarefas:list')
+        def get(self):
+            """Exportar todas as tarefas em streaming, lote a lote (requer permissão de visualização)"""
+            from src.utils.exportacao import FORMATOS, cabecalhos, exportar_tarefas
+
+            formato = request.args.get('formato', 'ndjson')
+            if formato not in FORMATOS:
+                api_ns.abort(400, f"Formato deve ser um de: {', '.join(FORMATOS)}")
+
+            return Response(exportar_tarefas(formato), mimetype=FORMATOS[formato], headers=cabecalhos(formato))
+
     @api_ns.route('/<int:id>')
     @api_ns.param('id', 'ID da tarefa')
     class Tarefa(Resource):
@@ -125,14 +217,9 @@ def create_routes(api):
                 if not tarefa:
                     api_ns.abort(404, f"Tarefa com ID {id} não encontrada")
                 
-                return {
-                    'id': tarefa[0],
-                    'titulo': tarefa[1],
-                    'descricao': tarefa[2],
-                    'status': tarefa[3],
-                    'data_criacao': tarefa[4],
-                    'data_atualizacao': tarefa[5]
-                }
+                return tarefa_para_dict(tarefa)
+            except HTTPException:
+                raise
             except Exception as e:
                 api_ns.abort(500, f"Erro ao obter tarefa: {str(e)}")
         
@@ -179,9 +266,12 @@ def create_routes(api):
                     SET titulo = ?, descricao = ?, status = ?, data_atualizacao = ?
                     WHERE id = ?
                 ''', (titulo, descricao, status, data_atual, id))
+                registrar_alteracao(cursor, id, 'update', data_atual)
                 
                 conn.commit()
                 conn.close()
+                consultas_tarefas.invalidar()
+                hub_tarefas.notificar()
                 
                 return {
                     'id': id,
@@ -191,6 +281,8 @@ def create_routes(api):
                     'data_criacao': tarefa_existente[4],
                     'data_atualizacao': data_atual
                 }
+            except HTTPException:
+                raise
             except Exception as e:
                 api_ns.abort(500, f"Erro ao atualizar tarefa: {str(e)}")
         
@@ -216,13 +308,18 @@ def create_routes(api):
                     api_ns.abort(404, f"Tarefa com ID {id} não encontrada")
                 
                 cursor.execute('DELETE FROM tarefas WHERE id = ?', (id,))
+                registrar_alteracao(cursor, id, 'delete', datetime.now().isoformat())
                 conn.commit()
                 conn.close()
+                consultas_tarefas.invalidar()
+                hub_tarefas.notificar()
                 
                 return {
                     'message': f'Tarefa com ID {id} removida com sucesso',
                     'status': 'sucesso'
                 }
+            except HTTPException:
+                raise
             except Exception as e:
                 api_ns.abort(500, f"Erro ao remover tarefa: {str(e)}")
     
@@ -0,0 +1,63 @@
+"""
+Rotas atendidas por corrotinas no servidor ASGI (src/api/asgi.py)
+Cada rota aqui substitui, no caminho ASGI, a rota Flask de mesmo
+caminho; no servidor WSGI a versão Flask continua atendendo.
+"""
+
+import asyncio
+
+from config import Config
+from src.api.asgi import ErroHTTP, RespostaJSON, RespostaStream
+from src.utils.exportacao import FORMATOS, TAMANHO_LOTE, cabecalhos, inicio, serializar
+from src.utils.permissions import verificar_permissao
+
+
+def create_async_routes(roteador):
+    """Registra as rotas assíncronas no roteador"""
+    from src.models.tarefa import ler_lote_tarefas
+
+    @roteador.rota('/health')
+    async def saude(requisicao):
+        """Verificação de saúde respondida no event loop, sem esperar vaga no pool do Flask"""
+        return RespostaJSON({'status': 'ok'})
+
+    @roteador.rota('/tarefas/export')
+    async def exportar_tarefas(requisicao):
+        """Exportação em streaming: cada lote é lido no pool e enviado em seguida"""
+        await requisicao.exigir_permissao('tarefas:list')
+        formato = requisicao.query.get('formato', 'ndjson')
+        if formato not in FORMATOS:
+            raise ErroHTTP(400, f"Formato deve ser um de: {', '.join(FORMATOS)}")
+
+        async def corpo():
+            yield inicio(formato)
+            apos_id = 0
+            while True:
+                linhas = await requisicao.executar(ler_lote_tarefas, apos_id, TAMANHO_LOTE)
+                if not linhas:
+                    return
+                yield serializar(linhas, formato)
+                apos_id = linhas[-1][0]
+
+        return RespostaStream(corpo(), FORMATOS[formato], headers=cabecalhos(formato))
+
+    @roteador.rota('/tarefas/stream')
+    async def stream_tarefas(requisicao):
+        """Server-Sent Events: a conexão aguarda no event loop, sem ocupar thread"""
+        from src.utils.sse import Assinante, despertar_no_loop, hub_tarefas, ler_posicao, transmitir_assincrono
+
+        usuario = await requisicao.exigir_permissao('tarefas:list')
+        acordado = asyncio.Event()
+        assinante = Assinante(
+            verificar_permissao(usuario.nivel_acesso, 'tarefas:read'),
+            ler_posicao(requisicao.headers.get('last-event-id'), requisicao.query.get('since')),
+            Config.SSE_BUFFER_EVENTS,
+            despertar_no_loop(asyncio.get_running_loop(), acordado)
+        )
+        if not hub_tarefas.assinar(assinante):
+            return RespostaJSON({'message': 'Limite de conexões de eventos atingido'}, 503, {'retry-after': '5'})
+
+        corpo = transmitir_assincrono(hub_tarefas, assinante, acordado,
+                                      Config.SSE_HEARTBEAT_SECONDS, Config.SSE_MAX_SECONDS)
+        return RespostaStream(corpo, 'text/event-stream',
+                              headers={'cache-control': 'no-cache', 'x-accel-buffering': 'no'})
@@ -1,6 +1,12 @@
-from flask import request
+from flask import request, Response, current_app
 from flask_restx import Resource, Namespace
+from werkzeug.exceptions import HTTPException
 from datetime import datetime
+from config import Config
+from src.utils.rate_limiter import LoginThrottle
+from src.utils.memory import inspetor_memoria
+from src.utils.auth_middleware import require_auth, get_current_user, get_auth_token
+from src.utils.role_middleware import require_permission
 
 def create_auth_routes(api):
     """Cria as rotas de autenticação"""
@@ -9,11 +15,24 @@ def create_auth_routes(api):
     auth_ns = Namespace('auth', description='Autenticação e gerenciamento de usuários')
     
     # Criar modelos
-    from src.models.usuario import create_auth_models, init_auth_database, Usuario
+    from src.models.usuario import create_auth_models, Usuario
     usuario_registro_model, usuario_login_model, verificar_2fa_model, usuario_resposta_model, login_resposta_model = create_auth_models(api)
     
-    # Inicializar banco de dados de autenticação
-    init_auth_database()
+    # Limitadores de tentativas (verificados antes de qualquer hash ou SQL)
+    login_throttle = None
+    twofa_throttle = None
+    if Config.RATE_LIMIT_ENABLED:
+        login_throttle = LoginThrottle.from_config(Config, 'LOGIN')
+        twofa_throttle = LoginThrottle.from_config(Config, 'TWOFA')
+        inspetor_memoria.registrar_componente('limite_login', login_throttle.stats)
+        inspetor_memoria.registrar_componente('limite_2fa', twofa_throttle.stats)
+    
+    def muitas_tentativas(espera):
+        """Resposta 429 com o cabeçalho Retry-After"""
+        return {
+            'message': 'Muitas tentativas. Tente novamente mais tarde.',
+            'retry_after': espera
+        }, 429, {'Retry-After': str(espera)}
     
     @auth_ns.route('/register')
     class UsuarioRegistro(Resource):
@@ -50,6 +69,8 @@ def create_auth_routes(api):
                 
             except ValueError as e:
                 auth_ns.abort(400, str(e))
+            except HTTPException:
+                raise
             except Exception as e:
                 auth_ns.abort(500, f"Erro ao criar usuário: {str(e)}")
     
@@ -59,10 +80,19 @@ def create_auth_routes(api):
         @auth_ns.expect(usuario_login_model)
         @auth_ns.response(200, 'Login realizado com sucesso', login_resposta_model)
         @auth_ns.response(401, 'Credenciais inválidas')
+        @auth_ns.response(429, 'Muitas tentativas')
         def post(self):
             """Login do usuário"""
             try:
-                dados = request.get_json()
+                dados = request.get_json(silent=True)
+                
+                # Limitar tentativas por IP e por email antes do hash
+                if login_throttle:
+                    email = dados.get('email') if isinstance(dados, dict) else None
+                    espera = login_throttle.verificar(request.remote_addr, email)
+                    if espera:
+                        return muitas_tentativas(espera)
+                
                 if not dados or not dados.get('email') or not dados.get('senha'):
                     auth_ns.abort(400, "Email e senha são obrigatórios")
                 
@@ -74,18 +104,16 @@ def create_auth_routes(api):
                 # Gerar token JWT
                 token = usuario.gerar_jwt_token()
                 
-                # Gerar QR Code para 2FA (se ainda não configurado)
-                qr_code_url = None
-                if usuario.secret_2fa:
-                    qr_code_url = usuario.gerar_qr_code_2fa()
-                
+                # O QR Code do 2FA é obtido sob demanda em /auth/setup-2fa
                 return {
                     'usuario': usuario.to_dict(),
                     'token': token,
                     '2fa_necessario': False,  # Por enquanto, 2FA é opcional
-                    'qr_code_url': qr_code_url
+                    'qr_code_url': None
                 }
                 
+            except HTTPException:
+                raise
             except Exception as e:
                 auth_ns.abort(500, f"Erro ao fazer login: {str(e)}")
     
@@ -95,20 +123,25 @@ def create_auth_routes(api):
         @auth_ns.expect(verificar_2fa_model)
         @auth_ns.response(200, '2FA verificado com sucesso')
         @auth_ns.response(401, 'Código 2FA inválido')
+        @auth_ns.response(429, 'Muitas tentativas')
         def post(self):
             """Verificar código 2FA"""
             try:
+                # Limitar tentativas por IP e por token antes da consulta
+                if twofa_throttle:
+                    espera = twofa_throttle.verificar(request.remote_addr, request.headers.get('Authorization'))
+                    if espera:
+                        return muitas_tentativas(espera)
+                
                 dados = request.get_json()
                 if not dados or not dados.get('codigo'):
                     auth_ns.abort(400, "Código é obrigatório")
                 
-                # Buscar usuário pelo token JWT no header
-                token = request.headers.get('Authorization')
-                if not token or not token.startswith('Bearer '):
+                # Usuário resolvido uma única vez para a requisição
+                if not get_auth_token():
                     auth_ns.abort(401, "Token de autorização necessário")
                 
-                token = token.replace('Bearer ', '')
-                usuario = Usuario.verificar_jwt_token(token)
+                usuario = get_current_user()
                 if not usuario:
                     auth_ns.abort(401, "Token inválido")
                 
@@ -121,6 +154,8 @@ def create_auth_routes(api):
                     'status': 'sucesso'
                 }
                 
+            except HTTPException:
+                raise
             except Exception as e:
                 auth_ns.abort(500, f"Erro ao verificar 2FA: {str(e)}")
     
@@ -129,48 +164,50 @@ def create_auth_routes(api):
         @auth_ns.doc('obter_usuario_atual')
         @auth_ns.response(200, 'Usuário atual', usuario_resposta_model)
         @auth_ns.response(401, 'Token inválido')
+        @require_auth
         def get(self):
             """Obter dados do usuário atual"""
             try:
-                # Buscar usuário pelo token JWT
-                token = request.headers.get('Authorization')
-                if not token or not token.startswith('Bearer '):
-                    auth_ns.abort(401, "Token de autorização necessário")
-                
-                token = token.replace('Bearer ', '')
-                usuario = Usuario.verificar_jwt_token(token)
-                if not usuario:
-                    auth_ns.abort(401, "Token inválido")
-                
-                return usuario.to_dict()
+                return get_current_user().to_dict()
                 
+            except HTTPException:
+                raise
             except Exception as e:
                 auth_ns.abort(500, f"Erro ao obter usuário: {str(e)}")
     
+    @auth_ns.route('/me/capabilities')
+    class CapacidadesUsuario(Resource):
+        @auth_ns.doc('capacidades_usuario_atual')
+        @auth_ns.response(200, 'Permissões e rotas permitidas para o usuário atual')
+        @auth_ns.response(304, 'Capacidades não modificadas')
+        @auth_ns.response(401, 'Token inválido')
+        @require_auth
+        def get(self):
+            """Todas as permissões e rotas permitidas ao usuário atual, numa única resposta cacheável"""
+            matriz = current_app.extensions['matriz_permissoes']
+            corpo, etag = matriz.capacidades(get_current_user().nivel_acesso)
+            
+            resposta = Response(corpo, mimetype='application/json')
+            resposta.set_etag(etag)
+            # Revalidação barata: o ETag muda com o nível ou a versão das permissões
+            resposta.headers['Cache-Control'] = 'private, no-cache'
+            return resposta.make_conditional(request)
+    
     @auth_ns.route('/logout')
     class UsuarioLogout(Resource):
         @auth_ns.doc('logout_usuario')
         @auth_ns.response(200, 'Logout realizado com sucesso')
         @auth_ns.response(401, 'Token inválido')
+        @require_auth
         def post(self):
             """Logout do usuário"""
             try:
-                # Buscar usuário pelo token JWT
-                token = request.headers.get('Authorization')
-                if not token or not token.startswith('Bearer '):
-                    auth_ns.abort(401, "Token de autorização necessário")
-                
-                token = token.replace('Bearer ', '')
-                usuario = Usuario.verificar_jwt_token(token)
-                if not usuario:
-                    auth_ns.abort(401, "Token inválido")
-                
                 # Desativar token no banco
                 from src.models.usuario import get_db_connection
                 conn = get_db_connection()
                 cursor = conn.cursor()
                 
-                cursor.execute('UPDATE sessoes SET ativo = 0 WHERE token = ?', (token,))
+                cursor.execute('UPDATE sessoes SET ativo = 0 WHERE token = ?', (get_auth_token(),))
                 conn.commit()
                 conn.close()
                 
@@ -179,6 +216,8 @@ def create_auth_routes(api):
                     'status': 'sucesso'
                 }
                 
+            except HTTPException:
+                raise
             except Exception as e:
                 auth_ns.abort(500, f"Erro ao fazer logout: {str(e)}")
     
@@ -187,29 +226,62 @@ def create_auth_routes(api):
         @auth_ns.doc('configurar_2fa')
         @auth_ns.response(200, 'QR Code gerado para configuração 2FA')
         @auth_ns.response(401, 'Token inválido')
+        @require_auth
         def get(self):
             """Configurar 2FA para o usuário"""
             try:
-                # Buscar usuário pelo token JWT
-                token = request.headers.get('Authorization')
-                if not token or not token.startswith('Bearer '):
-                    auth_ns.abort(401, "Token de autorização necessário")
-                
-                token = token.replace('Bearer ', '')
-                usuario = Usuario.verificar_jwt_token(token)
-                if not usuario:
-                    auth_ns.abort(401, "Token inválido")
+                usuario = get_current_user()
                 
-                # Gerar QR Code
+                # Gerar QR Code (data URI, gerado uma vez e mantido em cache)
                 qr_code_url = usuario.gerar_qr_code_2fa()
                 
                 return {
                     'qr_code_url': qr_code_url,
+                    'qr_code_png_url': '/auth/setup-2fa/qr',
                     'secret': usuario.secret_2fa,
                     'message': 'Configure o Google Authenticator com o QR Code'
                 }
                 
+            except HTTPException:
+                raise
             except Exception as e:
                 auth_ns.abort(500, f"Erro ao configurar 2FA: {str(e)}")
     
+    @auth_ns.route('/setup-2fa/qr')
+    class Setup2FAQRCode(Resource):
+        @auth_ns.doc('qr_code_2fa')
+        @auth_ns.produces(['image/png'])
+        @auth_ns.response(200, 'Imagem PNG do QR Code')
+        @auth_ns.response(304, 'Imagem não modificada')
+        @auth_ns.response(401, 'Token inválido')
+        @auth_ns.response(404, '2FA não configurado')
+        @require_auth
+        def get(self):
+            """Imagem PNG do QR Code do 2FA servida da memória com ETag"""
+            resultado = get_current_user().gerar_qr_code_png()
+            if not resultado:
+                auth_ns.abort(404, "2FA não configurado")
+            
+            png, etag = resultado
+            resposta = Response(png, mimetype='image/png')
+            resposta.set_etag(etag)
+            resposta.headers['Cache-Control'] = 'private, max-age=3600'
+            return resposta.make_conditional(request)
+    
+    @auth_ns.route('/rate-limit')
+    class LimiteTentativas(Resource):
+        @auth_ns.doc('estatisticas_limite_tentativas')
+        @auth_ns.response(200, 'Contadores dos limitadores de tentativas')
+        @auth_ns.response(401, 'Token inválido')
+        @auth_ns.response(403, 'Permissão insuficiente')
+        @require_auth
+        @require_permission('system:admin')
+        def get(self):
+            """Contadores de tentativas permitidas e rejeitadas (apenas administrativo)"""
+            return {
+                'ativo': login_throttle is not None,
+                'login': login_throttle.stats() if login_throttle else None,
+                'verify_2fa': twofa_throttle.stats() if twofa_throttle else None
+            }
+    
     return auth_ns
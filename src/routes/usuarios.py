@@ -2,13 +2,104 @@
 Rotas para gerenciamento de usuários e níveis de acesso
 """
 
+import base64
+import json
 from flask import request
 from flask_restx import Resource, Namespace, fields
+from werkzeug.exceptions import HTTPException
 from datetime import datetime
-from src.models.usuario import Usuario, create_auth_models, init_auth_database
+from src.models.usuario import Usuario, create_auth_models
 from src.utils.role_middleware import require_admin, require_manager_or_admin, require_permission
-from src.utils.auth_middleware import require_auth
-from src.utils.permissions import obter_niveis_disponiveis, validar_nivel_acesso
+from src.utils.auth_middleware import require_auth, get_current_user
+from src.utils.permissions import NIVEIS_ACESSO, obter_niveis_disponiveis, validar_nivel_acesso, verificar_permissao, registro_permissoes
+from src.utils.permission_registry import validar_permissoes
+from src.models.nivel_acesso import salvar_nivel, remover_nivel
+from src.models.usuario_lote import (
+    filtro_usuarios, alterar_nivel_em_lote, desativar_em_lote, registrar_ouvinte,
+    versionar_usuarios, notificar_alteracao_usuarios
+)
+from src.utils.qr_cache import qr_code_cache
+from src.utils.user_index import indice_usuarios
+from src.utils.single_flight import consultas_usuarios
+from src.utils.provisionamento import detectar_formato, ler_registros, provisionar_usuarios, resumir
+
+# Colunas retornadas pelas rotas de usuários (nunca inclui senha_hash)
+CAMPOS_LISTAGEM = ('id', 'nome', 'email', 'nivel_acesso', 'ativo', 'data_criacao')
+COLUNAS_LISTAGEM = ', '.join(CAMPOS_LISTAGEM)
+
+# Tamanho de página da listagem de usuários
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+# Máximo de IDs aceitos numa operação em lote
+LIMITE_IDS_LOTE = 10000
+
+# Máximo de usuários por requisição de provisionamento (cada um custa um hash de senha)
+LIMITE_REGISTROS_PROVISIONAMENTO = 1000
+
+# Número de sugestões do autocomplete
+LIMITE_SUGESTOES_PADRAO = 10
+LIMITE_SUGESTOES_MAXIMO = 25
+
+def linha_para_dict(linha):
+    """Converte uma linha selecionada com COLUNAS_LISTAGEM em dicionário"""
+    usuario = dict(zip(CAMPOS_LISTAGEM, linha))
+    usuario['ativo'] = bool(usuario['ativo'])
+    return usuario
+
+def codificar_cursor(data_criacao, usuario_id):
+    """Cursor opaco com a posição (data_criacao, id) do último item da página"""
+    bruto = json.dumps([data_criacao, usuario_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(bruto).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor):
+    """
+    Decodifica um cursor gerado por ``codificar_cursor``
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data_criacao, usuario_id = json.loads(bruto)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor inválido") from e
+    if not isinstance(data_criacao, str) or not isinstance(usuario_id, int):
+        raise ValueError("Cursor inválido")
+    return data_criacao, usuario_id
+
+def montar_consulta_listagem(limite, apos=None, nivel_acesso=None, ativo=None, prefixo=None):
+    """
+    Monta a consulta paginada da listagem de usuários
+
+    A ordenação (data_criacao DESC, id DESC) e o cursor por (data_criacao, id)
+    percorrem o índice ``idx_usuarios_data_criacao`` (ou ``idx_usuarios_nivel_data``
+    quando filtrado por nível); a busca por prefixo usa os índices NOCASE de
+    nome e email.
+
+    Returns:
+        tuple: (sql, parâmetros) -- busca ``limite + 1`` linhas para saber se há próxima página
+    """
+    condicoes, parametros = filtro_usuarios(nivel_acesso, ativo, prefixo)
+    if apos:
+        condicoes.append('(data_criacao, id) < (?, ?)')
+        parametros.extend(apos)
+
+    where = f"WHERE {' AND '.join(condicoes)} " if condicoes else ''
+    sql = f'SELECT {COLUNAS_LISTAGEM} FROM usuarios {where}ORDER BY data_criacao DESC, id DESC LIMIT ?'
+    parametros.append(limite + 1)
+    return sql, parametros
+
+def ler_booleano(valor):
+    """Converte parâmetros de query como 'true'/'false'/'1'/'0' (None se ausente)"""
+    if valor is None or valor == '':
+        return None
+    valor = valor.strip().lower()
+    if valor in ('1', 'true', 'sim'):
+        return True
+    if valor in ('0', 'false', 'nao', 'não'):
+        return False
+    raise ValueError("Parâmetro 'ativo' deve ser true ou false")
 
 def create_user_routes(api):
     """Cria as rotas para gerenciamento de usuários"""
@@ -19,8 +110,16 @@ def create_user_routes(api):
     # Criar modelos
     usuario_registro_model, usuario_login_model, verificar_2fa_model, usuario_resposta_model, login_resposta_model = create_auth_models(api)
     
-    # Inicializar banco de dados
-    init_auth_database()
+    # Compilar os níveis de acesso cadastrados no banco
+    registro_permissoes.recarregar()
+    
+    # Índice de sugestão montado uma vez e mantido pelas notificações de alteração
+    indice_usuarios.construir()
+    
+    # Caches invalidados após alterações de usuários
+    registrar_ouvinte(qr_code_cache.ao_alterar_usuarios)
+    registrar_ouvinte(indice_usuarios.ao_alterar_usuarios)
+    registrar_ouvinte(consultas_usuarios.invalidar)
     
     # Modelo para atualização de usuário
     usuario_update_model = user_ns.model('UsuarioUpdate', {
@@ -31,43 +130,78 @@ def create_user_routes(api):
     
     # Modelo para resposta de níveis de acesso
     niveis_model = user_ns.model('NiveisAcesso', {
-        'niveis': fields.Raw(description='Níveis de acesso disponíveis')
+        'niveis': fields.Raw(description='Níveis de acesso disponíveis'),
+        'versao': fields.Integer(description='Versão dos níveis de acesso')
+    })
+    
+    # Modelo para criação/alteração de nível de acesso
+    nivel_model = user_ns.model('NivelAcesso', {
+        'titulo': fields.String(required=True, description='Nome de exibição do nível'),
+        'descricao': fields.String(description='Descrição do nível'),
+        'nivel': fields.Integer(required=True, description='Posição na hierarquia (1 = menor)'),
+        'permissoes': fields.List(fields.String, required=True, description="Permissões no formato 'recurso:acao'")
     })
     
     @user_ns.route('/')
     class UsuariosList(Resource):
-        @user_ns.doc('listar_usuarios')
+        @user_ns.doc('listar_usuarios', params={
+            'limite': f'Itens por página (padrão {LIMITE_PADRAO}, máximo {LIMITE_MAXIMO})',
+            'cursor': 'Valor de proximo_cursor da página anterior',
+            'nivel_acesso': 'Filtrar por nível de acesso',
+            'ativo': 'Filtrar por status (true/false)',
+            'q': 'Busca por prefixo do nome ou email'
+        })
         @user_ns.response(200, 'Sucesso')
+        @user_ns.response(400, 'Parâmetros inválidos')
         @user_ns.response(401, 'Token inválido')
         @user_ns.response(403, 'Permissão insuficiente')
         @require_auth
         @require_manager_or_admin
         def get(self):
-            """Listar todos os usuários (apenas gerencial e administrativo)"""
+            """Listar usuários com paginação por cursor (apenas gerencial e administrativo)"""
             try:
-                conn = Usuario.get_db_connection()
-                cursor = conn.cursor()
+                # Valores não numéricos caem no padrão
+                limite = request.args.get('limite', LIMITE_PADRAO, type=int)
+                limite = max(1, min(limite, LIMITE_MAXIMO))
+                
+                try:
+                    apos = decodificar_cursor(request.args['cursor']) if request.args.get('cursor') else None
+                    ativo = ler_booleano(request.args.get('ativo'))
+                except ValueError as e:
+                    user_ns.abort(400, str(e))
+                
+                nivel_acesso = request.args.get('nivel_acesso') or None
+                if nivel_acesso and not validar_nivel_acesso(nivel_acesso):
+                    user_ns.abort(400, "Nível de acesso inválido")
                 
-                cursor.execute('SELECT * FROM usuarios ORDER BY data_criacao DESC')
-                usuarios = cursor.fetchall()
+                sql, parametros = montar_consulta_listagem(
+                    limite,
+                    apos=apos,
+                    nivel_acesso=nivel_acesso,
+                    ativo=ativo,
+                    prefixo=request.args.get('q', '').strip() or None
+                )
                 
-                usuarios_list = []
-                for usuario in usuarios:
-                    usuarios_list.append({
-                        'id': usuario[0],
-                        'nome': usuario[1],
-                        'email': usuario[2],
-                        'nivel_acesso': usuario[5],
-                        'ativo': bool(usuario[6]),
-                        'data_criacao': usuario[7]
-                    })
+                # Páginas idênticas pedidas ao mesmo tempo compartilham uma única execução
+                linhas = consultas_usuarios.consultar(
+                    Usuario.get_db_connection, sql, parametros, escopo=get_current_user().nivel_acesso
+                )
                 
-                conn.close()
+                proximo_cursor = None
+                if len(linhas) > limite:
+                    linhas = linhas[:limite]
+                    ultima = linhas[-1]
+                    proximo_cursor = codificar_cursor(ultima[CAMPOS_LISTAGEM.index('data_criacao')], ultima[0])
+                
+                usuarios_list = [linha_para_dict(linha) for linha in linhas]
                 
                 return {
                     'usuarios': usuarios_list,
-                    'total': len(usuarios_list)
+                    'total': len(usuarios_list),
+                    'proximo_cursor': proximo_cursor
                 }
+            except HTTPException:
+                raise
             except Exception as e:
                 user_ns.abort(500, f"Erro ao listar usuários: {str(e)}")
         
@@ -105,16 +239,183 @@ def create_user_routes(api):
                     conn = Usuario.get_db_connection()
                     cursor = conn.cursor()
                     cursor.execute('UPDATE usuarios SET nivel_acesso = ? WHERE id = ?', (nivel_acesso, usuario.id))
+                    versao = versionar_usuarios(cursor)
                     conn.commit()
                     conn.close()
-                    usuario.nivel_acesso = nivel_acesso
+                    notificar_alteracao_usuarios('nivel', [usuario.id], versao)
+                    usuario = usuario._replace(nivel_acesso=nivel_acesso)
                 
                 return usuario.to_dict(), 201
             except ValueError as e:
                 user_ns.abort(400, str(e))
+            except HTTPException:
+                raise
             except Exception as e:
                 user_ns.abort(500, f"Erro ao criar usuário: {str(e)}")
     
+    @user_ns.route('/bulk')
+    class UsuariosLote(Resource):
+        @user_ns.doc('provisionar_usuarios', description='Corpo em CSV (text/csv, com cabeçalho nome,email,senha,nivel_acesso), NDJSON (application/x-ndjson) ou lista JSON')
+        @user_ns.response(200, 'Resultado por linha')
+        @user_ns.response(400, 'Erro de validação')
+        @user_ns.response(401, 'Token inválido')
+        @user_ns.response(403, 'Permissão insuficiente')
+        @require_auth
+        @require_admin
+        def post(self):
+            """Criar usuários em lote a partir de CSV ou NDJSON (apenas administrativo)"""
+            try:
+                if request.is_json:
+                    registros = request.get_json()
+                    if not isinstance(registros, list):
+                        user_ns.abort(400, "Envie uma lista de usuários")
+                    registros = [r if isinstance(r, dict) else {'_erro': 'Registro deve ser um objeto'} for r in registros]
+                else:
+                    formato = detectar_formato(request.content_type)
+                    registros = ler_registros(request.get_data(as_text=True), formato)
+                
+                if not registros:
+                    user_ns.abort(400, "Nenhum usuário informado")
+                if len(registros) > LIMITE_REGISTROS_PROVISIONAMENTO:
+                    user_ns.abort(400, f"Máximo de {LIMITE_REGISTROS_PROVISIONAMENTO} usuários por requisição")
+                
+                return resumir(provisionar_usuarios(registros))
+            except HTTPException:
+                raise
+            except Exception as e:
+                user_ns.abort(500, f"Erro ao provisionar usuários: {str(e)}")
+    
+    @user_ns.route('/suggest')
+    class SugestaoUsuarios(Resource):
+        @user_ns.doc('sugerir_usuarios', params={
+            'q': 'Prefixo do nome (ou de uma palavra do nome) ou do email',
+            'limite': f'Máximo de sugestões (padrão {LIMITE_SUGESTOES_PADRAO}, máximo {LIMITE_SUGESTOES_MAXIMO})',
+            'inativos': 'Incluir usuários inativos (apenas administrativo)'
+        })
+        @user_ns.response(200, 'Sugestões')
+        @user_ns.response(401, 'Token inválido')
+        @require_auth
+        def get(self):
+            """Autocomplete de usuários servido pelo índice em memória"""
+            termo = request.args.get('q', '')
+            limite = request.args.get('limite', LIMITE_SUGESTOES_PADRAO, type=int)
+            limite = max(1, min(limite, LIMITE_SUGESTOES_MAXIMO))
+            
+            usuario_atual = get_current_user()
+            nivel = usuario_atual.nivel_acesso
+            
+            if not verificar_permissao(nivel, 'usuarios:list'):
+                # Sem permissão de listar usuários: apenas o próprio usuário
+                sugestoes = [usuario_atual] if indice_usuarios.corresponde(termo, usuario_atual.nome, usuario_atual.email) else []
+            else:
+                indice_usuarios.verificar_versao()
+                incluir_inativos = request.args.get('inativos') in ('1', 'true') and verificar_permissao(nivel, 'system:admin')
+                filtro = None if incluir_inativos else (lambda usuario: usuario.ativo)
+                sugestoes = indice_usuarios.buscar(termo, limite, filtro)
+            
+            return {
+                'sugestoes': [{'id': u.id, 'nome': u.nome, 'email': u.email} for u in sugestoes],
+                'total': len(sugestoes)
+            }
+    
+    # Seleção de usuários das operações em lote
+    selecao_campos = {
+        'ids': fields.List(fields.Integer, description='IDs dos usuários'),
+        'filtro': fields.Raw(description="Critérios 'nivel_acesso', 'ativo' e 'q' (prefixo de nome/email)")
+    }
+    
+    def ler_selecao(dados):
+        """Valida 'ids' e 'filtro' do corpo de uma operação em lote"""
+        ids = dados.get('ids')
+        filtro = dados.get('filtro')
+        
+        if ids is not None and not isinstance(ids, list):
+            user_ns.abort(400, "'ids' deve ser uma lista")
+        if ids is not None and len(ids) > LIMITE_IDS_LOTE:
+            user_ns.abort(400, f"Máximo de {LIMITE_IDS_LOTE} IDs por operação")
+        if filtro is not None and not isinstance(filtro, dict):
+            user_ns.abort(400, "'filtro' deve ser um objeto")
+        if filtro:
+            if 'ativo' in filtro and not isinstance(filtro['ativo'], bool):
+                user_ns.abort(400, "'filtro.ativo' deve ser true ou false")
+            if filtro.get('nivel_acesso') and not validar_nivel_acesso(filtro['nivel_acesso']):
+                user_ns.abort(400, "'filtro.nivel_acesso' inválido")
+        
+        return ids, filtro
+    
+    @user_ns.route('/nivel')
+    class AlterarNivelLote(Resource):
+        @user_ns.doc('alterar_nivel_usuarios')
+        @user_ns.expect(user_ns.model('AlterarNivelLote', {
+            'nivel_acesso': fields.String(required=True, description='Novo nível de acesso'),
+            **selecao_campos
+        }))
+        @user_ns.response(200, 'Usuários alterados')
+        @user_ns.response(400, 'Erro de validação')
+        @user_ns.response(401, 'Token inválido')
+        @user_ns.response(403, 'Permissão insuficiente')
+        @require_auth
+        @require_admin
+        def put(self):
+            """Alterar o nível de vários usuários numa única transação (apenas administrativo)"""
+            try:
+                dados = request.get_json(silent=True)
+                if not isinstance(dados, dict) or not dados.get('nivel_acesso'):
+                    user_ns.abort(400, "Campo 'nivel_acesso' é obrigatório")
+                
+                nivel_acesso = dados['nivel_acesso']
+                if not validar_nivel_acesso(nivel_acesso):
+                    user_ns.abort(400, "Nível de acesso inválido")
+                
+                ids, filtro = ler_selecao(dados)
+                
+                # O próprio administrador nunca é alterado pelo lote
+                alterados = alterar_nivel_em_lote(nivel_acesso, ids, filtro, excluir_id=get_current_user().id)
+                
+                return {
+                    'nivel_acesso': nivel_acesso,
+                    'alterados': len(alterados),
+                    'ids': alterados
+                }
+            except ValueError as e:
+                user_ns.abort(400, str(e))
+            except HTTPException:
+                raise
+            except Exception as e:
+                user_ns.abort(500, f"Erro ao alterar níveis: {str(e)}")
+    
+    @user_ns.route('/deactivate')
+    class DesativarLote(Resource):
+        @user_ns.doc('desativar_usuarios')
+        @user_ns.expect(user_ns.model('DesativarLote', selecao_campos))
+        @user_ns.response(200, 'Usuários desativados')
+        @user_ns.response(400, 'Erro de validação')
+        @user_ns.response(401, 'Token inválido')
+        @user_ns.response(403, 'Permissão insuficiente')
+        @require_auth
+        @require_admin
+        def post(self):
+            """Desativar vários usuários e revogar suas sessões numa única transação (apenas administrativo)"""
+            try:
+                dados = request.get_json(silent=True)
+                if not isinstance(dados, dict):
+                    user_ns.abort(400, "Dados são obrigatórios")
+                
+                ids, filtro = ler_selecao(dados)
+                desativados, sessoes_revogadas = desativar_em_lote(ids, filtro, excluir_id=get_current_user().id)
+                
+                return {
+                    'desativados': len(desativados),
+                    'ids': desativados,
+                    'sessoes_revogadas': sessoes_revogadas
+                }
+            except ValueError as e:
+                user_ns.abort(400, str(e))
+            except HTTPException:
+                raise
+            except Exception as e:
+                user_ns.abort(500, f"Erro ao desativar usuários: {str(e)}")
+    
     @user_ns.route('/<int:id>')
     @user_ns.param('id', 'ID do usuário')
     class UsuarioResource(Resource):
@@ -131,21 +432,14 @@ def create_user_routes(api):
                 conn = Usuario.get_db_connection()
                 cursor = conn.cursor()
                 
-                cursor.execute('SELECT * FROM usuarios WHERE id = ?', (id,))
+                cursor.execute(f'SELECT {COLUNAS_LISTAGEM} FROM usuarios WHERE id = ?', (id,))
                 usuario_data = cursor.fetchone()
                 conn.close()
                 
                 if not usuario_data:
                     user_ns.abort(404, f"Usuário com ID {id} não encontrado")
                 
-                return {
-                    'id': usuario_data[0],
-                    'nome': usuario_data[1],
-                    'email': usuario_data[2],
-                    'nivel_acesso': usuario_data[5],
-                    'ativo': bool(usuario_data[6]),
-                    'data_criacao': usuario_data[7]
-                }
+                return linha_para_dict(usuario_data)
             except Exception as e:
                 user_ns.abort(500, f"Erro ao obter usuário: {str(e)}")
         
@@ -169,17 +463,19 @@ def create_user_routes(api):
                 cursor = conn.cursor()
                 
                 # Verificar se usuário existe
-                cursor.execute('SELECT * FROM usuarios WHERE id = ?', (id,))
-                usuario_existente = cursor.fetchone()
+                cursor.execute(f'SELECT {COLUNAS_LISTAGEM} FROM usuarios WHERE id = ?', (id,))
+                usuario_data = cursor.fetchone()
                 
-                if not usuario_existente:
+                if not usuario_data:
                     conn.close()
                     user_ns.abort(404, f"Usuário com ID {id} não encontrado")
                 
+                usuario_existente = linha_para_dict(usuario_data)
+                
                 # Preparar dados para atualização
-                nome = dados.get('nome', usuario_existente[1])
-                nivel_acesso = dados.get('nivel_acesso', usuario_existente[5])
-                ativo = dados.get('ativo', usuario_existente[6])
+                nome = dados.get('nome', usuario_existente['nome'])
+                nivel_acesso = dados.get('nivel_acesso', usuario_existente['nivel_acesso'])
+                ativo = dados.get('ativo', usuario_existente['ativo'])
                 
                 if not validar_nivel_acesso(nivel_acesso):
                     conn.close()
@@ -191,18 +487,22 @@ def create_user_routes(api):
                     SET nome = ?, nivel_acesso = ?, ativo = ?
                     WHERE id = ?
                 ''', (nome, nivel_acesso, ativo, id))
+                versao = versionar_usuarios(cursor)
                 
                 conn.commit()
                 conn.close()
+                notificar_alteracao_usuarios('atualizacao', [id], versao)
                 
                 return {
                     'id': id,
                     'nome': nome,
-                    'email': usuario_existente[2],
+                    'email': usuario_existente['email'],
                     'nivel_acesso': nivel_acesso,
                     'ativo': ativo,
-                    'data_criacao': usuario_existente[7]
+                    'data_criacao': usuario_existente['data_criacao']
                 }
+            except HTTPException:
+                raise
             except Exception as e:
                 user_ns.abort(500, f"Erro ao atualizar usuário: {str(e)}")
         
@@ -220,22 +520,24 @@ def create_user_routes(api):
                 cursor = conn.cursor()
                 
                 # Verificar se usuário existe
-                cursor.execute('SELECT * FROM usuarios WHERE id = ?', (id,))
+                cursor.execute('SELECT id FROM usuarios WHERE id = ?', (id,))
                 usuario_existente = cursor.fetchone()
                 
                 if not usuario_existente:
                     conn.close()
                     user_ns.abort(404, f"Usuário com ID {id} não encontrado")
                 
-                # Desativar usuário (soft delete)
-                cursor.execute('UPDATE usuarios SET ativo = 0 WHERE id = ?', (id,))
-                conn.commit()
                 conn.close()
                 
+                # Desativar usuário (soft delete) e revogar suas sessões
+                desativar_em_lote(ids=[id])
+                
                 return {
                     'message': f'Usuário com ID {id} removido com sucesso',
                     'status': 'sucesso'
                 }
+            except HTTPException:
+                raise
             except Exception as e:
                 user_ns.abort(500, f"Erro ao remover usuário: {str(e)}")
     
@@ -251,11 +553,99 @@ def create_user_routes(api):
             """Listar níveis de acesso disponíveis"""
             try:
                 return {
-                    'niveis': obter_niveis_disponiveis()
+                    'niveis': obter_niveis_disponiveis(),
+                    'versao': registro_permissoes.atual.versao
                 }
             except Exception as e:
                 user_ns.abort(500, f"Erro ao listar níveis: {str(e)}")
     
+    @user_ns.route('/niveis/<string:nome>')
+    @user_ns.param('nome', 'Identificador do nível de acesso')
+    class NivelAcessoResource(Resource):
+        @user_ns.doc('salvar_nivel')
+        @user_ns.expect(nivel_model)
+        @user_ns.response(200, 'Nível atualizado')
+        @user_ns.response(201, 'Nível criado')
+        @user_ns.response(400, 'Erro de validação')
+        @user_ns.response(401, 'Token inválido')
+        @user_ns.response(403, 'Permissão insuficiente')
+        @require_auth
+        @require_admin
+        def put(self, nome):
+            """Criar ou alterar um nível de acesso e suas permissões (apenas administrativo)"""
+            try:
+                dados = request.get_json()
+                if not dados:
+                    user_ns.abort(400, "Dados são obrigatórios")
+                
+                titulo = dados.get('titulo')
+                nivel = dados.get('nivel')
+                permissoes = dados.get('permissoes')
+                
+                if not nome.replace('_', '').isalnum() or not nome.islower():
+                    user_ns.abort(400, "Nome do nível deve conter apenas letras minúsculas, números e '_'")
+                if not titulo:
+                    user_ns.abort(400, "Campo 'titulo' é obrigatório")
+                if not isinstance(nivel, int) or isinstance(nivel, bool) or nivel < 1:
+                    user_ns.abort(400, "Campo 'nivel' deve ser um inteiro positivo")
+                if not isinstance(permissoes, list) or not validar_permissoes(permissoes):
+                    user_ns.abort(400, "Campo 'permissoes' deve ser uma lista no formato 'recurso:acao'")
+                # require_admin e require_manager_or_admin comparam com a posição dos níveis padrão
+                if nome in NIVEIS_ACESSO and nivel != NIVEIS_ACESSO[nome]['nivel']:
+                    user_ns.abort(400, f"A posição do nível '{nome}' é fixa ({NIVEIS_ACESSO[nome]['nivel']})")
+                if nome == 'administrativo' and 'system:admin' not in permissoes:
+                    user_ns.abort(400, "O nível administrativo deve manter a permissão 'system:admin'")
+                
+                criado = salvar_nivel(nome, titulo, dados.get('descricao', ''), nivel, permissoes)
+                
+                # Trocar o snapshot deste worker; os demais percebem pela versão
+                atual = registro_permissoes.recarregar()
+                
+                return {
+                    'nome': nome,
+                    'nivel': atual.niveis[nome],
+                    'versao': atual.versao
+                }, 201 if criado else 200
+            except HTTPException:
+                raise
+            except Exception as e:
+                user_ns.abort(500, f"Erro ao salvar nível: {str(e)}")
+        
+        @user_ns.doc('remover_nivel')
+        @user_ns.response(200, 'Nível removido')
+        @user_ns.response(401, 'Token inválido')
+        @user_ns.response(403, 'Permissão insuficiente')
+        @user_ns.response(404, 'Nível não encontrado')
+        @user_ns.response(409, 'Nível em uso')
+        @require_auth
+        @require_admin
+        def delete(self, nome):
+            """Remover um nível de acesso sem usuários (apenas administrativo)"""
+            try:
+                # Os níveis padrão são referência da hierarquia (ex.: require_manager_or_admin)
+                if nome in NIVEIS_ACESSO:
+                    user_ns.abort(400, f"O nível '{nome}' não pode ser removido")
+                
+                try:
+                    existia = remover_nivel(nome)
+                except ValueError as e:
+                    user_ns.abort(409, str(e))
+                
+                if not existia:
+                    user_ns.abort(404, f"Nível '{nome}' não encontrado")
+                
+                atual = registro_permissoes.recarregar()
+                
+                return {
+                    'message': f"Nível '{nome}' removido com sucesso",
+                    'status': 'sucesso',
+                    'versao': atual.versao
+                }
+            except HTTPException:
+                raise
+            except Exception as e:
+                user_ns.abort(500, f"Erro ao remover nível: {str(e)}")
+    
     @user_ns.route('/<int:id>/nivel')
     @user_ns.param('id', 'ID do usuário')
     class AlterarNivel(Resource):
@@ -286,7 +676,7 @@ def create_user_routes(api):
                 cursor = conn.cursor()
                 
                 # Verificar se usuário existe
-                cursor.execute('SELECT * FROM usuarios WHERE id = ?', (id,))
+                cursor.execute('SELECT id FROM usuarios WHERE id = ?', (id,))
                 usuario_existente = cursor.fetchone()
                 
                 if not usuario_existente:
@@ -295,13 +685,17 @@ def create_user_routes(api):
                 
                 # Atualizar nível de acesso
                 cursor.execute('UPDATE usuarios SET nivel_acesso = ? WHERE id = ?', (nivel_acesso, id))
+                versao = versionar_usuarios(cursor)
                 conn.commit()
                 conn.close()
+                notificar_alteracao_usuarios('nivel', [id], versao)
                 
                 return {
                     'message': f'Nível de acesso do usuário {id} alterado para {nivel_acesso}',
                     'status': 'sucesso'
                 }
+            except HTTPException:
+                raise
             except Exception as e:
                 user_ns.abort(500, f"Erro ao alterar nível: {str(e)}")
     
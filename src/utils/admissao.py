@@ -0,0 +1,245 @@
+"""
+Controle de admissão por classe de rota (descarte de carga)
+Sob sobrecarga, requisições baratas ficavam na fila atrás das caras
+(listagem completa, exportação, hash de senha no login) e a latência de
+tudo desabava. Cada classe de rota cara tem um limite de execuções
+simultâneas e uma fila curta:
+
+- com vaga livre, a requisição segue na hora;
+- com a fila cheia, recebe 503 imediato com ``Retry-After``;
+- na fila, espera no máximo ``espera_max`` segundos pela vaga (FIFO) e,
+  se ela não vier, também recebe 503.
+
+Rotas sem classe (``/health``, ``/auth/me``, CRUD de uma tarefa...) nunca
+esperam aqui. Os limites valem por processo: com N workers, o total é N
+vezes o configurado.
+
+O excedente só é descartado se chegar a uma thread do worker: no gunicorn
+são necessários workers gthread com mais threads que as vagas (o padrão
+``WORKER_THREADS=0``, ver ``servidor.numero_threads``). No ASGI a fila
+fica no event loop.
+"""
+
+import asyncio
+import threading
+from collections import deque
+
+# Rotas caras: (método, caminho) -> classe
+ROTAS = {
+    ('GET', '/tarefas/'): 'listagem',
+    ('GET', '/usuarios/'): 'listagem',
+    ('GET', '/tarefas/export'): 'exportacao',
+    ('POST', '/auth/login'): 'login',
+    ('POST', '/auth/register'): 'login',
+}
+
+# Prefixo das chaves do Config de cada classe (<PREFIXO>_CONCURRENCY e <PREFIXO>_QUEUE)
+PREFIXOS = {
+    'listagem': 'ADMISSION_LIST',
+    'exportacao': 'ADMISSION_EXPORT',
+    'login': 'ADMISSION_LOGIN',
+}
+
+# Chave do environ WSGI marcando requisições já admitidas pelo servidor ASGI
+CHAVE_ADMITIDA = 'admissao.admitida'
+
+MENSAGEM_SOBRECARGA = 'Servidor sobrecarregado. Tente novamente em instantes.'
+
+
+class _Espera:
+    """Requisição na fila; ``admitida`` é marcada por quem libera a vaga"""
+
+    __slots__ = ('despertar', 'admitida')
+
+    def __init__(self, despertar):
+        self.despertar = despertar
+        self.admitida = False
+
+
+class ClasseAdmissao:
+    """
+    Limite de concorrência com fila limitada de uma classe de rotas
+
+    Ao liberar uma vaga, ela passa direto à primeira requisição da fila
+    (nenhuma requisição nova a ultrapassa). ``despertar`` é chamado de
+    qualquer thread: ``threading.Event.set`` no caminho WSGI,
+    ``loop.call_soon_threadsafe`` no ASGI.
+    """
+
+    def __init__(self, nome, max_concorrentes, max_fila, espera_max):
+        self.nome = nome
+        self.max_concorrentes = max_concorrentes
+        self.max_fila = max_fila
+        self.espera_max = espera_max
+        self.ativas = 0
+        self.admitidas = 0
+        self.rejeitadas_fila_cheia = 0
+        self.rejeitadas_tempo_esgotado = 0
+        self._fila = deque()
+        self._lock = threading.Lock()
+
+    def _reservar(self, despertar):
+        """True (vaga obtida), False (fila cheia) ou a ``_Espera`` na fila"""
+        with self._lock:
+            if self.ativas < self.max_concorrentes:
+                self.ativas += 1
+                self.admitidas += 1
+                return True
+            if len(self._fila) >= self.max_fila:
+                self.rejeitadas_fila_cheia += 1
+                return False
+            espera = _Espera(despertar)
+            self._fila.append(espera)
+            return espera
+
+    def _desistir(self, espera):
+        """Fim da espera: True se a vaga chegou a tempo"""
+        with self._lock:
+            if espera.admitida:
+                return True
+            self._fila.remove(espera)
+            self.rejeitadas_tempo_esgotado += 1
+            return False
+
+    def entrar(self):
+        """Obtém uma vaga, bloqueando a thread na fila (False = rejeitada)"""
+        acordado = threading.Event()
+        espera = self._reservar(acordado.set)
+        if isinstance(espera, bool):
+            return espera
+        acordado.wait(self.espera_max)
+        return self._desistir(espera)
+
+    async def entrar_assincrono(self):
+        """Versão em corrotina de ``entrar``: a fila não ocupa threads"""
+        loop = asyncio.get_running_loop()
+        acordado = asyncio.Event()
+        espera = self._reservar(lambda: loop.call_soon_threadsafe(acordado.set))
+        if isinstance(espera, bool):
+            return espera
+        try:
+            await asyncio.wait_for(acordado.wait(), self.espera_max)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Cliente desconectou na fila: devolve a vaga se ela já tinha chegado
+            if self._desistir(espera):
+                self.liberar()
+            raise
+        return self._desistir(espera)
+
+    def liberar(self):
+        """Devolve a vaga (ou a repassa à primeira requisição da fila)"""
+        with self._lock:
+            if self._fila:
+                espera = self._fila.popleft()
+                espera.admitida = True
+                self.admitidas += 1
+                espera.despertar()
+            else:
+                self.ativas -= 1
+
+    def stats(self):
+        return {
+            'ativas': self.ativas,
+            'na_fila': len(self._fila),
+            'max_concorrentes': self.max_concorrentes,
+            'max_fila': self.max_fila,
+            'admitidas': self.admitidas,
+            'rejeitadas_fila_cheia': self.rejeitadas_fila_cheia,
+            'rejeitadas_tempo_esgotado': self.rejeitadas_tempo_esgotado
+        }
+
+
+class ControleAdmissao:
+    """Classes de admissão de uma aplicação e a classificação das rotas"""
+
+    def __init__(self, classes, rotas=ROTAS, retry_after=1):
+        self.classes = classes
+        self.rotas = {chave: classes[nome] for chave, nome in rotas.items() if nome in classes}
+        self.retry_after = retry_after
+
+    @classmethod
+    def from_config(cls, config):
+        """Cria as classes a partir dos atributos ``ADMISSION_*`` do Config"""
+        classes = {
+            nome: ClasseAdmissao(
+                nome,
+                getattr(config, f'{prefixo}_CONCURRENCY'),
+                getattr(config, f'{prefixo}_QUEUE'),
+                config.ADMISSION_QUEUE_TIMEOUT
+            )
+            for nome, prefixo in PREFIXOS.items()
+        }
+        return cls(classes, retry_after=config.ADMISSION_RETRY_AFTER)
+
+    def classificar(self, metodo, caminho):
+        """Classe da rota (None para rotas sem limite)"""
+        return self.rotas.get((metodo, caminho))
+
+    def sobrecarga(self):
+        """Corpo e cabeçalhos da resposta 503"""
+        return {'message': MENSAGEM_SOBRECARGA, 'retry_after': self.retry_after}, {'Retry-After': str(self.retry_after)}
+
+    def stats(self):
+        return {nome: classe.stats() for nome, classe in self.classes.items()}
+
+    def coletor(self):
+        """Coletor de métricas: vagas ocupadas, profundidade da fila e rejeições"""
+        def coletar():
+            series = []
+            for nome, classe in self.classes.items():
+                rotulo = (('classe', nome),)
+                series += [
+                    ('gauge', 'admission_in_flight', rotulo, classe.ativas),
+                    ('gauge', 'admission_queue_depth', rotulo, len(classe._fila)),
+                    ('counter', 'admission_admitted_total', rotulo, classe.admitidas),
+                    ('counter', 'admission_rejected_total', rotulo + (('motivo', 'fila_cheia'),),
+                     classe.rejeitadas_fila_cheia),
+                    ('counter', 'admission_rejected_total', rotulo + (('motivo', 'tempo_esgotado'),),
+                     classe.rejeitadas_tempo_esgotado),
+                ]
+            return series
+        return coletar
+
+
+def registrar_admissao(app, controle):
+    """
+    Aplica o controle de admissão às rotas Flask
+
+    Deve ser registrado antes da autenticação: a rejeição não custa
+    nenhuma consulta. A vaga é devolvida com a resposta pronta; streams
+    como a exportação a mantêm até terminarem de ser enviados.
+    """
+    from flask import g, jsonify, request
+
+    def admitir():
+        if request.environ.get(CHAVE_ADMITIDA):
+            return None
+        classe = controle.classificar(request.method, request.path)
+        if classe is None:
+            return None
+        if not classe.entrar():
+            corpo, headers = controle.sobrecarga()
+            return jsonify(corpo), 503, headers
+        g.admissao = classe
+
+    def liberar_ao_responder(resposta):
+        classe = g.pop('admissao', None)
+        if classe is not None:
+            if resposta.is_streamed:
+                # O trabalho acontece durante o envio: a vaga segue até o fim do stream
+                resposta.call_on_close(classe.liberar)
+            else:
+                classe.liberar()
+        return resposta
+
+    def liberar(erro=None):
+        # Resposta não chegou ao after_request (erro não tratado)
+        classe = g.pop('admissao', None)
+        if classe is not None:
+            classe.liberar()
+
+    app.before_request(admitir)
+    app.after_request(liberar_ao_responder)
+    app.teardown_request(liberar)
@@ -0,0 +1,76 @@
+"""
+Execução de código bloqueante a partir de corrotinas
+O SQLite e a aplicação Flask são síncronos: no caminho ASGI eles rodam
+em pools de threads limitados, e as corrotinas que excedem o limite
+esperam no event loop (sem ocupar thread nem crescer a fila do pool).
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorLimitado:
+    """
+    Pool de threads com limite de tarefas em execução e na fila
+
+    No máximo ``max_threads + max_fila`` chamadas são entregues ao pool;
+    as demais aguardam num semáforo do event loop.
+    """
+
+    def __init__(self, nome, max_threads=16, max_fila=64):
+        self.nome = nome
+        self.max_threads = max_threads
+        self.max_fila = max_fila
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix=nome)
+        self._vagas = None
+        self.em_execucao = 0
+        self.aguardando = 0
+        self.concluidas = 0
+
+    def _semaforo(self):
+        # Criado no primeiro uso, dentro do event loop que o usará
+        if self._vagas is None:
+            self._vagas = asyncio.Semaphore(self.max_threads + self.max_fila)
+        return self._vagas
+
+    async def executar(self, funcao, *args, **kwargs):
+        """Executa ``funcao(*args, **kwargs)`` numa thread do pool e retorna o resultado"""
+        vagas = self._semaforo()
+        self.aguardando += 1
+        try:
+            await vagas.acquire()
+        finally:
+            self.aguardando -= 1
+
+        self.em_execucao += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(funcao, *args, **kwargs))
+        finally:
+            self.em_execucao -= 1
+            self.concluidas += 1
+            vagas.release()
+
+    def encerrar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            'max_threads': self.max_threads,
+            'max_fila': self.max_fila,
+            'em_execucao': self.em_execucao,
+            'aguardando': self.aguardando,
+            'concluidas': self.concluidas
+        }
+
+    def coletor(self):
+        """Coletor de métricas: chamadas no pool e aguardando vaga"""
+        def coletar():
+            rotulo = (('executor', self.nome),)
+            return [
+                ('gauge', 'executor_tasks_running', rotulo, self.em_execucao),
+                ('gauge', 'executor_tasks_waiting', rotulo, self.aguardando),
+                ('counter', 'executor_tasks_total', rotulo, self.concluidas),
+            ]
+        return coletar
@@ -1,70 +1,80 @@
 from functools import wraps
-from flask import request, jsonify
+from flask import request, g, abort
 from src.models.usuario import Usuario
-from src.utils.permissions import verificar_permissao, verificar_nivel_minimo
+
+def resolve_current_user():
+    """
+    Resolve a autenticação da requisição (registrado como before_request)
+
+    Extrai o token Bearer do header uma única vez e guarda em ``flask.g``.
+    A consulta da sessão no banco é feita somente no primeiro acesso ao
+    usuário e o resultado fica em ``g.current_user``, de modo que
+    decorators e handlers nunca verificam o mesmo token duas vezes.
+    """
+    if 'auth_token' in g:
+        return
+
+    header = request.headers.get('Authorization')
+    if header and header.startswith('Bearer '):
+        g.auth_token = header[len('Bearer '):]
+    else:
+        g.auth_token = None
+
+def get_auth_token():
+    """Retorna o token Bearer da requisição atual (ou None)"""
+    resolve_current_user()
+    return g.auth_token
+
+def get_current_user():
+    """Retorna o usuário atual da requisição, autenticando no máximo uma vez"""
+    if 'current_user' not in g:
+        token = get_auth_token()
+        g.current_user = Usuario.verificar_jwt_token(token) if token else None
+    return g.current_user
 
 def require_auth(f):
     """Decorator para proteger rotas que precisam de autenticação"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # Verificar se há token de autorização
-        token = request.headers.get('Authorization')
-        if not token or not token.startswith('Bearer '):
-            from flask import abort
+        if not get_auth_token():
             abort(401, 'Token de autorização necessário')
-        
-        # Extrair token
-        token = token.replace('Bearer ', '')
-        
-        # Verificar token
-        usuario = Usuario.verificar_jwt_token(token)
-        if not usuario:
-            from flask import abort
+
+        # Verificar token (resolvido uma vez por requisição)
+        if not get_current_user():
             abort(401, 'Token inválido ou expirado')
-        
-        # Adicionar usuário ao contexto da requisição
-        request.current_user = usuario
-        
+
         return f(*args, **kwargs)
-    
+
+    decorated_function.requires_auth = True
     return decorated_function
 
 def require_2fa(f):
     """Decorator para rotas que precisam de verificação 2FA"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        from flask import abort
-        
         # Primeiro verificar autenticação básica
-        token = request.headers.get('Authorization')
-        if not token or not token.startswith('Bearer '):
+        if not get_auth_token():
             abort(401, 'Token de autorização necessário')
-        
-        token = token.replace('Bearer ', '')
-        usuario = Usuario.verificar_jwt_token(token)
+
+        usuario = get_current_user()
         if not usuario:
             abort(401, 'Token inválido ou expirado')
-        
+
         # Verificar se 2FA está configurado
         if not usuario.secret_2fa:
             abort(403, '2FA não configurado')
-        
+
         # Verificar código 2FA no header
         codigo_2fa = request.headers.get('X-2FA-Code')
         if not codigo_2fa:
             abort(401, 'Código 2FA necessário')
-        
+
         # Verificar código 2FA
         if not usuario.verificar_codigo_2fa(codigo_2fa):
             abort(401, 'Código 2FA inválido')
-        
-        # Adicionar usuário ao contexto
-        request.current_user = usuario
-        
+
         return f(*args, **kwargs)
-    
-    return decorated_function
 
-def get_current_user():
-    """Retorna o usuário atual da requisição"""
-    return getattr(request, 'current_user', None)
+    decorated_function.requires_auth = True
+    return decorated_function
@@ -4,7 +4,56 @@ Define diferentes estratégias de autorização para cada nível de acesso
 """
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, Iterable, List
+
+
+# Catálogo de permissões conhecidas: cada permissão ocupa uma posição de bit
+# fixa, e cada nível de acesso é compilado numa máscara inteira
+PERMISSOES = (
+    'tarefas:read',
+    'tarefas:list',
+    'tarefas:create',
+    'tarefas:update',
+    'tarefas:delete',
+    'usuarios:read',
+    'usuarios:list',
+    'usuarios:create',
+    'usuarios:update',
+    'usuarios:delete',
+    'usuarios:change_role',
+    'system:admin'
+)
+
+PERMISSAO_BITS: Dict[str, int] = {permissao: 1 << posicao for posicao, permissao in enumerate(PERMISSOES)}
+
+
+def bit_permissao(action: str) -> int:
+    """
+    Retorna o bit de uma permissão (0 para permissões desconhecidas)
+    
+    Args:
+        action (str): Permissão (ex: 'tarefas:create')
+    
+    Returns:
+        int: Bit da permissão
+    """
+    return PERMISSAO_BITS.get(action, 0)
+
+
+def compilar_mascara(actions: Iterable[str]) -> int:
+    """
+    Compila uma lista de permissões numa máscara de bits
+    
+    Args:
+        actions (Iterable[str]): Permissões permitidas
+    
+    Returns:
+        int: Máscara com um bit ligado por permissão
+    """
+    mascara = 0
+    for action in actions:
+        mascara |= PERMISSAO_BITS[action]
+    return mascara
 
 
 class AuthorizationStrategy(ABC):
@@ -51,9 +100,10 @@ class VisualizacaoStrategy(AuthorizationStrategy):
         'tarefas:read',
         'tarefas:list'
     ]
+    MASK = compilar_mascara(ALLOWED_ACTIONS)
     
     def can_perform_action(self, action: str) -> bool:
-        return action in self.ALLOWED_ACTIONS
+        return (self.MASK & PERMISSAO_BITS.get(action, 0)) != 0
     
     def get_allowed_actions(self) -> List[str]:
         return self.ALLOWED_ACTIONS.copy()
@@ -74,9 +124,10 @@ class GerencialStrategy(AuthorizationStrategy):
         'usuarios:read',
         'usuarios:list'
     ]
+    MASK = compilar_mascara(ALLOWED_ACTIONS)
     
     def can_perform_action(self, action: str) -> bool:
-        return action in self.ALLOWED_ACTIONS
+        return (self.MASK & PERMISSAO_BITS.get(action, 0)) != 0
     
     def get_allowed_actions(self) -> List[str]:
         return self.ALLOWED_ACTIONS.copy()
@@ -102,9 +153,10 @@ class AdministrativoStrategy(AuthorizationStrategy):
         'usuarios:change_role',
         'system:admin'
     ]
+    MASK = compilar_mascara(ALLOWED_ACTIONS)
     
     def can_perform_action(self, action: str) -> bool:
-        return action in self.ALLOWED_ACTIONS
+        return (self.MASK & PERMISSAO_BITS.get(action, 0)) != 0
     
     def get_allowed_actions(self) -> List[str]:
         return self.ALLOWED_ACTIONS.copy()
@@ -113,6 +165,15 @@ class AdministrativoStrategy(AuthorizationStrategy):
         return 'administrativo'
 
 
+# Estratégias padrão sem estado (uma instância por nível); definem os
+# níveis iniciais gravados no banco
+STRATEGIES: Dict[str, AuthorizationStrategy] = {
+    'visualizacao': VisualizacaoStrategy(),
+    'gerencial': GerencialStrategy(),
+    'administrativo': AdministrativoStrategy()
+}
+
+
 class AuthorizationContext:
     """Contexto que utiliza a estratégia de autorização"""
     
@@ -135,13 +196,10 @@ class AuthorizationContext:
         Returns:
             AuthorizationStrategy: Estratégia apropriada
         """
-        strategies = {
-            'visualizacao': VisualizacaoStrategy(),
-            'gerencial': GerencialStrategy(),
-            'administrativo': AdministrativoStrategy()
-        }
+        # Estratégias compiladas a partir dos níveis cadastrados no banco
+        from src.utils.permissions import registro_permissoes
         
-        strategy = strategies.get(nivel_acesso)
+        strategy = registro_permissoes.atual.estrategias.get(nivel_acesso)
         if not strategy:
             raise ValueError(f"Nível de acesso inválido: {nivel_acesso}")
         
@@ -0,0 +1,295 @@
+"""
+Captura do tráfego real para reprodução posterior
+Cada requisição vira um registro compacto (uma linha JSON) com método,
+rota (template), argumentos da rota, query string, tamanhos, status e
+duração. Corpos e cabeçalhos nunca são gravados e valores de parâmetros
+sensíveis (senhas, tokens, códigos e as buscas por nome/email de
+usuários) são substituídos por ``***``.
+
+Cada processo grava o seu próprio ``captura-<pid>.jsonl``; ao atingir o
+tamanho máximo o arquivo é renomeado e compactado (``.jsonl.gz``) por uma
+thread auxiliar, fora da requisição, e apenas os arquivos mais recentes
+do diretório são mantidos. O script
+``benchmarks/replay.py`` lê esses arquivos e reproduz o tráfego.
+
+Formato de um registro::
+
+    {"t": 1718000000.123, "m": "GET", "r": "/tarefas/<int:id>", "a": {"id": 5},
+     "q": "limite=50", "p": "visualizacao", "e": 0, "s": 200, "o": 312, "d": 2.41}
+
+``t`` início (epoch), ``p`` nível de acesso do usuário (``"?"`` com token
+não resolvido, ausente sem token), ``e``/``o`` bytes de entrada/saída e
+``d`` duração em ms.
+"""
+
+import glob
+import gzip
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode
+
+REDIGIDO = '***'
+
+# Trechos de nomes de parâmetros cujos valores nunca são gravados
+PARAMETROS_SENSIVEIS = ('senha', 'password', 'token', 'secret', 'codigo', 'code', 'otp', 'key', 'email')
+
+# Parâmetros redigidos apenas em algumas rotas (nome exato): a busca de
+# usuários recebe prefixos de nomes e emails
+PARAMETROS_SENSIVEIS_POR_ROTA = {
+    '/usuarios/': ('q',),
+    '/usuarios/suggest': ('q',),
+}
+
+# Rotas de diagnóstico e documentação não fazem parte do tráfego da aplicação
+PREFIXOS_IGNORADOS = ('/metrics', '/admin/', '/docs', '/swagger', '/static/')
+
+PADRAO_ARGUMENTO = re.compile(r'<(?:[^:<>]+:)?([^<>]+)>')
+
+
+def sanitizar_query(query_string, rota=None):
+    """Query string com os valores de parâmetros sensíveis (em geral e da rota) redigidos"""
+    if not query_string:
+        return ''
+    da_rota = PARAMETROS_SENSIVEIS_POR_ROTA.get(rota, ())
+    pares = [
+        (chave, REDIGIDO if chave in da_rota or any(trecho in chave.lower() for trecho in PARAMETROS_SENSIVEIS)
+         else valor)
+        for chave, valor in parse_qsl(query_string, keep_blank_values=True)
+    ]
+    return urlencode(pares, safe='*')
+
+
+def caminho_registro(registro):
+    """Reconstrói o caminho da requisição a partir da rota e dos argumentos"""
+    argumentos = registro.get('a') or {}
+    caminho = PADRAO_ARGUMENTO.sub(lambda m: str(argumentos.get(m.group(1), '')), registro['r'])
+    if registro.get('q'):
+        caminho += '?' + registro['q']
+    return caminho
+
+
+def ler_registros(caminhos):
+    """
+    Lê registros de arquivos ou diretórios de captura (``.jsonl`` e ``.jsonl.gz``)
+
+    Linhas incompletas (ex.: processo interrompido no meio da escrita) são
+    ignoradas.
+
+    Returns:
+        list: Registros ordenados pelo instante de início
+    """
+    arquivos = []
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            arquivos.extend(glob.glob(os.path.join(caminho, 'captura-*.jsonl*')))
+        else:
+            arquivos.append(caminho)
+
+    registros = []
+    for arquivo in sorted(arquivos):
+        abrir = gzip.open if arquivo.endswith('.gz') else open
+        with abrir(arquivo, 'rt', encoding='utf-8') as entrada:
+            for linha in entrada:
+                try:
+                    registro = json.loads(linha)
+                except ValueError:
+                    continue
+                if isinstance(registro, dict) and 't' in registro and 'r' in registro:
+                    registros.append(registro)
+    registros.sort(key=lambda registro: registro['t'])
+    return registros
+
+
+class GravadorCaptura:
+    """
+    Grava os registros de um processo com rotação por tamanho
+
+    As linhas ficam num buffer em memória e são escritas a cada
+    ``intervalo_escrita`` segundos (ou 64 KB), com ``os.write`` no
+    descritor do arquivo: um processo filho criado por fork descarta o
+    buffer herdado em vez de gravá-lo em duplicidade.
+
+    Na rotação a requisição apenas renomeia o arquivo cheio; a compactação
+    e a limpeza dos antigos ficam com uma thread auxiliar do processo.
+    """
+
+    LIMITE_BUFFER = 64 * 1024
+
+    def __init__(self, diretorio, max_bytes=10 * 1024 * 1024, max_arquivos=10, intervalo_escrita=1.0):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        self.max_arquivos = max_arquivos
+        self.intervalo_escrita = intervalo_escrita
+        os.makedirs(diretorio, exist_ok=True)
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._fd = None
+        self._tamanho = 0
+        self._buffer = []
+        self._bytes_buffer = 0
+        self._ultima_escrita = time.monotonic()
+        self.gravados = 0
+        self.rotacoes = 0
+        self._pendentes = None
+
+    @property
+    def arquivo_atual(self):
+        return os.path.join(self.diretorio, f'captura-{self._pid}.jsonl')
+
+    def gravar(self, registro):
+        """Acrescenta um registro; escreve no arquivo quando o buffer vence"""
+        if os.getpid() != self._pid:
+            # Processo filho (ex.: worker do gunicorn): arquivo e buffer próprios
+            self._reiniciar()
+        linha = json.dumps(registro, separators=(',', ':'), ensure_ascii=False) + '\n'
+        with self._lock:
+            self._buffer.append(linha)
+            self._bytes_buffer += len(linha)
+            self.gravados += 1
+            if (self._bytes_buffer >= self.LIMITE_BUFFER
+                    or time.monotonic() - self._ultima_escrita >= self.intervalo_escrita):
+                self._escrever()
+
+    def descarregar(self):
+        """Escreve imediatamente o que estiver no buffer e aguarda as compactações pendentes"""
+        if os.getpid() != self._pid:
+            return
+        with self._lock:
+            self._escrever()
+            pendentes = self._pendentes
+        if pendentes is not None:
+            pendentes.join()
+
+    def _escrever(self):
+        self._ultima_escrita = time.monotonic()
+        if not self._buffer:
+            return
+        dados = ''.join(self._buffer).encode('utf-8')
+        self._buffer = []
+        self._bytes_buffer = 0
+
+        if self._fd is None:
+            self._fd = os.open(self.arquivo_atual, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            self._tamanho = os.fstat(self._fd).st_size
+        os.write(self._fd, dados)
+        self._tamanho += len(dados)
+        if self._tamanho >= self.max_bytes:
+            self._rotacionar()
+
+    def _rotacionar(self):
+        """Fecha o arquivo atual e o entrega, renomeado, à thread de compactação"""
+        os.close(self._fd)
+        self._fd = None
+        self._tamanho = 0
+        self.rotacoes += 1
+
+        cheio = os.path.join(self.diretorio, f'captura-{self._pid}-{time.time_ns()}.jsonl')
+        os.rename(self.arquivo_atual, cheio)
+        if self._pendentes is None:
+            self._pendentes = queue.Queue()
+            threading.Thread(target=self._compactar_pendentes, args=(self._pendentes,),
+                             name='compactador-captura', daemon=True).start()
+        self._pendentes.put(cheio)
+
+    def _compactar_pendentes(self, pendentes):
+        while True:
+            origem = pendentes.get()
+            try:
+                self._compactar(origem)
+            except OSError:
+                # O .jsonl renomeado continua legível por ler_registros
+                pass
+            finally:
+                pendentes.task_done()
+
+    def _compactar(self, origem):
+        """Compacta um arquivo cheio e apaga os mais antigos além do limite"""
+        destino = f'{origem}.gz'
+        # Nome fora do padrão captura-*: a leitura nunca pega um .gz incompleto
+        temporario = os.path.join(self.diretorio, f'.{os.path.basename(destino)}.tmp')
+        with open(origem, 'rb') as entrada, gzip.open(temporario, 'wb') as saida:
+            for bloco in iter(lambda: entrada.read(1024 * 1024), b''):
+                saida.write(bloco)
+        os.replace(temporario, destino)
+        os.unlink(origem)
+
+        compactados = sorted(glob.glob(os.path.join(self.diretorio, 'captura-*.jsonl.gz')), key=os.path.getmtime)
+        for antigo in compactados[:max(0, len(compactados) - self.max_arquivos)]:
+            try:
+                os.unlink(antigo)
+            except OSError:
+                pass
+
+    def stats(self):
+        return {
+            'itens': len(self._buffer),
+            'gravados': self.gravados,
+            'rotacoes': self.rotacoes,
+            'compactacoes_pendentes': self._pendentes.unfinished_tasks if self._pendentes is not None else 0
+        }
+
+
+def registrar_captura(app, gravador, taxa_amostragem=1.0):
+    """
+    Registra os hooks de captura (chamar antes do hook de autenticação)
+
+    Args:
+        gravador (GravadorCaptura): Destino dos registros
+        taxa_amostragem (float): Fração das requisições capturadas
+    """
+    from flask import g, request
+
+    def iniciar():
+        rota = request.url_rule.rule if request.url_rule else None
+        if rota is None or rota.startswith(PREFIXOS_IGNORADOS):
+            return
+        if taxa_amostragem < 1.0 and random.random() >= taxa_amostragem:
+            return
+        g.captura = (time.time(), time.perf_counter(), rota)
+
+    def registrar_resposta(resposta):
+        if 'captura' in g:
+            g.captura_resposta = (resposta.status_code, resposta.calculate_content_length())
+        return resposta
+
+    def finalizar(erro=None):
+        dados = g.pop('captura', None)
+        if dados is None:
+            return
+        inicio, inicio_relogio, rota = dados
+        status, tamanho_saida = g.pop('captura_resposta', (500, None))
+
+        registro = {
+            't': round(inicio, 3),
+            'm': request.method,
+            'r': rota,
+            'e': request.content_length or 0,
+            's': status,
+            'o': tamanho_saida,
+            'd': round((time.perf_counter() - inicio_relogio) * 1000, 3)
+        }
+        if request.view_args:
+            registro['a'] = request.view_args
+        query = sanitizar_query(request.query_string.decode('latin-1'), rota)
+        if query:
+            registro['q'] = query
+        # Nível de acesso só quando já resolvido pela requisição (sem consulta extra)
+        usuario = g.get('current_user')
+        if usuario is not None:
+            registro['p'] = usuario.nivel_acesso
+        elif g.get('auth_token'):
+            registro['p'] = '?'
+        gravador.gravar(registro)
+
+    app.before_request(iniciar)
+    app.after_request(registrar_resposta)
+    app.teardown_request(finalizar)
+    return gravador
@@ -0,0 +1,50 @@
+"""
+Exportação de tarefas em streaming (NDJSON ou CSV)
+Compartilhado pela rota WSGI (gerador síncrono) e pela rota ASGI
+(corrotina): ambas leem lotes por paginação de chave e serializam cada
+lote num único bloco de bytes, sem montar a tabela inteira em memória.
+"""
+
+import csv
+import io
+import json
+
+from src.models.tarefa import ler_lote_tarefas, tarefa_para_dict
+
+FORMATOS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+COLUNAS = ('id', 'titulo', 'descricao', 'status', 'data_criacao', 'data_atualizacao')
+TAMANHO_LOTE = 500
+
+
+def cabecalhos(formato):
+    """Cabeçalhos HTTP da resposta de exportação"""
+    return {'Content-Disposition': f'attachment; filename=tarefas.{formato}'}
+
+
+def inicio(formato):
+    """Bytes enviados antes do primeiro lote (linha de colunas no CSV)"""
+    return ','.join(COLUNAS).encode('utf-8') + b'\r\n' if formato == 'csv' else b''
+
+
+def serializar(linhas, formato):
+    """Serializa um lote de linhas de ``tarefas`` no formato pedido"""
+    if formato == 'csv':
+        saida = io.StringIO()
+        csv.writer(saida).writerows(linha[:len(COLUNAS)] for linha in linhas)
+        return saida.getvalue().encode('utf-8')
+    return ''.join(json.dumps(tarefa_para_dict(linha), ensure_ascii=False) + '\n' for linha in linhas).encode('utf-8')
+
+
+def exportar_tarefas(formato, tamanho_lote=TAMANHO_LOTE):
+    """Gerador síncrono com a exportação completa, lote a lote"""
+    yield inicio(formato)
+    apos_id = 0
+    while True:
+        linhas = ler_lote_tarefas(apos_id, tamanho_lote)
+        if not linhas:
+            return
+        yield serializar(linhas, formato)
+        apos_id = linhas[-1][0]
@@ -0,0 +1,272 @@
+"""
+Inspeção de memória do worker com tracemalloc
+Permite ligar e desligar o rastreamento em produção, capturar snapshots,
+comparar dois deles pelas linhas que mais alocaram e consultar o tamanho
+dos caches em memória da aplicação.
+
+Cuidados para uso num worker em atendimento:
+
+- número de quadros por alocação limitado (cada quadro custa memória)
+- poucos snapshots guardados; os mais antigos são descartados
+- rastreamento desligado automaticamente após uma duração máxima
+- uma única operação pesada (captura ou comparação) por vez
+
+Cada worker tem seu próprio estado: as respostas informam o pid.
+"""
+
+import gc
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from config import Config
+
+# Agrupamentos aceitos por tracemalloc.Snapshot.statistics/compare_to
+AGRUPAMENTOS = ('lineno', 'filename', 'traceback')
+
+# Alocações do próprio tracemalloc e do mecanismo de import não interessam
+FILTROS_SNAPSHOT = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class OperacaoEmAndamento(Exception):
+    """Outra operação pesada de memória está em execução neste worker"""
+
+
+def _estatistica_para_dict(estatistica):
+    """Converte Statistic/StatisticDiff em dicionário serializável"""
+    dados = {
+        'local': [f'{quadro.filename}:{quadro.lineno}' for quadro in estatistica.traceback],
+        'tamanho_bytes': estatistica.size,
+        'quantidade': estatistica.count
+    }
+    if isinstance(estatistica, tracemalloc.StatisticDiff):
+        dados['diferenca_bytes'] = estatistica.size_diff
+        dados['diferenca_quantidade'] = estatistica.count_diff
+    return dados
+
+
+def memoria_processo():
+    """RSS atual e pico do processo, e contadores do coletor de lixo"""
+    rss = None
+    try:
+        with open('/proc/self/statm', encoding='ascii') as arquivo:
+            rss = int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KiB no Linux e em bytes no macOS
+    pico = pico if sys.platform == 'darwin' else pico * 1024
+
+    return {
+        'pid': os.getpid(),
+        'rss_bytes': rss,
+        'pico_rss_bytes': pico,
+        'gc_contagens': list(gc.get_count())
+    }
+
+
+class InspetorMemoria:
+    """Controle do tracemalloc, snapshots guardados e componentes medidos"""
+
+    def __init__(self, max_snapshots=4, max_quadros=25, duracao_maxima=600):
+        """
+        Args:
+            max_snapshots (int): Número máximo de snapshots guardados
+            max_quadros (int): Limite de quadros de pilha por alocação
+            duracao_maxima (float): Segundos até desligar o rastreamento (0 = sem limite)
+        """
+        self.max_snapshots = max_snapshots
+        self.max_quadros = max_quadros
+        self.duracao_maxima = duracao_maxima
+        self._snapshots = OrderedDict()
+        self._proximo_id = 1
+        self._componentes = {}
+        self._lock = threading.Lock()
+        self._operacao = threading.Lock()
+        self._temporizador = None
+        self.iniciado_em = None
+
+    def apos_fork(self):
+        """No processo filho: novos locks, sem snapshots e sem rastreamento"""
+        self._lock = threading.Lock()
+        self._operacao = threading.Lock()
+        self._snapshots = OrderedDict()
+        self._temporizador = None
+        self.iniciado_em = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def registrar_componente(self, nome, stats):
+        """Registra um cache ou pool cujo ``stats()`` entra no relatório"""
+        self._componentes[nome] = stats
+
+    def componentes(self):
+        """Estatísticas de cada componente registrado"""
+        resultado = {}
+        for nome, stats in sorted(self._componentes.items()):
+            try:
+                resultado[nome] = stats()
+            except Exception as e:
+                resultado[nome] = {'erro': str(e)}
+        return resultado
+
+    def iniciar(self, quadros=1, duracao=None):
+        """
+        Liga o tracemalloc
+
+        Args:
+            quadros (int): Quadros de pilha guardados por alocação (limitado)
+            duracao (float): Segundos até desligar sozinho (limitado pela duração máxima)
+
+        Returns:
+            bool: False se o rastreamento já estava ligado
+        """
+        quadros = min(max(int(quadros), 1), self.max_quadros)
+        if self.duracao_maxima:
+            duracao = min(duracao or self.duracao_maxima, self.duracao_maxima)
+
+        with self._lock:
+            if tracemalloc.is_tracing():
+                return False
+            tracemalloc.start(quadros)
+            self.iniciado_em = time.time()
+            if duracao:
+                self._temporizador = threading.Timer(duracao, self.parar)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+        return True
+
+    def parar(self):
+        """
+        Desliga o tracemalloc e libera os rastros (os snapshots continuam disponíveis)
+
+        Returns:
+            bool: False se o rastreamento já estava desligado
+        """
+        with self._lock:
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+                self._temporizador = None
+            self.iniciado_em = None
+            if not tracemalloc.is_tracing():
+                return False
+            tracemalloc.stop()
+        return True
+
+    def capturar(self):
+        """
+        Captura um snapshot filtrado e o guarda
+
+        Returns:
+            dict: Resumo do snapshot (id, data, total alocado)
+
+        Raises:
+            RuntimeError: Se o rastreamento estiver desligado
+            OperacaoEmAndamento: Se outra captura ou comparação estiver em execução
+        """
+        if not self._operacao.acquire(blocking=False):
+            raise OperacaoEmAndamento()
+        try:
+            if not tracemalloc.is_tracing():
+                raise RuntimeError("tracemalloc desligado: inicie o rastreamento antes de capturar")
+            snapshot = tracemalloc.take_snapshot().filter_traces(FILTROS_SNAPSHOT)
+            resumo = {
+                'criado_em': time.time(),
+                'quadros': snapshot.traceback_limit,
+                'total_bytes': sum(estatistica.size for estatistica in snapshot.statistics('filename'))
+            }
+            with self._lock:
+                resumo['id'] = self._proximo_id
+                self._proximo_id += 1
+                self._snapshots[resumo['id']] = (snapshot, resumo)
+                while len(self._snapshots) > self.max_snapshots:
+                    self._snapshots.popitem(last=False)
+            return resumo
+        finally:
+            self._operacao.release()
+
+    def descartar(self, snapshot_id):
+        """Remove um snapshot guardado"""
+        with self._lock:
+            return self._snapshots.pop(snapshot_id, None) is not None
+
+    def _obter(self, snapshot_id):
+        with self._lock:
+            item = self._snapshots.get(snapshot_id)
+        if item is None:
+            raise KeyError(snapshot_id)
+        return item[0]
+
+    def estatisticas(self, snapshot_id, top=20, agrupar='lineno'):
+        """
+        Maiores alocações de um snapshot
+
+        Raises:
+            KeyError: Se o snapshot não existir
+            OperacaoEmAndamento: Se outra operação pesada estiver em execução
+        """
+        snapshot = self._obter(snapshot_id)
+        if not self._operacao.acquire(blocking=False):
+            raise OperacaoEmAndamento()
+        try:
+            return [_estatistica_para_dict(e) for e in snapshot.statistics(agrupar)[:top]]
+        finally:
+            self._operacao.release()
+
+    def comparar(self, de_id, para_id, top=20, agrupar='lineno'):
+        """
+        Linhas cuja alocação mais cresceu (ou diminuiu) entre dois snapshots
+
+        Raises:
+            KeyError: Se algum snapshot não existir
+            OperacaoEmAndamento: Se outra operação pesada estiver em execução
+        """
+        anterior = self._obter(de_id)
+        posterior = self._obter(para_id)
+        if not self._operacao.acquire(blocking=False):
+            raise OperacaoEmAndamento()
+        try:
+            diferencas = posterior.compare_to(anterior, agrupar)
+            return [_estatistica_para_dict(d) for d in diferencas[:top]]
+        finally:
+            self._operacao.release()
+
+    def estado(self):
+        """Rastreamento, memória rastreada, snapshots guardados e componentes"""
+        rastreando = tracemalloc.is_tracing()
+        atual, pico = tracemalloc.get_traced_memory() if rastreando else (0, 0)
+        with self._lock:
+            snapshots = [resumo for _, resumo in self._snapshots.values()]
+        return {
+            'rastreando': rastreando,
+            'quadros': tracemalloc.get_traceback_limit() if rastreando else None,
+            'iniciado_em': self.iniciado_em,
+            'rastreado_bytes': atual,
+            'pico_rastreado_bytes': pico,
+            'custo_tracemalloc_bytes': tracemalloc.get_tracemalloc_memory(),
+            'snapshots': snapshots,
+            'processo': memoria_processo(),
+            'componentes': self.componentes()
+        }
+
+
+# Instância compartilhada pelo processo
+inspetor_memoria = InspetorMemoria(
+    Config.TRACEMALLOC_MAX_SNAPSHOTS,
+    Config.TRACEMALLOC_MAX_FRAMES,
+    Config.TRACEMALLOC_MAX_SECONDS
+)
+
+# Um worker criado por fork não herda o temporizador nem os snapshots do pai
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=inspetor_memoria.apos_fork)
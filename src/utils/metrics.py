@@ -0,0 +1,509 @@
+"""
+Métricas da API no formato de texto do Prometheus
+Histogramas de latência por rota e status, requisições em andamento,
+tempo de banco por requisição e taxas de acerto dos caches.
+
+Com vários workers (ex.: gunicorn), cada processo grava periodicamente um
+snapshot em ``Config.METRICS_DIR`` (``metricas-<pid>-<início>.json``: um
+PID reaproveitado não sobrescreve o arquivo de outro processo) e o
+endpoint ``/metrics`` soma os snapshots de todos os processos.
+
+Contadores e histogramas de workers que terminaram continuam somados (são
+monotônicos): ao sair (``worker_exit``), ou quando uma leitura encontra o
+arquivo de um processo morto, os totais são incorporados a um único
+arquivo de encerrados e o arquivo do processo é removido. O diretório
+mantém um arquivo por worker vivo, qualquer que seja a reciclagem. Gauges
+de processos mortos são descartados.
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows (sem workers pré-fork)
+    fcntl = None
+
+# Limites (segundos) dos buckets dos histogramas de latência
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BANCO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Rótulo das requisições que não casaram com nenhuma rota
+ROTA_DESCONHECIDA = '<desconhecida>'
+
+# Totais dos processos encerrados e lock que coordena sua atualização
+ARQUIVO_ENCERRADOS = 'metricas-encerrados.json'
+ARQUIVO_LOCK = 'metricas.lock'
+
+AJUDA = {
+    'http_request_duration_seconds': 'Latência das requisições por rota, método e status',
+    'http_requests_in_flight': 'Requisições em andamento por rota',
+    'db_request_duration_seconds': 'Tempo gasto no banco por requisição',
+    'db_queries_total': 'Comandos SQL executados',
+    'cache_requests_total': 'Consultas aos caches em memória por resultado',
+    'cache_items': 'Itens mantidos em cada cache em memória',
+    'executor_tasks_running': 'Chamadas bloqueantes entregues ao pool de threads (caminho ASGI)',
+    'executor_tasks_waiting': 'Corrotinas aguardando vaga no pool de threads',
+    'executor_tasks_total': 'Chamadas bloqueantes concluídas no pool de threads',
+    'sse_clients': 'Conexões abertas em /tarefas/stream',
+    'sse_events_total': 'Eventos de tarefas entregues aos clientes SSE',
+    'sse_evictions_total': 'Clientes SSE desconectados por não consumirem os eventos a tempo',
+    'single_flight_calls_total': 'Leituras por resultado: executadas no banco ou compartilhadas com uma idêntica em andamento',
+    'single_flight_in_flight': 'Leituras coalescíveis em andamento',
+    'admission_in_flight': 'Requisições em execução por classe de admissão',
+    'admission_queue_depth': 'Requisições aguardando vaga por classe de admissão',
+    'admission_admitted_total': 'Requisições admitidas por classe de admissão',
+    'admission_rejected_total': 'Requisições rejeitadas com 503 (fila cheia ou tempo de espera esgotado)',
+}
+
+
+class Metricas:
+    """
+    Registro de métricas de um processo
+
+    Cada série é identificada por ``(nome, rótulos)``, onde os rótulos são
+    uma tupla ordenada de pares ``(chave, valor)``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._coletores = {}
+        self._inicio = time.time_ns()
+        self._encerrado = False
+        self.reiniciar()
+
+    def apos_fork(self):
+        """No processo filho: novo lock e séries zeradas (o pai continua com as suas)"""
+        self._lock = threading.Lock()
+        self._inicio = time.time_ns()
+        self._encerrado = False
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Zera todas as séries"""
+        with self._lock:
+            self._contadores = {}
+            self._gauges = {}
+            self._histogramas = {}
+            self._buckets = {}
+            self._ultima_gravacao = 0.0
+
+    def incrementar(self, nome, rotulos=(), valor=1.0):
+        """Soma ``valor`` a um contador"""
+        chave = (nome, rotulos)
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0.0) + valor
+
+    def ajustar_gauge(self, nome, rotulos=(), delta=1.0):
+        """Soma ``delta`` (positivo ou negativo) a um gauge"""
+        chave = (nome, rotulos)
+        with self._lock:
+            self._gauges[chave] = self._gauges.get(chave, 0.0) + delta
+
+    def observar(self, nome, rotulos, valor, buckets=BUCKETS_LATENCIA):
+        """Registra uma observação num histograma"""
+        chave = (nome, rotulos)
+        with self._lock:
+            serie = self._histogramas.get(chave)
+            if serie is None:
+                self._buckets[nome] = buckets
+                # [contagens por bucket..., contagem +Inf, soma]
+                serie = self._histogramas[chave] = [0] * (len(buckets) + 1) + [0.0]
+            for posicao, limite in enumerate(buckets):
+                if valor <= limite:
+                    serie[posicao] += 1
+                    break
+            else:
+                serie[len(buckets)] += 1
+            serie[-1] += valor
+
+    def registrar_coletor(self, nome, coletor):
+        """
+        Registra uma função chamada a cada snapshot
+
+        O coletor retorna uma lista de ``(tipo, nome, rótulos, valor)`` com
+        tipo 'counter' ou 'gauge' (ex.: contadores de acerto de um cache).
+        """
+        self._coletores[nome] = coletor
+
+    def snapshot(self):
+        """Estado serializável do processo, incluindo os coletores"""
+        with self._lock:
+            contadores = dict(self._contadores)
+            gauges = dict(self._gauges)
+            histogramas = {chave: list(serie) for chave, serie in self._histogramas.items()}
+            buckets = dict(self._buckets)
+
+        for coletor in list(self._coletores.values()):
+            for tipo, nome, rotulos, valor in coletor():
+                destino = contadores if tipo == 'counter' else gauges
+                destino[(nome, rotulos)] = destino.get((nome, rotulos), 0.0) + valor
+
+        def serializar(series):
+            return [[nome, [list(par) for par in rotulos], valor] for (nome, rotulos), valor in series.items()]
+
+        return {
+            'pid': os.getpid(),
+            'inicio': self._inicio,
+            'contadores': serializar(contadores),
+            'gauges': serializar(gauges),
+            'histogramas': serializar(histogramas),
+            'buckets': {nome: list(limites) for nome, limites in buckets.items()}
+        }
+
+    # Multiprocesso ---------------------------------------------------------
+
+    def _arquivo(self, diretorio):
+        return os.path.join(diretorio, f'metricas-{os.getpid()}-{self._inicio}.json')
+
+    def gravar(self, diretorio, intervalo=0.0):
+        """
+        Grava o snapshot do processo em ``diretorio`` (troca atômica do arquivo)
+
+        Args:
+            intervalo (float): Não grava se a última gravação foi há menos tempo
+        """
+        agora = time.monotonic()
+        if self._encerrado or agora - self._ultima_gravacao < intervalo:
+            return
+        self._ultima_gravacao = agora
+
+        destino = self._arquivo(diretorio)
+        temporario = f'{destino}.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.snapshot(), arquivo, separators=(',', ':'))
+        os.replace(temporario, destino)
+
+    def encerrar(self, diretorio):
+        """
+        Incorpora os totais deste processo aos encerrados e remove o seu arquivo
+
+        Chamado quando o worker sai; gravações posteriores são ignoradas.
+        """
+        snapshot = self.snapshot()
+        self._encerrado = True
+        with _travar(diretorio, exclusivo=True):
+            _incorporar_encerrados(diretorio, [snapshot])
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self._arquivo(diretorio))
+
+    def snapshots(self, diretorio=None):
+        """Snapshot deste processo mais os gravados pelos demais workers"""
+        proprio = self.snapshot()
+        if not diretorio or not os.path.isdir(diretorio):
+            return [proprio]
+
+        resultado = [proprio]
+        mortos = []
+        meu_arquivo = os.path.basename(self._arquivo(diretorio))
+        with _travar(diretorio, exclusivo=False):
+            for nome_arquivo in os.listdir(diretorio):
+                if not (nome_arquivo.startswith('metricas-') and nome_arquivo.endswith('.json')):
+                    continue
+                if nome_arquivo == meu_arquivo:
+                    continue
+                dados = _ler_snapshot(os.path.join(diretorio, nome_arquivo))
+                if dados is None:
+                    continue
+                if nome_arquivo != ARQUIVO_ENCERRADOS and not _processo_vivo(dados.get('pid')):
+                    # Gauges representam o estado atual: não valem para processos mortos
+                    dados['gauges'] = []
+                    mortos.append(nome_arquivo)
+                resultado.append(dados)
+
+        if mortos:
+            # Worker que saiu sem worker_exit (ex.: SIGKILL): incorporar uma única vez
+            with _travar(diretorio, exclusivo=True):
+                for nome_arquivo in mortos:
+                    caminho = os.path.join(diretorio, nome_arquivo)
+                    dados = _ler_snapshot(caminho)
+                    if dados is not None:
+                        _incorporar_encerrados(diretorio, [dados])
+                        os.remove(caminho)
+        return resultado
+
+    # Exportação ------------------------------------------------------------
+
+    @staticmethod
+    def exportar(snapshots):
+        """Soma os snapshots e gera o texto no formato de exposição do Prometheus"""
+        contadores, gauges, histogramas, buckets = _somar(snapshots)
+
+        linhas = []
+        cabecalhos = set()
+
+        def cabecalho(nome, tipo):
+            if nome not in cabecalhos:
+                cabecalhos.add(nome)
+                linhas.append(f'# HELP {nome} {AJUDA.get(nome, nome)}')
+                linhas.append(f'# TYPE {nome} {tipo}')
+
+        for (nome, rotulos), valor in sorted(contadores.items()):
+            cabecalho(nome, 'counter')
+            linhas.append(f'{nome}{_rotulos(rotulos)} {_numero(valor)}')
+
+        for (nome, rotulos), valor in sorted(gauges.items()):
+            cabecalho(nome, 'gauge')
+            linhas.append(f'{nome}{_rotulos(rotulos)} {_numero(valor)}')
+
+        for (nome, rotulos), serie in sorted(histogramas.items()):
+            cabecalho(nome, 'histogram')
+            limites = buckets.get(nome, ())
+            acumulado = 0
+            for limite, contagem in zip(limites, serie):
+                acumulado += contagem
+                linhas.append(f'{nome}_bucket{_rotulos(rotulos + (("le", _numero(limite)),))} {acumulado}')
+            total = acumulado + serie[len(limites)]
+            linhas.append(f'{nome}_bucket{_rotulos(rotulos + (("le", "+Inf"),))} {total}')
+            linhas.append(f'{nome}_sum{_rotulos(rotulos)} {_numero(serie[-1])}')
+            linhas.append(f'{nome}_count{_rotulos(rotulos)} {total}')
+
+        return '\n'.join(linhas) + '\n'
+
+
+def _somar(snapshots):
+    """Soma as séries de vários snapshots: (contadores, gauges, histogramas, buckets)"""
+    contadores = {}
+    gauges = {}
+    histogramas = {}
+    buckets = {}
+
+    for dados in snapshots:
+        buckets.update(dados.get('buckets', {}))
+        for destino, series in ((contadores, dados['contadores']), (gauges, dados['gauges'])):
+            for nome, rotulos, valor in series:
+                chave = (nome, tuple(tuple(par) for par in rotulos))
+                destino[chave] = destino.get(chave, 0.0) + valor
+        for nome, rotulos, serie in dados['histogramas']:
+            chave = (nome, tuple(tuple(par) for par in rotulos))
+            atual = histogramas.get(chave)
+            histogramas[chave] = serie if atual is None else [a + b for a, b in zip(atual, serie)]
+
+    return contadores, gauges, histogramas, buckets
+
+
+@contextlib.contextmanager
+def _travar(diretorio, exclusivo):
+    """Lock entre processos do diretório de métricas (flock no arquivo de lock)"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(diretorio, ARQUIVO_LOCK), 'a') as arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+
+def _ler_snapshot(caminho):
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _incorporar_encerrados(diretorio, snapshots):
+    """Soma contadores e histogramas ao arquivo dos encerrados (chamado com o lock exclusivo)"""
+    destino = os.path.join(diretorio, ARQUIVO_ENCERRADOS)
+    anterior = _ler_snapshot(destino)
+    contadores, _, histogramas, buckets = _somar(([anterior] if anterior else []) + snapshots)
+
+    def serializar(series):
+        return [[nome, [list(par) for par in rotulos], valor] for (nome, rotulos), valor in series.items()]
+
+    temporario = f'{destino}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump({
+            'pid': None,
+            'contadores': serializar(contadores),
+            'gauges': [],
+            'histogramas': serializar(histogramas),
+            'buckets': buckets
+        }, arquivo, separators=(',', ':'))
+    os.replace(temporario, destino)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ''
+    return '{' + ','.join(f'{chave}="{_escapar(valor)}"' for chave, valor in rotulos) + '}'
+
+
+def _numero(valor):
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor)
+
+
+def _processo_vivo(pid):
+    if not isinstance(pid, int):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Tempo de banco ----------------------------------------------------------
+
+# [segundos, comandos] acumulados na requisição atual (None fora de requisições)
+_acumulador_banco = contextvars.ContextVar('acumulador_banco', default=None)
+
+
+def iniciar_medicao_banco():
+    """Começa a acumular o tempo de banco do contexto atual"""
+    acumulador = [0.0, 0]
+    _acumulador_banco.set(acumulador)
+    return acumulador
+
+
+def encerrar_medicao_banco():
+    """Para de acumular e retorna ``(segundos, comandos)`` do contexto atual"""
+    acumulador = _acumulador_banco.get()
+    _acumulador_banco.set(None)
+    return tuple(acumulador) if acumulador else (0.0, 0)
+
+
+def _medido(metodo, conta_comando=False):
+    """Envolve um método do sqlite3 somando sua duração ao acumulador do contexto"""
+    def medido(self, *args, **kwargs):
+        acumulador = _acumulador_banco.get()
+        if acumulador is None:
+            return metodo(self, *args, **kwargs)
+        inicio = time.perf_counter()
+        try:
+            return metodo(self, *args, **kwargs)
+        finally:
+            acumulador[0] += time.perf_counter() - inicio
+            if conta_comando:
+                acumulador[1] += 1
+    medido.__name__ = metodo.__name__
+    medido.__doc__ = metodo.__doc__
+    return medido
+
+
+class CursorMedido(sqlite3.Cursor):
+    """Cursor que soma o tempo de execução e leitura ao acumulador da requisição"""
+    execute = _medido(sqlite3.Cursor.execute, conta_comando=True)
+    executemany = _medido(sqlite3.Cursor.executemany, conta_comando=True)
+    executescript = _medido(sqlite3.Cursor.executescript, conta_comando=True)
+    fetchone = _medido(sqlite3.Cursor.fetchone)
+    fetchmany = _medido(sqlite3.Cursor.fetchmany)
+    fetchall = _medido(sqlite3.Cursor.fetchall)
+
+
+class ConexaoMedida(sqlite3.Connection):
+    """
+    Conexão cujo tempo de banco é contabilizado por requisição
+
+    Usada como ``sqlite3.connect(caminho, factory=ConexaoMedida)``; fora de
+    uma requisição medida o custo é uma leitura de ContextVar por chamada.
+    """
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+    commit = _medido(sqlite3.Connection.commit)
+
+
+# Flask -------------------------------------------------------------------
+
+def registrar_metricas(app, diretorio=None, intervalo_gravacao=1.0):
+    """
+    Instrumenta a aplicação e expõe ``GET /metrics``
+
+    Deve ser chamado antes dos demais ``before_request`` para que a
+    latência medida inclua a autenticação.
+
+    Args:
+        diretorio (str): Diretório compartilhado entre workers (None = processo único)
+        intervalo_gravacao (float): Intervalo mínimo entre gravações do snapshot
+    """
+    from flask import Response, g, request
+
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+
+    def iniciar():
+        rota = request.url_rule.rule if request.url_rule else ROTA_DESCONHECIDA
+        g.metricas = (time.perf_counter(), rota, iniciar_medicao_banco())
+        metricas.ajustar_gauge('http_requests_in_flight', (('rota', rota),), 1)
+
+    def registrar_status(resposta):
+        g.metricas_status = resposta.status_code
+        return resposta
+
+    def finalizar(erro=None):
+        dados = g.pop('metricas', None)
+        if dados is None:
+            return
+        inicio, rota, _ = dados
+        duracao = time.perf_counter() - inicio
+        segundos_banco, comandos = encerrar_medicao_banco()
+        status = g.pop('metricas_status', 500 if erro else 200)
+
+        metricas.ajustar_gauge('http_requests_in_flight', (('rota', rota),), -1)
+        metricas.observar('http_request_duration_seconds',
+                          (('metodo', request.method), ('rota', rota), ('status', str(status))), duracao)
+        metricas.observar('db_request_duration_seconds', (('rota', rota),), segundos_banco, BUCKETS_BANCO)
+        if comandos:
+            metricas.incrementar('db_queries_total', (('rota', rota),), comandos)
+
+        if diretorio:
+            metricas.gravar(diretorio, intervalo_gravacao)
+
+    app.before_request(iniciar)
+    app.after_request(registrar_status)
+    app.teardown_request(finalizar)
+
+    @app.route('/metrics')
+    def exportar_metricas():
+        texto = Metricas.exportar(metricas.snapshots(diretorio))
+        return Response(texto, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+def coletor_cache(nome, stats):
+    """
+    Cria um coletor de acertos/erros a partir do ``stats()`` de um cache
+
+    O dicionário pode ter ``hits``, ``misses`` e ``itens``.
+    """
+    def coletar():
+        dados = stats()
+        rotulo = (('cache', nome),)
+        series = [
+            ('counter', 'cache_requests_total', rotulo + (('resultado', 'hit'),), dados.get('hits', 0)),
+            ('counter', 'cache_requests_total', rotulo + (('resultado', 'miss'),), dados.get('misses', 0)),
+        ]
+        if 'itens' in dados:
+            series.append(('gauge', 'cache_items', rotulo, dados['itens']))
+        return series
+    return coletar
+
+
+# Instância compartilhada pelo processo
+metricas = Metricas()
+
+# Um worker criado por fork (gunicorn com preload) não herda as séries do pai
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=metricas.apos_fork)
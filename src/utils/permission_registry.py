@@ -0,0 +1,159 @@
+"""
+Registro de permissões compilado em memória
+Os níveis de acesso ficam no banco (tabelas niveis_acesso/niveis_permissoes)
+e são compilados num snapshot imutável de máscaras de bits. O snapshot é
+trocado atomicamente quando um nível é alterado, e os demais workers
+percebem a mudança por uma verificação barata de versão.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Tuple
+
+from src.utils.authorization_strategy import AuthorizationStrategy, PERMISSOES, PERMISSAO_BITS
+
+
+class CompiledStrategy(AuthorizationStrategy):
+    """Estratégia gerada a partir de um nível de acesso compilado"""
+
+    def __init__(self, nome: str, mascara: int, bits: Dict[str, int], acoes: Tuple[str, ...]):
+        self.nome = nome
+        self.mascara = mascara
+        self.bits = bits
+        self.acoes = acoes
+
+    def can_perform_action(self, action: str) -> bool:
+        return (self.mascara & self.bits.get(action, 0)) != 0
+
+    def get_allowed_actions(self):
+        return list(self.acoes)
+
+    def get_level_name(self) -> str:
+        return self.nome
+
+
+class CompiledPermissions(NamedTuple):
+    """Snapshot imutável das permissões de todos os níveis"""
+    versao: int
+    bits: Dict[str, int]
+    mascaras: Dict[str, int]
+    permissoes_nivel: Dict[str, Tuple[str, ...]]
+    nivel_numerico: Dict[str, int]
+    niveis: Dict[str, dict]
+    estrategias: Dict[str, CompiledStrategy]
+
+
+def compilar_permissoes(niveis: Dict[str, dict], versao: int = 0) -> CompiledPermissions:
+    """
+    Compila os níveis de acesso em máscaras de bits
+
+    As permissões do catálogo (``PERMISSOES``) mantêm sempre a mesma posição
+    de bit; permissões novas, criadas por níveis dinâmicos, recebem as
+    posições seguintes em ordem alfabética.
+
+    Args:
+        niveis (dict): ``{nome: {'nome', 'descricao', 'nivel', 'permissoes'}}``
+        versao (int): Versão dos dados de origem
+
+    Returns:
+        CompiledPermissions: Snapshot compilado
+    """
+    bits = dict(PERMISSAO_BITS)
+    extras = sorted({p for dados in niveis.values() for p in dados['permissoes']} - set(bits))
+    for posicao, permissao in enumerate(extras, start=len(PERMISSOES)):
+        bits[permissao] = 1 << posicao
+
+    mascaras = {}
+    permissoes_nivel = {}
+    estrategias = {}
+    for nome, dados in niveis.items():
+        acoes = tuple(dados['permissoes'])
+        mascara = 0
+        for permissao in acoes:
+            mascara |= bits[permissao]
+        mascaras[nome] = mascara
+        permissoes_nivel[nome] = acoes
+        estrategias[nome] = CompiledStrategy(nome, mascara, bits, acoes)
+
+    return CompiledPermissions(
+        versao=versao,
+        bits=bits,
+        mascaras=mascaras,
+        permissoes_nivel=permissoes_nivel,
+        nivel_numerico={nome: dados['nivel'] for nome, dados in niveis.items()},
+        niveis=niveis,
+        estrategias=estrategias
+    )
+
+
+class PermissionRegistry:
+    """
+    Mantém o snapshot atual das permissões
+
+    Leitores usam ``registry.atual`` sem lock: a troca é uma única
+    atribuição de referência. Apenas recargas são serializadas.
+    """
+
+    def __init__(self, inicial: CompiledPermissions, intervalo_verificacao: float = 5.0):
+        self.atual = inicial
+        self.intervalo_verificacao = intervalo_verificacao
+        self._proxima_verificacao = 0.0
+        self._lock = threading.Lock()
+        self.recargas = 0
+
+    def apos_fork(self):
+        """No processo filho: novo lock e versão conferida na próxima requisição"""
+        self._lock = threading.Lock()
+        self._proxima_verificacao = 0.0
+
+    def trocar(self, snapshot: CompiledPermissions):
+        """Substitui o snapshot atual atomicamente"""
+        self.atual = snapshot
+        self.recargas += 1
+
+    def recarregar(self):
+        """Lê os níveis do banco, compila e troca o snapshot"""
+        from src.models.nivel_acesso import carregar_niveis
+
+        with self._lock:
+            versao, niveis = carregar_niveis()
+            self.trocar(compilar_permissoes(niveis, versao))
+            self._proxima_verificacao = time.monotonic() + self.intervalo_verificacao
+        return self.atual
+
+    def verificar_versao(self):
+        """
+        Recarrega se outro worker alterou os níveis (registrado como before_request)
+
+        Consulta apenas a versão, e no máximo uma vez a cada
+        ``intervalo_verificacao`` segundos por processo.
+        """
+        agora = time.monotonic()
+        if agora < self._proxima_verificacao:
+            return
+
+        from src.models.nivel_acesso import obter_versao_niveis
+
+        self._proxima_verificacao = agora + self.intervalo_verificacao
+        if obter_versao_niveis() != self.atual.versao:
+            self.recarregar()
+
+    def stats(self):
+        """Retorna versão e número de recargas do registro"""
+        return {
+            'versao': self.atual.versao,
+            'niveis': len(self.atual.niveis),
+            'permissoes': len(self.atual.bits),
+            'recargas': self.recargas
+        }
+
+
+def validar_permissoes(permissoes: Iterable[str]) -> bool:
+    """Valida o formato ``recurso:acao`` de uma lista de permissões"""
+    for permissao in permissoes:
+        if not isinstance(permissao, str):
+            return False
+        recurso, _, acao = permissao.partition(':')
+        if not recurso or not acao or not all(c.isalnum() or c == '_' for c in recurso + acao):
+            return False
+    return True
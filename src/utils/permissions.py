@@ -3,58 +3,49 @@ Sistema de Permissões e Níveis de Acesso
 Usa o padrão Strategy para autorização
 """
 
-from src.utils.authorization_strategy import create_authorization_context
+import os
 
-# Níveis de acesso disponíveis (mantido para compatibilidade)
+from config import Config
+from src.utils.authorization_strategy import VisualizacaoStrategy, GerencialStrategy, AdministrativoStrategy
+from src.utils.permission_registry import PermissionRegistry, compilar_permissoes
+
+# Níveis de acesso padrão: usados para popular o banco na primeira execução
+# e como snapshot inicial antes da primeira carga (mantido para compatibilidade)
 NIVEIS_ACESSO = {
     'visualizacao': {
         'nome': 'Visualização',
         'descricao': 'Apenas visualizar dados',
         'nivel': 1,
-        'permissoes': [
-            'tarefas:read',
-            'tarefas:list'
-        ]
+        'permissoes': list(VisualizacaoStrategy.ALLOWED_ACTIONS)
     },
     'gerencial': {
         'nome': 'Gerencial',
         'descricao': 'Gerenciar tarefas e usuários',
         'nivel': 2,
-        'permissoes': [
-            'tarefas:read',
-            'tarefas:list',
-            'tarefas:create',
-            'tarefas:update',
-            'tarefas:delete',
-            'usuarios:read',
-            'usuarios:list'
-        ]
+        'permissoes': list(GerencialStrategy.ALLOWED_ACTIONS)
     },
     'administrativo': {
         'nome': 'Administrativo',
         'descricao': 'Acesso total ao sistema',
         'nivel': 3,
-        'permissoes': [
-            'tarefas:read',
-            'tarefas:list',
-            'tarefas:create',
-            'tarefas:update',
-            'tarefas:delete',
-            'usuarios:read',
-            'usuarios:list',
-            'usuarios:create',
-            'usuarios:update',
-            'usuarios:delete',
-            'usuarios:change_role',
-            'system:admin'
-        ]
+        'permissoes': list(AdministrativoStrategy.ALLOWED_ACTIONS)
     }
 }
 
+# Registro compilado em memória; recarregado do banco na inicialização e
+# sempre que um nível muda (neste ou em outro worker)
+registro_permissoes = PermissionRegistry(
+    compilar_permissoes(NIVEIS_ACESSO),
+    intervalo_verificacao=Config.PERMISSIONS_VERSION_CHECK_INTERVAL
+)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=registro_permissoes.apos_fork)
+
 def verificar_permissao(nivel_usuario, permissao_necessaria):
     """
     Verifica se um usuário tem permissão para uma ação específica
-    Usa o padrão Strategy internamente
+    Usa as máscaras de bits do registro compilado (sem acesso ao banco)
     
     Args:
         nivel_usuario (str): Nível de acesso do usuário
@@ -63,11 +54,22 @@ def verificar_permissao(nivel_usuario, permissao_necessaria):
     Returns:
         bool: True se tem permissão, False caso contrário
     """
-    try:
-        context = create_authorization_context(nivel_usuario)
-        return context.can_perform_action(permissao_necessaria)
-    except (ValueError, AttributeError):
-        return False
+    atual = registro_permissoes.atual
+    return (atual.mascaras.get(nivel_usuario, 0) & atual.bits.get(permissao_necessaria, 0)) != 0
+
+def verificar_bits(nivel_usuario, bits_necessarios):
+    """
+    Verifica uma permissão já convertida em bit (ver ``bit_permissao``)
+    Uma consulta ao dicionário e um AND
+    
+    Args:
+        nivel_usuario (str): Nível de acesso do usuário
+        bits_necessarios (int): Bit da permissão necessária
+    
+    Returns:
+        bool: True se tem permissão, False caso contrário
+    """
+    return (registro_permissoes.atual.mascaras.get(nivel_usuario, 0) & bits_necessarios) != 0
 
 def verificar_nivel_minimo(nivel_usuario, nivel_minimo):
     """
@@ -80,27 +82,23 @@ def verificar_nivel_minimo(nivel_usuario, nivel_minimo):
     Returns:
         bool: True se tem nível suficiente, False caso contrário
     """
-    if nivel_usuario not in NIVEIS_ACESSO or nivel_minimo not in NIVEIS_ACESSO:
+    nivel_numerico = registro_permissoes.atual.nivel_numerico
+    if nivel_usuario not in nivel_numerico or nivel_minimo not in nivel_numerico:
         return False
     
-    return NIVEIS_ACESSO[nivel_usuario]['nivel'] >= NIVEIS_ACESSO[nivel_minimo]['nivel']
+    return nivel_numerico[nivel_usuario] >= nivel_numerico[nivel_minimo]
 
 def obter_permissoes_usuario(nivel_usuario):
     """
     Retorna todas as permissões de um usuário
-    Usa o padrão Strategy internamente
     
     Args:
         nivel_usuario (str): Nível de acesso do usuário
     
     Returns:
-        list: Lista de permissões do usuário
+        list: Permissões do usuário (cópia da tupla pré-calculada do registro)
     """
-    try:
-        context = create_authorization_context(nivel_usuario)
-        return context.get_allowed_actions()
-    except (ValueError, AttributeError):
-        return []
+    return list(registro_permissoes.atual.permissoes_nivel.get(nivel_usuario, ()))
 
 def obter_niveis_disponiveis():
     """
@@ -109,7 +107,7 @@ def obter_niveis_disponiveis():
     Returns:
         dict: Dicionário com todos os níveis de acesso
     """
-    return NIVEIS_ACESSO
+    return registro_permissoes.atual.niveis
 
 def validar_nivel_acesso(nivel):
     """
@@ -121,4 +119,4 @@ def validar_nivel_acesso(nivel):
     Returns:
         bool: True se válido, False caso contrário
     """
-    return nivel in NIVEIS_ACESSO
+    return nivel in registro_permissoes.atual.niveis
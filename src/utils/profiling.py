@@ -0,0 +1,345 @@
+"""
+Perfilamento sob demanda de requisições
+Um administrador (``system:admin``) envia o cabeçalho ``X-Profile`` e apenas
+aquela requisição é perfilada:
+
+- ``X-Profile: cprofile`` -- perfilador determinístico (cProfile)
+- ``X-Profile: sample``   -- amostragem periódica da pilha da thread (uma
+  única thread de amostragem por processo atende todas as requisições)
+
+O id do perfil volta no cabeçalho ``X-Profile-Id`` e o resultado é
+consultado em ``/admin/profiles/<id>`` como tabela top-N ou como pilhas
+colapsadas (formato de entrada do flamegraph.pl / speedscope).
+
+Opcionalmente uma fração do tráfego é amostrada automaticamente. Com o
+perfilamento desativado nenhum hook é registrado.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+# Modos aceitos no cabeçalho X-Profile
+MODO_CPROFILE = 'cprofile'
+MODO_AMOSTRAGEM = 'sample'
+MODOS = (MODO_CPROFILE, MODO_AMOSTRAGEM)
+
+CABECALHO_PERFIL = 'X-Profile'
+CABECALHO_ID = 'X-Profile-Id'
+
+# Critérios de ordenação da tabela top-N
+ORDENACOES = ('cumtime', 'tottime', 'ncalls')
+
+
+def _nome_funcao(arquivo, linha, funcao):
+    """Nome legível de uma função: ``modulo.py:linha(funcao)``"""
+    if arquivo == '~':
+        return funcao
+    return f'{os.path.basename(arquivo)}:{linha}({funcao})'
+
+
+class AmostradorCompartilhado:
+    """
+    Thread única de amostragem de pilhas do processo
+
+    Lê a pilha de todas as threads inscritas a cada ``intervalo`` segundos
+    com uma só chamada a ``sys._current_frames()`` e conta as pilhas
+    colapsadas (``raiz;...;folha``) de cada uma. A thread só existe
+    enquanto houver inscritos: muitas requisições perfiladas ao mesmo
+    tempo não multiplicam as threads nem o custo da amostragem.
+    """
+
+    def __init__(self, intervalo=0.001):
+        self.intervalo = intervalo
+        self._alvos = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def apos_fork(self):
+        """No processo filho: a thread de amostragem não sobrevive ao fork"""
+        self._lock = threading.Lock()
+        self._alvos = {}
+        self._thread = None
+
+    def inscrever(self, thread_id):
+        """Passa a amostrar a thread; retorna o contador das suas pilhas"""
+        pilhas = Counter()
+        with self._lock:
+            self._alvos[thread_id] = pilhas
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name='amostrador-pilhas', daemon=True)
+                self._thread.start()
+        return pilhas
+
+    def cancelar(self, thread_id):
+        """Deixa de amostrar a thread"""
+        with self._lock:
+            self._alvos.pop(thread_id, None)
+
+    def _executar(self):
+        while True:
+            time.sleep(self.intervalo)
+            with self._lock:
+                if not self._alvos:
+                    self._thread = None
+                    return
+                alvos = list(self._alvos.items())
+
+            quadros_por_thread = sys._current_frames()
+            for thread_id, pilhas in alvos:
+                frame = quadros_por_thread.get(thread_id)
+                quadros = []
+                while frame is not None:
+                    codigo = frame.f_code
+                    quadros.append(_nome_funcao(codigo.co_filename, codigo.co_firstlineno, codigo.co_name))
+                    frame = frame.f_back
+                if quadros:
+                    pilhas[';'.join(reversed(quadros))] += 1
+
+    def __len__(self):
+        return len(self._alvos)
+
+
+amostrador_pilhas = AmostradorCompartilhado()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=amostrador_pilhas.apos_fork)
+
+
+class AmostradorPilhas:
+    """Perfilamento por amostragem de uma thread, feito pelo amostrador compartilhado"""
+
+    def __init__(self, thread_id, amostrador=None):
+        self.thread_id = thread_id
+        self.amostrador = amostrador or amostrador_pilhas
+        self.intervalo = self.amostrador.intervalo
+        self.pilhas = Counter()
+
+    def iniciar(self):
+        self.pilhas = self.amostrador.inscrever(self.thread_id)
+
+    def parar(self):
+        self.amostrador.cancelar(self.thread_id)
+
+
+def _linhas_cprofile(perfilador):
+    """Converte as estatísticas do cProfile em linhas serializáveis"""
+    estatisticas = pstats.Stats(perfilador).stats
+    linhas = []
+    for (arquivo, linha, funcao), (chamadas_primitivas, chamadas, tottime, cumtime, _) in estatisticas.items():
+        linhas.append({
+            'funcao': _nome_funcao(arquivo, linha, funcao),
+            'ncalls': chamadas,
+            'primitivas': chamadas_primitivas,
+            'tottime': tottime,
+            'cumtime': cumtime
+        })
+    return linhas
+
+
+def _linhas_amostragem(pilhas, intervalo):
+    """Tempo próprio (folha) e acumulado estimados a partir das amostras"""
+    proprio = Counter()
+    acumulado = Counter()
+    for pilha, contagem in pilhas.items():
+        quadros = pilha.split(';')
+        proprio[quadros[-1]] += contagem
+        for quadro in set(quadros):
+            acumulado[quadro] += contagem
+    return [
+        {
+            'funcao': funcao,
+            'ncalls': None,
+            'amostras': acumulado[funcao],
+            'tottime': proprio[funcao] * intervalo,
+            'cumtime': acumulado[funcao] * intervalo
+        }
+        for funcao in acumulado
+    ]
+
+
+class ArmazemPerfis:
+    """
+    Perfis recentes em memória (LRU), opcionalmente gravados em disco
+
+    Com ``diretorio`` configurado qualquer worker encontra um perfil
+    gerado por outro. O diretório também guarda no máximo ``max_perfis``
+    arquivos: os mais antigos são removidos a cada perfil gravado.
+    """
+
+    def __init__(self, max_perfis=50, diretorio=None):
+        self.max_perfis = max_perfis
+        self.diretorio = diretorio
+        self._perfis = OrderedDict()
+        self._lock = threading.Lock()
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+    def guardar(self, perfil):
+        with self._lock:
+            self._perfis[perfil['id']] = perfil
+            while len(self._perfis) > self.max_perfis:
+                self._perfis.popitem(last=False)
+
+        if self.diretorio:
+            destino = os.path.join(self.diretorio, f"perfil-{perfil['id']}.json")
+            with open(f'{destino}.tmp', 'w', encoding='utf-8') as arquivo:
+                json.dump(perfil, arquivo, separators=(',', ':'))
+            os.replace(f'{destino}.tmp', destino)
+            self._podar_diretorio()
+
+    def _podar_diretorio(self):
+        """Remove os arquivos de perfil mais antigos além de ``max_perfis`` (de todos os workers)"""
+        arquivos = []
+        for nome in os.listdir(self.diretorio):
+            if nome.startswith('perfil-') and nome.endswith('.json'):
+                caminho = os.path.join(self.diretorio, nome)
+                try:
+                    arquivos.append((os.path.getmtime(caminho), caminho))
+                except OSError:
+                    continue
+        arquivos.sort()
+        for _, caminho in arquivos[:max(0, len(arquivos) - self.max_perfis)]:
+            try:
+                os.remove(caminho)
+            except OSError:
+                # Outro worker já removeu
+                pass
+
+    def obter(self, perfil_id):
+        with self._lock:
+            perfil = self._perfis.get(perfil_id)
+        if perfil is not None or not self.diretorio:
+            return perfil
+        # ids são uuid hex: nunca contêm separadores de caminho
+        if not all(c in '0123456789abcdef' for c in perfil_id):
+            return None
+        try:
+            with open(os.path.join(self.diretorio, f'perfil-{perfil_id}.json'), encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (OSError, ValueError):
+            return None
+
+    def listar(self):
+        """Resumo dos perfis em memória, do mais recente para o mais antigo"""
+        with self._lock:
+            perfis = list(self._perfis.values())
+        return [{chave: valor for chave, valor in perfil.items() if chave not in ('funcoes', 'pilhas')}
+                for perfil in reversed(perfis)]
+
+    def __len__(self):
+        return len(self._perfis)
+
+    def stats(self):
+        return {'itens': len(self._perfis), 'max_itens': self.max_perfis}
+
+
+def tabela_top(perfil, top=30, ordenar='cumtime'):
+    """Linhas do perfil ordenadas pelo critério, limitadas a ``top``"""
+    ordenar = ordenar if ordenar in ORDENACOES else 'cumtime'
+    return sorted(perfil['funcoes'], key=lambda linha: linha.get(ordenar) or 0, reverse=True)[:top]
+
+
+def pilhas_colapsadas(perfil):
+    """Texto no formato ``raiz;...;folha contagem``, uma pilha por linha"""
+    pilhas = perfil.get('pilhas') or {}
+    return ''.join(f'{pilha} {contagem}\n' for pilha, contagem in sorted(pilhas.items()))
+
+
+class PerfiladorRequisicoes:
+    """Hooks do Flask que iniciam e encerram o perfilamento de uma requisição"""
+
+    def __init__(self, armazem, taxa_amostragem=0.0):
+        self.armazem = armazem
+        self.taxa_amostragem = taxa_amostragem
+
+    def _pode_perfilar(self):
+        from src.utils.auth_middleware import get_current_user
+        from src.utils.permissions import verificar_permissao
+
+        usuario = get_current_user()
+        return usuario is not None and verificar_permissao(usuario.nivel_acesso, 'system:admin')
+
+    def iniciar(self):
+        from flask import g, request
+
+        modo = request.headers.get(CABECALHO_PERFIL)
+        if modo is not None:
+            modo = modo.strip().lower()
+            if modo not in MODOS or not self._pode_perfilar():
+                return
+        elif self.taxa_amostragem and random.random() < self.taxa_amostragem:
+            modo = MODO_AMOSTRAGEM
+        else:
+            return
+
+        if modo == MODO_CPROFILE:
+            perfilador = cProfile.Profile()
+            try:
+                perfilador.enable()
+            except ValueError:
+                # Outro perfilador determinístico já está ativo neste processo
+                return
+        else:
+            perfilador = AmostradorPilhas(threading.get_ident())
+            perfilador.iniciar()
+        g.perfil = (modo, perfilador, time.perf_counter(), time.time())
+
+    def _encerrar(self, status):
+        from flask import g, request
+
+        dados = g.pop('perfil', None)
+        if dados is None:
+            return None
+        modo, perfilador, inicio, criado_em = dados
+
+        if modo == MODO_CPROFILE:
+            perfilador.disable()
+            funcoes = _linhas_cprofile(perfilador)
+            pilhas = None
+        else:
+            perfilador.parar()
+            funcoes = _linhas_amostragem(perfilador.pilhas, perfilador.intervalo)
+            pilhas = dict(perfilador.pilhas)
+
+        perfil = {
+            'id': uuid.uuid4().hex,
+            'modo': modo,
+            'metodo': request.method,
+            'rota': request.url_rule.rule if request.url_rule else request.path,
+            'status': status,
+            'duracao': time.perf_counter() - inicio,
+            'criado_em': criado_em,
+            'pid': os.getpid(),
+            'funcoes': funcoes,
+            'pilhas': pilhas
+        }
+        self.armazem.guardar(perfil)
+        return perfil['id']
+
+    def finalizar(self, resposta):
+        perfil_id = self._encerrar(resposta.status_code)
+        if perfil_id:
+            resposta.headers[CABECALHO_ID] = perfil_id
+        return resposta
+
+    def liberar(self, erro=None):
+        # Exceção não tratada: after_request não roda, mas o perfilador precisa parar
+        self._encerrar(500)
+
+
+def registrar_profiling(app, armazem, taxa_amostragem=0.0, intervalo_amostragem=0.001):
+    """Registra os hooks de perfilamento (chamar depois do hook de autenticação)"""
+    amostrador_pilhas.intervalo = intervalo_amostragem
+    perfilador = PerfiladorRequisicoes(armazem, taxa_amostragem)
+    app.before_request(perfilador.iniciar)
+    app.after_request(perfilador.finalizar)
+    app.teardown_request(perfilador.liberar)
+    return perfilador
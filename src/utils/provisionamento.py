@@ -0,0 +1,259 @@
+"""
+Provisionamento de usuários em lote
+Lê registros em CSV ou NDJSON, gera os hashes de senha em paralelo e
+insere os usuários com executemany em blocos
+
+Os hashes rodam num pool de threads compartilhado e limitado (o
+pbkdf2:sha256, padrão do Werkzeug fixado, roda no hashlib, que libera o
+GIL): uma requisição nunca cria processos nem ocupa mais que
+``MAXIMO_THREADS_HASH`` núcleos.
+"""
+
+import csv
+import io
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from werkzeug.security import generate_password_hash
+
+from src.models.usuario import get_db_connection
+from src.models.usuario_lote import versionar_usuarios, notificar_alteracao_usuarios
+from src.utils.permissions import validar_nivel_acesso
+
+# Limite de parâmetros por consulta IN (...) seguro para qualquer SQLite
+TAMANHO_BLOCO_CONSULTA = 500
+
+# Abaixo deste número de senhas o custo de distribuir o trabalho não compensa
+MINIMO_PARA_PARALELISMO = 16
+
+# Threads do pool de hash compartilhado por todas as requisições do processo
+MAXIMO_THREADS_HASH = 4
+THREADS_HASH = min(MAXIMO_THREADS_HASH, os.cpu_count() or 1)
+
+_pool_hash = None
+_lock_pool = threading.Lock()
+
+def _obter_pool():
+    """Pool de hash do processo, criado no primeiro uso"""
+    global _pool_hash
+    with _lock_pool:
+        if _pool_hash is None:
+            _pool_hash = ThreadPoolExecutor(max_workers=THREADS_HASH, thread_name_prefix='hash-senhas')
+        return _pool_hash
+
+def _apos_fork():
+    # As threads do pool não sobrevivem ao fork: o filho cria o seu
+    global _pool_hash, _lock_pool
+    _pool_hash = None
+    _lock_pool = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_apos_fork)
+
+def detectar_formato(content_type=None, nome_arquivo=None):
+    """
+    Detecta o formato dos registros pelo Content-Type ou extensão
+
+    Returns:
+        str: 'csv' ou 'ndjson'
+    """
+    content_type = (content_type or '').lower()
+    nome_arquivo = (nome_arquivo or '').lower()
+
+    if 'csv' in content_type or nome_arquivo.endswith('.csv'):
+        return 'csv'
+    return 'ndjson'
+
+def ler_registros(conteudo, formato='csv'):
+    """
+    Converte o conteúdo em uma lista de registros
+
+    Args:
+        conteudo (str): Texto CSV (com cabeçalho) ou NDJSON (um objeto por linha)
+        formato (str): 'csv' ou 'ndjson'
+
+    Returns:
+        list: Lista de dicionários (linhas NDJSON inválidas viram ``{'_erro': ...}``)
+    """
+    if formato == 'csv':
+        leitor = csv.DictReader(io.StringIO(conteudo))
+        return [{chave.strip(): (valor or '').strip() for chave, valor in linha.items() if chave}
+                for linha in leitor]
+
+    registros = []
+    for numero, linha in enumerate(conteudo.splitlines(), start=1):
+        if not linha.strip():
+            continue
+        try:
+            registro = json.loads(linha)
+            if not isinstance(registro, dict):
+                raise ValueError("registro deve ser um objeto JSON")
+            registros.append(registro)
+        except ValueError as e:
+            registros.append({'_erro': f"JSON inválido na linha {numero}: {e}"})
+    return registros
+
+def _validar(registros):
+    """Valida os registros e separa os aceitos dos resultados de erro"""
+    resultados = []
+    aceitos = []
+    emails_no_lote = set()
+
+    for indice, registro in enumerate(registros, start=1):
+        email = str(registro.get('email') or '').strip()
+        resultado = {'linha': indice, 'email': email, 'status': 'erro'}
+        resultados.append(resultado)
+
+        if '_erro' in registro:
+            resultado['erro'] = registro['_erro']
+            continue
+
+        nome = str(registro.get('nome') or '').strip()
+        senha = str(registro.get('senha') or '')
+        nivel_acesso = registro.get('nivel_acesso') or 'visualizacao'
+
+        if not nome or not email or not senha:
+            resultado['erro'] = "Nome, email e senha são obrigatórios"
+        elif len(senha) < 6:
+            resultado['erro'] = "Senha deve ter pelo menos 6 caracteres"
+        elif not isinstance(nivel_acesso, str) or not validar_nivel_acesso(nivel_acesso):
+            resultado['erro'] = "Nível de acesso inválido"
+        elif email in emails_no_lote:
+            resultado['erro'] = "Email duplicado no lote"
+        else:
+            emails_no_lote.add(email)
+            aceitos.append((resultado, nome, email, senha, nivel_acesso))
+
+    return resultados, aceitos
+
+def _blocos(itens, tamanho):
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+def _emails_existentes(cursor, emails):
+    """Consulta, em blocos, quais emails já estão cadastrados"""
+    existentes = set()
+    for bloco in _blocos(emails, TAMANHO_BLOCO_CONSULTA):
+        marcadores = ', '.join('?' * len(bloco))
+        cursor.execute(f'SELECT email FROM usuarios WHERE email IN ({marcadores})', bloco)
+        existentes.update(email for (email,) in cursor.fetchall())
+    return existentes
+
+def gerar_hashes(senhas, threads=None):
+    """
+    Gera os hashes de senha no pool de threads compartilhado
+
+    Args:
+        senhas (list): Senhas em texto puro
+        threads (int): Limite de threads usadas (padrão: todas as do pool;
+            1 gera em série na thread atual)
+
+    Returns:
+        list: Hashes na mesma ordem das senhas
+    """
+    if threads == 1 or THREADS_HASH == 1 or len(senhas) < MINIMO_PARA_PARALELISMO:
+        return [generate_password_hash(senha) for senha in senhas]
+
+    partes = min(threads or THREADS_HASH, THREADS_HASH)
+    # Uma tarefa por fatia: requisições simultâneas dividem o pool em vez de enfileirar senha a senha
+    fatias = [senhas[inicio::partes] for inicio in range(partes)]
+    resultados = list(_obter_pool().map(lambda fatia: [generate_password_hash(senha) for senha in fatia], fatias))
+
+    hashes = [None] * len(senhas)
+    for inicio, fatia in enumerate(resultados):
+        hashes[inicio::partes] = fatia
+    return hashes
+
+def provisionar_usuarios(registros, threads=None, tamanho_lote=500):
+    """
+    Cria usuários em lote
+
+    Args:
+        registros (list): Dicionários com nome, email, senha e nivel_acesso (opcional)
+        threads (int): Threads usadas no hash das senhas
+        tamanho_lote (int): Número de linhas por executemany/commit
+
+    Returns:
+        list: Um resultado por registro, na ordem de entrada, com
+        ``linha``, ``email``, ``status`` ('criado' ou 'erro') e ``id`` ou ``erro``
+    """
+    resultados, aceitos = _validar(registros)
+    if not aceitos:
+        return resultados
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        # Verificar todos os emails com consultas por conjunto
+        existentes = _emails_existentes(cursor, [item[2] for item in aceitos])
+        pendentes = []
+        for item in aceitos:
+            if item[2] in existentes:
+                item[0]['erro'] = "Email já cadastrado"
+            else:
+                pendentes.append(item)
+
+        hashes = gerar_hashes([item[3] for item in pendentes], threads)
+        data_atual = datetime.now().isoformat()
+
+        import pyotp
+        linhas = [
+            (nome, email, senha_hash, pyotp.random_base32(), nivel_acesso, data_atual)
+            for (_, nome, email, _, nivel_acesso), senha_hash in zip(pendentes, hashes)
+        ]
+
+        sql_insert = '''
+            INSERT INTO usuarios (nome, email, senha_hash, secret_2fa, nivel_acesso, data_criacao)
+            VALUES (?, ?, ?, ?, ?, ?)
+        '''
+
+        for bloco_pendentes, bloco_linhas in zip(_blocos(pendentes, tamanho_lote), _blocos(linhas, tamanho_lote)):
+            try:
+                cursor.executemany(sql_insert, bloco_linhas)
+                versao = versionar_usuarios(cursor)
+                conn.commit()
+            except sqlite3.IntegrityError:
+                # Email inserido por outra requisição após a verificação:
+                # refazer o bloco linha a linha para isolar as falhas
+                conn.rollback()
+                for item, linha in zip(bloco_pendentes, bloco_linhas):
+                    try:
+                        cursor.execute(sql_insert, linha)
+                    except sqlite3.IntegrityError:
+                        item[0]['erro'] = "Email já cadastrado"
+                versao = versionar_usuarios(cursor)
+                conn.commit()
+
+            # Recuperar os IDs gerados para o bloco
+            emails = [item[2] for item in bloco_pendentes if 'erro' not in item[0]]
+            ids = {}
+            for bloco_emails in _blocos(emails, TAMANHO_BLOCO_CONSULTA):
+                marcadores = ', '.join('?' * len(bloco_emails))
+                cursor.execute(f'SELECT id, email FROM usuarios WHERE email IN ({marcadores})', bloco_emails)
+                ids.update((email, usuario_id) for usuario_id, email in cursor.fetchall())
+
+            for item in bloco_pendentes:
+                if 'erro' not in item[0]:
+                    item[0]['status'] = 'criado'
+                    item[0]['id'] = ids.get(item[2])
+
+            notificar_alteracao_usuarios('criacao', list(ids.values()), versao)
+    finally:
+        conn.close()
+
+    return resultados
+
+def resumir(resultados):
+    """Resume os resultados de um provisionamento"""
+    criados = sum(1 for resultado in resultados if resultado['status'] == 'criado')
+    return {
+        'total': len(resultados),
+        'criados': criados,
+        'erros': len(resultados) - criados,
+        'resultados': resultados
+    }
@@ -0,0 +1,142 @@
+"""
+Cache em memória dos QR Codes de configuração do 2FA
+Os QR Codes são gerados sob demanda e nunca gravados em disco
+"""
+
+import base64
+import hashlib
+import hmac
+import io
+import os
+import secrets
+import threading
+from collections import OrderedDict
+
+
+class QRCodeCache:
+    """
+    Cache LRU de imagens PNG de QR Code
+
+    A chave é ``(usuario_id, HMAC(secret))`` com uma chave aleatória do
+    processo: trocar o secret do usuário gera uma nova entrada. O ETag é
+    um token aleatório sorteado ao gerar a imagem e nunca é derivado do
+    secret (um valor calculável a partir dele, exposto em cabeçalhos e
+    caches HTTP, permitiria testar secrets candidatos offline). Workers
+    diferentes têm ETags diferentes para a mesma imagem: no pior caso a
+    revalidação baixa a imagem de novo.
+    """
+
+    def __init__(self, max_itens=512):
+        """
+        Args:
+            max_itens (int): Número máximo de imagens mantidas em memória
+        """
+        self.max_itens = max_itens
+        self._chave_impressao = secrets.token_bytes(32)
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _impressao(self, secret):
+        """Identifica o secret na chave do cache sem guardá-lo (só existe em memória)"""
+        return hmac.new(self._chave_impressao, secret.encode('utf-8'), hashlib.sha256).digest()
+
+    def obter_png(self, usuario_id, secret, provisioning_uri):
+        """
+        Retorna a imagem PNG do QR Code, gerando-a apenas na primeira vez
+
+        Args:
+            usuario_id (int): ID do usuário
+            secret (str): Secret TOTP atual do usuário
+            provisioning_uri (str): URI ``otpauth://`` codificada no QR Code
+
+        Returns:
+            tuple: (bytes do PNG, ETag)
+        """
+        chave = (usuario_id, self._impressao(secret))
+
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                self._itens.move_to_end(chave)
+                self.hits += 1
+                return item
+            self.misses += 1
+
+        item = (self._renderizar(provisioning_uri), secrets.token_hex(16))
+
+        with self._lock:
+            existente = self._itens.get(chave)
+            if existente is not None:
+                # Outra requisição gerou a mesma imagem antes: manter um único ETag
+                return existente
+            # Remover imagens antigas do mesmo usuário (secret trocado)
+            for antiga in [c for c in self._itens if c[0] == usuario_id]:
+                del self._itens[antiga]
+            self._itens[chave] = item
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+        return item
+
+    def obter_data_uri(self, usuario_id, secret, provisioning_uri):
+        """Retorna o QR Code como data URI ``data:image/png;base64,...``"""
+        png, _ = self.obter_png(usuario_id, secret, provisioning_uri)
+        return 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+
+    @staticmethod
+    def _renderizar(provisioning_uri):
+        """Gera o PNG do QR Code em memória"""
+        import qrcode
+
+        qr = qrcode.QRCode(version=1, box_size=10, border=5)
+        qr.add_data(provisioning_uri)
+        qr.make(fit=True)
+
+        buffer = io.BytesIO()
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def descartar_usuarios(self, usuario_ids):
+        """Remove as imagens de vários usuários"""
+        usuario_ids = set(usuario_ids)
+        with self._lock:
+            for chave in [c for c in self._itens if c[0] in usuario_ids]:
+                del self._itens[chave]
+
+    def ao_alterar_usuarios(self, evento, usuario_ids, versao=None):
+        """Ouvinte de alterações de usuários: desativados perdem o QR Code em cache"""
+        if evento == 'desativacao':
+            self.descartar_usuarios(usuario_ids)
+
+    def limpar(self):
+        """Remove todas as imagens e zera os contadores"""
+        with self._lock:
+            self._itens.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def apos_fork(self):
+        """No processo filho: novo lock, mantendo as imagens herdadas"""
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._itens)
+
+    def stats(self):
+        """Retorna tamanho e taxa de acerto do cache"""
+        return {
+            'itens': len(self._itens),
+            'max_itens': self.max_itens,
+            'bytes': sum(len(png) for png, _ in self._itens.values()),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+# Instância compartilhada pelo processo
+qr_code_cache = QRCodeCache()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=qr_code_cache.apos_fork)
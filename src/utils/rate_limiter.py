@@ -0,0 +1,207 @@
+"""
+Limitador de tentativas em memória (token bucket)
+Protege as rotas de login e 2FA contra excesso de tentativas antes de
+qualquer hash de senha ou consulta SQL
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# Buckets mais antigos examinados em busca de um cheio quando o limite de chaves é atingido
+CANDIDATOS_DESCARTE = 32
+
+
+class TokenBucketLimiter:
+    """
+    Conjunto de token buckets indexados por chave (IP, email, token...)
+
+    Cada bucket guarda apenas ``[tokens, ultimo_acesso]``. Os buckets ficam
+    num OrderedDict ordenado pelo último acesso, o que permite:
+
+    - verificação O(1) por chave;
+    - expiração amortizada O(1) removendo do início os buckets ociosos
+      (um bucket ocioso por ``capacidade / taxa`` segundos está cheio e é
+      equivalente a um bucket novo);
+    - memória limitada a ``max_chaves`` entradas. Ao atingir o limite só
+      é descartado um bucket que já voltou a ficar cheio (equivalente a um
+      novo); descartar um bucket esgotado zeraria o limite daquela chave,
+      bastando a um ataque alternar muitas chaves. Sem bucket descartável a
+      tentativa da chave nova é recusada (falha fechada).
+    """
+
+    def __init__(self, capacidade, taxa_por_segundo, max_chaves=10000, relogio=time.monotonic):
+        """
+        Args:
+            capacidade (int): Número máximo de tentativas em rajada
+            taxa_por_segundo (float): Tokens repostos por segundo
+            max_chaves (int): Número máximo de buckets mantidos em memória
+            relogio (callable): Fonte de tempo monotônica (injetável em testes)
+        """
+        if capacidade <= 0 or taxa_por_segundo <= 0:
+            raise ValueError("Capacidade e taxa devem ser positivas")
+
+        self.capacidade = float(capacidade)
+        self.taxa = float(taxa_por_segundo)
+        self.max_chaves = max_chaves
+        self.ttl = self.capacidade / self.taxa
+        self._relogio = relogio
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.permitidas = 0
+        self.rejeitadas = 0
+        self.descartadas = 0
+        self.recusadas_lotado = 0
+
+    def consumir(self, chave):
+        """
+        Tenta consumir um token da chave
+
+        Args:
+            chave (str): Identificador do bucket
+
+        Returns:
+            float: 0 se a tentativa foi permitida, ou o número de segundos
+            até haver um token disponível
+        """
+        agora = self._relogio()
+
+        with self._lock:
+            self._expirar(agora)
+
+            bucket = self._buckets.get(chave)
+            if bucket is None:
+                if len(self._buckets) >= self.max_chaves:
+                    espera = self._descartar_cheio(agora)
+                    if espera:
+                        self.rejeitadas += 1
+                        self.recusadas_lotado += 1
+                        return espera
+                bucket = [self.capacidade, agora]
+                self._buckets[chave] = bucket
+            else:
+                tokens = bucket[0] + (agora - bucket[1]) * self.taxa
+                bucket[0] = min(self.capacidade, tokens)
+                bucket[1] = agora
+                self._buckets.move_to_end(chave)
+
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                self.permitidas += 1
+                return 0.0
+
+            self.rejeitadas += 1
+            return (1.0 - bucket[0]) / self.taxa
+
+    def _descartar_cheio(self, agora):
+        """
+        Descarta o bucket cheio mais antigo entre os ``CANDIDATOS_DESCARTE`` primeiros
+
+        Returns:
+            float: 0 se um bucket foi descartado, ou os segundos até o
+            primeiro dos candidatos ficar cheio
+        """
+        espera = None
+        for indice, (chave, bucket) in enumerate(self._buckets.items()):
+            if indice >= CANDIDATOS_DESCARTE:
+                break
+            faltam = self.capacidade - (bucket[0] + (agora - bucket[1]) * self.taxa)
+            if faltam <= 0:
+                del self._buckets[chave]
+                self.descartadas += 1
+                return 0.0
+            espera = faltam / self.taxa if espera is None else min(espera, faltam / self.taxa)
+        return espera
+
+    def _expirar(self, agora):
+        """Remove do início da fila os buckets ociosos (já cheios)"""
+        buckets = self._buckets
+        while buckets:
+            chave, bucket = next(iter(buckets.items()))
+            if agora - bucket[1] < self.ttl:
+                break
+            del buckets[chave]
+
+    def limpar(self):
+        """Remove todos os buckets e zera os contadores"""
+        with self._lock:
+            self._buckets.clear()
+            self.permitidas = 0
+            self.rejeitadas = 0
+            self.descartadas = 0
+            self.recusadas_lotado = 0
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def stats(self):
+        """Retorna os contadores do limitador"""
+        return {
+            'chaves': len(self._buckets),
+            'max_chaves': self.max_chaves,
+            'permitidas': self.permitidas,
+            'rejeitadas': self.rejeitadas,
+            'descartadas': self.descartadas,
+            'recusadas_lotado': self.recusadas_lotado
+        }
+
+
+class LoginThrottle:
+    """Combina um limitador por IP e outro por identidade (email ou token)"""
+
+    def __init__(self, por_ip, por_identidade):
+        self.por_ip = por_ip
+        self.por_identidade = por_identidade
+
+    @classmethod
+    def from_config(cls, config, prefixo='LOGIN'):
+        """
+        Cria o throttle a partir dos atributos ``<prefixo>_RATE_*`` do Config
+
+        Args:
+            config: Classe ou objeto de configuração
+            prefixo (str): Prefixo das chaves de configuração
+        """
+        max_chaves = getattr(config, 'RATE_LIMIT_MAX_KEYS', 10000)
+        por_ip = TokenBucketLimiter(
+            getattr(config, f'{prefixo}_RATE_IP_BURST'),
+            getattr(config, f'{prefixo}_RATE_IP_PER_MINUTE') / 60.0,
+            max_chaves
+        )
+        por_identidade = TokenBucketLimiter(
+            getattr(config, f'{prefixo}_RATE_ID_BURST'),
+            getattr(config, f'{prefixo}_RATE_ID_PER_MINUTE') / 60.0,
+            max_chaves
+        )
+        return cls(por_ip, por_identidade)
+
+    def verificar(self, ip, identidade=None):
+        """
+        Verifica se uma tentativa pode prosseguir
+
+        Args:
+            ip (str): Endereço IP do cliente
+            identidade (str): Email (login) ou token (2FA), se informado
+
+        Returns:
+            int: 0 se permitido, ou o valor de ``Retry-After`` em segundos
+        """
+        espera = self.por_ip.consumir(ip or '-')
+        if espera:
+            return math.ceil(espera)
+
+        if identidade:
+            espera = self.por_identidade.consumir(str(identidade).strip().lower())
+            if espera:
+                return math.ceil(espera)
+
+        return 0
+
+    def stats(self):
+        """Retorna os contadores dos dois limitadores"""
+        return {
+            'por_ip': self.por_ip.stats(),
+            'por_identidade': self.por_identidade.stats()
+        }
@@ -3,8 +3,10 @@ Middleware de Autorização por Níveis de Acesso
 """
 
 from functools import wraps
-from flask import request, abort
-from src.utils.permissions import verificar_permissao, verificar_nivel_minimo, obter_permissoes_usuario
+from flask import abort
+from src.utils.permissions import verificar_permissao, verificar_bits, verificar_nivel_minimo, obter_permissoes_usuario
+from src.utils.authorization_strategy import bit_permissao
+from src.utils.auth_middleware import get_current_user
 
 def require_permission(permission):
     """
@@ -13,19 +15,30 @@ def require_permission(permission):
     Args:
         permission (str): Permissão necessária (ex: 'tarefas:create')
     """
+    # Bit da permissão calculado uma vez, na decoração da rota (as posições
+    # do catálogo são fixas; permissões fora dele são resolvidas a cada vez)
+    bits = bit_permissao(permission)
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # Obter usuário atual
-            usuario_atual = getattr(request, 'current_user', None)
+            usuario_atual = get_current_user()
             if not usuario_atual:
                 abort(401, 'Usuário não autenticado')
             
             # Verificar permissão
-            if not verificar_permissao(usuario_atual.nivel_acesso, permission):
+            if bits:
+                permitido = verificar_bits(usuario_atual.nivel_acesso, bits)
+            else:
+                permitido = verificar_permissao(usuario_atual.nivel_acesso, permission)
+            
+            if not permitido:
                 abort(403, f'Permissão insuficiente. Necessário: {permission}')
             
             return f(*args, **kwargs)
+        # Metadados lidos na montagem da matriz de permissões das rotas
+        decorated_function.required_permission = permission
         return decorated_function
     return decorator
 
@@ -40,7 +53,7 @@ def require_role(minimum_role):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # Obter usuário atual
-            usuario_atual = getattr(request, 'current_user', None)
+            usuario_atual = get_current_user()
             if not usuario_atual:
                 abort(401, 'Usuário não autenticado')
             
@@ -49,6 +62,7 @@ def require_role(minimum_role):
                 abort(403, f'Nível de acesso insuficiente. Necessário: {minimum_role}')
             
             return f(*args, **kwargs)
+        decorated_function.required_role = minimum_role
         return decorated_function
     return decorator
 
@@ -59,7 +73,7 @@ def require_admin(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # Obter usuário atual
-        usuario_atual = getattr(request, 'current_user', None)
+        usuario_atual = get_current_user()
         if not usuario_atual:
             abort(401, 'Usuário não autenticado')
         
@@ -68,6 +82,7 @@ def require_admin(f):
             abort(403, 'Acesso administrativo necessário')
         
         return f(*args, **kwargs)
+    decorated_function.required_role = 'administrativo'
     return decorated_function
 
 def require_manager_or_admin(f):
@@ -77,7 +92,7 @@ def require_manager_or_admin(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # Obter usuário atual
-        usuario_atual = getattr(request, 'current_user', None)
+        usuario_atual = get_current_user()
         if not usuario_atual:
             abort(401, 'Usuário não autenticado')
         
@@ -86,6 +101,7 @@ def require_manager_or_admin(f):
             abort(403, 'Acesso gerencial ou administrativo necessário')
         
         return f(*args, **kwargs)
+    decorated_function.required_role = 'gerencial'
     return decorated_function
 
 def get_user_permissions():
@@ -93,9 +109,9 @@ def get_user_permissions():
     Retorna as permissões do usuário atual
     
     Returns:
-        list: Lista de permissões do usuário
+        list: Permissões do usuário
     """
-    usuario_atual = getattr(request, 'current_user', None)
+    usuario_atual = get_current_user()
     if not usuario_atual:
         return []
     
@@ -111,7 +127,7 @@ def check_permission(permission):
     Returns:
         bool: True se tem permissão, False caso contrário
     """
-    usuario_atual = getattr(request, 'current_user', None)
+    usuario_atual = get_current_user()
     if not usuario_atual:
         return False
     
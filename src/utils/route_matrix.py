@@ -0,0 +1,153 @@
+"""
+Matriz de permissões das rotas
+Montada uma única vez na inicialização a partir dos metadados deixados
+pelos decorators ``require_auth``, ``require_permission`` e ``require_role``.
+Permite responder "o que este usuário pode fazer" sem uma chamada por ação.
+"""
+
+import hashlib
+import json
+import threading
+from typing import NamedTuple, Optional
+
+from src.utils.permissions import registro_permissoes, verificar_permissao, verificar_nivel_minimo
+
+# Métodos gerados automaticamente pelo Flask, sem handler próprio
+METODOS_IGNORADOS = frozenset({'HEAD', 'OPTIONS'})
+
+
+class RegraRota(NamedTuple):
+    """Exigências de acesso de um método de uma rota"""
+    rota: str
+    metodo: str
+    endpoint: str
+    autenticacao: bool
+    permissao: Optional[str]
+    nivel_minimo: Optional[str]
+
+    @property
+    def chave(self):
+        return f'{self.metodo} {self.rota}'
+
+    def permite(self, nivel_acesso):
+        """Indica se um nível de acesso atende às exigências da rota"""
+        if self.permissao and not verificar_permissao(nivel_acesso, self.permissao):
+            return False
+        if self.nivel_minimo and not verificar_nivel_minimo(nivel_acesso, self.nivel_minimo):
+            return False
+        return True
+
+
+def _handler(view, metodo):
+    """Retorna a função que atende o método (Resource do flask-restx ou view simples)"""
+    view_class = getattr(view, 'view_class', None)
+    if view_class is not None:
+        return getattr(view_class, metodo.lower(), None)
+    return view
+
+
+def extrair_regras(app):
+    """
+    Percorre o mapa de URLs da aplicação e extrai as regras protegidas
+
+    Rotas sem nenhum decorator de autenticação (documentação, login,
+    arquivos estáticos) ficam de fora da matriz.
+
+    Returns:
+        tuple: ``RegraRota`` ordenadas por rota e método
+    """
+    regras = []
+    for regra_url in app.url_map.iter_rules():
+        view = app.view_functions.get(regra_url.endpoint)
+        if view is None:
+            continue
+
+        for metodo in sorted((regra_url.methods or set()) - METODOS_IGNORADOS):
+            handler = _handler(view, metodo)
+            if handler is None:
+                continue
+
+            permissao = getattr(handler, 'required_permission', None)
+            nivel_minimo = getattr(handler, 'required_role', None)
+            autenticacao = bool(getattr(handler, 'requires_auth', False) or permissao or nivel_minimo)
+            if not autenticacao:
+                continue
+
+            regras.append(RegraRota(
+                rota=regra_url.rule,
+                metodo=metodo,
+                endpoint=regra_url.endpoint,
+                autenticacao=autenticacao,
+                permissao=permissao,
+                nivel_minimo=nivel_minimo
+            ))
+
+    regras.sort(key=lambda regra: (regra.rota, regra.metodo))
+    return tuple(regras)
+
+
+class MatrizPermissoes:
+    """
+    Matriz rota/método -> exigência, com as capacidades de cada nível em cache
+
+    As capacidades dependem apenas do nível de acesso e da versão do
+    registro de permissões, então a resposta (e seu ETag) é calculada uma
+    vez por nível e reaproveitada por todos os usuários daquele nível.
+    """
+
+    def __init__(self, regras):
+        self.regras = tuple(regras)
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def construir(cls, app):
+        """Monta a matriz a partir das rotas registradas na aplicação"""
+        return cls(extrair_regras(app))
+
+    def como_lista(self):
+        """Matriz completa em formato serializável"""
+        return [regra._asdict() for regra in self.regras]
+
+    def capacidades(self, nivel_acesso):
+        """
+        Capacidades de um nível de acesso
+
+        Returns:
+            tuple: (corpo JSON, ETag) -- o corpo contém ``nivel_acesso``,
+            ``versao``, ``permissoes`` e ``rotas`` (``{"GET /rota": bool}``)
+        """
+        snapshot = registro_permissoes.atual
+        chave = (nivel_acesso, snapshot.versao)
+
+        resultado = self._cache.get(chave)
+        if resultado is not None:
+            self.hits += 1
+            return resultado
+        self.misses += 1
+
+        corpo = json.dumps({
+            'nivel_acesso': nivel_acesso,
+            'versao': snapshot.versao,
+            'permissoes': list(snapshot.permissoes_nivel.get(nivel_acesso, ())),
+            'rotas': {regra.chave: regra.permite(nivel_acesso) for regra in self.regras}
+        }, ensure_ascii=False, separators=(',', ':'))
+        resultado = (corpo, hashlib.sha256(corpo.encode('utf-8')).hexdigest()[:32])
+
+        with self._lock:
+            # Entradas de versões antigas não serão mais consultadas
+            if any(versao != snapshot.versao for _, versao in self._cache):
+                self._cache = {k: v for k, v in self._cache.items() if k[1] == snapshot.versao}
+            self._cache[chave] = resultado
+        return resultado
+
+    def stats(self):
+        """Tamanho e taxa de acerto do cache de capacidades"""
+        return {
+            'rotas': len(self.regras),
+            'itens': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses
+        }
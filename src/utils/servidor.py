@@ -0,0 +1,144 @@
+"""
+Execução em produção com o gunicorn (pré-fork com vários workers)
+Usado por ``gunicorn.conf.py``; todas as opções vêm de ``Config``.
+
+Ciclo de vida:
+
+- Com ``PRELOAD_APP`` o processo mestre cria a aplicação uma única vez
+  (esquema do banco, permissões compiladas, índice de usuários) e os
+  workers herdam essa memória por cópia na escrita.
+- Nenhuma conexão SQLite atravessa o fork: as conexões são abertas por
+  requisição. Locks e verificações de versão dos caches em memória são
+  refeitos no filho pelos hooks ``os.register_at_fork`` de cada módulo.
+- Com mais de um worker, métricas e perfis são gravados num diretório
+  compartilhado para que ``/metrics`` e ``/admin/profiles`` enxerguem
+  todos os processos.
+
+Sinais do mestre:
+
+- ``HUP``: recarrega a configuração e substitui os workers aos poucos
+  (sem ``PRELOAD_APP`` também recarrega o código)
+- ``USR2`` seguido de ``QUIT`` no mestre antigo: troca de versão do código
+  sem recusar conexões (com ``PRELOAD_APP``)
+- ``TERM``: encerramento gracioso, aguardando até ``GRACEFUL_TIMEOUT``
+- ``TTIN`` / ``TTOU``: adiciona / remove um worker
+"""
+
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Diretório temporário criado por preparar_ambiente (removido ao encerrar)
+_diretorio_temporario = None
+
+
+def numero_workers(configurado=0, cpus=None):
+    """Workers configurados ou ``2 x CPUs + 1`` (recomendação do gunicorn)"""
+    if configurado > 0:
+        return configurado
+    return 2 * (cpus or os.cpu_count() or 1) + 1
+
+
+def numero_threads(config=Config):
+    """
+    Threads configuradas ou, com ``WORKER_THREADS=0``, as automáticas
+
+    O controle de admissão só descarta carga se a requisição excedente
+    chegar a uma thread: com ele ativo, cada worker recebe as vagas de
+    todas as classes, as conexões SSE e uma reserva para as rotas baratas
+    (``/health``, ``/auth/me``) e as respostas 503. Sem ele, workers
+    síncronos.
+    """
+    if config.WORKER_THREADS > 0:
+        return config.WORKER_THREADS
+    if not config.ADMISSION_ENABLED:
+        return 1
+    return sum(limites_admissao(config)) + config.SSE_WSGI_MAX_CLIENTS + config.ADMISSION_RESERVED_THREADS
+
+
+def limites_admissao(config=Config):
+    """Vagas simultâneas de cada classe de admissão"""
+    from src.utils.admissao import PREFIXOS
+    return [getattr(config, f'{prefixo}_CONCURRENCY') for prefixo in PREFIXOS.values()]
+
+
+def opcoes_gunicorn(config=Config):
+    """Opções do gunicorn derivadas da configuração da aplicação"""
+    threads = numero_threads(config)
+    if config.ADMISSION_ENABLED and threads <= max(limites_admissao(config)):
+        logger.warning('Controle de admissão ativo com %d thread(s) por worker: as vagas das classes '
+                       'nunca se esgotam e nenhuma carga é descartada (use WORKER_THREADS=0)', threads)
+    opcoes = {
+        'bind': f'{config.HOST}:{config.PORT}',
+        'workers': numero_workers(config.WORKERS),
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'preload_app': config.PRELOAD_APP,
+        'timeout': config.WORKER_TIMEOUT,
+        'graceful_timeout': config.GRACEFUL_TIMEOUT,
+        'keepalive': config.KEEPALIVE,
+        'max_requests': config.MAX_REQUESTS,
+        'max_requests_jitter': config.MAX_REQUESTS_JITTER,
+        'accesslog': config.ACCESS_LOG or None,
+        'errorlog': '-',
+        'loglevel': config.LOG_LEVEL,
+        'proc_name': 'api-tarefas',
+    }
+    # Heartbeat dos workers em memória: evita travas de I/O em discos lentos
+    if os.path.isdir('/dev/shm'):
+        opcoes['worker_tmp_dir'] = '/dev/shm'
+    return opcoes
+
+
+def ativar_wal(db_path=None):
+    """Coloca o banco em journal WAL (persistente no arquivo)"""
+    db_path = db_path or os.environ.get('DATABASE_PATH', 'tarefas.db')
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def preparar_ambiente(workers, config=Config):
+    """
+    Ajustes feitos no mestre antes de carregar a aplicação
+
+    Com vários workers e sem diretórios configurados, métricas e perfis
+    passam a usar um diretório temporário compartilhado.
+    """
+    global _diretorio_temporario
+
+    if config.DATABASE_WAL:
+        ativar_wal()
+
+    if workers > 1 and (not config.METRICS_DIR or not config.PROFILING_DIR):
+        _diretorio_temporario = tempfile.mkdtemp(prefix='api-tarefas-')
+        if not config.METRICS_DIR:
+            config.METRICS_DIR = os.path.join(_diretorio_temporario, 'metricas')
+        if not config.PROFILING_DIR:
+            config.PROFILING_DIR = os.path.join(_diretorio_temporario, 'perfis')
+
+
+def worker_exit(server, worker):
+    """Grava o que cada worker mantém em buffer antes de ele sair (reciclagem ou parada)"""
+    from src.utils.metrics import metricas
+
+    if Config.METRICS_DIR:
+        # Totais incorporados aos encerrados: o diretório não cresce com a reciclagem
+        metricas.encerrar(Config.METRICS_DIR)
+    captura = getattr(worker.wsgi, 'extensions', {}).get('captura')
+    if captura is not None:
+        captura.descarregar()
+
+
+def on_exit(server):
+    """Remove o diretório temporário compartilhado pelos workers"""
+    if _diretorio_temporario:
+        shutil.rmtree(_diretorio_temporario, ignore_errors=True)
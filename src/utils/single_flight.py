@@ -0,0 +1,138 @@
+"""
+Coalescência de leituras idênticas simultâneas (single-flight)
+Quando vários usuários abrem o painel ao mesmo tempo, as mesmas consultas
+(``GET /tarefas/``, ``GET /usuarios/``) chegam juntas ao SQLite. Enquanto
+uma consulta idêntica está em andamento, as chamadas seguintes aguardam o
+resultado dela em vez de executá-la de novo.
+
+A chave é a impressão do SQL (espaços normalizados), os parâmetros e o
+escopo de permissão de quem consulta. Cada grupo tem uma geração,
+incrementada a cada escrita confirmada neste processo: uma leitura
+iniciada depois de uma escrita nunca reaproveita uma consulta iniciada
+antes dela (quem escreve sempre lê o que escreveu).
+
+Os resultados são compartilhados entre as chamadas: retorne linhas
+(tuplas) e monte os dicionários de resposta em cada chamada.
+"""
+
+import os
+import threading
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def impressao_sql(sql):
+    """SQL com espaços normalizados (mesma consulta escrita com outra indentação)"""
+    return ' '.join(sql.split())
+
+
+class _Chamada:
+    __slots__ = ('pronta', 'resultado', 'erro')
+
+    def __init__(self):
+        self.pronta = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class SingleFlight:
+    """Grupo de chamadas coalescidas por chave"""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.geracao = 0
+        self.executadas = 0
+        self.compartilhadas = 0
+        self._em_voo = {}
+        self._lock = threading.Lock()
+
+    def apos_fork(self):
+        """No processo filho: novo lock e nenhuma chamada herdada em andamento"""
+        self._lock = threading.Lock()
+        self._em_voo = {}
+
+    def invalidar(self, *args):
+        """
+        Chamado após uma escrita confirmada: chamadas já em andamento deixam de ser reaproveitadas
+
+        Aceita argumentos para servir diretamente de ouvinte de alterações.
+        """
+        with self._lock:
+            self.geracao += 1
+
+    def executar(self, chave, funcao):
+        """
+        Executa ``funcao()`` ou aguarda a chamada idêntica em andamento
+
+        Exceções da chamada executada são repassadas às que a aguardavam.
+        """
+        with self._lock:
+            chave = (self.geracao, chave)
+            chamada = self._em_voo.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = self._em_voo[chave] = _Chamada()
+                self.executadas += 1
+            else:
+                self.compartilhadas += 1
+
+        if not lider:
+            chamada.pronta.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = funcao()
+            return chamada.resultado
+        except Exception as erro:
+            chamada.erro = erro
+            raise
+        finally:
+            with self._lock:
+                del self._em_voo[chave]
+            chamada.pronta.set()
+
+    def consultar(self, conectar, sql, parametros=(), escopo=None):
+        """
+        ``fetchall()`` de uma consulta, compartilhado entre chamadas idênticas simultâneas
+
+        Args:
+            conectar: Fábrica de conexões (ex.: ``get_db_connection``)
+            escopo: Escopo de permissão de quem consulta (ex.: nível de acesso)
+        """
+        def executar():
+            conn = conectar()
+            try:
+                return conn.execute(sql, parametros).fetchall()
+            finally:
+                conn.close()
+
+        return self.executar((impressao_sql(sql), tuple(parametros), escopo), executar)
+
+    def stats(self):
+        return {
+            'em_andamento': len(self._em_voo),
+            'executadas': self.executadas,
+            'compartilhadas': self.compartilhadas,
+            'geracao': self.geracao
+        }
+
+    def coletor(self):
+        """Coletor de métricas: chamadas executadas e coalescidas"""
+        def coletar():
+            grupo = ('grupo', self.nome)
+            return [
+                ('counter', 'single_flight_calls_total', (grupo, ('resultado', 'executada')), self.executadas),
+                ('counter', 'single_flight_calls_total', (grupo, ('resultado', 'compartilhada')), self.compartilhadas),
+                ('gauge', 'single_flight_in_flight', (grupo,), len(self._em_voo)),
+            ]
+        return coletar
+
+
+consultas_tarefas = SingleFlight('tarefas')
+consultas_usuarios = SingleFlight('usuarios')
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=consultas_tarefas.apos_fork)
+    os.register_at_fork(after_in_child=consultas_usuarios.apos_fork)
@@ -0,0 +1,387 @@
+"""
+Eventos de tarefas em tempo real (Server-Sent Events)
+Um único leitor por processo acompanha o log de alterações
+(``tarefas_alteracoes``) e distribui cada alteração a todos os assinantes
+de ``GET /tarefas/stream``: o banco recebe uma consulta por intervalo,
+qualquer que seja o número de clientes conectados. Escritas feitas neste
+processo acordam o leitor na hora; as de outros workers são percebidas no
+intervalo de verificação.
+
+- Cada assinante tem um buffer limitado. Quem não consome rápido o
+  suficiente é desconectado; ao reconectar com ``Last-Event-ID`` (o
+  ``seq`` do log) recebe o que perdeu, lido do próprio log.
+- Cada evento é serializado uma vez por forma (com ou sem os dados da
+  tarefa, conforme a permissão do assinante), não uma vez por cliente.
+- Um assinante atrasado além do buffer ou do piso do log recebe o evento
+  ``reset`` e recarrega a lista completa.
+
+O servidor indicado é o ASGI (``asgi.py``), em que cada conexão é uma
+corrotina. No WSGI cada conexão ocupa uma thread: com workers síncronos a
+rota responde 503 e o cliente passa a consultar ``/tarefas/changes``; com
+gthread são aceitas até ``SSE_WSGI_MAX_CLIENTS`` conexões por worker, cada
+uma com duração máxima ``duracao_wsgi()``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Linha de comentário enviada para manter a conexão (e proxies) ativa
+HEARTBEAT = b': ping\n\n'
+
+# Alterações lidas do log por consulta
+LOTE_LEITURA = 500
+
+# Espera sugerida ao navegador antes de reconectar (ms)
+RETRY_MS = 3000
+
+
+def formatar_evento(evento, dados, identificador=None):
+    """Quadro SSE (``id``, ``event`` e ``data``) em bytes"""
+    linhas = f'id: {identificador}\n' if identificador is not None else ''
+    linhas += f'event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n'
+    return linhas.encode('utf-8')
+
+
+# Quadro enviado a quem precisa descartar o estado local e recarregar a lista
+RESET = formatar_evento('reset', {})
+
+
+class EventoTarefa:
+    """Alteração do log com os quadros SSE de cada forma, gerados uma vez"""
+
+    __slots__ = ('seq', 'alteracao', '_completo', '_resumido')
+
+    def __init__(self, alteracao):
+        self.seq = alteracao['seq']
+        self.alteracao = alteracao
+        self._completo = None
+        self._resumido = None
+
+    def quadro(self, com_tarefa):
+        if com_tarefa:
+            if self._completo is None:
+                self._completo = formatar_evento(self.alteracao['operacao'], self.alteracao, self.seq)
+            return self._completo
+        if self._resumido is None:
+            self._resumido = formatar_evento(self.alteracao['operacao'], {**self.alteracao, 'tarefa': None}, self.seq)
+        return self._resumido
+
+
+class Assinante:
+    """
+    Conexão de ``/tarefas/stream``
+
+    ``despertar`` é chamado (de qualquer thread) quando há quadros novos
+    ou quando o assinante é removido: um ``threading.Event.set`` no
+    servidor WSGI, ``loop.call_soon_threadsafe`` no ASGI.
+    """
+
+    def __init__(self, com_tarefa, desde=None, max_eventos=256, despertar=None):
+        self.com_tarefa = com_tarefa
+        self.desde = desde
+        self.max_eventos = max_eventos
+        self.despertar = despertar or (lambda: None)
+        # Último seq já colocado no buffer (evita duplicatas entre log e tempo real)
+        self.ultimo = desde or 0
+        self.sincronizado = False
+        self.removido = False
+        self._quadros = deque()
+
+    def _enfileirar(self, quadro, seq=None):
+        """Chamado pelo hub; retorna False se o buffer estourou"""
+        if seq is not None:
+            if seq <= self.ultimo:
+                return True
+            self.ultimo = seq
+        if len(self._quadros) >= self.max_eventos:
+            return False
+        self._quadros.append(quadro)
+        self.despertar()
+        return True
+
+    def retirar(self):
+        """Quadros pendentes, na ordem (esvazia o buffer)"""
+        quadros = []
+        while self._quadros:
+            quadros.append(self._quadros.popleft())
+        return quadros
+
+    def __len__(self):
+        return len(self._quadros)
+
+
+class HubTarefas:
+    """Distribuição das alterações de tarefas aos assinantes deste processo"""
+
+    def __init__(self, intervalo=1.0, max_assinantes=1000):
+        self.intervalo = intervalo
+        self.max_assinantes = max_assinantes
+        self.seq = None
+        self.eventos = 0
+        self.entregas = 0
+        self.removidos = 0
+        self.resets = 0
+        self._assinantes = set()
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread = None
+
+    def apos_fork(self):
+        """No processo filho: sem assinantes nem leitor herdados"""
+        self._assinantes = set()
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread = None
+        self.seq = None
+
+    def assinar(self, assinante, limite=None):
+        """
+        Registra um assinante (False se o limite de conexões foi atingido)
+
+        O leitor envia primeiro o que o assinante perdeu desde
+        ``assinante.desde`` e depois as alterações em tempo real.
+
+        Args:
+            limite (int): Limite menor que ``max_assinantes`` (ex.: servidor WSGI)
+        """
+        with self._lock:
+            if limite is None:
+                limite = self.max_assinantes
+            if len(self._assinantes) >= min(self.max_assinantes, limite):
+                return False
+            self._assinantes.add(assinante)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._laco, name='hub-tarefas', daemon=True)
+                self._thread.start()
+        self._acordar.set()
+        return True
+
+    def cancelar(self, assinante):
+        with self._lock:
+            self._assinantes.discard(assinante)
+            if not self._assinantes:
+                # Sem assinantes a posição envelhece: a próxima leitura parte do seq atual
+                self.seq = None
+
+    def notificar(self):
+        """Acorda o leitor (chamado após confirmar uma escrita neste processo)"""
+        if self._assinantes:
+            self._acordar.set()
+
+    def _remover(self, assinante):
+        """Desconecta um assinante lento (chamado com o lock)"""
+        self._assinantes.discard(assinante)
+        assinante.removido = True
+        self.removidos += 1
+        assinante.despertar()
+
+    def _laco(self):
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            with self._lock:
+                if not self._assinantes:
+                    self._thread = None
+                    return
+            try:
+                self.verificar()
+            except sqlite3.Error as erro:
+                logger.warning('Erro ao ler o log de alterações: %s', erro)
+
+    def verificar(self):
+        """Sincroniza assinantes novos e distribui as alterações ainda não lidas"""
+        from src.models.tarefa import get_db_connection
+        from src.models.tarefa_alteracoes import listar_alteracoes, seq_atual
+
+        conn = get_db_connection()
+        try:
+            if self.seq is None:
+                self.seq = seq_atual(conn.cursor())
+
+            with self._lock:
+                novos = [assinante for assinante in self._assinantes if not assinante.sincronizado]
+            for assinante in novos:
+                self._sincronizar(conn, assinante, listar_alteracoes)
+
+            while True:
+                pagina = listar_alteracoes(conn, self.seq, LOTE_LEITURA)
+                conn.rollback()
+                if pagina['reset']:
+                    # Este leitor ficou atrás do piso do log (processo parado por muito tempo)
+                    self.seq = seq_atual(conn.cursor())
+                    self._reiniciar_todos()
+                    return
+                self.publicar([EventoTarefa(alteracao) for alteracao in pagina['alteracoes']])
+                self.seq = pagina['seq']
+                if not pagina['mais']:
+                    return
+        finally:
+            conn.close()
+
+    def _sincronizar(self, conn, assinante, listar_alteracoes):
+        """Envia a um assinante novo o que ele perdeu, limitado ao seu buffer"""
+        desde = assinante.desde
+        if desde is not None and desde < self.seq:
+            pagina = listar_alteracoes(conn, desde, assinante.max_eventos)
+            conn.rollback()
+            # Alterações posteriores a self.seq chegam pela distribuição normal
+            if pagina['reset'] or (pagina['mais'] and pagina['seq'] < self.seq):
+                self._reset(assinante)
+            else:
+                with self._lock:
+                    for alteracao in pagina['alteracoes']:
+                        if alteracao['seq'] <= self.seq:
+                            assinante._enfileirar(EventoTarefa(alteracao).quadro(assinante.com_tarefa), alteracao['seq'])
+        assinante.ultimo = max(assinante.ultimo, self.seq)
+        assinante.sincronizado = True
+
+    def _reset(self, assinante):
+        with self._lock:
+            assinante._enfileirar(RESET)
+            self.resets += 1
+
+    def _reiniciar_todos(self):
+        with self._lock:
+            for assinante in list(self._assinantes):
+                assinante._enfileirar(RESET)
+                assinante.ultimo = self.seq
+                self.resets += 1
+
+    def publicar(self, eventos):
+        """Coloca os eventos no buffer de cada assinante sincronizado"""
+        if not eventos:
+            return
+        with self._lock:
+            self.eventos += len(eventos)
+            for assinante in list(self._assinantes):
+                if not assinante.sincronizado:
+                    continue
+                for evento in eventos:
+                    if not assinante._enfileirar(evento.quadro(assinante.com_tarefa), evento.seq):
+                        self._remover(assinante)
+                        break
+                    self.entregas += 1
+
+    def stats(self):
+        return {
+            'assinantes': len(self._assinantes),
+            'seq': self.seq,
+            'eventos': self.eventos,
+            'entregas': self.entregas,
+            'removidos': self.removidos,
+            'resets': self.resets,
+            'quadros_em_buffer': sum(len(assinante) for assinante in list(self._assinantes))
+        }
+
+    def coletor(self):
+        """Coletor de métricas: conexões, eventos distribuídos e desconexões por lentidão"""
+        def coletar():
+            return [
+                ('gauge', 'sse_clients', (), len(self._assinantes)),
+                ('counter', 'sse_events_total', (), self.entregas),
+                ('counter', 'sse_evictions_total', (), self.removidos),
+            ]
+        return coletar
+
+
+def ler_posicao(last_event_id=None, since=None):
+    """
+    Seq a partir do qual retomar: ``Last-Event-ID`` (reconexão) ou ``?since=``
+
+    Returns:
+        int | None: None quando o cliente quer apenas o tempo real
+    """
+    for valor in (last_event_id, since):
+        if valor and valor.isdigit():
+            return int(valor)
+    return None
+
+
+def duracao_wsgi(config=Config):
+    """
+    Duração máxima de um stream no servidor WSGI
+
+    Metade de ``WORKER_TIMEOUT``: a conexão termina (e o cliente reconecta
+    com ``Last-Event-ID``) bem antes de o gunicorn considerar o worker
+    travado. No ASGI vale ``SSE_MAX_SECONDS``.
+    """
+    return min(config.SSE_MAX_SECONDS, config.WORKER_TIMEOUT / 2)
+
+
+def transmitir(hub, assinante, acordado, heartbeat, duracao):
+    """
+    Gerador síncrono dos bytes do stream (servidor WSGI: uma thread por conexão)
+
+    Args:
+        acordado (threading.Event): Evento ligado ao ``despertar`` do assinante
+        heartbeat (float): Segundos sem eventos até enviar um comentário
+        duracao (float): Segundos até encerrar a conexão
+    """
+    limite = time.monotonic() + duracao
+    try:
+        yield f'retry: {RETRY_MS}\n\n'.encode()
+        while not assinante.removido:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return
+            if acordado.wait(min(heartbeat, restante)):
+                acordado.clear()
+                quadros = assinante.retirar()
+                if quadros:
+                    yield b''.join(quadros)
+            else:
+                yield HEARTBEAT
+        # Removido por lentidão: entrega o que ficou no buffer e encerra
+        yield b''.join(assinante.retirar())
+    finally:
+        hub.cancelar(assinante)
+
+
+async def transmitir_assincrono(hub, assinante, acordado, heartbeat, duracao):
+    """Versão em corrotina de ``transmitir`` (servidor ASGI: nenhuma thread por conexão)"""
+    limite = time.monotonic() + duracao
+    try:
+        yield f'retry: {RETRY_MS}\n\n'.encode()
+        while not assinante.removido:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return
+            try:
+                await asyncio.wait_for(acordado.wait(), min(heartbeat, restante))
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            acordado.clear()
+            quadros = assinante.retirar()
+            if quadros:
+                yield b''.join(quadros)
+        yield b''.join(assinante.retirar())
+    finally:
+        hub.cancelar(assinante)
+
+
+def despertar_no_loop(loop, acordado):
+    """``despertar`` de um assinante ASGI: acorda a corrotina a partir da thread do hub"""
+    def despertar():
+        try:
+            loop.call_soon_threadsafe(acordado.set)
+        except RuntimeError:
+            # Event loop já encerrado: a conexão terminou
+            pass
+    return despertar
+
+
+hub_tarefas = HubTarefas(Config.SSE_POLL_INTERVAL, Config.SSE_MAX_CLIENTS)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=hub_tarefas.apos_fork)
@@ -0,0 +1,398 @@
+"""
+Geração de dados sintéticos para testes de escala
+Usuários, tarefas e sessões com distribuições próximas das de produção,
+reproduzíveis pela semente e pela data de referência. As tarefas e sessões
+são geradas em blocos independentes (cada um com sua própria semente), em
+paralelo entre os núcleos, e inseridas com executemany numa conexão com as
+garantias de durabilidade relaxadas (o banco gerado é descartável).
+
+Distribuições:
+
+- níveis de acesso: ~1% administrativo, ~9% gerencial, restante visualização
+- datas de criação concentradas nos dias recentes e no horário comercial
+- donos das tarefas seguindo uma lei de potência (poucos usuários concentram
+  a maior parte das tarefas)
+- status dependente da idade (tarefas antigas tendem a estar concluídas)
+- tamanho das descrições log-normal, com parte delas vazia
+- sessões proporcionais à atividade do usuário, algumas revogadas ou expiradas
+"""
+
+import itertools
+import math
+import os
+import random
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from src.models.esquema import garantir_esquema
+from src.models.tarefa_alteracoes import registrar_tarefas_existentes, reiniciar_alteracoes
+from src.models.usuario import get_db_connection
+from src.models.usuario_lote import versionar_usuarios
+
+# Linhas por bloco gerado: fixo, pois cada bloco tem a própria semente
+BLOCO_GERACAO = 10000
+
+# Linhas inseridas por commit
+TAMANHO_LOTE = 50000
+
+# Domínio dos emails gerados (identifica os dados sintéticos no banco)
+DOMINIO_EMAIL = 'dados.teste'
+
+# Chaves do versoes_cache com a faixa de IDs das tarefas da última geração
+# (as tarefas sem dono não têm outra marca que as distinga das reais)
+CHAVE_TAREFAS_INICIO = 'dados_sinteticos_tarefas_inicio'
+CHAVE_TAREFAS_FIM = 'dados_sinteticos_tarefas_fim'
+
+PRIMEIROS_NOMES = (
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela',
+    'João', 'Karina', 'Lucas', 'Mariana', 'Nicolas', 'Olívia', 'Pedro', 'Rafaela', 'Samuel',
+    'Tatiane', 'Vinícius', 'Érica', 'Igor', 'Júlia', 'Marcos', 'Letícia', 'Thiago', 'Beatriz'
+)
+SOBRENOMES = (
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima',
+    'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Araújo'
+)
+VERBOS = ('Revisar', 'Implementar', 'Corrigir', 'Documentar', 'Testar', 'Planejar', 'Atualizar', 'Validar')
+OBJETOS = (
+    'relatório mensal', 'tela de login', 'integração de pagamentos', 'cadastro de clientes',
+    'rotina de backup', 'painel de métricas', 'contrato do fornecedor', 'orçamento do projeto'
+)
+TITULOS = tuple(f'{verbo} {objeto}' for verbo in VERBOS for objeto in OBJETOS)
+PALAVRAS = (
+    'cliente', 'prazo', 'entrega', 'revisão', 'ajuste', 'equipe', 'sistema', 'dados', 'relatório',
+    'reunião', 'pendência', 'validação', 'processo', 'documento', 'versão', 'servidor', 'teste'
+)
+
+# Distribuição dos níveis de acesso
+PESOS_NIVEIS = (('administrativo', 1), ('gerencial', 9), ('visualizacao', 90))
+
+# Peso das horas do dia (0h-23h) na criação de registros: pico no horário comercial
+PESOS_HORAS = (1, 1, 1, 1, 1, 2, 4, 8, 14, 16, 16, 14, 10, 14, 16, 16, 14, 10, 6, 4, 3, 2, 2, 1)
+
+
+class Escala:
+    """Quantidades e parâmetros de um conjunto de dados"""
+
+    def __init__(self, usuarios=1000, tarefas=50000, sessoes=10000, dias=365,
+                 expoente_donos=1.1, fracao_sem_dono=0.05):
+        self.usuarios = usuarios
+        self.tarefas = tarefas
+        self.sessoes = sessoes
+        self.dias = max(dias, 1)
+        self.expoente_donos = expoente_donos
+        self.fracao_sem_dono = fracao_sem_dono
+
+
+def _acumulados(pesos):
+    return list(itertools.accumulate(pesos))
+
+
+def _sortear(aleatorio, acumulados):
+    """Índice sorteado por busca binária nos pesos acumulados"""
+    return bisect_left(acumulados, aleatorio.random() * acumulados[-1])
+
+
+class GeradorDados:
+    """
+    Gera as linhas de cada tabela de forma determinística
+
+    Cada tabela (e cada bloco de tarefas e sessões) tem a própria semente,
+    derivada da semente geral: o resultado não depende da ordem nem do
+    número de processos usados na geração.
+    """
+
+    def __init__(self, escala, semente=42, referencia=None):
+        self.escala = escala
+        self.semente = semente
+        referencia = referencia or datetime.now()
+        # Datas geradas sempre anteriores à meia-noite do dia de referência
+        self.referencia = referencia.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._horas = _acumulados(PESOS_HORAS)
+        corpus = self.aleatorio('corpus')
+        # Texto base das descrições: trechos são recortados em posições aleatórias
+        self._corpus = ' '.join(corpus.choice(PALAVRAS) for _ in range(20000))
+
+    def aleatorio(self, tabela, bloco=0):
+        """Gerador pseudoaleatório próprio de uma tabela/bloco"""
+        return random.Random(f'{self.semente}:{tabela}:{bloco}')
+
+    def momento(self, aleatorio, recencia=2.0):
+        """
+        Data no período da escala, mais frequente nos dias recentes
+
+        ``recencia`` > 1 concentra as datas perto da referência.
+        """
+        dias_atras = 1 + int(self.escala.dias * aleatorio.random() ** recencia)
+        hora = _sortear(aleatorio, self._horas)
+        segundos = hora * 3600 + int(aleatorio.random() * 3600)
+        return self.referencia - timedelta(days=dias_atras, seconds=-segundos,
+                                           microseconds=-int(aleatorio.random() * 1000000))
+
+    def descricao(self, aleatorio):
+        """Texto de tamanho log-normal (mediana ~80 caracteres), vazio em 15% dos casos"""
+        if aleatorio.random() < 0.15:
+            return ''
+        tamanho = min(int(aleatorio.lognormvariate(math.log(80), 0.9)), 4000)
+        inicio = int(aleatorio.random() * (len(self._corpus) - tamanho - 1))
+        return self._corpus[inicio:inicio + tamanho].strip().capitalize()
+
+    def usuarios(self, senha_hash):
+        """Linhas (nome, email, senha_hash, nivel_acesso, ativo, data_criacao)"""
+        aleatorio = self.aleatorio('usuarios')
+        niveis = [nivel for nivel, _ in PESOS_NIVEIS]
+        acumulados = _acumulados(peso for _, peso in PESOS_NIVEIS)
+        for numero in range(self.escala.usuarios):
+            primeiro = aleatorio.choice(PRIMEIROS_NOMES)
+            sobrenome = aleatorio.choice(SOBRENOMES)
+            # O primeiro usuário é sempre um administrador ativo, para o banco ser utilizável
+            nivel = 'administrativo' if numero == 0 else niveis[_sortear(aleatorio, acumulados)]
+            inativo = aleatorio.random() < 0.05 and numero != 0
+            yield (
+                f'{primeiro} {sobrenome}',
+                f'usuario{numero}@{DOMINIO_EMAIL}',
+                senha_hash,
+                nivel,
+                0 if inativo else 1,
+                self.momento(aleatorio, recencia=1.3).isoformat()
+            )
+
+    def pesos_atividade(self):
+        """Pesos acumulados de cada usuário (em ordem de ID) como dono de tarefas e sessões"""
+        ordem = list(range(self.escala.usuarios))
+        self.aleatorio('atividade').shuffle(ordem)
+        pesos = [0.0] * self.escala.usuarios
+        for posicao, indice in enumerate(ordem, start=1):
+            pesos[indice] = 1 / posicao ** self.escala.expoente_donos
+        return _acumulados(pesos)
+
+    def bloco_tarefas(self, bloco, quantidade, ids_usuarios, atividade):
+        """Linhas (titulo, descricao, status, data_criacao, data_atualizacao, usuario_id)"""
+        aleatorio = self.aleatorio('tarefas', bloco)
+        dias = self.escala.dias
+        sem_dono = self.escala.fracao_sem_dono
+        linhas = []
+        for _ in range(quantidade):
+            criada = self.momento(aleatorio)
+            idade = (self.referencia - criada).days / dias
+            status = 'concluida' if aleatorio.random() < 0.25 + 0.65 * idade else 'pendente'
+            atualizada = min(criada + timedelta(hours=aleatorio.expovariate(1 / 36)), self.referencia)
+            dono = None
+            if ids_usuarios and aleatorio.random() >= sem_dono:
+                dono = ids_usuarios[_sortear(aleatorio, atividade)]
+            linhas.append((
+                TITULOS[int(aleatorio.random() * len(TITULOS))],
+                self.descricao(aleatorio),
+                status,
+                criada.isoformat(),
+                atualizada.isoformat(),
+                dono
+            ))
+        return linhas
+
+    def bloco_sessoes(self, bloco, quantidade, ids_usuarios, atividade):
+        """Linhas (usuario_id, token, expires_at, ativo, data_criacao)"""
+        aleatorio = self.aleatorio('sessoes', bloco)
+        linhas = []
+        for _ in range(quantidade):
+            criada = self.momento(aleatorio, recencia=3.0)
+            expira = criada + timedelta(days=7)
+            ativa = expira > self.referencia and aleatorio.random() >= 0.1
+            linhas.append((
+                ids_usuarios[_sortear(aleatorio, atividade)],
+                f'sintetico-{aleatorio.getrandbits(128):032x}',
+                expira.isoformat(),
+                1 if ativa else 0,
+                criada.isoformat()
+            ))
+        return linhas
+
+
+# Gerador reaproveitado entre os blocos atendidos por um mesmo processo
+_gerador_processo = None
+
+def _gerar_bloco(parametros):
+    """Gera um bloco de tarefas ou sessões (executado nos processos auxiliares)"""
+    global _gerador_processo
+    escala, semente, referencia, tabela, bloco, quantidade, ids_usuarios, atividade = parametros
+    chave = (semente, referencia, tuple(sorted(vars(escala).items())))
+    if _gerador_processo is None or _gerador_processo[0] != chave:
+        _gerador_processo = (chave, GeradorDados(escala, semente, referencia))
+    gerador = _gerador_processo[1]
+    gerar = gerador.bloco_tarefas if tabela == 'tarefas' else gerador.bloco_sessoes
+    return gerar(bloco, quantidade, ids_usuarios, atividade)
+
+
+def _blocos(tabela, total, escala, semente, referencia, ids_usuarios, atividade):
+    for bloco, inicio in enumerate(range(0, total, BLOCO_GERACAO)):
+        quantidade = min(BLOCO_GERACAO, total - inicio)
+        yield (escala, semente, referencia, tabela, bloco, quantidade, ids_usuarios, atividade)
+
+
+def _gerar_em_paralelo(executor, parametros, processos):
+    """Blocos na ordem original, com no máximo 2 por processo em memória"""
+    if executor is None:
+        for item in parametros:
+            yield _gerar_bloco(item)
+        return
+
+    pendentes = deque()
+    for item in parametros:
+        pendentes.append(executor.submit(_gerar_bloco, item))
+        if len(pendentes) >= processos * 2:
+            yield pendentes.popleft().result()
+    while pendentes:
+        yield pendentes.popleft().result()
+
+
+def _inserir(conn, sql, blocos, tamanho_lote, progresso=None, tabela=''):
+    """Insere cada bloco com um executemany, com um commit a cada ``tamanho_lote`` linhas"""
+    total = 0
+    desde_commit = 0
+    for bloco in blocos:
+        conn.executemany(sql, bloco)
+        total += len(bloco)
+        desde_commit += len(bloco)
+        if desde_commit >= tamanho_lote:
+            conn.commit()
+            desde_commit = 0
+            if progresso:
+                progresso(tabela, total)
+    conn.commit()
+    if progresso and desde_commit:
+        progresso(tabela, total)
+    return total
+
+
+def _limpar_sinteticos(conn):
+    """
+    Apaga os dados de uma geração anterior: usuários ``@dados.teste``, suas
+    sessões e tarefas e as tarefas sem dono da faixa de IDs registrada
+    """
+    usuarios_sinteticos = 'SELECT id FROM usuarios WHERE email LIKE ?'
+    padrao = (f'%@{DOMINIO_EMAIL}',)
+    faixa = dict(conn.execute('SELECT chave, versao FROM versoes_cache WHERE chave IN (?, ?)',
+                              (CHAVE_TAREFAS_INICIO, CHAVE_TAREFAS_FIM)).fetchall())
+
+    conn.execute(f'DELETE FROM sessoes WHERE usuario_id IN ({usuarios_sinteticos})', padrao)
+    conn.execute(f'DELETE FROM tarefas WHERE usuario_id IN ({usuarios_sinteticos})', padrao)
+    if len(faixa) == 2:
+        conn.execute('DELETE FROM tarefas WHERE id BETWEEN ? AND ?',
+                     (faixa[CHAVE_TAREFAS_INICIO], faixa[CHAVE_TAREFAS_FIM]))
+    conn.execute('DELETE FROM usuarios WHERE email LIKE ?', padrao)
+    conn.execute('DELETE FROM versoes_cache WHERE chave IN (?, ?)', (CHAVE_TAREFAS_INICIO, CHAVE_TAREFAS_FIM))
+    # O log é recriado ao final da carga com as tarefas restantes
+    reiniciar_alteracoes(conn.cursor())
+
+
+def _banco_vazio(conn):
+    return not any(
+        conn.execute(f'SELECT 1 FROM {tabela} LIMIT 1').fetchone() for tabela in ('usuarios', 'tarefas', 'sessoes')
+    )
+
+
+def _registrar_faixa_tarefas(conn, inicio, fim):
+    conn.executemany('INSERT OR REPLACE INTO versoes_cache (chave, versao) VALUES (?, ?)',
+                     [(CHAVE_TAREFAS_INICIO, inicio), (CHAVE_TAREFAS_FIM, fim)])
+
+
+def gerar_banco(escala, semente=42, referencia=None, senha='senha123', limpar=False,
+                tamanho_lote=TAMANHO_LOTE, processos=None, progresso=None):
+    """
+    Cria as tabelas (se preciso) e carrega o conjunto de dados no banco atual
+
+    Todos os usuários recebem a mesma senha, transformada em hash uma única vez.
+    Só um banco vazio é carregado sem fsync; o ``journal_mode`` do arquivo é
+    restaurado ao final.
+
+    Args:
+        escala (Escala): Quantidades a gerar
+        semente (int): Semente dos sorteios (mesma semente e referência = mesmos dados)
+        referencia (datetime): Dia mais recente dos dados (padrão: hoje)
+        senha (str): Senha de todos os usuários gerados
+        limpar (bool): Apagar antes os dados sintéticos de uma geração anterior
+            (usuários, tarefas e sessões reais são preservados)
+        tamanho_lote (int): Linhas inseridas por commit
+        processos (int): Processos de geração (padrão: número de CPUs)
+        progresso (callable): Chamado como ``progresso(tabela, linhas_inseridas)``
+
+    Returns:
+        dict: Linhas inseridas por tabela
+
+    Raises:
+        ValueError: Se o banco já contiver dados sintéticos e ``limpar`` for False
+    """
+    garantir_esquema()
+
+    referencia = referencia or datetime.now()
+    gerador = GeradorDados(escala, semente, referencia)
+    processos = processos or os.cpu_count() or 1
+    conn = get_db_connection()
+    # journal_mode fica gravado no arquivo: o modo original (WAL, por exemplo) volta ao final
+    journal_original = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    vazio = _banco_vazio(conn)
+    try:
+        if vazio:
+            # Banco novo: sem fsync e com journal em memória durante a carga (uma
+            # falha perde só o que foi gerado). Um banco com dados mantém a durabilidade
+            conn.execute('PRAGMA synchronous = OFF')
+            conn.execute('PRAGMA journal_mode = MEMORY')
+        conn.execute('PRAGMA cache_size = -262144')
+
+        if limpar:
+            _limpar_sinteticos(conn)
+            conn.commit()
+
+        if conn.execute('SELECT 1 FROM usuarios WHERE email LIKE ? LIMIT 1', (f'%@{DOMINIO_EMAIL}',)).fetchone():
+            raise ValueError("O banco já contém dados sintéticos; use limpar=True (--limpar) para recriá-los")
+
+        inseridos = {}
+        inseridos['usuarios'] = _inserir(
+            conn,
+            'INSERT INTO usuarios (nome, email, senha_hash, nivel_acesso, ativo, data_criacao) VALUES (?, ?, ?, ?, ?, ?)',
+            [list(gerador.usuarios(generate_password_hash(senha)))], tamanho_lote, progresso, 'usuarios'
+        )
+        versionar_usuarios(conn.cursor())
+        conn.commit()
+
+        ids_usuarios = [usuario_id for (usuario_id,) in conn.execute(
+            'SELECT id FROM usuarios WHERE email LIKE ? ORDER BY id', (f'%@{DOMINIO_EMAIL}',)
+        )]
+        atividade = gerador.pesos_atividade()
+        total_sessoes = escala.sessoes if ids_usuarios else 0
+
+        paralelo = processos > 1 and escala.tarefas + total_sessoes > BLOCO_GERACAO
+        executor = ProcessPoolExecutor(max_workers=processos) if paralelo else None
+        ultima_tarefa = conn.execute('SELECT COALESCE(MAX(id), 0) FROM tarefas').fetchone()[0]
+        try:
+            for tabela, total, sql in (
+                ('tarefas', escala.tarefas,
+                 'INSERT INTO tarefas (titulo, descricao, status, data_criacao, data_atualizacao, usuario_id) VALUES (?, ?, ?, ?, ?, ?)'),
+                ('sessoes', total_sessoes,
+                 'INSERT INTO sessoes (usuario_id, token, expires_at, ativo, data_criacao) VALUES (?, ?, ?, ?, ?)'),
+            ):
+                parametros = _blocos(tabela, total, escala, semente, referencia, ids_usuarios, atividade)
+                inseridos[tabela] = _inserir(conn, sql, _gerar_em_paralelo(executor, parametros, processos),
+                                             tamanho_lote, progresso, tabela)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if inseridos['tarefas']:
+            fim = conn.execute('SELECT MAX(id) FROM tarefas').fetchone()[0]
+            _registrar_faixa_tarefas(conn, ultima_tarefa + 1, fim)
+
+        # Tarefas inseridas em massa entram no log de alterações de uma vez
+        registrar_tarefas_existentes(conn.cursor())
+        conn.execute('ANALYZE')
+        conn.commit()
+    finally:
+        if vazio:
+            conn.rollback()
+            conn.execute(f'PRAGMA journal_mode = {journal_original}')
+        conn.close()
+
+    return inseridos
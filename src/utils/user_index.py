@@ -0,0 +1,231 @@
+"""
+Índice em memória para sugestão (autocomplete) de usuários
+Lista ordenada de chaves normalizadas (nome completo, cada palavra do nome
+e email) consultada por busca binária de prefixo. O índice é construído na
+inicialização e atualizado incrementalmente pelas notificações de
+alteração de usuários; alterações feitas por outros workers são
+percebidas pela versão 'usuarios' da tabela versoes_cache.
+"""
+
+import json
+import os
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import NamedTuple
+
+from config import Config
+
+
+class SugestaoUsuario(NamedTuple):
+    """Dados mantidos no índice para cada usuário"""
+    id: int
+    nome: str
+    email: str
+    nivel_acesso: str
+    ativo: bool
+
+
+def normalizar(texto):
+    """Remove acentos e diferenças de maiúsculas (``'Érica'`` -> ``'erica'``)"""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold().strip()
+
+
+def chaves_usuario(nome, email):
+    """Chaves indexadas de um usuário: nome completo, cada palavra do nome e email"""
+    nome_normalizado = ' '.join(normalizar(nome).split())
+    chaves = {nome_normalizado, normalizar(email)}
+    chaves.update(nome_normalizado.split())
+    chaves.discard('')
+    return chaves
+
+
+class IndiceUsuarios:
+    """
+    Índice de prefixos de nomes e emails
+
+    As escritas montam uma nova lista e trocam a referência (copy-on-write),
+    de modo que as buscas leem sem lock um estado sempre consistente.
+    """
+
+    def __init__(self, intervalo_verificacao: float = 5.0):
+        self.intervalo_verificacao = intervalo_verificacao
+        self.versao = None
+        self.construcoes = 0
+        self.atualizacoes = 0
+        # (entradas ordenadas [(chave, id)], {id: SugestaoUsuario}) trocados juntos
+        self._estado = ([], {})
+        self._proxima_verificacao = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._estado[1])
+
+    def apos_fork(self):
+        """
+        No processo filho: novo lock, mantendo o índice herdado
+
+        O índice montado antes do fork (gunicorn com preload) é
+        compartilhado por cópia na escrita; a versão é conferida na
+        primeira consulta, pois o processo pai pode estar desatualizado.
+        """
+        self._lock = threading.Lock()
+        self._proxima_verificacao = 0.0
+
+    @staticmethod
+    def _ler_usuarios(cursor, ids=None):
+        """Lê os campos indexados de todos os usuários ou de uma lista de IDs"""
+        sql = 'SELECT id, nome, email, nivel_acesso, ativo FROM usuarios'
+        parametros = ()
+        if ids is not None:
+            sql += ' WHERE id IN (SELECT value FROM json_each(?))'
+            parametros = (json.dumps(list(ids)),)
+        cursor.execute(sql, parametros)
+        return [SugestaoUsuario(i, n, e, nivel, bool(ativo)) for i, n, e, nivel, ativo in cursor.fetchall()]
+
+    def construir(self):
+        """Lê todos os usuários numa transação de leitura e substitui o índice"""
+        from src.models.usuario import get_db_connection
+        from src.models.usuario_lote import CHAVE_VERSAO_USUARIOS
+
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN')
+            cursor.execute('SELECT versao FROM versoes_cache WHERE chave = ?', (CHAVE_VERSAO_USUARIOS,))
+            linha = cursor.fetchone()
+            versao = linha[0] if linha else 0
+            usuarios = self._ler_usuarios(cursor)
+            conn.rollback()
+        finally:
+            conn.close()
+
+        entradas = sorted((chave, u.id) for u in usuarios for chave in chaves_usuario(u.nome, u.email))
+        with self._lock:
+            self._estado = (entradas, {u.id: u for u in usuarios})
+            self.versao = versao
+            self.construcoes += 1
+            self._proxima_verificacao = time.monotonic() + self.intervalo_verificacao
+
+    def verificar_versao(self):
+        """Reconstrói se a versão no banco mudou (no máximo uma consulta por intervalo)"""
+        agora = time.monotonic()
+        if agora < self._proxima_verificacao:
+            return
+        self._proxima_verificacao = agora + self.intervalo_verificacao
+
+        from src.models.nivel_acesso import obter_versao
+        from src.models.usuario_lote import CHAVE_VERSAO_USUARIOS
+
+        if obter_versao(CHAVE_VERSAO_USUARIOS) != self.versao:
+            self.construir()
+
+    def ao_alterar_usuarios(self, evento, ids, versao=None):
+        """
+        Ouvinte de alterações de usuários: atualiza apenas os IDs afetados
+
+        A atualização incremental só é aplicada quando a alteração é a
+        próxima versão esperada; caso contrário (outro worker escreveu no
+        meio, ou versão desconhecida) a próxima busca reconstrói o índice.
+        """
+        if self.versao is None or versao is None or versao != self.versao + 1:
+            self._proxima_verificacao = 0.0
+            return
+
+        from src.models.usuario import get_db_connection
+
+        conn = get_db_connection()
+        try:
+            usuarios = self._ler_usuarios(conn.cursor(), ids)
+        finally:
+            conn.close()
+
+        with self._lock:
+            if versao != self.versao + 1:
+                self._proxima_verificacao = 0.0
+                return
+
+            entradas = list(self._estado[0])
+            mapa = dict(self._estado[1])
+            for usuario_id in ids:
+                anterior = mapa.pop(usuario_id, None)
+                if anterior is not None:
+                    for chave in chaves_usuario(anterior.nome, anterior.email):
+                        posicao = bisect_left(entradas, (chave, usuario_id))
+                        if posicao < len(entradas) and entradas[posicao] == (chave, usuario_id):
+                            del entradas[posicao]
+            for usuario in usuarios:
+                mapa[usuario.id] = usuario
+                for chave in chaves_usuario(usuario.nome, usuario.email):
+                    insort(entradas, (chave, usuario.id))
+
+            self._estado = (entradas, mapa)
+            self.versao = versao
+            self.atualizacoes += 1
+
+    @staticmethod
+    def corresponde(termo, nome, email):
+        """Indica se um único usuário atende ao termo, sem consultar o índice"""
+        prefixo = ' '.join(normalizar(termo).split())
+        return bool(prefixo) and any(chave.startswith(prefixo) for chave in chaves_usuario(nome, email))
+
+    def buscar(self, termo, limite=10, filtro=None):
+        """
+        Usuários cujo nome (ou uma palavra dele) ou email começam com o termo
+
+        Args:
+            termo (str): Prefixo digitado
+            limite (int): Máximo de resultados
+            filtro (callable): Predicado ``filtro(SugestaoUsuario) -> bool``
+
+        Returns:
+            list: ``SugestaoUsuario`` em ordem alfabética da chave encontrada
+        """
+        prefixo = ' '.join(normalizar(termo).split())
+        if not prefixo or limite <= 0:
+            return []
+
+        entradas, usuarios = self._estado
+        resultado = []
+        vistos = set()
+
+        posicao = bisect_left(entradas, (prefixo,))
+        total = len(entradas)
+        while posicao < total:
+            chave, usuario_id = entradas[posicao]
+            if not chave.startswith(prefixo):
+                break
+            posicao += 1
+
+            if usuario_id in vistos:
+                continue
+            vistos.add(usuario_id)
+
+            usuario = usuarios.get(usuario_id)
+            if usuario is None or (filtro is not None and not filtro(usuario)):
+                continue
+            resultado.append(usuario)
+            if len(resultado) >= limite:
+                break
+
+        return resultado
+
+    def stats(self):
+        """Tamanho e contadores do índice"""
+        entradas, usuarios = self._estado
+        return {
+            'usuarios': len(usuarios),
+            'chaves': len(entradas),
+            'versao': self.versao,
+            'construcoes': self.construcoes,
+            'atualizacoes': self.atualizacoes
+        }
+
+
+# Instância compartilhada pelo processo
+indice_usuarios = IndiceUsuarios(Config.USER_INDEX_VERSION_CHECK_INTERVAL)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=indice_usuarios.apos_fork)
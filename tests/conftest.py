@@ -0,0 +1,72 @@
+"""
+Fixtures compartilhadas pelos testes
+
+Cada teste recebe um banco SQLite próprio em um diretório temporário,
+apontado por ``DATABASE_PATH`` (restaurado pelo ``monkeypatch`` ao final).
+"""
+import pytest
+from src.api.app import create_app
+from src.models.usuario import Usuario, init_auth_database
+
+
+def criar_usuario(nome, nivel_acesso='visualizacao', email=None):
+    """Cria um usuário com o nível informado"""
+    usuario = Usuario.criar(nome=nome, email=email or f"{nome.lower()}@teste.com", senha="senha123")
+    if nivel_acesso != 'visualizacao':
+        conn = Usuario.get_db_connection()
+        conn.execute('UPDATE usuarios SET nivel_acesso = ? WHERE id = ?', (nivel_acesso, usuario.id))
+        conn.commit()
+        conn.close()
+        usuario = usuario._replace(nivel_acesso=nivel_acesso)
+    return usuario
+
+
+def autorizacao(token):
+    """Cabeçalho de autorização de um token"""
+    return {'Authorization': f'Bearer {token}'}
+
+
+def criar_headers(nome, nivel_acesso='visualizacao'):
+    """Cria um usuário com o nível informado e retorna o cabeçalho de autorização"""
+    return autorizacao(criar_usuario(nome, nivel_acesso).gerar_jwt_token())
+
+
+@pytest.fixture
+def db_path(tmp_path_factory, monkeypatch):
+    """Caminho de um banco temporário (ainda sem tabelas) definido em DATABASE_PATH"""
+    # Diretório próprio: o tmp_path do teste fica livre para os arquivos que ele gerar
+    caminho = str(tmp_path_factory.mktemp('banco') / 'teste.db')
+    monkeypatch.setenv('DATABASE_PATH', caminho)
+    return caminho
+
+
+@pytest.fixture
+def temp_db(db_path):
+    """Banco temporário com as tabelas de autenticação"""
+    init_auth_database()
+    return db_path
+
+
+@pytest.fixture
+def app(db_path):
+    """Cria a aplicação com banco temporário"""
+    app, api = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def app_client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def token(app):
+    """Token válido de um usuário de visualização"""
+    return criar_usuario('Ana').gerar_jwt_token()
+
+
+@pytest.fixture
+def admin_headers(app):
+    """Headers de um usuário administrativo"""
+    return criar_headers('Admin', 'administrativo')
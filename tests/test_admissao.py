@@ -0,0 +1,172 @@
+"""
+Testes do controle de admissão e descarte de carga
+"""
+import pytest
+import json
+import asyncio
+import threading
+from config import Config
+from src.api.app import create_app
+from src.api.asgi import criar_app_asgi
+from src.utils.admissao import ClasseAdmissao
+from tests.conftest import autorizacao
+
+
+@pytest.fixture
+def app(db_path, monkeypatch):
+    """Cria a aplicação com banco temporário e filas sem espera"""
+    monkeypatch.setattr(Config, 'ADMISSION_QUEUE_TIMEOUT', 0.05)
+    monkeypatch.setattr(Config, 'ADMISSION_RETRY_AFTER', 2)
+
+    app, api = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def headers(token):
+    return autorizacao(token)
+
+
+def lotar(classe):
+    """Ocupa todas as vagas e a fila de uma classe"""
+    for _ in range(classe.max_concorrentes):
+        assert classe.entrar()
+    classe.max_fila = 0
+
+
+class TestClasseAdmissao:
+    """Vagas, fila limitada e repasse da vaga"""
+
+    def test_fila_cheia_rejeita_na_hora(self):
+        classe = ClasseAdmissao('teste', 1, 0, espera_max=5)
+        assert classe.entrar() is True
+
+        assert classe.entrar() is False
+        assert classe.stats()['rejeitadas_fila_cheia'] == 1
+
+    def test_espera_esgotada(self):
+        classe = ClasseAdmissao('teste', 1, 1, espera_max=0.05)
+        classe.entrar()
+
+        assert classe.entrar() is False
+        assert classe.stats()['rejeitadas_tempo_esgotado'] == 1
+        assert classe.stats()['na_fila'] == 0
+
+    def test_vaga_repassada_a_quem_espera(self):
+        """Ao liberar, a vaga vai para a fila; o total ativo não cai"""
+        classe = ClasseAdmissao('teste', 1, 1, espera_max=5)
+        classe.entrar()
+        resultado = []
+        thread = threading.Thread(target=lambda: resultado.append(classe.entrar()))
+        thread.start()
+        while not classe.stats()['na_fila']:
+            threading.Event().wait(0.01)
+
+        classe.liberar()
+        thread.join(2)
+
+        assert resultado == [True]
+        assert classe.stats()['ativas'] == 1
+        classe.liberar()
+        assert classe.stats()['ativas'] == 0
+
+    def test_espera_assincrona(self):
+        """A corrotina na fila recebe a vaga liberada por outra thread"""
+        classe = ClasseAdmissao('teste', 1, 1, espera_max=5)
+        classe.entrar()
+
+        async def executar():
+            threading.Timer(0.05, classe.liberar).start()
+            return await classe.entrar_assincrono()
+
+        assert asyncio.run(executar()) is True
+        assert classe.stats()['admitidas'] == 2
+
+
+class TestRotas:
+    """503 com Retry-After nas rotas caras; rotas baratas sempre atendidas"""
+
+    def test_listagem_lotada_retorna_503(self, app, headers):
+        lotar(app.extensions['admissao'].classes['listagem'])
+        cliente = app.test_client()
+
+        resposta = cliente.get('/tarefas/', headers=headers)
+
+        assert resposta.status_code == 503
+        assert resposta.headers['Retry-After'] == '2'
+        assert resposta.get_json()['retry_after'] == 2
+        # Outras classes e rotas sem classe não são afetadas
+        assert cliente.get('/health').get_json() == {'status': 'ok'}
+        assert cliente.get('/auth/me', headers=headers).status_code == 200
+        assert cliente.get('/tarefas/export', headers=headers).status_code == 200
+
+    def test_vaga_devolvida_apos_resposta(self, app, headers):
+        cliente = app.test_client()
+        for _ in range(Config.ADMISSION_LIST_CONCURRENCY + 1):
+            assert cliente.get('/tarefas/', headers=headers).status_code == 200
+
+        assert app.extensions['admissao'].classes['listagem'].stats()['ativas'] == 0
+
+    def test_exportacao_mantem_vaga_ate_o_fim_do_stream(self, app, headers):
+        exportacao = app.extensions['admissao'].classes['exportacao']
+
+        resposta = app.test_client().get('/tarefas/export', headers=headers)
+        assert exportacao.stats()['ativas'] == 1
+        resposta.close()
+
+        assert exportacao.stats()['ativas'] == 0
+
+    def test_metricas(self, app):
+        lotar(app.extensions['admissao'].classes['login'])
+        cliente = app.test_client()
+        cliente.post('/auth/login', json={'email': 'x@teste.com', 'senha': 'senha123'})
+
+        texto = cliente.get('/metrics').get_data(as_text=True)
+
+        assert 'admission_rejected_total{classe="login",motivo="fila_cheia"} 1' in texto
+        assert 'admission_queue_depth{classe="login"} 0' in texto
+
+
+class TestASGI:
+    """Admissão no event loop do servidor ASGI"""
+
+    def chamar(self, app_asgi, caminho, headers=()):
+        scope = {'type': 'http', 'method': 'GET', 'path': caminho, 'query_string': b'', 'headers': list(headers)}
+        enviados = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(mensagem):
+            enviados.append(mensagem)
+
+        asyncio.run(app_asgi(scope, receive, send))
+        return enviados
+
+    def test_rejeicao_e_saude(self, app, headers):
+        app_asgi = criar_app_asgi(app)
+        lotar(app.extensions['admissao'].classes['listagem'])
+        autorizacao = [(b'authorization', headers['Authorization'].encode())]
+
+        inicio, corpo = self.chamar(app_asgi, '/tarefas/', autorizacao)
+        saude = self.chamar(app_asgi, '/health')
+        app_asgi.executor_wsgi.encerrar()
+        app_asgi.executor_banco.encerrar()
+
+        assert inicio['status'] == 503
+        assert (b'retry-after', b'2') in inicio['headers']
+        assert json.loads(corpo['body'])['retry_after'] == 2
+        assert json.loads(saude[1]['body']) == {'status': 'ok'}
+
+    def test_vaga_devolvida(self, app, headers):
+        app_asgi = criar_app_asgi(app)
+        autorizacao = [(b'authorization', headers['Authorization'].encode())]
+
+        enviados = self.chamar(app_asgi, '/tarefas/', autorizacao)
+        app_asgi.executor_wsgi.encerrar()
+        app_asgi.executor_banco.encerrar()
+
+        assert enviados[0]['status'] == 200
+        listagem = app.extensions['admissao'].classes['listagem'].stats()
+        assert listagem['ativas'] == 0 and listagem['admitidas'] == 1
@@ -0,0 +1,158 @@
+"""
+Testes do servidor ASGI (rotas assíncronas e adaptador WSGI)
+"""
+import pytest
+import json
+import asyncio
+import threading
+from src.api.asgi import criar_app_asgi, montar_environ
+from src.models.usuario import Usuario
+from src.utils.assincrono import ExecutorLimitado
+from tests.conftest import autorizacao
+
+
+@pytest.fixture
+def app(app):
+    """Aplicação ASGI sobre a aplicação Flask com banco temporário"""
+    app = criar_app_asgi(app)
+
+    yield app
+
+    app.executor_wsgi.encerrar()
+    app.executor_banco.encerrar()
+
+
+def inserir_tarefas(quantidade):
+    conn = Usuario.get_db_connection()
+    conn.executemany(
+        'INSERT INTO tarefas (titulo, descricao, data_criacao, data_atualizacao) VALUES (?, ?, ?, ?)',
+        [(f'Tarefa {numero}', 'com, vírgula', '2024-01-01', '2024-01-01') for numero in range(quantidade)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def chamar(app, metodo, caminho, query='', headers=None, corpo=b''):
+    """Executa uma requisição HTTP na aplicação ASGI e retorna (status, headers, corpo)"""
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': metodo, 'scheme': 'http',
+        'path': caminho, 'root_path': '', 'query_string': query.encode(),
+        'headers': [(nome.lower().encode(), valor.encode()) for nome, valor in (headers or {}).items()],
+        'client': ('127.0.0.1', 5000), 'server': ('testserver', 80),
+    }
+    entrada = [{'type': 'http.request', 'body': corpo, 'more_body': False}]
+    enviadas = []
+
+    async def receive():
+        if entrada:
+            return entrada.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(mensagem):
+        enviadas.append(mensagem)
+
+    asyncio.run(app(scope, receive, send))
+    cabecalhos = {nome.decode(): valor.decode() for nome, valor in enviadas[0]['headers']}
+    return enviadas[0]['status'], cabecalhos, b''.join(mensagem.get('body', b'') for mensagem in enviadas[1:])
+
+
+class TestAdaptadorWSGI:
+    """Rotas Flask atendidas pelo servidor ASGI"""
+
+    def test_environ(self):
+        """Headers repetidos são unidos; Content-Length vem do corpo lido"""
+        scope = {
+            'method': 'POST', 'path': '/tarefas/', 'query_string': b'a=1',
+            'headers': [(b'content-type', b'application/json'), (b'x-valor', b'1'), (b'x-valor', b'2')],
+        }
+        environ = montar_environ(scope, b'{}')
+
+        assert environ['CONTENT_TYPE'] == 'application/json'
+        assert environ['HTTP_X_VALOR'] == '1,2'
+        assert environ['CONTENT_LENGTH'] == '2'
+        assert environ['QUERY_STRING'] == 'a=1'
+        assert environ['wsgi.input'].read() == b'{}'
+
+    def test_rotas_flask(self, app, token):
+        """Corpo, headers e autorização chegam à aplicação Flask"""
+        status, _, corpo = chamar(app, 'POST', '/auth/login', headers={'Content-Type': 'application/json'},
+                                  corpo=json.dumps({'email': 'ana@teste.com', 'senha': 'senha123'}).encode())
+        assert status == 200
+        assert 'token' in json.loads(corpo)
+
+        status, cabecalhos, corpo = chamar(app, 'GET', '/tarefas/', headers=autorizacao(token))
+        assert status == 200
+        assert cabecalhos['content-type'] == 'application/json'
+        assert json.loads(corpo)['total'] == 0
+
+    def test_corpo_muito_grande(self, app):
+        """Corpos acima do limite são recusados antes do Flask"""
+        app.max_corpo = 10
+        status, _, _ = chamar(app, 'POST', '/auth/login', corpo=b'x' * 11)
+
+        assert status == 413
+
+
+class TestRotasAssincronas:
+    """Exportação atendida por corrotina"""
+
+    def test_exportacao_ndjson(self, app, token, monkeypatch):
+        """Todas as tarefas saem em ordem de id, lidas em vários lotes"""
+        monkeypatch.setattr('src.routes.assincronas.TAMANHO_LOTE', 3)
+        inserir_tarefas(7)
+
+        status, cabecalhos, corpo = chamar(app, 'GET', '/tarefas/export', headers=autorizacao(token))
+
+        assert status == 200
+        assert cabecalhos['content-type'] == 'application/x-ndjson'
+        linhas = [json.loads(linha) for linha in corpo.decode().splitlines()]
+        assert [linha['titulo'] for linha in linhas] == [f'Tarefa {numero}' for numero in range(7)]
+        assert app.executor_banco.concluidas >= 4
+
+    def test_exportacao_csv_igual_ao_flask(self, app, token):
+        """A corrotina produz os mesmos bytes que a rota Flask"""
+        inserir_tarefas(4)
+        _, cabecalhos, corpo = chamar(app, 'GET', '/tarefas/export', query='formato=csv', headers=autorizacao(token))
+        resposta = app.app_flask.test_client().get('/tarefas/export?formato=csv', headers=autorizacao(token))
+
+        assert cabecalhos['content-type'] == 'text/csv; charset=utf-8'
+        assert corpo == resposta.data
+        assert corpo.decode().splitlines()[1].endswith('"com, vírgula",pendente,2024-01-01,2024-01-01')
+
+    def test_erros_de_autenticacao(self, app, token):
+        """Mesmas respostas dos decoradores das rotas Flask"""
+        status, _, corpo = chamar(app, 'GET', '/tarefas/export')
+        assert status == 401
+        assert json.loads(corpo)['message'] == 'Token de autorização necessário'
+
+        status, _, _ = chamar(app, 'GET', '/tarefas/export', headers=autorizacao('invalido'))
+        assert status == 401
+
+        status, _, corpo = chamar(app, 'GET', '/tarefas/export', query='formato=xml', headers=autorizacao(token))
+        assert status == 400
+
+
+class TestExecutorLimitado:
+    """Pool de threads limitado"""
+
+    def test_chamadas_acima_do_limite_aguardam(self):
+        """Com 1 thread e fila 1, a terceira chamada espera no event loop"""
+        executor = ExecutorLimitado('teste', max_threads=1, max_fila=1)
+        liberar = threading.Event()
+
+        async def executar():
+            tarefas = [asyncio.ensure_future(executor.executar(liberar.wait, 5)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            estado = executor.stats()
+            liberar.set()
+            await asyncio.gather(*tarefas)
+            return estado
+
+        estado = asyncio.run(executar())
+        executor.encerrar()
+
+        assert estado['em_execucao'] == 2
+        assert estado['aguardando'] == 1
+        assert executor.stats()['concluidas'] == 3
+        rotulo = (('executor', 'teste'),)
+        assert ('counter', 'executor_tasks_total', rotulo, 3) in executor.coletor()()
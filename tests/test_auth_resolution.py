@@ -0,0 +1,91 @@
+"""
+Testes da resolução única de autenticação por requisição
+Conta as idas ao banco feitas por cada endpoint autenticado
+"""
+import pytest
+import sqlite3
+
+
+class ContadorSQL:
+    """Conta conexões e comandos SQL executados durante uma requisição"""
+
+    def __init__(self):
+        self.conexoes = 0
+        self.comandos = []
+
+    def zerar(self):
+        self.conexoes = 0
+        self.comandos = []
+
+    @property
+    def consultas(self):
+        """Comandos de dados (ignora BEGIN/COMMIT implícitos)"""
+        return [c for c in self.comandos if c.lstrip().split()[0].upper() in ('SELECT', 'INSERT', 'UPDATE', 'DELETE')]
+
+
+@pytest.fixture
+def contador(monkeypatch):
+    """Instrumenta sqlite3.connect para contar as idas ao banco"""
+    contador = ContadorSQL()
+    connect_original = sqlite3.connect
+
+    def connect_contado(*args, **kwargs):
+        conn = connect_original(*args, **kwargs)
+        contador.conexoes += 1
+        conn.set_trace_callback(contador.comandos.append)
+        return conn
+
+    monkeypatch.setattr(sqlite3, 'connect', connect_contado)
+    return contador
+
+
+class TestResolucaoAutenticacao:
+    """Cada endpoint deve verificar o token no máximo uma vez"""
+
+    def test_me_uma_consulta(self, app_client, token, contador):
+        """GET /auth/me deve fazer apenas a consulta da sessão"""
+        resposta = app_client.get('/auth/me', headers={'Authorization': f'Bearer {token}'})
+        
+        assert resposta.status_code == 200
+        assert len(contador.consultas) == 1
+        assert contador.conexoes == 1
+
+    def test_setup_2fa_uma_consulta(self, app_client, token, contador):
+        """GET /auth/setup-2fa deve fazer apenas a consulta da sessão"""
+        resposta = app_client.get('/auth/setup-2fa', headers={'Authorization': f'Bearer {token}'})
+        
+        assert resposta.status_code == 200
+        assert len(contador.consultas) == 1
+
+    def test_verify_2fa_uma_consulta(self, app_client, token, contador):
+        """POST /auth/verify-2fa deve verificar o token uma única vez"""
+        resposta = app_client.post('/auth/verify-2fa', json={'codigo': '000000'},
+                                   headers={'Authorization': f'Bearer {token}'})
+        
+        assert resposta.status_code == 401
+        assert len(contador.consultas) == 1
+
+    def test_logout_consulta_e_atualizacao(self, app_client, token, contador):
+        """POST /auth/logout deve fazer a consulta da sessão e o UPDATE"""
+        resposta = app_client.post('/auth/logout', headers={'Authorization': f'Bearer {token}'})
+        
+        assert resposta.status_code == 200
+        assert len(contador.consultas) == 2
+        
+        contador.zerar()
+        resposta = app_client.get('/auth/me', headers={'Authorization': f'Bearer {token}'})
+        assert resposta.status_code == 401
+
+    def test_rota_protegida_de_tarefas(self, app_client, token, contador):
+        """GET /tarefas/ deve consultar a sessão uma vez mais a listagem"""
+        resposta = app_client.get('/tarefas/', headers={'Authorization': f'Bearer {token}'})
+        
+        assert resposta.status_code == 200
+        assert len(contador.consultas) == 2
+
+    def test_sem_token_nao_consulta(self, app_client, contador):
+        """Sem header Authorization não deve haver ida ao banco"""
+        resposta = app_client.get('/auth/me')
+        
+        assert resposta.status_code == 401
+        assert contador.conexoes == 0
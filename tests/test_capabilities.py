@@ -0,0 +1,71 @@
+"""
+Testes da matriz de permissões das rotas e de /auth/me/capabilities
+"""
+import pytest
+from src.utils.route_matrix import RegraRota, MatrizPermissoes
+from tests.conftest import criar_headers
+
+
+class TestMatrizRotas:
+    """Matriz montada a partir dos decorators"""
+
+    def test_regras_extraidas_dos_decorators(self, app):
+        """Permissões e níveis mínimos devem vir dos decorators das rotas"""
+        regras = {regra.chave: regra for regra in app.extensions['matriz_permissoes'].regras}
+
+        assert regras['DELETE /tarefas/<int:id>'].permissao == 'tarefas:delete'
+        assert regras['GET /usuarios/'].nivel_minimo == 'gerencial'
+        assert regras['PUT /usuarios/<int:id>/nivel'].nivel_minimo == 'administrativo'
+        assert regras['GET /auth/me'].autenticacao is True
+        # Rotas públicas ficam fora da matriz
+        assert 'POST /auth/login' not in regras
+
+    def test_capacidades_em_cache_por_nivel(self):
+        """O mesmo nível reutiliza o corpo e o ETag calculados"""
+        matriz = MatrizPermissoes([
+            RegraRota('/tarefas/', 'GET', 'listar', True, 'tarefas:list', None),
+            RegraRota('/usuarios/', 'GET', 'usuarios', True, None, 'gerencial'),
+        ])
+
+        corpo, etag = matriz.capacidades('visualizacao')
+        assert matriz.capacidades('visualizacao') == (corpo, etag)
+        assert matriz.capacidades('gerencial')[1] != etag
+
+
+class TestEndpointCapacidades:
+    """GET /auth/me/capabilities"""
+
+    def test_rotas_permitidas_por_nivel(self, app):
+        """Cada nível recebe exatamente as rotas que pode chamar"""
+        cliente = app.test_client()
+
+        visualizacao = cliente.get('/auth/me/capabilities',
+                                   headers=criar_headers('ver')).get_json()
+        gerencial = cliente.get('/auth/me/capabilities',
+                                headers=criar_headers('ger', 'gerencial')).get_json()
+
+        assert visualizacao['rotas']['GET /tarefas/'] is True
+        assert visualizacao['rotas']['POST /tarefas/'] is False
+        assert visualizacao['rotas']['GET /usuarios/'] is False
+        assert gerencial['rotas']['POST /tarefas/'] is True
+        assert gerencial['rotas']['GET /usuarios/'] is True
+        assert gerencial['rotas']['PUT /usuarios/<int:id>/nivel'] is False
+        assert 'tarefas:update' in gerencial['permissoes']
+
+    def test_revalidacao_com_etag(self, app):
+        """If-None-Match com o ETag atual deve responder 304"""
+        cliente = app.test_client()
+        headers = criar_headers('etag')
+
+        resposta = cliente.get('/auth/me/capabilities', headers=headers)
+        assert resposta.status_code == 200
+        assert 'private' in resposta.headers['Cache-Control']
+
+        revalidacao = cliente.get('/auth/me/capabilities',
+                                  headers={**headers, 'If-None-Match': resposta.headers['ETag']})
+        assert revalidacao.status_code == 304
+
+    def test_sem_token(self, app):
+        """Sem token deve responder 401"""
+        resposta = app.test_client().get('/auth/me/capabilities')
+        assert resposta.status_code == 401
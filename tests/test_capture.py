@@ -0,0 +1,128 @@
+"""
+Testes da captura de tráfego para reprodução
+"""
+import pytest
+import os
+import gzip
+import threading
+from src.models.usuario import Usuario
+from src.utils.capture import (
+    GravadorCaptura, caminho_registro, ler_registros, registrar_captura, sanitizar_query
+)
+
+
+class TestSanitizacao:
+    """Registros sem dados sensíveis e reconstrução do caminho"""
+
+    def test_query_redige_parametros_sensiveis(self):
+        """Valores de senhas, tokens e códigos nunca são gravados"""
+        query = sanitizar_query('q=ana&access_token=abc&codigo_2fa=123456&limite=5')
+        assert query == 'q=ana&access_token=***&codigo_2fa=***&limite=5'
+        assert sanitizar_query('') == ''
+
+    def test_busca_de_usuarios_redigida(self):
+        """O termo buscado em /usuarios/ e /usuarios/suggest (nome ou email) não é gravado"""
+        assert sanitizar_query('q=ana.silva&limite=5', '/usuarios/') == 'q=***&limite=5'
+        assert sanitizar_query('q=ana', '/usuarios/suggest') == 'q=***'
+        assert sanitizar_query('q=relatorio', '/tarefas/') == 'q=relatorio'
+
+    def test_caminho_a_partir_da_rota(self):
+        """Argumentos da rota e query string recompõem o caminho original"""
+        registro = {'r': '/usuarios/<int:id>/nivel', 'a': {'id': 7}, 'q': 'x=1'}
+        assert caminho_registro(registro) == '/usuarios/7/nivel?x=1'
+        assert caminho_registro({'r': '/tarefas/'}) == '/tarefas/'
+
+
+class TestGravadorCaptura:
+    """Gravação em buffer, rotação compactada e leitura"""
+
+    def test_rotacao_compacta_e_limita_arquivos(self, tmp_path):
+        """Arquivos cheios viram .jsonl.gz e só os mais recentes ficam"""
+        gravador = GravadorCaptura(str(tmp_path), max_bytes=200, max_arquivos=2, intervalo_escrita=0)
+        for numero in range(40):
+            gravador.gravar({'t': float(numero), 'm': 'GET', 'r': '/tarefas/', 's': 200, 'd': 1.0})
+        gravador.descarregar()
+
+        compactados = [nome for nome in os.listdir(tmp_path) if nome.endswith('.jsonl.gz')]
+        assert gravador.rotacoes > 2
+        assert len(compactados) == 2
+
+        registros = ler_registros([str(tmp_path)])
+        instantes = [registro['t'] for registro in registros]
+        assert instantes == sorted(instantes)
+        assert instantes[-1] == 39.0
+
+    def test_rotacao_nao_compacta_na_requisicao(self, tmp_path, monkeypatch):
+        """A gravação que enche o arquivo só o renomeia; a compactação roda em outra thread"""
+        compactando = threading.Event()
+        liberar = threading.Event()
+        compactar = GravadorCaptura._compactar
+
+        def compactar_lento(gravador, origem):
+            compactando.set()
+            liberar.wait(2)
+            compactar(gravador, origem)
+
+        monkeypatch.setattr(GravadorCaptura, '_compactar', compactar_lento)
+        gravador = GravadorCaptura(str(tmp_path), max_bytes=100, intervalo_escrita=0)
+
+        gravador.gravar({'t': 1.0, 'm': 'GET', 'r': '/tarefas/', 'x': 'a' * 100})
+        assert compactando.wait(2)
+        assert gravador.stats()['compactacoes_pendentes'] == 1
+        # O arquivo renomeado continua legível enquanto aguarda a compactação
+        assert len(ler_registros([str(tmp_path)])) == 1
+
+        liberar.set()
+        gravador.descarregar()
+        assert [nome for nome in os.listdir(tmp_path) if nome.startswith('captura-')][0].endswith('.jsonl.gz')
+        assert len(ler_registros([str(tmp_path)])) == 1
+
+    def test_linhas_incompletas_ignoradas(self, tmp_path):
+        """Uma linha cortada no fim do arquivo não impede a leitura"""
+        caminho = tmp_path / 'captura-1-1.jsonl.gz'
+        with gzip.open(caminho, 'wt', encoding='utf-8') as saida:
+            saida.write('{"t":1,"m":"GET","r":"/tarefas/"}\n{"t":2,"m":"GE')
+
+        assert len(ler_registros([str(caminho)])) == 1
+
+
+class TestMiddlewareCaptura:
+    """Registros produzidos pelas requisições"""
+
+    def test_registro_da_requisicao(self, app, tmp_path):
+        """Rota em template, argumentos, tamanhos e nível de acesso, sem o token"""
+        gravador = registrar_captura(app, GravadorCaptura(str(tmp_path), intervalo_escrita=0))
+        usuario = Usuario.criar(nome='Ana', email='ana@teste.com', senha='senha123')
+        token = usuario.gerar_jwt_token()
+        conn = Usuario.get_db_connection()
+        tarefa_id = conn.execute(
+            "INSERT INTO tarefas (titulo, data_criacao, data_atualizacao) VALUES ('T', '2024-01-01', '2024-01-01')"
+        ).lastrowid
+        conn.commit()
+        conn.close()
+        cliente = app.test_client()
+
+        cliente.get(f'/tarefas/{tarefa_id}?token=segredo', headers={'Authorization': f'Bearer {token}'})
+        cliente.get('/metrics')
+        cliente.get('/inexistente')
+        gravador.descarregar()
+
+        [registro] = ler_registros([str(tmp_path)])
+        assert registro['m'] == 'GET'
+        assert registro['r'] == '/tarefas/<int:id>'
+        assert registro['a'] == {'id': tarefa_id}
+        assert registro['q'] == 'token=***'
+        assert registro['s'] == 200
+        assert registro['o'] > 0
+        assert registro['p'] == 'visualizacao'
+        assert registro['d'] >= 0
+        conteudo = ''.join(open(os.path.join(tmp_path, nome)).read() for nome in os.listdir(tmp_path))
+        assert token not in conteudo and 'segredo' not in conteudo
+
+    def test_amostragem(self, app, tmp_path):
+        """Com taxa zero nada é capturado"""
+        gravador = registrar_captura(app, GravadorCaptura(str(tmp_path), intervalo_escrita=0), 0.0)
+        app.test_client().get('/tarefas/')
+        gravador.descarregar()
+
+        assert ler_registros([str(tmp_path)]) == []
@@ -0,0 +1,76 @@
+"""
+Testes da criação única do esquema e da partida da aplicação
+"""
+import pytest
+import os
+import sys
+import sqlite3
+import subprocess
+from flask import Flask
+from flask_restx import Api
+from src.models.esquema import VERSAO_ESQUEMA, garantir_esquema
+from src.models.tarefa import init_database
+from src.models.usuario import create_auth_models, init_auth_database
+
+
+def tabelas(db_path):
+    conn = sqlite3.connect(db_path)
+    nomes = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    return nomes
+
+
+class TestEsquema:
+    """DDL executado uma vez por versão"""
+
+    def test_cria_tabelas_e_grava_versao(self, db_path):
+        """Banco novo recebe todas as tabelas e a versão atual"""
+        assert garantir_esquema() is True
+
+        assert {'tarefas', 'usuarios', 'sessoes', 'niveis_acesso', 'versoes_cache'} <= tabelas(db_path)
+        conn = sqlite3.connect(db_path)
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == VERSAO_ESQUEMA
+        assert conn.execute('SELECT COUNT(*) FROM niveis_acesso').fetchone()[0] > 0
+        conn.close()
+
+    def test_segunda_partida_pula_ddl(self, db_path):
+        """Com a versão já gravada nenhum DDL é executado"""
+        garantir_esquema()
+        conn = sqlite3.connect(db_path)
+        conn.execute('DROP TABLE versoes_cache')
+        conn.commit()
+        conn.close()
+
+        assert garantir_esquema() is False
+        assert 'versoes_cache' not in tabelas(db_path)
+
+    def test_banco_anterior_ao_controle_de_versao(self, db_path):
+        """Bancos criados pelas funções antigas são completados e versionados"""
+        init_database()
+        init_auth_database()
+
+        assert garantir_esquema() is True
+        assert garantir_esquema() is False
+
+
+class TestPartida:
+    """Modelos compartilhados e dependências carregadas sob demanda"""
+
+    def test_modelos_de_autenticacao_criados_uma_vez(self):
+        """A segunda chamada reaproveita os modelos já registrados na Api"""
+        api = Api(Flask(__name__))
+
+        assert all(a is b for a, b in zip(create_auth_models(api), create_auth_models(api)))
+
+    def test_create_app_nao_importa_dependencias_pesadas(self, db_path):
+        """pyotp, jwt e qrcode só são importados quando usados"""
+        script = (
+            'import sys\n'
+            'from src.api.app import create_app\n'
+            'create_app()\n'
+            "print(','.join(m for m in ('pyotp', 'jwt', 'qrcode', 'PIL') if m in sys.modules))\n"
+        )
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        saida = subprocess.run([sys.executable, '-c', script], cwd=raiz, capture_output=True, text=True, check=True)
+
+        assert saida.stdout.strip() == ''
@@ -0,0 +1,106 @@
+"""
+Testes da inspeção de memória com tracemalloc
+"""
+import pytest
+from src.utils.memory import InspetorMemoria, OperacaoEmAndamento, inspetor_memoria
+from tests.conftest import criar_headers
+
+
+@pytest.fixture
+def app(app):
+    """Aplicação com o inspetor de memória sempre desligado ao final"""
+    yield app
+    inspetor_memoria.parar()
+
+
+@pytest.fixture
+def inspetor():
+    """Inspetor isolado, sempre desligado ao final"""
+    inspetor = InspetorMemoria(max_snapshots=2, max_quadros=5, duracao_maxima=60)
+    yield inspetor
+    inspetor.parar()
+
+
+class TestInspetorMemoria:
+    """Controle do tracemalloc e comparação de snapshots"""
+
+    def test_captura_exige_rastreamento(self, inspetor):
+        """Sem tracemalloc ligado não há snapshot"""
+        with pytest.raises(RuntimeError):
+            inspetor.capturar()
+
+    def test_diferenca_aponta_linha_que_alocou(self, inspetor):
+        """A comparação mostra a linha responsável pelo crescimento"""
+        assert inspetor.iniciar(quadros=100) is True
+        assert inspetor.iniciar() is False
+
+        anterior = inspetor.capturar()['id']
+        retidos = [bytearray(1024) for _ in range(2000)]
+        posterior = inspetor.capturar()['id']
+
+        diferencas = inspetor.comparar(anterior, posterior, top=5)
+        assert any(
+            'test_memory.py' in d['local'][0] and d['diferenca_bytes'] >= 2000 * 1024
+            for d in diferencas
+        )
+        assert len(retidos) == 2000
+
+    def test_limites_de_seguranca(self, inspetor):
+        """Quadros limitados, poucos snapshots e uma operação pesada por vez"""
+        inspetor.iniciar(quadros=100)
+        assert inspetor.estado()['quadros'] == 5
+
+        ids = [inspetor.capturar()['id'] for _ in range(3)]
+        assert [s['id'] for s in inspetor.estado()['snapshots']] == ids[1:]
+        with pytest.raises(KeyError):
+            inspetor.estatisticas(ids[0])
+
+        inspetor._operacao.acquire()
+        try:
+            with pytest.raises(OperacaoEmAndamento):
+                inspetor.capturar()
+        finally:
+            inspetor._operacao.release()
+
+    def test_componentes_registrados(self, inspetor):
+        """Os stats() dos caches entram no relatório, mesmo se um deles falhar"""
+        inspetor.registrar_componente('cache', lambda: {'itens': 3})
+        inspetor.registrar_componente('quebrado', lambda: 1 / 0)
+
+        componentes = inspetor.estado()['componentes']
+        assert componentes['cache'] == {'itens': 3}
+        assert 'erro' in componentes['quebrado']
+
+
+class TestRotasMemoria:
+    """Rotas /admin/memory"""
+
+    def test_fluxo_completo(self, app):
+        """Ligar, capturar dois snapshots, comparar e desligar"""
+        client = app.test_client()
+        headers = criar_headers('admin', 'administrativo')
+
+        assert client.post('/admin/memory/start?quadros=3', headers=headers).get_json()['rastreando'] is True
+        primeiro = client.post('/admin/memory/snapshots', headers=headers).get_json()['id']
+        segundo = client.post('/admin/memory/snapshots', headers=headers).get_json()['id']
+
+        resposta = client.get(f'/admin/memory/diff?de={primeiro}&para={segundo}&top=3', headers=headers)
+        assert resposta.status_code == 200
+        assert len(resposta.get_json()['diferencas']) <= 3
+
+        estatisticas = client.get(f'/admin/memory/snapshots/{segundo}?agrupar=filename', headers=headers)
+        assert estatisticas.status_code == 200
+        assert client.get(f'/admin/memory/snapshots/{segundo}?agrupar=x', headers=headers).status_code == 400
+
+        assert client.post('/admin/memory/stop', headers=headers).get_json()['parado'] is True
+        estado = client.get('/admin/memory', headers=headers).get_json()
+        assert estado['rastreando'] is False
+        assert {'qr_code', 'capacidades', 'indice_usuarios', 'permissoes'} <= set(estado['componentes'])
+
+    def test_somente_administradores(self, app):
+        """Usuários sem system:admin recebem 403"""
+        client = app.test_client()
+        headers = criar_headers('leitor', 'visualizacao')
+
+        assert client.get('/admin/memory', headers=headers).status_code == 403
+        assert client.post('/admin/memory/start', headers=headers).status_code == 403
@@ -0,0 +1,135 @@
+"""
+Testes das métricas Prometheus
+"""
+import pytest
+import json
+import sqlite3
+from src.utils.metrics import (
+    Metricas, ConexaoMedida, iniciar_medicao_banco, encerrar_medicao_banco, metricas
+)
+from tests.conftest import criar_headers
+
+
+@pytest.fixture
+def app_client(app):
+    """Cliente da aplicação com métricas zeradas"""
+    metricas.reiniciar()
+    return app.test_client()
+
+
+class TestMetricas:
+    """Registro, agregação e formato de exposição"""
+
+    def test_histograma_exportado(self):
+        """Buckets acumulados, +Inf, soma e contagem"""
+        registro = Metricas()
+        for valor in (0.003, 0.02, 20.0):
+            registro.observar('http_request_duration_seconds', (('rota', '/x'),), valor)
+
+        texto = Metricas.exportar([registro.snapshot()])
+
+        assert '# TYPE http_request_duration_seconds histogram' in texto
+        assert 'http_request_duration_seconds_bucket{rota="/x",le="0.005"} 1' in texto
+        assert 'http_request_duration_seconds_bucket{rota="/x",le="0.025"} 2' in texto
+        assert 'http_request_duration_seconds_bucket{rota="/x",le="+Inf"} 3' in texto
+        assert 'http_request_duration_seconds_count{rota="/x"} 3' in texto
+
+    def test_agregacao_entre_processos(self, tmp_path):
+        """Contadores somam todos os processos; gauges de processos mortos são descartados"""
+        worker = Metricas()
+        worker.incrementar('db_queries_total', (('rota', '/x'),), 5)
+        worker.ajustar_gauge('http_requests_in_flight', (('rota', '/x'),), 2)
+        morto = worker.snapshot()
+        morto['pid'] = 2 ** 22 + 12345
+
+        atual = Metricas()
+        atual.incrementar('db_queries_total', (('rota', '/x'),), 1)
+        atual.ajustar_gauge('http_requests_in_flight', (('rota', '/x'),), 1)
+
+        (tmp_path / f"metricas-{morto['pid']}.json").write_text(json.dumps(morto))
+        texto = Metricas.exportar(atual.snapshots(str(tmp_path)))
+
+        assert 'db_queries_total{rota="/x"} 6' in texto
+        assert 'http_requests_in_flight{rota="/x"} 1' in texto
+
+    def test_worker_encerrado_incorporado(self, tmp_path):
+        """Ao sair, os totais vão para o arquivo dos encerrados e o arquivo do worker some"""
+        for _ in range(3):
+            worker = Metricas()
+            worker.incrementar('db_queries_total', (('rota', '/x'),), 2)
+            worker.observar('http_request_duration_seconds', (('rota', '/x'),), 0.02)
+            worker.ajustar_gauge('http_requests_in_flight', (('rota', '/x'),), 1)
+            worker.gravar(str(tmp_path))
+            worker.encerrar(str(tmp_path))
+            # Gravação tardia (ex.: teardown) não recria o arquivo
+            worker.gravar(str(tmp_path))
+
+        texto = Metricas.exportar(Metricas().snapshots(str(tmp_path)))
+
+        assert sorted(p.name for p in tmp_path.glob('*.json')) == ['metricas-encerrados.json']
+        assert 'db_queries_total{rota="/x"} 6' in texto
+        assert 'http_request_duration_seconds_count{rota="/x"} 3' in texto
+        assert 'http_requests_in_flight' not in texto
+
+    def test_arquivo_de_processo_morto_incorporado_uma_vez(self, tmp_path):
+        """Worker morto sem worker_exit: somado na leitura e removido do diretório"""
+        worker = Metricas()
+        worker.incrementar('db_queries_total', (('rota', '/x'),), 5)
+        morto = worker.snapshot()
+        morto['pid'] = 2 ** 22 + 12345
+        (tmp_path / f"metricas-{morto['pid']}-1.json").write_text(json.dumps(morto))
+
+        leitor = Metricas()
+        primeira = Metricas.exportar(leitor.snapshots(str(tmp_path)))
+        segunda = Metricas.exportar(leitor.snapshots(str(tmp_path)))
+
+        assert 'db_queries_total{rota="/x"} 5' in primeira
+        assert 'db_queries_total{rota="/x"} 5' in segunda
+        assert not (tmp_path / f"metricas-{morto['pid']}-1.json").exists()
+
+    def test_arquivo_por_pid_e_inicio(self, tmp_path):
+        """Um PID reaproveitado grava noutro arquivo: os contadores somados não diminuem"""
+        antigo, novo = Metricas(), Metricas()
+        novo._inicio = antigo._inicio + 1
+        antigo.incrementar('db_queries_total', (('rota', '/x'),), 5)
+        novo.incrementar('db_queries_total', (('rota', '/x'),), 1)
+        antigo.gravar(str(tmp_path))
+        novo.gravar(str(tmp_path))
+
+        assert len(list(tmp_path.glob('metricas-*.json'))) == 2
+        assert 'db_queries_total{rota="/x"} 6' in Metricas.exportar(Metricas().snapshots(str(tmp_path)))
+
+    def test_tempo_de_banco_por_contexto(self, tmp_path):
+        """A conexão medida acumula tempo e comandos apenas durante a medição"""
+        conn = sqlite3.connect(str(tmp_path / 'medido.db'), factory=ConexaoMedida)
+        conn.execute('CREATE TABLE t (x)')
+
+        iniciar_medicao_banco()
+        conn.execute('INSERT INTO t VALUES (1)')
+        conn.cursor().execute('SELECT x FROM t').fetchall()
+        segundos, comandos = encerrar_medicao_banco()
+        conn.close()
+
+        assert comandos == 2
+        assert segundos > 0
+
+
+class TestEndpointMetricas:
+    """GET /metrics"""
+
+    def test_latencia_por_rota_e_status(self, app_client):
+        """As requisições aparecem com a rota (padrão da URL) e o status"""
+        headers = criar_headers('Metricas')
+        app_client.get('/tarefas/', headers=headers)
+        app_client.get('/tarefas/', headers=headers)
+        app_client.get('/tarefas/')
+
+        resposta = app_client.get('/metrics')
+        texto = resposta.get_data(as_text=True)
+
+        assert resposta.status_code == 200
+        assert resposta.mimetype == 'text/plain'
+        assert 'http_request_duration_seconds_count{metodo="GET",rota="/tarefas/",status="200"} 2' in texto
+        assert 'http_request_duration_seconds_count{metodo="GET",rota="/tarefas/",status="401"} 1' in texto
+        assert 'db_request_duration_seconds_count{rota="/tarefas/"} 3' in texto
+        assert 'cache_requests_total{cache="qr_code",resultado="hit"}' in texto
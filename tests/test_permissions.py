@@ -0,0 +1,112 @@
+"""
+Testes unitários para as funções de permissão compiladas em bits
+e para o registro de níveis de acesso dinâmicos
+"""
+import pytest
+from src.models.usuario import Usuario
+from src.models.nivel_acesso import salvar_nivel, remover_nivel
+from src.utils.authorization_strategy import PERMISSOES, STRATEGIES, create_authorization_context
+from src.utils.permission_registry import compilar_permissoes
+from src.utils.permissions import (
+    NIVEIS_ACESSO,
+    registro_permissoes,
+    verificar_permissao,
+    verificar_nivel_minimo,
+    obter_permissoes_usuario,
+    validar_nivel_acesso
+)
+
+
+class TestPermissoesCompiladas:
+    """As máscaras devem reproduzir exatamente as listas das estratégias"""
+
+    def test_equivalente_as_estrategias(self):
+        """Deve concordar com ALLOWED_ACTIONS para todos os níveis e permissões"""
+        for nivel, strategy in STRATEGIES.items():
+            for permissao in PERMISSOES + ('tarefas:export', ''):
+                esperado = permissao in strategy.ALLOWED_ACTIONS
+                assert verificar_permissao(nivel, permissao) is esperado
+                assert create_authorization_context(nivel).can_perform_action(permissao) is esperado
+
+    def test_nivel_invalido(self):
+        """Nível inválido não deve ter permissões"""
+        assert verificar_permissao('invalido', 'tarefas:read') is False
+        assert verificar_permissao(None, 'tarefas:read') is False
+        assert obter_permissoes_usuario('invalido') == []
+        assert validar_nivel_acesso('invalido') is False
+
+    def test_nivel_minimo(self):
+        """Deve comparar a hierarquia dos níveis"""
+        assert verificar_nivel_minimo('administrativo', 'gerencial') is True
+        assert verificar_nivel_minimo('visualizacao', 'gerencial') is False
+        assert verificar_nivel_minimo('invalido', 'visualizacao') is False
+
+    def test_obter_permissoes(self):
+        """Deve retornar as permissões do nível na ordem da estratégia"""
+        assert obter_permissoes_usuario('visualizacao') == ['tarefas:read', 'tarefas:list']
+
+    def test_permissoes_retornadas_sao_copias(self):
+        """Alterar a lista retornada não afeta o registro"""
+        permissoes = obter_permissoes_usuario('visualizacao')
+        permissoes.append('system:admin')
+        assert 'system:admin' not in obter_permissoes_usuario('visualizacao')
+
+
+@pytest.fixture
+def registro_temp_db(temp_db):
+    """Banco temporário com níveis padrão; restaura o registro ao final"""
+    yield registro_permissoes
+    
+    registro_permissoes.trocar(compilar_permissoes(NIVEIS_ACESSO))
+
+
+class TestRegistroPermissoes:
+    """Testes para os níveis dinâmicos armazenados no banco"""
+
+    def test_compilar_permissao_nova(self):
+        """Permissões fora do catálogo recebem bits após as do catálogo"""
+        compilado = compilar_permissoes({
+            'auditor': {'nome': 'Auditor', 'descricao': '', 'nivel': 1, 'permissoes': ['relatorios:read', 'tarefas:read']}
+        })
+        assert compilado.bits['tarefas:read'] == 1
+        assert compilado.bits['relatorios:read'] == 1 << len(PERMISSOES)
+        assert compilado.estrategias['auditor'].can_perform_action('relatorios:read') is True
+
+    def test_carrega_niveis_padrao(self, registro_temp_db):
+        """O banco deve ser populado com os níveis padrão"""
+        atual = registro_temp_db.recarregar()
+        
+        assert atual.versao == 1
+        assert set(atual.niveis) == set(NIVEIS_ACESSO)
+        assert verificar_permissao('gerencial', 'tarefas:create') is True
+
+    def test_salvar_nivel_recompila(self, registro_temp_db):
+        """Um nível novo deve valer após a recarga, sem consultar o banco por verificação"""
+        registro_temp_db.recarregar()
+        salvar_nivel('auditor', 'Auditor', 'Somente relatórios', 1, ['relatorios:read', 'tarefas:read'])
+        atual = registro_temp_db.recarregar()
+        
+        assert atual.versao == 2
+        assert validar_nivel_acesso('auditor') is True
+        assert verificar_permissao('auditor', 'relatorios:read') is True
+        assert verificar_permissao('auditor', 'tarefas:create') is False
+        assert create_authorization_context('auditor').get_level_name() == 'auditor'
+
+    def test_verificar_versao_de_outro_worker(self, registro_temp_db):
+        """Alterações feitas por outro processo são percebidas pela versão"""
+        registro_temp_db.recarregar()
+        salvar_nivel('gerencial', 'Gerencial', '', 2, ['tarefas:read', 'tarefas:list'])
+        
+        assert verificar_permissao('gerencial', 'tarefas:create') is True
+        registro_temp_db._proxima_verificacao = 0
+        registro_temp_db.verificar_versao()
+        assert verificar_permissao('gerencial', 'tarefas:create') is False
+
+    def test_remover_nivel_em_uso(self, registro_temp_db):
+        """Não deve remover nível atribuído a usuários"""
+        Usuario.criar("Visual", "visual@dpm.com", "senha123")
+        
+        with pytest.raises(ValueError):
+            remover_nivel('visualizacao')
+        assert remover_nivel('gerencial') is True
+        assert remover_nivel('gerencial') is False
@@ -0,0 +1,145 @@
+"""
+Testes do perfilamento sob demanda de requisições
+"""
+import pytest
+import os
+import threading
+import time
+from src.utils.profiling import (
+    AmostradorCompartilhado, AmostradorPilhas, ArmazemPerfis, PerfiladorRequisicoes, pilhas_colapsadas, tabela_top
+)
+from tests.conftest import criar_headers
+
+
+class TestArmazemPerfis:
+    """Armazenamento e formatação dos perfis"""
+
+    def test_lru_descarta_mais_antigos(self):
+        """Somente os perfis mais recentes ficam em memória"""
+        armazem = ArmazemPerfis(max_perfis=2)
+        for perfil_id in ('a', 'b', 'c'):
+            armazem.guardar({'id': perfil_id, 'funcoes': [], 'pilhas': None})
+
+        assert armazem.obter('a') is None
+        assert [perfil['id'] for perfil in armazem.listar()] == ['c', 'b']
+
+    def test_perfil_compartilhado_em_disco(self, tmp_path):
+        """Um worker encontra o perfil gravado por outro"""
+        ArmazemPerfis(diretorio=str(tmp_path)).guardar({'id': 'abc123', 'funcoes': [], 'pilhas': None})
+
+        assert ArmazemPerfis(diretorio=str(tmp_path)).obter('abc123')['id'] == 'abc123'
+        assert ArmazemPerfis(diretorio=str(tmp_path)).obter('../abc123') is None
+
+    def test_diretorio_limitado(self, tmp_path):
+        """O diretório compartilhado guarda no máximo max_perfis arquivos, descartando os mais antigos"""
+        for indice, perfil_id in enumerate(('a1', 'b2', 'c3')):
+            ArmazemPerfis(max_perfis=2, diretorio=str(tmp_path)).guardar({'id': perfil_id, 'funcoes': [], 'pilhas': None})
+            os.utime(tmp_path / f'perfil-{perfil_id}.json', (indice, indice))
+
+        ArmazemPerfis(max_perfis=2, diretorio=str(tmp_path)).guardar({'id': 'd4', 'funcoes': [], 'pilhas': None})
+
+        assert sorted(os.listdir(tmp_path)) == ['perfil-c3.json', 'perfil-d4.json']
+
+    def test_tabela_e_pilhas(self):
+        """Tabela ordenada pelo critério e pilhas no formato do flamegraph"""
+        perfil = {
+            'funcoes': [
+                {'funcao': 'a', 'ncalls': 1, 'tottime': 0.1, 'cumtime': 0.5},
+                {'funcao': 'b', 'ncalls': 9, 'tottime': 0.4, 'cumtime': 0.4}
+            ],
+            'pilhas': {'main;a;b': 3, 'main;a': 1}
+        }
+
+        assert [linha['funcao'] for linha in tabela_top(perfil, 1, 'tottime')] == ['b']
+        assert [linha['funcao'] for linha in tabela_top(perfil, 5, 'desconhecido')] == ['a', 'b']
+        assert pilhas_colapsadas(perfil) == 'main;a 1\nmain;a;b 3\n'
+
+
+class TestPerfilRequisicao:
+    """Cabeçalho X-Profile e rotas /admin/profiles"""
+
+    def test_perfil_cprofile_por_administrador(self, app):
+        """O administrador recebe o id do perfil e consulta a tabela top-N"""
+        client = app.test_client()
+        headers = criar_headers('admin', 'administrativo')
+
+        resposta = client.get('/tarefas/', headers={**headers, 'X-Profile': 'cprofile'})
+        perfil_id = resposta.headers.get('X-Profile-Id')
+        assert resposta.status_code == 200
+        assert perfil_id
+
+        detalhe = client.get(f'/admin/profiles/{perfil_id}?top=5', headers=headers).get_json()
+        assert detalhe['modo'] == 'cprofile'
+        assert detalhe['rota'] == '/tarefas/'
+        assert 0 < len(detalhe['funcoes']) <= 5
+
+        resposta = client.get(f'/admin/profiles/{perfil_id}?formato=collapsed', headers=headers)
+        assert resposta.status_code == 400
+
+    def test_perfil_por_amostragem(self, app):
+        """O perfil por amostragem exporta pilhas colapsadas"""
+        client = app.test_client()
+        headers = criar_headers('admin', 'administrativo')
+
+        perfil_id = client.get('/tarefas/', headers={**headers, 'X-Profile': 'sample'}).headers['X-Profile-Id']
+        resposta = client.get(f'/admin/profiles/{perfil_id}?formato=collapsed', headers=headers)
+
+        assert resposta.status_code == 200
+        assert resposta.mimetype == 'text/plain'
+
+    def test_cabecalho_ignorado_sem_permissao(self, app):
+        """Usuários sem system:admin não geram perfis nem acessam as rotas"""
+        client = app.test_client()
+        headers = criar_headers('leitor', 'visualizacao')
+
+        resposta = client.get('/tarefas/', headers={**headers, 'X-Profile': 'cprofile'})
+        assert 'X-Profile-Id' not in resposta.headers
+        assert client.get('/tarefas/', headers={'X-Profile': 'cprofile'}).headers.get('X-Profile-Id') is None
+        assert client.get('/admin/profiles', headers=headers).status_code == 403
+        assert len(app.extensions['perfis']) == 0
+
+    def test_amostragem_automatica_do_trafego(self, app):
+        """Com taxa 1.0 toda requisição é perfilada, sem cabeçalho"""
+        perfilador = PerfiladorRequisicoes(app.extensions['perfis'], taxa_amostragem=1.0)
+        with app.test_request_context('/tarefas/'):
+            perfilador.iniciar()
+            resposta = perfilador.finalizar(app.response_class('ok'))
+
+        assert resposta.headers['X-Profile-Id']
+        assert app.extensions['perfis'].obter(resposta.headers['X-Profile-Id'])['modo'] == 'sample'
+
+    def test_rotas_exigem_autenticacao(self, app):
+        """As rotas de perfis não respondem sem token"""
+        client = app.test_client()
+
+        assert client.get('/admin/profiles').status_code == 401
+        assert client.get('/admin/profiles/abc123').status_code == 401
+
+
+class TestAmostradorCompartilhado:
+    """Uma única thread amostra todas as requisições perfiladas"""
+
+    def test_uma_thread_para_varias_requisicoes(self):
+        """Várias threads inscritas compartilham a thread de amostragem, que termina sem inscritos"""
+        amostrador = AmostradorCompartilhado(intervalo=0.001)
+        parar = threading.Event()
+        trabalhadores = [threading.Thread(target=parar.wait) for _ in range(3)]
+        for trabalhador in trabalhadores:
+            trabalhador.start()
+
+        antes = threading.active_count()
+        perfis = [AmostradorPilhas(trabalhador.ident, amostrador) for trabalhador in trabalhadores]
+        for perfil in perfis:
+            perfil.iniciar()
+        assert threading.active_count() == antes + 1
+
+        time.sleep(0.05)
+        for perfil in perfis:
+            perfil.parar()
+        parar.set()
+        for trabalhador in trabalhadores:
+            trabalhador.join()
+
+        assert all(sum(perfil.pilhas.values()) > 0 for perfil in perfis)
+        time.sleep(0.02)
+        assert amostrador._thread is None
@@ -0,0 +1,146 @@
+"""
+Testes unitários para o provisionamento de usuários em lote
+"""
+import pytest
+import os
+import sys
+import subprocess
+from src.models.usuario import Usuario
+from src.routes.usuarios import LIMITE_REGISTROS_PROVISIONAMENTO
+from src.utils.provisionamento import MINIMO_PARA_PARALELISMO, gerar_hashes, ler_registros, provisionar_usuarios, resumir
+from tests.conftest import criar_headers
+
+
+class TestLeituraRegistros:
+    """Testes para a leitura de CSV e NDJSON"""
+
+    def test_ler_csv(self):
+        """Deve ler CSV com cabeçalho"""
+        registros = ler_registros("nome,email,senha\nAna,ana@dpm.com,senha123\n", 'csv')
+        assert registros == [{'nome': 'Ana', 'email': 'ana@dpm.com', 'senha': 'senha123'}]
+
+    def test_ler_ndjson_com_linha_invalida(self):
+        """Deve marcar linhas NDJSON inválidas sem interromper a leitura"""
+        registros = ler_registros('{"nome": "Ana"}\nnao-json\n\n{"nome": "Bia"}', 'ndjson')
+        assert len(registros) == 3
+        assert '_erro' in registros[1]
+
+
+class TestProvisionamento:
+    """Testes para a criação em lote"""
+
+    def test_cria_usuarios_e_reporta_erros(self, temp_db):
+        """Deve criar os válidos e reportar erros por linha"""
+        Usuario.criar("Existente", "existe@dpm.com", "senha123")
+        
+        resultados = provisionar_usuarios([
+            {'nome': 'Ana', 'email': 'ana@dpm.com', 'senha': 'senha123', 'nivel_acesso': 'gerencial'},
+            {'nome': 'Curta', 'email': 'curta@dpm.com', 'senha': '123'},
+            {'nome': 'Repetida', 'email': 'existe@dpm.com', 'senha': 'senha123'},
+            {'nome': 'Ana 2', 'email': 'ana@dpm.com', 'senha': 'senha123'},
+            {'nome': 'Bia', 'email': 'bia@dpm.com', 'senha': 'senha123', 'nivel_acesso': 'invalido'},
+        ], threads=1)
+        
+        assert [r['status'] for r in resultados] == ['criado', 'erro', 'erro', 'erro', 'erro']
+        assert resultados[2]['erro'] == "Email já cadastrado"
+        assert resultados[3]['erro'] == "Email duplicado no lote"
+        assert resumir(resultados)['criados'] == 1
+        
+        usuario = Usuario.buscar_por_email('ana@dpm.com')
+        assert usuario.id == resultados[0]['id']
+        assert usuario.nivel_acesso == 'gerencial'
+        assert usuario.verificar_senha('senha123') is True
+
+    def test_blocos_de_insercao(self, temp_db):
+        """Deve inserir em vários blocos de executemany"""
+        registros = [
+            {'nome': f'Usuário {i}', 'email': f'u{i}@dpm.com', 'senha': 'senha123'}
+            for i in range(7)
+        ]
+        
+        resultados = provisionar_usuarios(registros, threads=1, tamanho_lote=3)
+        
+        assert all(r['status'] == 'criado' for r in resultados)
+        assert len({r['id'] for r in resultados}) == 7
+
+    def test_nivel_de_acesso_nao_textual(self, temp_db):
+        """Nível de acesso que não é texto deve ser erro da linha, não da requisição"""
+        resultados = provisionar_usuarios([
+            {'nome': 'Ana', 'email': 'ana@dpm.com', 'senha': 'senha123', 'nivel_acesso': {'admin': True}},
+            {'nome': 'Bia', 'email': 'bia@dpm.com', 'senha': 'senha123', 'nivel_acesso': ['gerencial']},
+        ], threads=1)
+
+        assert [r['erro'] for r in resultados] == ["Nível de acesso inválido"] * 2
+
+    def test_hashes_em_paralelo_mantem_a_ordem(self):
+        """Os hashes do pool compartilhado devem seguir a ordem das senhas"""
+        senhas = [f'senha{i:03d}' for i in range(MINIMO_PARA_PARALELISMO + 3)]
+
+        hashes = gerar_hashes(senhas)
+
+        from werkzeug.security import check_password_hash
+        assert all(check_password_hash(h, senha) for h, senha in zip(hashes, senhas))
+
+
+class TestRotaProvisionamento:
+    """Testes para POST /usuarios/bulk"""
+
+    def test_csv(self, app_client, admin_headers):
+        """Deve criar os usuários de um CSV e reportar erros por linha"""
+        corpo = "nome,email,senha,nivel_acesso\nAna,ana@dpm.com,senha123,gerencial\nCurta,curta@dpm.com,123,\n"
+
+        response = app_client.post('/usuarios/bulk', data=corpo, content_type='text/csv', headers=admin_headers)
+
+        assert response.status_code == 200
+        assert response.json['criados'] == 1
+        assert response.json['resultados'][1]['erro'] == "Senha deve ter pelo menos 6 caracteres"
+
+    def test_json_com_nivel_nao_textual(self, app_client, admin_headers):
+        """Nível de acesso não textual deve falhar só na sua linha"""
+        response = app_client.post('/usuarios/bulk', headers=admin_headers, json=[
+            {'nome': 'Ana', 'email': 'ana@dpm.com', 'senha': 'senha123', 'nivel_acesso': {'x': 1}},
+            {'nome': 'Bia', 'email': 'bia@dpm.com', 'senha': 'senha123'},
+        ])
+
+        assert response.status_code == 200
+        assert [r['status'] for r in response.json['resultados']] == ['erro', 'criado']
+        assert response.json['resultados'][0]['erro'] == "Nível de acesso inválido"
+
+    def test_limite_de_registros(self, app_client, admin_headers):
+        """Requisições acima do limite devem ser recusadas antes de qualquer hash"""
+        registros = [{'nome': 'U', 'email': f'u{i}@dpm.com', 'senha': 'senha123'}
+                     for i in range(LIMITE_REGISTROS_PROVISIONAMENTO + 1)]
+
+        response = app_client.post('/usuarios/bulk', headers=admin_headers, json=registros)
+
+        assert response.status_code == 400
+        assert Usuario.buscar_por_email('u0@dpm.com') is None
+
+    def test_apenas_administrativo(self, app_client):
+        """Usuários sem nível administrativo não podem provisionar"""
+        headers = criar_headers('Comum')
+
+        response = app_client.post('/usuarios/bulk', headers=headers, json=[
+            {'nome': 'Ana', 'email': 'ana@dpm.com', 'senha': 'senha123'}
+        ])
+
+        assert response.status_code == 403
+
+
+class TestScriptProvisionamento:
+    """Testes do script provision_users.py"""
+
+    def test_script_cria_usuarios(self, db_path, tmp_path):
+        """O script deve aceitar --threads e criar os usuários do arquivo"""
+        arquivo = tmp_path / 'usuarios.csv'
+        arquivo.write_text("nome,email,senha\nAna,ana@dpm.com,senha123\n", encoding='utf-8')
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        saida = subprocess.run(
+            [sys.executable, 'provision_users.py', str(arquivo), '--threads', '1', '--json'],
+            cwd=raiz, capture_output=True, text=True
+        )
+
+        assert saida.returncode == 0, saida.stderr
+        assert '"criados": 1' in saida.stdout
+        assert Usuario.buscar_por_email('ana@dpm.com') is not None
@@ -0,0 +1,116 @@
+"""
+Testes unitários para o limitador de tentativas (token bucket)
+"""
+import pytest
+from src.utils.rate_limiter import TokenBucketLimiter, LoginThrottle
+
+
+class RelogioFalso:
+    """Relógio controlável para os testes"""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class TestTokenBucketLimiter:
+    """Testes para o limitador por chave"""
+
+    def test_permite_rajada_e_rejeita_excesso(self):
+        """Deve permitir até a capacidade e depois rejeitar"""
+        relogio = RelogioFalso()
+        limiter = TokenBucketLimiter(3, 1.0, relogio=relogio)
+
+        assert [limiter.consumir('ip') for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.consumir('ip') == pytest.approx(1.0)
+        assert limiter.stats()['rejeitadas'] == 1
+
+    def test_repoe_tokens_com_o_tempo(self):
+        """Deve repor tokens de acordo com a taxa"""
+        relogio = RelogioFalso()
+        limiter = TokenBucketLimiter(1, 0.5, relogio=relogio)
+
+        assert limiter.consumir('email') == 0.0
+        assert limiter.consumir('email') == pytest.approx(2.0)
+        relogio.agora = 2.0
+        assert limiter.consumir('email') == 0.0
+
+    def test_chaves_independentes(self):
+        """Deve manter buckets separados por chave"""
+        limiter = TokenBucketLimiter(1, 1.0, relogio=RelogioFalso())
+
+        assert limiter.consumir('a') == 0.0
+        assert limiter.consumir('b') == 0.0
+        assert limiter.consumir('a') > 0
+
+    def test_memoria_limitada(self):
+        """Ao atingir o limite deve descartar os buckets que já voltaram a ficar cheios"""
+        relogio = RelogioFalso()
+        limiter = TokenBucketLimiter(2, 1.0, max_chaves=100, relogio=relogio)
+
+        for i in range(1000):
+            relogio.agora = i * 0.015
+            assert limiter.consumir(f'ip-{i}') == 0.0
+
+        assert len(limiter) == 100
+        assert limiter.stats()['descartadas'] == 900
+
+    def test_nao_descarta_bucket_esgotado(self):
+        """Chaves novas não podem apagar o limite de uma chave esgotada (falha fechada)"""
+        relogio = RelogioFalso()
+        limiter = TokenBucketLimiter(2, 1.0, max_chaves=2, relogio=relogio)
+
+        limiter.consumir('alvo')
+        limiter.consumir('alvo')
+        limiter.consumir('outro')
+
+        assert limiter.consumir('novo') == pytest.approx(1.0)
+        assert limiter.stats()['recusadas_lotado'] == 1
+
+        relogio.agora = 1.0
+        assert limiter.consumir('novo') == 0.0
+        assert limiter.stats()['descartadas'] == 1
+        # 'alvo' continua com o bucket reposto pela metade
+        assert limiter.consumir('alvo') == 0.0
+        assert limiter.consumir('alvo') > 0
+
+    def test_expira_buckets_ociosos(self):
+        """Deve remover buckets que ficaram cheios por inatividade"""
+        relogio = RelogioFalso()
+        limiter = TokenBucketLimiter(2, 1.0, relogio=relogio)
+
+        limiter.consumir('antigo')
+        relogio.agora = 10.0
+        limiter.consumir('novo')
+
+        assert len(limiter) == 1
+
+
+class TestLoginThrottle:
+    """Testes para o throttle combinado por IP e identidade"""
+
+    def test_limita_por_email(self):
+        """Deve rejeitar pelo email mesmo vindo de IPs diferentes"""
+        relogio = RelogioFalso()
+        throttle = LoginThrottle(
+            TokenBucketLimiter(100, 1.0, relogio=relogio),
+            TokenBucketLimiter(2, 1.0, relogio=relogio)
+        )
+
+        assert throttle.verificar('1.1.1.1', 'Alvo@dpm.com') == 0
+        assert throttle.verificar('2.2.2.2', 'alvo@dpm.com') == 0
+        assert throttle.verificar('3.3.3.3', 'alvo@dpm.com') == 1
+
+    def test_limita_por_ip(self):
+        """Deve rejeitar pelo IP antes de consumir o bucket do email"""
+        relogio = RelogioFalso()
+        throttle = LoginThrottle(
+            TokenBucketLimiter(1, 1.0, relogio=relogio),
+            TokenBucketLimiter(100, 1.0, relogio=relogio)
+        )
+
+        assert throttle.verificar('1.1.1.1', 'a@dpm.com') == 0
+        assert throttle.verificar('1.1.1.1', 'b@dpm.com') == 1
+        assert throttle.stats()['por_identidade']['permitidas'] == 1
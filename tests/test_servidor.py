@@ -0,0 +1,197 @@
+"""
+Testes da execução em produção (gunicorn com vários workers)
+"""
+import pytest
+import os
+import sys
+import time
+import socket
+import signal
+import sqlite3
+import subprocess
+import urllib.request
+from config import Config
+from src.utils.servidor import numero_threads, numero_workers, on_exit, opcoes_gunicorn, preparar_ambiente
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ConfigTeste(Config):
+    """Configuração isolada, alterável sem afetar Config"""
+    HOST = '127.0.0.1'
+    PORT = 8123
+    WORKERS = 0
+    WORKER_THREADS = 4
+    METRICS_DIR = ''
+    PROFILING_DIR = ''
+
+
+class TestOpcoes:
+    """Opções do gunicorn derivadas de Config"""
+
+    def test_numero_de_workers(self):
+        """Automático é 2 x CPUs + 1; um valor configurado prevalece"""
+        assert numero_workers(0, cpus=4) == 9
+        assert numero_workers(3, cpus=4) == 3
+
+    def test_opcoes(self):
+        """Threads > 1 usam workers gthread e a reciclagem vem da configuração"""
+        opcoes = opcoes_gunicorn(ConfigTeste)
+
+        assert opcoes['bind'] == '127.0.0.1:8123'
+        assert opcoes['worker_class'] == 'gthread'
+        assert opcoes['threads'] == 4
+        assert opcoes['preload_app'] is True
+        assert opcoes['max_requests'] == Config.MAX_REQUESTS
+        assert opcoes['max_requests_jitter'] == Config.MAX_REQUESTS_JITTER
+
+    def test_threads_automaticas_com_admissao(self):
+        """Padrão: gthread com vagas de todas as classes, streams e reserva"""
+        class Configuracao(ConfigTeste):
+            WORKER_THREADS = 0
+
+        opcoes = opcoes_gunicorn(Configuracao)
+
+        vagas = (Config.ADMISSION_LIST_CONCURRENCY + Config.ADMISSION_EXPORT_CONCURRENCY
+                 + Config.ADMISSION_LOGIN_CONCURRENCY)
+        assert opcoes['worker_class'] == 'gthread'
+        assert opcoes['threads'] == vagas + Config.SSE_WSGI_MAX_CLIENTS + Config.ADMISSION_RESERVED_THREADS
+        assert numero_threads(type('SemAdmissao', (Configuracao,), {'ADMISSION_ENABLED': False})) == 1
+
+    def test_aviso_com_threads_insuficientes(self, caplog):
+        """Workers síncronos com admissão ativa: nada seria descartado"""
+        class Configuracao(ConfigTeste):
+            WORKER_THREADS = 1
+
+        with caplog.at_level('WARNING', logger='src.utils.servidor'):
+            assert opcoes_gunicorn(Configuracao)['worker_class'] == 'sync'
+
+        assert 'nenhuma carga é descartada' in caplog.text
+
+    def test_preparar_ambiente(self, db_path):
+        """Vários workers recebem diretórios compartilhados; o banco passa a WAL"""
+        class Configuracao(ConfigTeste):
+            pass
+
+        preparar_ambiente(3, Configuracao)
+
+        assert os.path.dirname(Configuracao.METRICS_DIR) == os.path.dirname(Configuracao.PROFILING_DIR)
+        assert not Config.METRICS_DIR
+        conn = sqlite3.connect(db_path)
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        conn.close()
+
+        on_exit(None)
+        assert not os.path.exists(os.path.dirname(Configuracao.METRICS_DIR))
+
+
+class TestFork:
+    """Caches em memória utilizáveis no processo filho"""
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='requer fork')
+    def test_locks_refeitos_no_filho(self):
+        """Um lock preso no pai no momento do fork não trava o filho"""
+        from src.utils.qr_cache import qr_code_cache
+        from src.utils.user_index import indice_usuarios
+
+        with qr_code_cache._lock, indice_usuarios._lock:
+            pid = os.fork()
+            if pid == 0:
+                livres = qr_code_cache._lock.acquire(timeout=1) and indice_usuarios._lock.acquire(timeout=1)
+                os._exit(0 if livres and indice_usuarios._proxima_verificacao == 0.0 else 1)
+        _, status = os.waitpid(pid, 0)
+
+        assert os.waitstatus_to_exitcode(status) == 0
+
+
+def porta_livre():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class TestGunicorn:
+    """Servidor real com vários workers"""
+
+    def test_metricas_somadas_entre_workers(self, db_path):
+        """Requisições atendidas por workers diferentes (e reciclados) aparecem em /metrics"""
+        pytest.importorskip('gunicorn')
+        porta = porta_livre()
+        # Snapshot gravado a cada requisição: um worker ocioso não regrava o seu
+        ambiente = dict(os.environ, HOST='127.0.0.1', PORT=str(porta), WORKERS='2',
+                        MAX_REQUESTS='5', MAX_REQUESTS_JITTER='0', METRICS_FLUSH_INTERVAL='0')
+        processo = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+            cwd=RAIZ, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            url = f'http://127.0.0.1:{porta}'
+            for _ in range(100):
+                try:
+                    urllib.request.urlopen(f'{url}/metrics', timeout=1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+
+            for _ in range(12):
+                try:
+                    urllib.request.urlopen(f'{url}/tarefas/', timeout=5)
+                except urllib.error.HTTPError as erro:
+                    assert erro.code == 401
+
+            texto = urllib.request.urlopen(f'{url}/metrics', timeout=5).read().decode()
+            linha = next(linha for linha in texto.splitlines()
+                         if linha.startswith('http_request_duration_seconds_count') and '/tarefas/' in linha)
+            assert linha.endswith(' 12')
+        finally:
+            processo.send_signal(signal.SIGTERM)
+            processo.wait(timeout=30)
+
+    def test_admissao_com_opcoes_padrao(self, db_path):
+        """Com as opções distribuídas, logins excedentes recebem 503 e /health segue atendido"""
+        pytest.importorskip('gunicorn')
+        import json
+        from concurrent.futures import ThreadPoolExecutor
+
+        porta = porta_livre()
+        ambiente = dict(os.environ, HOST='127.0.0.1', PORT=str(porta), WORKERS='1',
+                        ADMISSION_LOGIN_CONCURRENCY='1', ADMISSION_LOGIN_QUEUE='0')
+        ambiente.pop('WORKER_THREADS', None)
+        processo = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+            cwd=RAIZ, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        url = f'http://127.0.0.1:{porta}'
+
+        def enviar(caminho, dados=None):
+            requisicao = urllib.request.Request(
+                f'{url}{caminho}', data=json.dumps(dados).encode() if dados else None,
+                headers={'Content-Type': 'application/json'}
+            )
+            try:
+                with urllib.request.urlopen(requisicao, timeout=10) as resposta:
+                    return resposta.status, resposta.headers.get('Retry-After')
+            except urllib.error.HTTPError as erro:
+                return erro.code, erro.headers.get('Retry-After')
+
+        try:
+            for _ in range(100):
+                try:
+                    urllib.request.urlopen(f'{url}/health', timeout=1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            enviar('/auth/register', {'nome': 'Ana', 'email': 'ana@teste.com', 'senha': 'senha123'})
+
+            with ThreadPoolExecutor(10) as executor:
+                logins = [executor.submit(enviar, '/auth/login', {'email': 'ana@teste.com', 'senha': 'senha123'})
+                          for _ in range(10)]
+                saude = executor.submit(enviar, '/health')
+                resultados = [futuro.result() for futuro in logins]
+
+            assert (503, '1') in resultados
+            assert (200, None) in resultados
+            assert saude.result()[0] == 200
+        finally:
+            processo.send_signal(signal.SIGTERM)
+            processo.wait(timeout=30)
@@ -0,0 +1,124 @@
+"""
+Testes da coalescência de leituras idênticas (single-flight)
+"""
+import pytest
+import threading
+from src.utils.single_flight import SingleFlight, consultas_tarefas, impressao_sql
+from tests.conftest import criar_headers
+
+
+def em_paralelo(grupo, chaves, funcao):
+    """
+    Executa uma chamada por chave em threads; a primeira de cada chave
+    fica bloqueada até todas as outras estarem aguardando
+    """
+    liberar = threading.Event()
+    resultados = {}
+
+    def bloqueante():
+        liberar.wait(2)
+        return funcao()
+
+    def chamar(indice, chave):
+        try:
+            resultados[indice] = grupo.executar(chave, bloqueante)
+        except Exception as erro:
+            resultados[indice] = erro
+
+    threads = [threading.Thread(target=chamar, args=(indice, chave)) for indice, chave in enumerate(chaves)]
+    for thread in threads:
+        thread.start()
+    # Todas as chamadas registradas (executadas + compartilhadas) antes de liberar
+    while grupo.executadas + grupo.compartilhadas < len(chaves):
+        threading.Event().wait(0.01)
+    liberar.set()
+    for thread in threads:
+        thread.join(5)
+    return [resultados[indice] for indice in range(len(chaves))]
+
+
+class TestSingleFlight:
+    """Chamadas simultâneas com a mesma chave"""
+
+    def test_chamadas_identicas_executam_uma_vez(self):
+        grupo = SingleFlight('teste')
+        execucoes = []
+
+        resultados = em_paralelo(grupo, ['a'] * 5, lambda: execucoes.append(1) or [(1, 'x')])
+
+        assert execucoes == [1]
+        assert all(resultado is resultados[0] for resultado in resultados)
+        assert grupo.stats()['executadas'] == 1
+        assert grupo.stats()['compartilhadas'] == 4
+        assert grupo.stats()['em_andamento'] == 0
+
+    def test_chaves_diferentes_nao_compartilham(self):
+        """Parâmetros ou escopo de permissão diferentes executam separadamente"""
+        grupo = SingleFlight('teste')
+
+        em_paralelo(grupo, [('sql', (), 'visualizacao'), ('sql', (), 'administrativo'), ('sql', (1,), 'visualizacao')],
+                    lambda: [])
+
+        assert grupo.stats()['executadas'] == 3
+        assert grupo.stats()['compartilhadas'] == 0
+
+    def test_erro_repassado_a_quem_aguardava(self):
+        grupo = SingleFlight('teste')
+
+        def falhar():
+            raise RuntimeError('banco indisponível')
+
+        resultados = em_paralelo(grupo, ['a'] * 3, falhar)
+
+        assert all(isinstance(resultado, RuntimeError) for resultado in resultados)
+        assert grupo.stats()['em_andamento'] == 0
+
+    def test_chamada_apos_invalidar_nao_reaproveita(self):
+        """Leitura iniciada após uma escrita não recebe o resultado de uma anterior a ela"""
+        grupo = SingleFlight('teste')
+        iniciou, liberar = threading.Event(), threading.Event()
+        resultados = []
+
+        def antiga():
+            iniciou.set()
+            liberar.wait(2)
+            return 'antes da escrita'
+
+        thread = threading.Thread(target=lambda: resultados.append(grupo.executar('a', antiga)))
+        thread.start()
+        iniciou.wait(2)
+        grupo.invalidar()
+        recente = grupo.executar('a', lambda: 'depois da escrita')
+        liberar.set()
+        thread.join(2)
+
+        assert recente == 'depois da escrita'
+        assert resultados == ['antes da escrita']
+
+    def test_impressao_ignora_espacos(self):
+        assert impressao_sql('SELECT *\n    FROM tarefas  WHERE id = ?') == 'SELECT * FROM tarefas WHERE id = ?'
+
+    def test_metricas(self):
+        grupo = SingleFlight('teste')
+        grupo.executar('a', lambda: None)
+
+        assert ('counter', 'single_flight_calls_total', (('grupo', 'teste'), ('resultado', 'executada')), 1) in grupo.coletor()()
+
+
+class TestRotas:
+    """Listagens usando o grupo compartilhado"""
+
+    def test_listagem_reflete_escrita_anterior(self, app_client):
+        """Quem cria uma tarefa a vê na listagem seguinte"""
+        headers = criar_headers('Admin', 'administrativo')
+        geracao = consultas_tarefas.geracao
+
+        assert app_client.get('/tarefas/', headers=headers).get_json()['total'] == 0
+        app_client.post('/tarefas/', json={'titulo': 'Nova'}, headers=headers)
+
+        assert consultas_tarefas.geracao == geracao + 1
+        assert app_client.get('/tarefas/', headers=headers).get_json()['total'] == 1
+        assert app_client.get('/usuarios/', headers=headers).get_json()['total'] == 1
+
+    def test_metricas_expostas(self, app_client):
+        assert b'single_flight_calls_total' in app_client.get('/metrics').data
@@ -0,0 +1,224 @@
+"""
+Testes dos eventos de tarefas em tempo real (GET /tarefas/stream)
+"""
+import pytest
+import json
+import asyncio
+import threading
+from config import Config
+from src.api.asgi import criar_app_asgi
+from src.models.usuario import Usuario
+from src.models.tarefa_alteracoes import compactar, registrar_alteracao
+from src.utils.sse import Assinante, HubTarefas, duracao_wsgi, hub_tarefas, ler_posicao
+
+
+@pytest.fixture
+def hub(app):
+    hub = HubTarefas(intervalo=0.05)
+    yield hub
+    for assinante in list(hub._assinantes):
+        hub.cancelar(assinante)
+
+
+def alterar(*alteracoes):
+    """Grava alterações (tarefa_id, operacao) e retorna os seqs"""
+    conn = Usuario.get_db_connection()
+    cursor = conn.cursor()
+    seqs = [registrar_alteracao(cursor, tarefa_id, operacao, '2024-01-01') for tarefa_id, operacao in alteracoes]
+    conn.commit()
+    conn.close()
+    return seqs
+
+
+def eventos(quadros):
+    """(event, id, data) de cada quadro SSE"""
+    resultado = []
+    for bloco in b''.join(quadros).decode().split('\n\n'):
+        campos = dict(linha.split(': ', 1) for linha in bloco.splitlines() if ': ' in linha and not linha.startswith(':'))
+        if 'event' in campos:
+            resultado.append((campos['event'], campos.get('id'), json.loads(campos['data'])))
+    return resultado
+
+
+def aguardar(assinante, acordado, quantidade):
+    """Quadros recebidos até completar ``quantidade`` eventos (ou 2s)"""
+    quadros = []
+    while len(eventos(quadros)) < quantidade and acordado.wait(2):
+        acordado.clear()
+        quadros += assinante.retirar()
+    return eventos(quadros)
+
+
+def novo_assinante(desde=None, com_tarefa=True, max_eventos=256):
+    acordado = threading.Event()
+    return Assinante(com_tarefa, desde, max_eventos, acordado.set), acordado
+
+
+class TestHub:
+    """Distribuição, retomada e remoção de assinantes"""
+
+    def test_alteracoes_em_tempo_real(self, hub):
+        """Assinante sem posição recebe só o que acontece depois de conectar"""
+        alterar((1, 'insert'))
+        assinante, acordado = novo_assinante()
+        hub.assinar(assinante)
+        while not assinante.sincronizado:
+            acordado.wait(0.01)
+
+        [seq] = alterar((2, 'insert'))
+        hub.notificar()
+
+        [(evento, identificador, dados)] = aguardar(assinante, acordado, 1)
+        assert evento == 'insert'
+        assert identificador == str(seq)
+        assert dados['tarefa_id'] == 2
+
+    def test_retomada_pelo_ultimo_id(self, hub):
+        """Com Last-Event-ID chegam as alterações perdidas, sem repetir"""
+        primeiro, segundo, terceiro = alterar((1, 'insert'), (2, 'insert'), (3, 'delete'))
+        assinante, acordado = novo_assinante(desde=primeiro)
+        hub.assinar(assinante)
+
+        recebidos = aguardar(assinante, acordado, 2)
+        assert [(evento, int(identificador)) for evento, identificador, _ in recebidos] == [('insert', segundo), ('delete', terceiro)]
+
+    def test_sem_permissao_de_leitura_recebe_so_o_id(self, hub):
+        """O conteúdo da tarefa acompanha o evento apenas com tarefas:read"""
+        assinante, acordado = novo_assinante(desde=0, com_tarefa=False)
+        conn = Usuario.get_db_connection()
+        tarefa_id = conn.execute(
+            "INSERT INTO tarefas (titulo, data_criacao, data_atualizacao) VALUES ('Sigilosa', 'x', 'x')"
+        ).lastrowid
+        registrar_alteracao(conn.cursor(), tarefa_id, 'insert', 'x')
+        conn.commit()
+        conn.close()
+        hub.assinar(assinante)
+
+        [(_, _, dados)] = aguardar(assinante, acordado, 1)
+        assert dados['tarefa_id'] == tarefa_id and dados['tarefa'] is None
+
+    def test_assinante_lento_removido(self, hub):
+        """Buffer cheio desconecta o assinante; os demais continuam"""
+        lento, _ = novo_assinante(max_eventos=2)
+        rapido, acordado = novo_assinante(max_eventos=10)
+        for assinante in (lento, rapido):
+            hub.assinar(assinante)
+        while not (lento.sincronizado and rapido.sincronizado):
+            acordado.wait(0.01)
+
+        alterar(*[(tarefa_id, 'insert') for tarefa_id in range(1, 6)])
+        hub.notificar()
+
+        assert len(aguardar(rapido, acordado, 5)) == 5
+        assert lento.removido
+        assert hub.stats()['removidos'] == 1
+        assert ('counter', 'sse_evictions_total', (), 1) in hub.coletor()()
+
+    def test_posicao_abaixo_do_piso_recebe_reset(self, hub):
+        """Quem perdeu exclusões já compactadas precisa recarregar a lista"""
+        primeiro, _, _ = alterar((1, 'insert'), (2, 'delete'), (3, 'insert'))
+        conn = Usuario.get_db_connection()
+        compactar(conn.cursor(), 10 ** 6)
+        conn.commit()
+        conn.close()
+
+        assinante, acordado = novo_assinante(desde=primeiro)
+        hub.assinar(assinante)
+
+        assert [evento for evento, _, _ in aguardar(assinante, acordado, 1)] == ['reset']
+
+    def test_limite_de_assinantes(self, app):
+        hub = HubTarefas(max_assinantes=1)
+        assinante, _ = novo_assinante()
+
+        assert hub.assinar(assinante) is True
+        assert hub.assinar(novo_assinante()[0]) is False
+        hub.cancelar(assinante)
+
+    def test_posicao(self):
+        """Last-Event-ID tem precedência sobre ?since="""
+        assert ler_posicao('7', '3') == 7
+        assert ler_posicao(None, '3') == 3
+        assert ler_posicao('abc', None) is None
+
+
+class TestRotaStream:
+    """GET /tarefas/stream nos servidores WSGI e ASGI"""
+
+    def test_stream_wsgi(self, app, token, monkeypatch):
+        """Eventos desde ?since= e encerramento após a duração máxima"""
+        monkeypatch.setattr(Config, 'SSE_MAX_SECONDS', 0.5)
+        alterar((1, 'insert'), (2, 'insert'))
+
+        resposta = app.test_client().get('/tarefas/stream?since=1', headers={'Authorization': f'Bearer {token}'},
+                                         environ_overrides={'wsgi.multithread': True})
+
+        assert resposta.status_code == 200
+        assert resposta.mimetype == 'text/event-stream'
+        assert [(evento, dados['tarefa_id']) for evento, _, dados in eventos([resposta.data])] == [('insert', 2)]
+        assert hub_tarefas.stats()['assinantes'] == 0
+
+    def test_worker_sincrono_recusa_stream(self, app, token):
+        """Sem threads o stream prenderia o worker: 503 e o cliente consulta /tarefas/changes"""
+        resposta = app.test_client().get('/tarefas/stream', headers={'Authorization': f'Bearer {token}'},
+                                         environ_overrides={'wsgi.multithread': False})
+
+        assert resposta.status_code == 503
+        assert resposta.get_json()['polling'] is True
+        assert hub_tarefas.stats()['assinantes'] == 0
+
+    def test_limite_de_conexoes_por_worker_wsgi(self, app, token, monkeypatch):
+        """Acima de SSE_WSGI_MAX_CLIENTS o worker gthread também encaminha ao polling"""
+        monkeypatch.setattr(Config, 'SSE_WSGI_MAX_CLIENTS', 0)
+
+        resposta = app.test_client().get('/tarefas/stream', headers={'Authorization': f'Bearer {token}'},
+                                         environ_overrides={'wsgi.multithread': True})
+
+        assert resposta.status_code == 503
+        assert resposta.get_json()['polling'] is True
+
+    def test_duracao_wsgi_abaixo_do_timeout_do_worker(self, monkeypatch):
+        monkeypatch.setattr(Config, 'WORKER_TIMEOUT', 30)
+        monkeypatch.setattr(Config, 'SSE_MAX_SECONDS', 300)
+
+        assert duracao_wsgi(Config) == 15
+
+    def test_stream_requer_autenticacao(self, app):
+        assert app.test_client().get('/tarefas/stream').status_code == 401
+
+    def test_stream_asgi_libera_assinante_ao_desconectar(self, app, token):
+        """A corrotina recebe o evento e sai do hub quando o cliente desconecta"""
+        app_asgi = criar_app_asgi(app)
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/tarefas/stream', 'query_string': b'',
+            'headers': [(b'authorization', f'Bearer {token}'.encode())],
+        }
+        enviados = []
+
+        async def executar():
+            saida = asyncio.Event()
+
+            async def receive():
+                await saida.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(mensagem):
+                enviados.append(mensagem)
+                if b'event: insert' in mensagem.get('body', b''):
+                    saida.set()
+
+            async def escrever():
+                while not hub_tarefas._assinantes or not all(a.sincronizado for a in hub_tarefas._assinantes):
+                    await asyncio.sleep(0.01)
+                alterar((1, 'insert'))
+                hub_tarefas.notificar()
+
+            await asyncio.wait_for(asyncio.gather(app_asgi(scope, receive, send), escrever()), 5)
+
+        asyncio.run(executar())
+        app_asgi.executor_wsgi.encerrar()
+        app_asgi.executor_banco.encerrar()
+
+        assert enviados[0]['status'] == 200
+        assert any(b'event: insert' in mensagem.get('body', b'') for mensagem in enviados)
+        assert hub_tarefas.stats()['assinantes'] == 0
@@ -0,0 +1,110 @@
+"""
+Testes do gerador de dados sintéticos
+"""
+import pytest
+import sqlite3
+from datetime import datetime
+from src.models.usuario import Usuario, init_auth_database
+from src.utils.servidor import ativar_wal
+from src.utils.synthetic_data import Escala, gerar_banco
+
+REFERENCIA = datetime(2025, 6, 1)
+
+
+def conteudo(db_path):
+    """
+    Todas as linhas geradas, para comparar dois bancos
+
+    Os ids mudam a cada geração (AUTOINCREMENT), então os donos são
+    comparados pela posição do usuário na ordem de inserção.
+    """
+    conn = sqlite3.connect(db_path)
+    usuarios = conn.execute('SELECT id, nome, email, nivel_acesso, ativo, data_criacao FROM usuarios ORDER BY id').fetchall()
+    posicao = {linha[0]: indice for indice, linha in enumerate(usuarios)}
+    tarefas = conn.execute(
+        'SELECT titulo, descricao, status, data_criacao, data_atualizacao, usuario_id FROM tarefas ORDER BY id'
+    ).fetchall()
+    sessoes = conn.execute('SELECT usuario_id, token, expires_at, ativo, data_criacao FROM sessoes ORDER BY id').fetchall()
+    conn.close()
+    return (
+        [linha[1:] for linha in usuarios],
+        [linha[:5] + (posicao.get(linha[5]),) for linha in tarefas],
+        [(posicao[linha[0]],) + linha[1:] for linha in sessoes]
+    )
+
+
+class TestGeradorDados:
+    """Quantidades, reprodutibilidade e distribuições"""
+
+    def test_quantidades_e_reprodutibilidade(self, db_path):
+        """Mesma semente e referência geram os mesmos dados, com qualquer tamanho de lote"""
+        escala = Escala(usuarios=50, tarefas=12000, sessoes=300)
+        inseridos = gerar_banco(escala, semente=7, referencia=REFERENCIA, processos=1)
+        assert inseridos == {'usuarios': 50, 'tarefas': 12000, 'sessoes': 300}
+        primeiro = conteudo(db_path)
+
+        gerar_banco(escala, semente=7, referencia=REFERENCIA, limpar=True, tamanho_lote=3000, processos=1)
+        segundo = conteudo(db_path)
+        assert segundo == primeiro
+
+    def test_recusa_gerar_duas_vezes(self, db_path):
+        """Sem limpar, uma segunda geração é recusada (emails repetidos)"""
+        gerar_banco(Escala(usuarios=5, tarefas=10, sessoes=5), referencia=REFERENCIA, processos=1)
+        with pytest.raises(ValueError):
+            gerar_banco(Escala(usuarios=5, tarefas=10, sessoes=5), referencia=REFERENCIA, processos=1)
+
+    def test_limpar_preserva_dados_reais(self, db_path):
+        """limpar=True apaga só a geração anterior: usuários, tarefas e sessões reais ficam"""
+        escala = Escala(usuarios=5, tarefas=20, sessoes=5)
+        gerar_banco(escala, referencia=REFERENCIA, processos=1)
+        real = Usuario.criar(nome='Real', email='real@empresa.com', senha='senha123')
+        conn = sqlite3.connect(db_path)
+        conn.executemany(
+            "INSERT INTO tarefas (titulo, data_criacao, data_atualizacao, usuario_id) VALUES (?, 'x', 'x', ?)",
+            [('Tarefa real', real.id), ('Tarefa real sem dono', None)]
+        )
+        conn.execute("INSERT INTO sessoes (usuario_id, token, expires_at, data_criacao) VALUES (?, 'real', 'x', 'x')", (real.id,))
+        conn.commit()
+        conn.close()
+
+        inseridos = gerar_banco(escala, referencia=REFERENCIA, limpar=True, processos=1)
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute('SELECT COUNT(*) FROM usuarios').fetchone() == (inseridos['usuarios'] + 1,)
+        assert conn.execute('SELECT COUNT(*) FROM tarefas').fetchone() == (inseridos['tarefas'] + 2,)
+        assert conn.execute("SELECT COUNT(*) FROM sessoes WHERE token = 'real'").fetchone() == (1,)
+        assert conn.execute("SELECT COUNT(*) FROM tarefas WHERE titulo LIKE 'Tarefa real%'").fetchone() == (2,)
+        conn.close()
+
+    @pytest.mark.parametrize('com_dados_reais', [False, True])
+    def test_preserva_journal_mode(self, db_path, com_dados_reais):
+        """A carga não tira o banco do modo WAL, esteja ele vazio ou não"""
+        ativar_wal(db_path)
+        if com_dados_reais:
+            init_auth_database()
+            Usuario.criar(nome='Real', email='real@empresa.com', senha='senha123')
+
+        gerar_banco(Escala(usuarios=5, tarefas=20, sessoes=5), referencia=REFERENCIA, processos=1)
+
+        conn = sqlite3.connect(db_path)
+        assert conn.execute('PRAGMA journal_mode').fetchone() == ('wal',)
+        conn.close()
+
+    def test_distribuicoes(self, db_path):
+        """Administrador garantido, datas no passado e donos concentrados"""
+        gerar_banco(Escala(usuarios=200, tarefas=20000, sessoes=500), referencia=REFERENCIA, processos=1)
+        conn = sqlite3.connect(db_path)
+
+        assert conn.execute('SELECT nivel_acesso, ativo FROM usuarios ORDER BY id LIMIT 1').fetchone() == ('administrativo', 1)
+        assert conn.execute(
+            'SELECT COUNT(*) FROM tarefas WHERE data_criacao >= ? OR data_atualizacao > ?',
+            (REFERENCIA.isoformat(), REFERENCIA.isoformat())
+        ).fetchone() == (0,)
+        assert conn.execute("SELECT COUNT(DISTINCT status) FROM tarefas").fetchone() == (2,)
+
+        # Os 10% de usuários mais ativos concentram a maior parte das tarefas
+        contagens = [c for (c,) in conn.execute(
+            'SELECT COUNT(*) c FROM tarefas WHERE usuario_id IS NOT NULL GROUP BY usuario_id ORDER BY c DESC'
+        )]
+        assert sum(contagens[:20]) > 0.5 * sum(contagens)
+        conn.close()
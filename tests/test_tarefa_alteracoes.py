@@ -0,0 +1,125 @@
+"""
+Testes do log de alterações das tarefas (GET /tarefas/changes)
+"""
+import pytest
+import sqlite3
+from src.models.esquema import garantir_esquema
+from src.models.usuario import Usuario
+from src.models.tarefa_alteracoes import compactar, registrar_alteracao
+
+
+def criar(cliente, headers, titulo):
+    return cliente.post('/tarefas/', json={'titulo': titulo}, headers=headers).get_json()['id']
+
+
+class TestFeedAlteracoes:
+    """Deltas a partir de um seq"""
+
+    def test_escritas_geram_alteracoes(self, app_client, admin_headers):
+        """Criação, atualização e exclusão aparecem em ordem, com o estado atual"""
+        inicio = app_client.get('/tarefas/', headers=admin_headers).get_json()['seq']
+        primeira = criar(app_client, admin_headers, 'Primeira')
+        segunda = criar(app_client, admin_headers, 'Segunda')
+        app_client.put(f'/tarefas/{primeira}', json={'status': 'concluida'}, headers=admin_headers)
+        app_client.delete(f'/tarefas/{segunda}', headers=admin_headers)
+
+        dados = app_client.get(f'/tarefas/changes?since={inicio}', headers=admin_headers).get_json()
+
+        # Só a alteração mais recente de cada tarefa permanece
+        assert [(a['tarefa_id'], a['operacao']) for a in dados['alteracoes']] == [(primeira, 'update'), (segunda, 'delete')]
+        assert dados['alteracoes'][0]['tarefa']['status'] == 'concluida'
+        assert dados['alteracoes'][1]['tarefa'] is None
+        assert dados['reset'] is False
+
+        vazio = app_client.get(f"/tarefas/changes?since={dados['seq']}", headers=admin_headers).get_json()
+        assert vazio['alteracoes'] == [] and vazio['seq'] == dados['seq']
+
+    def test_paginacao(self, app_client, admin_headers):
+        """Páginas limitadas, seguidas pelo seq retornado"""
+        ids = [criar(app_client, admin_headers, f'Tarefa {numero}') for numero in range(5)]
+
+        recebidos = []
+        seq = 0
+        while True:
+            dados = app_client.get(f'/tarefas/changes?since={seq}&limite=2', headers=admin_headers).get_json()
+            assert len(dados['alteracoes']) <= 2
+            recebidos += [a['tarefa_id'] for a in dados['alteracoes']]
+            seq = dados['seq']
+            if not dados['mais']:
+                break
+
+        assert recebidos == ids
+
+    def test_lista_informa_seq(self, app_client, admin_headers):
+        """O seq de GET /tarefas/ é o ponto de partida dos deltas"""
+        criar(app_client, admin_headers, 'Antes')
+        seq = app_client.get('/tarefas/', headers=admin_headers).get_json()['seq']
+        depois = criar(app_client, admin_headers, 'Depois')
+
+        dados = app_client.get(f'/tarefas/changes?since={seq}', headers=admin_headers).get_json()
+
+        assert [a['tarefa_id'] for a in dados['alteracoes']] == [depois]
+
+    def test_tarefa_inexistente_retorna_404(self, app_client, admin_headers):
+        """Erros HTTP dos handlers não viram 500 nem geram alteração"""
+        assert app_client.put('/tarefas/999', json={'titulo': 'x'}, headers=admin_headers).status_code == 404
+        assert app_client.delete('/tarefas/999', headers=admin_headers).status_code == 404
+        assert app_client.get('/tarefas/changes', headers=admin_headers).get_json()['alteracoes'] == []
+
+    def test_requer_autenticacao(self, app_client):
+        assert app_client.get('/tarefas/changes').status_code == 401
+
+
+class TestCompactacao:
+    """Exclusões antigas descartadas e clientes atrasados reiniciados"""
+
+    def test_cliente_abaixo_do_piso_recebe_reset(self, app_client, admin_headers):
+        """Exclusões fora da retenção somem do log; since anterior a elas pede reset"""
+        excluida = criar(app_client, admin_headers, 'Excluída')
+        app_client.delete(f'/tarefas/{excluida}', headers=admin_headers)
+        mantida = criar(app_client, admin_headers, 'Mantida')
+
+        conn = Usuario.get_db_connection()
+        assert compactar(conn.cursor(), 10 ** 6) == 1
+        conn.commit()
+        conn.close()
+
+        assert app_client.get('/tarefas/changes?since=1', headers=admin_headers).get_json()['reset'] is True
+        completo = app_client.get('/tarefas/changes?since=0', headers=admin_headers).get_json()
+        assert [a['tarefa_id'] for a in completo['alteracoes']] == [mantida]
+
+    def test_compactacao_automatica(self, app_client):
+        """Cada escrita descarta as exclusões mais antigas que a retenção"""
+        conn = Usuario.get_db_connection()
+        cursor = conn.cursor()
+        for tarefa_id in range(1, 6):
+            registrar_alteracao(cursor, tarefa_id, 'delete', '2024-01-01', retencao=2)
+        conn.commit()
+
+        restantes = [seq for (seq,) in cursor.execute('SELECT seq FROM tarefas_alteracoes ORDER BY seq')]
+        conn.close()
+        assert restantes == [4, 5]
+
+
+class TestMigracao:
+    """Bancos anteriores ao log"""
+
+    def test_tarefas_existentes_entram_no_log(self, tmp_path):
+        """Na atualização do esquema, cada tarefa existente ganha uma alteração 'insert'"""
+        db_path = str(tmp_path / 'antigo.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('''CREATE TABLE tarefas (id INTEGER PRIMARY KEY AUTOINCREMENT, titulo TEXT NOT NULL,
+                        descricao TEXT, status TEXT DEFAULT 'pendente', data_criacao TEXT NOT NULL,
+                        data_atualizacao TEXT NOT NULL, usuario_id INTEGER)''')
+        conn.executemany("INSERT INTO tarefas (titulo, data_criacao, data_atualizacao) VALUES (?, 'x', 'x')",
+                         [('A',), ('B',)])
+        conn.execute('PRAGMA user_version = 1')
+        conn.commit()
+        conn.close()
+
+        assert garantir_esquema(db_path) is True
+
+        conn = sqlite3.connect(db_path)
+        log = conn.execute('SELECT tarefa_id, operacao FROM tarefas_alteracoes ORDER BY seq').fetchall()
+        conn.close()
+        assert log == [(1, 'insert'), (2, 'insert')]
@@ -0,0 +1,74 @@
+"""
+Testes do índice em memória de sugestão de usuários
+"""
+import pytest
+from src.models.usuario import Usuario
+from src.models.usuario_lote import desativar_em_lote, registrar_ouvinte, remover_ouvinte
+from src.utils.user_index import IndiceUsuarios, normalizar, chaves_usuario
+
+
+@pytest.fixture
+def indice(temp_db):
+    """Índice sobre um banco temporário, registrado como ouvinte"""
+    indice = IndiceUsuarios(intervalo_verificacao=60)
+    indice.construir()
+    registrar_ouvinte(indice.ao_alterar_usuarios)
+
+    yield indice
+
+    remover_ouvinte(indice.ao_alterar_usuarios)
+
+
+class TestNormalizacao:
+    """Chaves sem acento e sem diferença de maiúsculas"""
+
+    def test_normalizar(self):
+        assert normalizar('Érica Conceição') == 'erica conceicao'
+
+    def test_chaves_usuario(self):
+        assert chaves_usuario('Ana  Maria', 'Ana@Teste.com') == {'ana maria', 'ana', 'maria', 'ana@teste.com'}
+
+
+class TestIndiceUsuarios:
+    """Busca por prefixo e atualização incremental"""
+
+    def test_busca_por_palavra_e_email(self, indice):
+        """Encontra por qualquer palavra do nome e pelo email, sem duplicar"""
+        Usuario.criar(nome="Érica Souza", email="erica@teste.com", senha="senha123")
+        Usuario.criar(nome="Marcos Silva", email="marcos@teste.com", senha="senha123")
+
+        assert [u.nome for u in indice.buscar('eri')] == ["Érica Souza"]
+        assert [u.nome for u in indice.buscar('SIL')] == ["Marcos Silva"]
+        assert [u.nome for u in indice.buscar('marcos@')] == ["Marcos Silva"]
+        assert indice.buscar('') == []
+
+    def test_atualizacao_incremental(self, indice):
+        """Criações e desativações locais são aplicadas sem reconstruir"""
+        usuario = Usuario.criar(nome="Paula Lima", email="paula@teste.com", senha="senha123")
+        desativar_em_lote(ids=[usuario.id])
+
+        assert indice.construcoes == 1
+        assert indice.atualizacoes == 2
+        assert indice.buscar('paula')[0].ativo is False
+        assert indice.buscar('paula', filtro=lambda u: u.ativo) == []
+
+    def test_versao_fora_de_ordem_reconstroi(self, indice):
+        """Uma alteração de outro worker (versão pulada) força a reconstrução"""
+        remover_ouvinte(indice.ao_alterar_usuarios)
+        Usuario.criar(nome="Outro Worker", email="outro@teste.com", senha="senha123")
+        registrar_ouvinte(indice.ao_alterar_usuarios)
+        Usuario.criar(nome="Local", email="local@teste.com", senha="senha123")
+
+        assert indice.buscar('outro') == []
+        indice.verificar_versao()
+
+        assert indice.construcoes == 2
+        assert [u.nome for u in indice.buscar('outro')] == ["Outro Worker"]
+        assert [u.nome for u in indice.buscar('local')] == ["Local"]
+
+    def test_limite(self, indice):
+        """Retorna no máximo o limite pedido"""
+        for i in range(5):
+            Usuario.criar(nome=f"Ana {i}", email=f"ana{i}@teste.com", senha="senha123")
+
+        assert len(indice.buscar('ana', limite=3)) == 3
@@ -3,27 +3,9 @@ Testes unitários para o modelo de usuário
 """
 import pytest
 import os
-import tempfile
 import sqlite3
-from src.models.usuario import Usuario, init_auth_database
-
-
-@pytest.fixture
-def temp_db():
-    """Cria um banco de dados temporário para testes"""
-    db_fd, db_path = tempfile.mkstemp(suffix='.db')
-    os.environ['DATABASE_PATH'] = db_path
-    
-    # Inicializar banco
-    init_auth_database()
-    
-    yield db_path
-    
-    # Limpar
-    os.close(db_fd)
-    os.unlink(db_path)
-    if 'DATABASE_PATH' in os.environ:
-        del os.environ['DATABASE_PATH']
+from datetime import datetime, timezone
+from src.models.usuario import Usuario
 
 
 class TestUsuario:
@@ -117,3 +99,56 @@ class TestUsuario:
         assert usuario_verificado.id == usuario.id
         assert usuario_verificado.email == usuario.email
 
+    def test_tokens_no_mesmo_segundo(self, temp_db, monkeypatch):
+        """Dois logins no mesmo instante devem gerar tokens distintos e ambos válidos"""
+        instante = datetime.now(timezone.utc).replace(microsecond=0)
+
+        class RelogioParado(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return instante
+
+        monkeypatch.setattr('src.models.usuario.datetime', RelogioParado)
+        usuario = Usuario.criar(nome="Dois Logins", email="dois@teste.com", senha="senha123")
+
+        primeiro = usuario.gerar_jwt_token()
+        segundo = usuario.gerar_jwt_token()
+
+        assert primeiro != segundo
+        assert Usuario.verificar_jwt_token(primeiro).id == usuario.id
+        assert Usuario.verificar_jwt_token(segundo).id == usuario.id
+
+    def test_qr_code_2fa_em_cache(self, temp_db):
+        """Deve gerar o QR Code em memória uma única vez por secret"""
+        from src.utils.qr_cache import qr_code_cache
+        qr_code_cache.limpar()
+        
+        usuario = Usuario.criar(
+            nome="QR",
+            email="qr@teste.com",
+            senha="senha123"
+        )
+        
+        primeiro = usuario.gerar_qr_code_2fa()
+        segundo = usuario.gerar_qr_code_2fa()
+        
+        assert primeiro.startswith('data:image/png;base64,')
+        assert primeiro == segundo
+        assert qr_code_cache.stats()['misses'] == 1
+        assert qr_code_cache.stats()['hits'] == 1
+        assert not os.path.exists(f"static/qr_codes/qr_{usuario.id}.png")
+
+    def test_etag_do_qr_code_nao_deriva_do_secret(self, temp_db):
+        """O ETag é aleatório, estável enquanto a imagem está em cache e muda com o secret"""
+        import hashlib
+        from src.utils.qr_cache import QRCodeCache
+        cache = QRCodeCache()
+
+        _, etag = cache.obter_png(1, 'SECRETANTIGO', 'otpauth://totp/a?secret=SECRETANTIGO')
+        assert etag != hashlib.sha256(b'1:SECRETANTIGO').hexdigest()[:32]
+        assert cache.obter_png(1, 'SECRETANTIGO', 'otpauth://totp/a?secret=SECRETANTIGO')[1] == etag
+        assert QRCodeCache().obter_png(1, 'SECRETANTIGO', 'otpauth://totp/a?secret=SECRETANTIGO')[1] != etag
+
+        _, novo = cache.obter_png(1, 'SECRETNOVO', 'otpauth://totp/a?secret=SECRETNOVO')
+        assert novo != etag
+        assert len(cache) == 1
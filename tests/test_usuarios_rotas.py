@@ -0,0 +1,167 @@
+"""
+Testes das rotas de gerenciamento de usuários
+"""
+import pytest
+from src.models.usuario import Usuario
+from src.utils.user_index import indice_usuarios
+from tests.conftest import autorizacao, criar_headers, criar_usuario
+
+
+@pytest.fixture
+def usuarios(app_client):
+    """Insere usuários com datas de criação distintas"""
+    conn = Usuario.get_db_connection()
+    conn.executemany(
+        'INSERT INTO usuarios (nome, email, senha_hash, nivel_acesso, ativo, data_criacao) VALUES (?, ?, ?, ?, ?, ?)',
+        [
+            (f'Pessoa {i:02d}', f'pessoa{i:02d}@teste.com', 'hash',
+             'gerencial' if i % 3 == 0 else 'visualizacao', 0 if i % 4 == 0 else 1,
+             f'2024-01-01T00:00:{i:02d}')
+            for i in range(1, 21)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+    # Inserção direta no banco: reconstruir o índice de sugestões
+    indice_usuarios.construir()
+
+
+class TestListagemUsuarios:
+    """GET /usuarios/ com paginação por cursor, filtros e busca"""
+
+    def test_paginacao_por_cursor(self, app_client, admin_headers, usuarios):
+        """As páginas seguidas pelo cursor cobrem todos os usuários sem repetição"""
+        ids = []
+        cursor = None
+        while True:
+            url = '/usuarios/?limite=7' + (f'&cursor={cursor}' if cursor else '')
+            dados = app_client.get(url, headers=admin_headers).get_json()
+            assert len(dados['usuarios']) <= 7
+            ids.extend(usuario['id'] for usuario in dados['usuarios'])
+            cursor = dados['proximo_cursor']
+            if not cursor:
+                break
+
+        assert len(ids) == 21
+        assert len(set(ids)) == 21
+
+    def test_filtros_nivel_e_ativo(self, app_client, admin_headers, usuarios):
+        """Filtros por nível e status são aplicados juntos"""
+        dados = app_client.get('/usuarios/?nivel_acesso=gerencial&ativo=false', headers=admin_headers).get_json()
+
+        # i múltiplo de 3 (gerencial) e de 4 (inativo): 12
+        assert [usuario['nome'] for usuario in dados['usuarios']] == ['Pessoa 12']
+        assert dados['proximo_cursor'] is None
+
+    def test_busca_por_prefixo(self, app_client, admin_headers, usuarios):
+        """Busca por prefixo de nome ou email, sem diferenciar maiúsculas"""
+        por_nome = app_client.get('/usuarios/?q=pessoa 1', headers=admin_headers).get_json()
+        por_email = app_client.get('/usuarios/?q=PESSOA2', headers=admin_headers).get_json()
+        curinga = app_client.get('/usuarios/?q=%25', headers=admin_headers).get_json()
+
+        assert por_nome['total'] == 10
+        assert [usuario['email'] for usuario in por_email['usuarios']] == ['pessoa20@teste.com']
+        assert curinga['total'] == 0
+
+    def test_sem_senha_hash(self, app_client, admin_headers, usuarios):
+        """A listagem nunca retorna senha_hash nem secret_2fa"""
+        dados = app_client.get('/usuarios/', headers=admin_headers).get_json()
+
+        assert all(set(usuario) == {'id', 'nome', 'email', 'nivel_acesso', 'ativo', 'data_criacao'}
+                   for usuario in dados['usuarios'])
+
+    def test_parametros_invalidos(self, app_client, admin_headers):
+        """Cursor, status ou nível inválidos respondem 400"""
+        assert app_client.get('/usuarios/?cursor=invalido', headers=admin_headers).status_code == 400
+        assert app_client.get('/usuarios/?ativo=talvez', headers=admin_headers).status_code == 400
+        assert app_client.get('/usuarios/?nivel_acesso=root', headers=admin_headers).status_code == 400
+
+
+class TestOperacoesEmLote:
+    """PUT /usuarios/nivel e POST /usuarios/deactivate"""
+
+    def test_alterar_nivel_por_ids(self, app_client, admin_headers, usuarios):
+        """Altera apenas os IDs informados, ignorando os que já têm o nível"""
+        resposta = app_client.put('/usuarios/nivel', headers=admin_headers,
+                                  json={'nivel_acesso': 'gerencial', 'ids': [2, 3, 4, 999]})
+        dados = resposta.get_json()
+
+        assert resposta.status_code == 200
+        # ID 4 é 'Pessoa 03', que já é gerencial
+        assert dados['ids'] == [2, 3]
+
+    def test_alterar_nivel_por_filtro_preserva_admin(self, app_client, admin_headers, usuarios):
+        """O filtro seleciona por conjunto e nunca altera o próprio administrador"""
+        dados = app_client.put('/usuarios/nivel', headers=admin_headers,
+                               json={'nivel_acesso': 'visualizacao', 'filtro': {'q': 'admin'}}).get_json()
+        assert dados['alterados'] == 0
+
+        dados = app_client.put('/usuarios/nivel', headers=admin_headers,
+                               json={'nivel_acesso': 'visualizacao', 'filtro': {'nivel_acesso': 'gerencial'}}).get_json()
+        assert dados['alterados'] == 6
+
+    def test_desativar_revoga_sessoes(self, app_client, admin_headers):
+        """Usuários desativados perdem as sessões ativas na mesma transação"""
+        usuario = Usuario.criar(nome="Sessao", email="sessao@teste.com", senha="senha123")
+        token = usuario.gerar_jwt_token()
+        assert app_client.get('/auth/me', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+
+        dados = app_client.post('/usuarios/deactivate', headers=admin_headers, json={'ids': [usuario.id]}).get_json()
+
+        assert dados['ids'] == [usuario.id]
+        assert dados['sessoes_revogadas'] == 1
+        assert app_client.get('/auth/me', headers={'Authorization': f'Bearer {token}'}).status_code == 401
+
+    def test_selecao_obrigatoria(self, app_client, admin_headers):
+        """Sem ids nem critérios de filtro a operação é recusada"""
+        assert app_client.post('/usuarios/deactivate', headers=admin_headers, json={}).status_code == 400
+        assert app_client.post('/usuarios/deactivate', headers=admin_headers,
+                               json={'filtro': {'cidade': 'x'}}).status_code == 400
+        assert app_client.put('/usuarios/nivel', headers=admin_headers,
+                              json={'nivel_acesso': 'root', 'ids': [1]}).status_code == 400
+
+
+class TestSugestaoUsuarios:
+    """GET /usuarios/suggest"""
+
+    def test_sugestoes_para_administrador(self, app_client, admin_headers, usuarios):
+        """Sugestões vêm do índice, sem inativos"""
+        dados = app_client.get('/usuarios/suggest?q=pessoa 0&limite=20', headers=admin_headers).get_json()
+
+        # Pessoa 01..09, exceto 04 e 08 (inativos)
+        assert sorted(s['nome'] for s in dados['sugestoes']) == [
+            'Pessoa 01', 'Pessoa 02', 'Pessoa 03', 'Pessoa 05', 'Pessoa 06', 'Pessoa 07', 'Pessoa 09'
+        ]
+
+    def test_sem_permissao_apenas_o_proprio(self, app_client, admin_headers, usuarios):
+        """Quem não pode listar usuários só encontra a si mesmo"""
+        usuario = criar_usuario('Pessoa Comum', email='comum@teste.com')
+        headers = autorizacao(usuario.gerar_jwt_token())
+
+        dados = app_client.get('/usuarios/suggest?q=pessoa', headers=headers).get_json()
+        assert [s['id'] for s in dados['sugestoes']] == [usuario.id]
+        assert app_client.get('/usuarios/suggest?q=admin', headers=headers).get_json()['total'] == 0
+
+
+class TestNiveisPadrao:
+    """Níveis usados como referência por require_admin e require_manager_or_admin"""
+
+    def test_niveis_padrao_nao_podem_ser_removidos(self, app_client, admin_headers):
+        for nome in ('visualizacao', 'gerencial', 'administrativo'):
+            assert app_client.delete(f'/usuarios/niveis/{nome}', headers=admin_headers).status_code == 400
+
+        # A hierarquia continua valendo para o administrador
+        assert app_client.get('/usuarios/', headers=admin_headers).status_code == 200
+        assert app_client.get('/usuarios/niveis', headers=admin_headers).status_code == 200
+
+    def test_posicao_dos_niveis_padrao_e_fixa(self, app_client, admin_headers):
+        """Elevar 'gerencial' à posição 3 daria acesso administrativo a todo gerente"""
+        gerente_headers = criar_headers('Gerente', 'gerencial')
+
+        resposta = app_client.put('/usuarios/niveis/gerencial', headers=admin_headers, json={
+            'titulo': 'Gerencial', 'nivel': 3, 'permissoes': ['tarefas:read', 'tarefas:list']
+        })
+
+        assert resposta.status_code == 400
+        assert app_client.delete('/usuarios/niveis/auditor', headers=gerente_headers).status_code == 403
@@ -0,0 +1,10 @@
+"""
+Ponto de entrada WSGI para servidores de produção
+
+Uso:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from src.api.app import create_app
+
+app, api = create_app()